@@ -9,6 +9,7 @@ from langchain_core.tools import tool
 from typing import List, Dict, Optional
 from supabase import Client
 from config import settings as config_settings
+from utils.agent_cache import agent_graph_cache, bind_request_client, model_cache_key, request_client
 
 
 # Define tools for general conversations (model building help)
@@ -223,15 +224,6 @@ def create_general_conversation_agent(
         tuple: (agent, system_prompt)
     """
     
-    # Tools for general conversations
-    tools = [
-        explain_platform_feature,
-        suggest_model_configuration,
-        create_model_tool(user_id, supabase)
-    ]
-    
-    print(f"[LangGraph] Creating general conversation agent with {len(tools)} tools")
-    
     # Get global settings
     global_settings = supabase.table("global_chat_settings").select("*").eq("id", 1).execute()
     
@@ -268,8 +260,6 @@ def create_general_conversation_agent(
         if "max_tokens" in model_params:
             params["max_tokens"] = model_params["max_tokens"]
     
-    chat_model = ChatOpenAI(**params)
-    
     # Build system prompt for general conversations
     system_prompt = f"""You are a helpful assistant for True Trading Group's AI Trading Platform.
 
@@ -371,13 +361,31 @@ DO NOT just explain - TAKE ACTION! You have tools - USE THEM!
 
 Be action-oriented, platform-specific, and actually CREATE models when users are ready!"""
     
-    # Create LangGraph agent
-    agent = create_react_agent(
-        chat_model,
-        tools
+    def build_agent():
+        # Tools for general conversations
+        tools = [
+            explain_platform_feature,
+            suggest_model_configuration,
+            create_model_tool(user_id, request_client)  # Cached graph - client is per request
+        ]
+        
+        print(f"[LangGraph] Creating general conversation agent with {len(tools)} tools")
+        
+        # Create LangGraph agent
+        return create_react_agent(
+            ChatOpenAI(**params),
+            tools
+        )
+    
+    # Reuse the compiled graph for this (user, chat settings); its tools use
+    # this request's client
+    bind_request_client(supabase)
+    agent = agent_graph_cache.get_or_build(
+        ("general_chat", user_id, model_cache_key(params)),
+        build_agent
     )
     
-    print(f"[LangGraph] ✅ General conversation agent created")
+    print(f"[LangGraph] ✅ General conversation agent ready (graph cache: {agent_graph_cache.stats()})")
     
     return agent, system_prompt
 
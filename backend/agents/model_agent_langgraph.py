@@ -9,6 +9,8 @@ from langchain_openai import ChatOpenAI
 from typing import List, Dict, Optional
 from supabase import Client
 from config import settings as config_settings
+from utils.agent_cache import agent_graph_cache, bind_request_client, model_cache_key, request_client
+from services.context_bundle import bundle_prompt, get_context_bundle
 
 
 def create_model_conversation_agent(
@@ -28,36 +30,18 @@ def create_model_conversation_agent(
         tuple: (agent, system_prompt) - LangGraph agent instance and prompt used
     """
     
+    # Model, chat settings and recent runs in one round trip (cached per model)
+    bundle = get_context_bundle(model_id, None, supabase)
+    
     # Verify ownership
-    model_check = supabase.table("models").select("user_id").eq("id", model_id).execute()
-    if not model_check.data or model_check.data[0]["user_id"] != user_id:
+    model = bundle.get("model")
+    if not model or model["user_id"] != user_id:
         raise PermissionError(f"User {user_id} does not own model {model_id}")
     
-    # Import existing tools (NO CHANGES to tool files!)
-    from agents.tools.analyze_trades import create_analyze_trades_tool
-    from agents.tools.get_ai_reasoning import create_get_ai_reasoning_tool
-    from agents.tools.calculate_metrics import create_calculate_metrics_tool
-    from agents.tools.suggest_rules import create_suggest_rules_tool
-    from agents.tools.get_model_config import create_get_model_config_tool
-    from agents.tools.update_model_rules import create_update_model_rules_tool
-    
-    # Create tools - run_id=None means access ALL runs
-    tools = [
-        create_analyze_trades_tool(supabase, model_id, None, user_id),
-        create_get_ai_reasoning_tool(supabase, model_id, None, user_id),
-        create_calculate_metrics_tool(supabase, model_id, None, user_id),
-        create_suggest_rules_tool(supabase, model_id, user_id),
-        create_get_model_config_tool(supabase, model_id, user_id),
-        create_update_model_rules_tool(supabase, model_id, user_id)
-    ]
-    
-    print(f"[LangGraph] Loading tools for model {model_id}: {[t.name for t in tools]}")
-    
-    # Get global chat settings
-    global_settings = supabase.table("global_chat_settings").select("*").eq("id", 1).execute()
+    # Global chat settings
+    settings_data = bundle.get("chat_settings")
     
-    if global_settings.data and len(global_settings.data) > 0:
-        settings_data = global_settings.data[0]
+    if settings_data:
         ai_model = settings_data["chat_model"]
         model_params = settings_data.get("model_parameters") or {}
         global_instructions = settings_data.get("chat_instructions") or ""
@@ -91,22 +75,53 @@ def create_model_conversation_agent(
         if "max_tokens" in model_params:
             params["max_tokens"] = model_params["max_tokens"]
     
-    chat_model = ChatOpenAI(**params)
-    
-    # Build system prompt
-    system_prompt = build_model_analysis_prompt(model_id, user_id, supabase, global_instructions)
+    # Build system prompt (reused while the bundle is cached)
+    system_prompt = bundle_prompt(
+        bundle, "model_analysis",
+        lambda: build_model_analysis_prompt(model_id, user_id, supabase, global_instructions, bundle=bundle)
+    )
     
-    # Create LangGraph React agent
-    print(f"[LangGraph] Creating react agent with {len(tools)} tools")
+    def build_agent():
+        # Import existing tools (NO CHANGES to tool files!)
+        from agents.tools.analyze_trades import create_analyze_trades_tool
+        from agents.tools.get_ai_reasoning import create_get_ai_reasoning_tool
+        from agents.tools.calculate_metrics import create_calculate_metrics_tool
+        from agents.tools.suggest_rules import create_suggest_rules_tool
+        from agents.tools.get_model_config import create_get_model_config_tool
+        from agents.tools.update_model_rules import create_update_model_rules_tool
+        
+        # Create tools - run_id=None means access ALL runs
+        # (request_client: the graph is cached, the Supabase client is per request)
+        tools = [
+            create_analyze_trades_tool(request_client, model_id, None, user_id),
+            create_get_ai_reasoning_tool(request_client, model_id, None, user_id),
+            create_calculate_metrics_tool(request_client, model_id, None, user_id),
+            create_suggest_rules_tool(request_client, model_id, user_id),
+            create_get_model_config_tool(request_client, model_id, user_id),
+            create_update_model_rules_tool(request_client, model_id, user_id)
+        ]
+        
+        print(f"[LangGraph] Loading tools for model {model_id}: {[t.name for t in tools]}")
+        
+        # Create LangGraph React agent
+        print(f"[LangGraph] Creating react agent with {len(tools)} tools")
+        
+        # NOTE: create_react_agent doesn't take state_modifier parameter
+        # System prompt will be prepended to messages array in backend/main.py
+        return create_react_agent(
+            ChatOpenAI(**params),
+            tools
+        )
     
-    # NOTE: create_react_agent doesn't take state_modifier parameter
-    # System prompt will be prepended to messages array in backend/main.py
-    agent = create_react_agent(
-        chat_model,
-        tools
+    # Reuse the compiled graph for this (model, user, chat settings); its
+    # tools use this request's client
+    bind_request_client(supabase)
+    agent = agent_graph_cache.get_or_build(
+        ("model_chat", model_id, user_id, model_cache_key(params)),
+        build_agent
     )
     
-    print(f"[LangGraph] ✅ Agent created successfully for model {model_id}")
+    print(f"[LangGraph] ✅ Agent ready for model {model_id} (graph cache: {agent_graph_cache.stats()})")
     
     return agent, system_prompt
 
@@ -115,7 +130,8 @@ def build_model_analysis_prompt(
     model_id: int,
     user_id: str,
     supabase: Client,
-    global_instructions: str = ""
+    global_instructions: str = "",
+    bundle: Optional[Dict] = None
 ) -> str:
     """
     Build comprehensive system prompt for model analysis mode
@@ -125,16 +141,15 @@ def build_model_analysis_prompt(
     - Model configuration
     - Run summary
     - Tool usage instructions
-    """
     
-    # Get model configuration
-    model_result = supabase.table("models").select("*").eq("id", model_id).execute()
+    Model and recent runs come from the context bundle (fetched if not given).
+    """
+    bundle = bundle or get_context_bundle(model_id, None, supabase)
+    model = bundle.get("model")
     
-    if not model_result.data:
+    if not model:
         return "You are a helpful trading assistant."
     
-    model = model_result.data[0]
-    
     # Calculate buying power
     margin = model.get('margin_account', False)
     trading_style = model.get('trading_style', 'day-trading')
@@ -146,17 +161,10 @@ def build_model_analysis_prompt(
     else:
         buying_power = '1x (cash account)'
     
-    # Get run summary
-    runs_result = supabase.table("trading_runs")\
-        .select("id, run_number, status, trading_mode, total_trades, final_return, final_portfolio_value, intraday_symbol, intraday_date")\
-        .eq("model_id", model_id)\
-        .order("run_number", desc=True)\
-        .limit(10)\
-        .execute()
-    
+    # Run summary (10 most recent runs)
     run_summary = ""
-    if runs_result.data:
-        runs = runs_result.data
+    if bundle.get("recent_runs"):
+        runs = bundle["recent_runs"]
         run_summary = f"\n\n<run_summary>\nThis model has completed {len(runs)} run(s):\n\n"
         
         for run in runs:
@@ -14,6 +14,10 @@ from langchain.agents import create_agent
 from typing import List, Dict, Optional
 from supabase import Client
 from config import settings as config_settings
+from utils.agent_cache import (
+    agent_graph_cache, bind_request_client, model_cache_key, request_client, with_system_prompt
+)
+from services.context_bundle import bundle_prompt, get_context_bundle
 
 class SystemAgent:
     """
@@ -27,16 +31,13 @@ class SystemAgent:
         user_id: str,
         supabase: Client
     ):
-        # Get model config
-        model_data = supabase.table("models")\
-            .select("user_id, default_ai_model, model_parameters")\
-            .eq("id", model_id)\
-            .execute()
+        # Model, chat settings, run and run aggregates in one round trip (cached per model/run)
+        self.bundle = get_context_bundle(model_id, run_id, supabase)
         
-        if not model_data.data:
+        if not self.bundle.get("model"):
             raise PermissionError(f"Model {model_id} not found")
         
-        model_config = model_data.data[0]
+        model_config = self.bundle["model"]
         model_owner = model_config["user_id"]
         
         print(f"🔍 Chat auth check: model_owner={model_owner}, requesting_user={user_id}, match={model_owner == user_id}")
@@ -56,14 +57,10 @@ class SystemAgent:
         global_instructions = ""
         
         try:
-            # Fetch global chat settings from database
-            global_settings = supabase.table("global_chat_settings")\
-                .select("*")\
-                .eq("id", 1)\
-                .execute()
+            # Global chat settings (from the context bundle)
+            settings = self.bundle.get("chat_settings")
             
-            if global_settings.data and len(global_settings.data) > 0:
-                settings = global_settings.data[0]
+            if settings:
                 ai_model = settings["chat_model"]
                 global_instructions = settings["chat_instructions"] or ""
                 
@@ -121,48 +118,32 @@ class SystemAgent:
         
         self.model = ChatOpenAI(**params)
         self.global_instructions = global_instructions
-        
-        # Load analysis tools
-        self.tools = self._load_tools()
+        self.system_prompt = bundle_prompt(self.bundle, "system_agent", self._get_system_prompt)
         
         print(f"[SystemAgent] Creating agent with:")
         print(f"  - Model: {self.model.model_name if hasattr(self.model, 'model_name') else type(self.model)}")
-        print(f"  - Tools: {[t.name for t in self.tools]}")
-        print(f"  - System prompt length: {len(self._get_system_prompt())} chars")
-        
-        # Create agent
-        self.agent = create_agent(
-            self.model,
-            tools=self.tools,
-            system_prompt=self._get_system_prompt()
+        print(f"  - System prompt length: {len(self.system_prompt)} chars")
+        
+        # Reuse compiled graph for this (model, run, user, chat settings) - the
+        # system prompt is passed as the first message instead of compiled in,
+        # and tools reach Supabase through the client bound per invocation
+        bind_request_client(supabase)
+        self.agent = agent_graph_cache.get_or_build(
+            ("system_chat", model_id, run_id, user_id, model_cache_key(params)),
+            lambda: create_agent(ChatOpenAI(**params), tools=_load_tools(model_id, run_id, user_id))
         )
         
-        print(f"[SystemAgent] Agent created: {type(self.agent)}")
+        print(f"[SystemAgent] Agent ready: {type(self.agent)} (graph cache: {agent_graph_cache.stats()})")
         print(f"[SystemAgent] Agent has astream: {hasattr(self.agent, 'astream')}")
     
-    def _load_tools(self) -> List:
-        """Load analysis and strategy building tools"""
-        from agents.tools.analyze_trades import create_analyze_trades_tool
-        from agents.tools.suggest_rules import create_suggest_rules_tool
-        from agents.tools.calculate_metrics import create_calculate_metrics_tool
-        from agents.tools.get_ai_reasoning import create_get_ai_reasoning_tool
-        
-        return [
-            create_analyze_trades_tool(self.supabase, self.model_id, self.run_id, self.user_id),
-            create_suggest_rules_tool(self.supabase, self.model_id, self.user_id),
-            create_calculate_metrics_tool(self.supabase, self.model_id, self.run_id, self.user_id),
-            create_get_ai_reasoning_tool(self.supabase, self.model_id, self.run_id, self.user_id)
-        ]
-    
     def _get_system_prompt(self) -> str:
         """System prompt for strategy analyst agent"""
         
         # Fetch model configuration from database
         model_config = ""
         try:
-            model_result = self.supabase.table("models").select("*").eq("id", self.model_id).execute()
-            if model_result.data:
-                model = model_result.data[0]
+            model = self.bundle.get("model")
+            if model:
                 
                 # Calculate buying power
                 margin = model.get('margin_account', False)
@@ -217,41 +198,15 @@ For example: A cash account (1x buying power) limits position sizes compared to
             try:
                 print(f"📊 Loading run context for run_id={self.run_id}...")
                 
-                # Fetch complete run details
-                run_result = self.supabase.table("trading_runs")\
-                    .select("*")\
-                    .eq("id", self.run_id)\
-                    .execute()
+                # Run row and aggregates come with the context bundle
+                run = self.bundle.get("run")
                 
-                if run_result.data:
-                    run = run_result.data[0]
-                    
-                    # Count actual trades
-                    trade_count_result = self.supabase.table("positions")\
-                        .select("id", count="exact")\
-                        .eq("run_id", self.run_id)\
-                        .execute()
-                    trade_count = trade_count_result.count if hasattr(trade_count_result, 'count') else run.get('total_trades', 0)
-                    
-                    # Count reasoning entries
-                    reasoning_count_result = self.supabase.table("ai_reasoning")\
-                        .select("id", count="exact")\
-                        .eq("run_id", self.run_id)\
-                        .execute()
-                    reasoning_count = reasoning_count_result.count if hasattr(reasoning_count_result, 'count') else 0
-                    
-                    # Get first and last trade dates
-                    trade_dates_result = self.supabase.table("positions")\
-                        .select("date")\
-                        .eq("run_id", self.run_id)\
-                        .order("date")\
-                        .execute()
-                    
-                    first_trade_date = "N/A"
-                    last_trade_date = "N/A"
-                    if trade_dates_result.data and len(trade_dates_result.data) > 0:
-                        first_trade_date = trade_dates_result.data[0].get('date', 'N/A')
-                        last_trade_date = trade_dates_result.data[-1].get('date', 'N/A')
+                if run:
+                    summary = self.bundle.get("run_summary") or {}
+                    trade_count = summary.get('trade_count', run.get('total_trades', 0))
+                    reasoning_count = summary.get('reasoning_count', 0)
+                    first_trade_date = summary.get('first_trade_at') or "N/A"
+                    last_trade_date = summary.get('last_trade_at') or "N/A"
                     
                     # Build mode-specific information
                     if run['trading_mode'] == 'intraday':
@@ -750,9 +705,10 @@ If user is confused, explain simply:
         # Add current message
         messages.append({"role": "user", "content": user_message})
         
-        # Invoke agent
+        # Invoke agent (tools use this agent's client)
+        bind_request_client(self.supabase)
         try:
-            response = await self.agent.ainvoke({"messages": messages})
+            response = await self.agent.ainvoke({"messages": with_system_prompt(self.system_prompt, messages)})
             
             # Extract response
             response_messages = response.get("messages", [])
@@ -838,7 +794,8 @@ If user is confused, explain simply:
             print(f"[SystemAgent] Input to agent: {{'messages': {len(messages)} items}}")
             chunk_num = 0
             
-            async for chunk in self.agent.astream({"messages": messages}):
+            bind_request_client(self.supabase)
+            async for chunk in self.agent.astream({"messages": with_system_prompt(self.system_prompt, messages)}):
                 chunk_num += 1
                 print(f"[SystemAgent] Chunk #{chunk_num}: {type(chunk)} = {str(chunk)[:200]}")
                 
@@ -869,6 +826,26 @@ If user is confused, explain simply:
             yield {"type": "error", "error": str(e)}
 
 
+def _load_tools(model_id: int, run_id: Optional[int], user_id: str) -> List:
+    """
+    Load analysis and strategy building tools for a cached graph
+    
+    Tools only capture ids (all part of the graph cache key) and reach the
+    database through request_client, never an agent instance or its client.
+    """
+    from agents.tools.analyze_trades import create_analyze_trades_tool
+    from agents.tools.suggest_rules import create_suggest_rules_tool
+    from agents.tools.calculate_metrics import create_calculate_metrics_tool
+    from agents.tools.get_ai_reasoning import create_get_ai_reasoning_tool
+    
+    return [
+        create_analyze_trades_tool(request_client, model_id, run_id, user_id),
+        create_suggest_rules_tool(request_client, model_id, user_id),
+        create_calculate_metrics_tool(request_client, model_id, run_id, user_id),
+        create_get_ai_reasoning_tool(request_client, model_id, run_id, user_id)
+    ]
+
+
 def create_system_agent(
     model_id: int,
     run_id: Optional[int],
@@ -6,6 +6,7 @@ Queries and analyzes trade history
 from langchain.tools import tool
 from typing import Dict, List, Optional
 from supabase import Client
+from services.archive_service import run_archive
 
 def create_analyze_trades_tool(supabase: Client, model_id: int, run_id: Optional[int], user_id: str):
     """Factory to create analyze_trades tool with context"""
@@ -37,19 +38,23 @@ def create_analyze_trades_tool(supabase: Client, model_id: int, run_id: Optional
         query = supabase.table("positions").select("*").eq("model_id", model_id)
         
         # Filter by run: specific_run_id takes priority, then context run_id, then all runs
-        if specific_run_id:
-            query = query.eq("run_id", specific_run_id)
-        elif run_id:
-            query = query.eq("run_id", run_id)
+        target_run_id = specific_run_id or run_id
+        if target_run_id:
+            query = query.eq("run_id", target_run_id)
         # else: Query ALL runs for this model
         
-        result = query.order("date").order("minute_time").execute()
+        # Archived runs come from the run archive (columnar files)
+        trades = run_archive.read(target_run_id, "positions") if target_run_id else None
+        if trades is None:
+            trades = query.order("date").order("minute_time").execute().data or []
+            if not target_run_id:
+                trades = run_archive.read_model(model_id, "positions") + trades
+                trades.sort(key=lambda t: (str(t.get("date")), t.get("minute_time") or ""))
+        trades = [t for t in trades if t.get("model_id") == model_id]
         
-        if not result.data or len(result.data) < 2:
+        if len(trades) < 2:
             return "Not enough trades to analyze (need at least 2)."
         
-        trades = result.data
-        
         # Calculate trade-by-trade P/L
         trade_pnl = []
         for i in range(1, len(trades)):
@@ -6,6 +6,7 @@ Retrieves AI's decision-making reasoning from past trades
 from langchain.tools import tool
 from typing import Dict, List, Optional
 from supabase import Client
+from services.archive_service import run_archive
 import json
 
 def create_get_ai_reasoning_tool(supabase: Client, model_id: int, run_id: Optional[int], user_id: str):
@@ -43,6 +44,7 @@ def create_get_ai_reasoning_tool(supabase: Client, model_id: int, run_id: Option
             .eq("model_id", model_id)
         
         # Filter by run if specified
+        target_run_id = run_id_filter or run_id
         if run_id_filter:
             print(f"  - Filtering by run_id_filter: {run_id_filter}")
             query = query.eq("run_id", run_id_filter)
@@ -53,20 +55,33 @@ def create_get_ai_reasoning_tool(supabase: Client, model_id: int, run_id: Option
         else:
             print(f"  - No run_id filter (querying ALL runs)")
         
-        # Order by most recent
-        query = query.order("timestamp", desc=True).limit(limit)
-        
-        print(f"[get_ai_reasoning] Executing query...")
-        result = query.execute()
+        # Archived runs are read from the run archive instead of the hot table
+        archived = run_archive.read(target_run_id, "reasoning") if target_run_id else None
+        if archived is not None:
+            print(f"[get_ai_reasoning] Reading archived run {target_run_id}")
+            reasoning_logs = [log for log in archived if log.get("model_id") == model_id]
+            reasoning_logs.sort(key=lambda log: str(log.get("timestamp")), reverse=True)
+            reasoning_logs = reasoning_logs[:limit]
+        else:
+            # Order by most recent
+            query = query.order("timestamp", desc=True).limit(limit)
+            
+            print(f"[get_ai_reasoning] Executing query...")
+            result = query.execute()
+            reasoning_logs = result.data or []
+            
+            # All runs: fill up from archived (older) runs
+            if not target_run_id and len(reasoning_logs) < limit:
+                older = run_archive.read_model(model_id, "reasoning")
+                older.sort(key=lambda log: str(log.get("timestamp")), reverse=True)
+                reasoning_logs += older[:limit - len(reasoning_logs)]
         
-        print(f"[get_ai_reasoning] Query result: {len(result.data) if result.data else 0} records")
+        print(f"[get_ai_reasoning] Query result: {len(reasoning_logs)} records")
         
-        if not result.data:
+        if not reasoning_logs:
             print(f"[get_ai_reasoning] ❌ NO DATA RETURNED - RLS issue or query problem")
             return "No AI reasoning logs found. The AI may not have logged decision-making details for these trades."
         
-        reasoning_logs = result.data
-        
         # Format response
         response = f"Found {len(reasoning_logs)} AI reasoning logs:\n\n"
         
@@ -5,6 +5,7 @@ Update Model Rules Tool - Actually modify model configuration
 from langchain.tools import tool
 from typing import Optional
 from supabase import Client
+from utils.auth_cache import invalidate_model
 
 def create_update_model_rules_tool(supabase: Client, model_id: int, user_id: str):
     """Factory to create update_model_rules tool"""
@@ -76,6 +77,7 @@ def create_update_model_rules_tool(supabase: Client, model_id: int, user_id: str
         # Perform update
         if update_data:
             result = supabase.table("models").update(update_data).eq("id", model_id).eq("user_id", user_id).execute()
+            invalidate_model(model_id)
             
             if not result.data:
                 return "Error: Failed to update model. Check permissions."
@@ -11,6 +11,7 @@ from jose import jwt, JWTError
 from typing import Optional, Dict, Any
 import os
 from config import settings, is_approved_email, is_admin
+from utils.auth_cache import token_claims_cache
 
 # Security schemes (both optional - don't auto-error)
 security = HTTPBearer(auto_error=False)
@@ -59,6 +60,31 @@ def get_supabase_client() -> Client:
     )
 
 
+def decode_token(token: str) -> Dict[str, Any]:
+    """
+    Verify a Supabase JWT, serving repeat tokens from the claims cache
+    
+    Verified claims are cached (keyed by token hash) until the token's exp,
+    so a client's steady stream of requests pays for signature verification
+    once.
+    
+    Raises:
+        JWTError: If token is invalid or expired
+    """
+    payload = token_claims_cache.get(token)
+    if payload is not None:
+        return payload
+    
+    payload = jwt.decode(
+        token,
+        settings.SUPABASE_JWT_SECRET,
+        algorithms=["HS256"],
+        audience="authenticated"
+    )
+    token_claims_cache.put(token, payload)
+    return payload
+
+
 def verify_token_string(token: str) -> Dict[str, Any]:
     """
     Verify JWT token from string (for query params)
@@ -72,15 +98,7 @@ def verify_token_string(token: str) -> Dict[str, Any]:
     Raises:
         JWTError: If token is invalid
     """
-    # Decode JWT token
-    payload = jwt.decode(
-        token,
-        settings.SUPABASE_JWT_SECRET,
-        algorithms=["HS256"],
-        audience="authenticated"
-    )
-    
-    return payload
+    return decode_token(token)
 
 
 def verify_token(credentials: HTTPAuthorizationCredentials = Security(security)) -> Dict[str, Any]:
@@ -99,15 +117,7 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Security(security))
     token = credentials.credentials
     
     try:
-        # Decode JWT token
-        payload = jwt.decode(
-            token,
-            settings.SUPABASE_JWT_SECRET,
-            algorithms=["HS256"],
-            audience="authenticated"
-        )
-        
-        return payload
+        return decode_token(token)
         
     except JWTError as e:
         raise HTTPException(
@@ -267,12 +277,7 @@ async def get_current_user_or_api_key(
     # Fall back to JWT
     if bearer_credentials:
         try:
-            payload = jwt.decode(
-                bearer_credentials.credentials,
-                settings.SUPABASE_JWT_SECRET,
-                algorithms=["HS256"],
-                audience="authenticated"
-            )
+            payload = decode_token(bearer_credentials.credentials)
             
             user_id = payload.get("sub")
             email = payload.get("email")
@@ -48,12 +48,79 @@ celery_app.conf.update(
     task_time_limit=7200,  # 2 hour hard limit
     task_soft_time_limit=6600,  # 1h 50m soft limit
     
+    # Honour per-message priority (scheduler: interactive before batch)
+    broker_transport_options={
+        'queue_order_strategy': 'priority',
+        # Above task_time_limit so late-acked runs aren't redelivered while still running
+        'visibility_timeout': 7500
+    },
+    
     # Worker settings
     worker_prefetch_multiplier=1,  # Only fetch 1 task at a time
-    worker_max_tasks_per_child=10,  # Restart worker after 10 tasks (prevent memory leaks)
+    # Warm workers keep agents/clients alive, so recycle rarely and rely on the memory cap;
+    # cold workers restart after 10 tasks (prevent memory leaks)
+    worker_max_tasks_per_child=settings.CELERY_WARM_MAX_TASKS_PER_CHILD if settings.CELERY_WARM_WORKERS else 10,
+    worker_max_memory_per_child=settings.CELERY_MAX_MEMORY_PER_CHILD_KB,
 )
 
+# Warm worker mode: persistent loop, shared clients, preloaded MCP tools + startup health check
+if settings.CELERY_WARM_WORKERS:
+    from celery.signals import worker_process_init
+    
+    @worker_process_init.connect
+    def _warm_worker_process(**kwargs):
+        from workers.warm_pool import warm_worker_startup
+        try:
+            warm_worker_startup()
+        except Exception as e:
+            print(f"⚠️  Warm worker startup failed (tasks will warm lazily): {e}")
+
+# Fair-share scheduler: free user/provider slots when a scheduled run ends
+if settings.SCHEDULER_ENABLED:
+    from celery.signals import task_postrun, task_revoked
+    
+    # Tasks that hold scheduler slots (the job id is their task id); the
+    # sharded reducer carries the job id of run_sharded_intraday
+    SCHEDULED_RUN_TASKS = frozenset({
+        'workers.run_intraday_trading',
+        'workers.run_daily_backtest',
+        'workers.run_sharded_intraday',
+        'workers.merge_intraday_shards',
+    })
+    
+    def _release_or_defer(task_id: str, succeeded: bool) -> None:
+        from workers.scheduler import run_scheduler, SchedulerUnavailable
+        if not run_scheduler.enabled:
+            return
+        try:
+            run_scheduler.release(task_id, succeeded=succeeded)
+        except SchedulerUnavailable as e:
+            # Lock busy: retry through the broker instead of leaking the slot
+            print(f"⚠️  Scheduler release deferred for {task_id}: {e}")
+            celery_app.send_task('workers.release_run', args=[task_id, succeeded], countdown=2)
+        except Exception as e:
+            print(f"⚠️  Scheduler release failed for {task_id}: {e}")
+    
+    @task_postrun.connect
+    def _release_scheduled_run(task_id=None, task=None, state=None, retval=None, **kwargs):
+        if task is None or task.name not in SCHEDULED_RUN_TASKS:
+            return
+        if state == 'RETRY':
+            return  # Requeued from its checkpoint - still holds its slots
+        if isinstance(retval, dict) and retval.get('status') == 'sharded':
+            return  # Shards queued - slots are freed when the reducer (same id) ends
+        # Run tasks catch their own errors and report them in the returned status
+        completed = state == 'SUCCESS' and isinstance(retval, dict) and retval.get('status') == 'completed'
+        _release_or_defer(task_id, completed)
+    
+    @task_revoked.connect
+    def _release_revoked_run(request=None, sender=None, **kwargs):
+        name = getattr(sender, 'name', None) or getattr(request, 'task', None)
+        if request is None or name not in SCHEDULED_RUN_TASKS:
+            return
+        _release_or_defer(request.id, False)
+
 # Import tasks directly (Render deployment doesn't support autodiscover properly)
 # Tasks are automatically registered via @celery_app.task decorator
-from workers import trading_tasks
+from workers import trading_tasks, sharded_tasks
 
@@ -64,6 +64,14 @@ class Settings(BaseSettings):
     YFINANCE_PROXY_URL: str = ""
     YFINANCE_PROXY_KEY: str = ""
     
+    # Market Data Client (shared Polygon proxy client)
+    POLYGON_MAX_CONCURRENCY: int = 16  # Upper bound for adaptive concurrency
+    POLYGON_MIN_CONCURRENCY: int = 2
+    POLYGON_TIMEOUT: float = 30.0  # Seconds per request
+    POLYGON_MAX_RETRIES: int = 5
+    POLYGON_HEDGE_MIN_DELAY: float = 2.0  # Never hedge a page before this many seconds
+    DAILY_INGEST_UNIVERSE_ON_BACKTEST: bool = False  # Daily backtests preload all Nasdaq-100 bars (else only the run's symbol; use workers.ingest_daily_universe)
+    
     # Upstash Redis (for intraday trading cache)
     UPSTASH_REDIS_REST_URL: str = ""
     UPSTASH_REDIS_REST_TOKEN: str = ""
@@ -74,6 +82,26 @@ class Settings(BaseSettings):
     REDIS_PASSWORD: str = ""
     REDIS_TLS: bool = True
     
+    # Celery Worker Mode
+    CELERY_WARM_WORKERS: bool = False  # Opt-in: persistent loop + cached agents per worker process
+    CELERY_WARM_MAX_TASKS_PER_CHILD: int = 100  # Recycle interval in warm mode (cold mode: 10)
+    CELERY_MAX_MEMORY_PER_CHILD_KB: int = 1500000  # Recycle child above ~1.5GB RSS
+    
+    # Run Scheduler (fair-share admission in front of Celery)
+    SCHEDULER_ENABLED: bool = True  # Needs Upstash Redis (shared with workers); bypassed without it
+    SCHEDULER_MAX_RUNS_PER_USER: int = 2  # Concurrent runs per user
+    SCHEDULER_PROVIDER_CONCURRENCY: int = 8  # Concurrent runs per LLM provider
+    SCHEDULER_PROVIDER_RATE_PER_MIN: float = 6.0  # Token bucket refill (run starts/min/provider)
+    SCHEDULER_PROVIDER_BURST: int = 4  # Token bucket size
+    SCHEDULER_PROVIDER_LIMITS: str = ""  # JSON overrides, e.g. {"openai": {"concurrency": 12}}
+    
+    # Run Archive (completed runs' positions/reasoning moved to Parquet files)
+    RUN_ARCHIVE_DIR: str = "./data/run_archive"  # Local files / download cache
+    RUN_ARCHIVE_BUCKET: str = ""  # Supabase Storage bucket for archive files (durable, shared)
+    RUN_ARCHIVE_DIR_DURABLE: bool = False  # RUN_ARCHIVE_DIR is a persistent disk shared by API and workers
+    RUN_ARCHIVE_AFTER_DAYS: int = 30  # Archive completed runs that ended this long ago
+    RUN_ARCHIVE_BATCH: int = 20  # Max runs per archive sweep
+    
     # MCP Server Tokens (Market Intelligence)
     FINMCP_TOKEN: str = ""
     UWMCP_MCP_TOKEN: str = ""
@@ -1,27 +1,29 @@
 """
 Daily Bar Loader - Fetch OHLCV from Polygon API
+Bars land in the local price index (utils/price_index.py) and Redis; reruns
+only fetch (symbol, date) ranges the index hasn't seen.
 """
 
-import httpx
-from typing import Dict
+import asyncio
+from typing import Dict, List, Optional
 from datetime import datetime
-from config import settings
+from utils.market_data_client import market_data_client, results_of, MarketDataError
+from utils.market_calendar import EASTERN
+from utils.price_index import daily_price_index, last_final_date
 
 
-async def fetch_daily_bars_polygon(
-    symbol: str,
-    start_date: str,
-    end_date: str
-) -> Dict[str, Dict]:
+DAILY_PRICE_TTL = 7 * 24 * 3600  # Historical opens never change
+
+
+async def _fetch_aggregates(symbol: str, start_date: str, end_date: str) -> Dict[str, Dict]:
     """
-    Fetch daily OHLCV bars from Polygon API
-    
+    One aggregates request for a symbol/range
+
     Returns: {date: {open, high, low, close, volume}}
+
+    Raises:
+        MarketDataError: Proxy failed after retries
     """
-    print(f"📊 Fetching daily bars for {symbol} ({start_date} to {end_date})")
-    
-    url = f"{settings.POLYGON_PROXY_URL}/polygon/stocks/aggregates/{symbol}"
-    
     params = {
         "timespan": "day",
         "from": start_date,
@@ -30,51 +32,135 @@ async def fetch_daily_bars_polygon(
         "sort": "asc",
         "limit": 50000
     }
-    
-    headers = {"x-custom-key": settings.POLYGON_PROXY_KEY}
-    
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        response = await client.get(url, params=params, headers=headers)
-        
-        if response.status_code != 200:
-            print(f"  ❌ Polygon API error: {response.status_code}")
-            return {}
-        
-        data = response.json()
-        
-        # Check if data wrapped
-        results = data.get("data", {}).get("results") if "data" in data else data.get("results")
-        
-        if not results:
-            print(f"  ⚠️  No bars returned")
-            return {}
-        
-        print(f"  ✅ Fetched {len(results)} daily bars")
-        
-        # Convert to dict keyed by date
-        bars = {}
-        for bar in results:
-            bar_date = datetime.fromtimestamp(bar['t'] / 1000).strftime('%Y-%m-%d')
-            bars[bar_date] = {
-                'open': bar['o'],
-                'high': bar['h'],
-                'low': bar['l'],
-                'close': bar['c'],
-                'volume': bar['v']
-            }
-        
-        # Cache in Redis for BaseAgent to read
+
+    data = await market_data_client.get_json(
+        f"stocks/aggregates/{symbol}", params, endpoint="stocks/aggregates"
+    )
+
+    # Convert to dict keyed by date (bar 't' is midnight ET in epoch ms)
+    bars = {}
+    for bar in results_of(data):
+        bar_date = datetime.fromtimestamp(bar['t'] / 1000, tz=EASTERN).strftime('%Y-%m-%d')
+        bars[bar_date] = {
+            'open': bar['o'],
+            'high': bar['h'],
+            'low': bar['l'],
+            'close': bar['c'],
+            'volume': bar['v']
+        }
+    return bars
+
+
+async def _cache_opens(bars_by_symbol: Dict[str, Dict[str, Dict]]) -> int:
+    """Write daily opens to Redis in pipelined batches (for get_open_prices compatibility)"""
+    from utils.redis_client import redis_client
+
+    commands = [
+        ["SETEX", f"daily_price:{symbol}:{date_str}", DAILY_PRICE_TTL, bar_data['open']]
+        for symbol, bars in bars_by_symbol.items()
+        for date_str, bar_data in bars.items()
+    ]
+    if not commands:
+        return 0
+
+    results = await redis_client.pipeline(commands)
+    return sum(1 for r in results if r is not None)
+
+
+async def ingest_daily_universe(
+    start_date: str,
+    end_date: str,
+    symbols: Optional[List[str]] = None
+) -> Dict[str, int]:
+    """
+    Ingest daily bars for a symbol universe, fetching only missing ranges
+
+    Args:
+        start_date: YYYY-MM-DD
+        end_date: YYYY-MM-DD
+        symbols: Defaults to the Nasdaq-100 universe the agent trades
+
+    Returns:
+        {symbol: bars fetched this call} plus '_failed' / '_cached' counters
+    """
+    if symbols is None:
+        from utils.price_tools import all_nasdaq_100_symbols
+        symbols = all_nasdaq_100_symbols
+
+    # Today's (or future) bars aren't final - never mark them as covered
+    final_end = min(end_date, last_final_date())
+
+    jobs = [
+        (symbol, gap_start, gap_end)
+        for symbol in symbols
+        for gap_start, gap_end in (
+            daily_price_index.missing_ranges(symbol, start_date, final_end) if start_date <= final_end else []
+        )
+    ]
+
+    print(f"📊 Daily ingestion {start_date} → {end_date}: {len(symbols)} symbols, {len(jobs)} missing ranges")
+
+    stats: Dict[str, int] = {symbol: 0 for symbol in symbols}
+    stats['_failed'] = 0
+    if not jobs:
+        stats['_cached'] = 0
+        return stats
+
+    # All gaps concurrently - the shared client paces to the proxy's rate limit
+    results = await asyncio.gather(
+        *(_fetch_aggregates(symbol, gap_start, gap_end) for symbol, gap_start, gap_end in jobs),
+        return_exceptions=True
+    )
+
+    fetched: Dict[str, Dict[str, Dict]] = {}
+    for (symbol, gap_start, gap_end), result in zip(jobs, results):
+        if isinstance(result, Exception):
+            # Not marked as covered, so the next run retries this range
+            print(f"  ❌ {symbol} {gap_start}→{gap_end}: {result}")
+            stats['_failed'] += 1
+            continue
+        daily_price_index.upsert(symbol, result, gap_start, gap_end)
+        fetched.setdefault(symbol, {}).update(result)
+        stats[symbol] += len(result)
+
+    daily_price_index.save()
+
+    try:
+        stats['_cached'] = await _cache_opens(fetched)
+        print(f"  💾 Cached {stats['_cached']} daily opens in Redis (pipelined)")
+    except Exception as e:
+        stats['_cached'] = 0
+        print(f"  ⚠️  Cache failed: {e}")
+
+    print(f"  ✅ Ingested {sum(len(b) for b in fetched.values())} bars ({stats['_failed']} ranges failed)")
+    return stats
+
+
+async def fetch_daily_bars_polygon(
+    symbol: str,
+    start_date: str,
+    end_date: str
+) -> Dict[str, Dict]:
+    """
+    Fetch daily OHLCV bars from Polygon API (missing ranges only)
+
+    Returns: {date: {open, high, low, close, volume}}
+    """
+    print(f"📊 Fetching daily bars for {symbol} ({start_date} to {end_date})")
+
+    stats = await ingest_daily_universe(start_date, end_date, symbols=[symbol])
+    bars = daily_price_index.get_range(symbol, start_date, end_date)
+
+    # Ranges that aren't final yet (today) are fetched directly, never indexed
+    if end_date > last_final_date():
         try:
-            from utils.redis_client import redis_client
-            
-            for date_str, bar_data in bars.items():
-                # Store as {symbol}_price format for get_open_prices compatibility
-                cache_key = f"daily_price:{symbol}:{date_str}"
-                await redis_client.set(cache_key, bar_data['open'], ex=7200)
-            
-            print(f"  💾 Cached {len(bars)} bars in Redis")
-        except Exception as e:
-            print(f"  ⚠️  Cache failed: {e}")
-        
-        return bars
+            bars.update(await _fetch_aggregates(symbol, max(start_date, last_final_date()), end_date))
+        except MarketDataError as e:
+            print(f"  ❌ Polygon API error: {e}")
+
+    if not bars:
+        print(f"  ⚠️  No bars returned")
+        return {}
 
+    print(f"  ✅ {len(bars)} daily bars ({stats.get(symbol, 0)} fetched, rest from local index)")
+    return bars
@@ -76,6 +76,16 @@ class DatabaseError(AIBTException):
         )
 
 
+class ArchiveUnavailableError(AIBTException):
+    """An archived run's files can't be read (pyarrow missing, storage down, bad file)"""
+    def __init__(self, detail: str = "Run archive unavailable"):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=detail,
+            error_code="ARCHIVE_UNAVAILABLE"
+        )
+
+
 def log_error(error: Exception, context: str = ""):
     """Log error with context"""
     logger.error(f"{context}: {type(error).__name__} - {str(error)}")
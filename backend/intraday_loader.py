@@ -3,11 +3,16 @@ Intraday Data Loader Service
 Fetches tick data from apiv3-ttg, aggregates to minute bars, caches in Redis
 """
 
-import httpx
+import asyncio
 from typing import List, Dict, Any
-from datetime import datetime, timezone, timedelta
-from config import settings
 from utils.redis_client import redis_client
+from utils.market_calendar import session_timestamp_range_ns, et_minute_label, is_trading_day
+from utils.market_data_client import market_data_client, results_of, MarketDataError
+
+
+TRADE_PAGE_LIMIT = 50000  # Max trades per request
+TRADE_FETCH_SLICES = 4  # Concurrent time slices per session fetch
+MAX_TRADE_PAGES_PER_SLICE = 200
 
 
 async def fetch_all_trades_for_session(
@@ -25,95 +30,50 @@ async def fetch_all_trades_for_session(
     
     Returns:
         List of trade dicts from Polygon
+    
+    Raises:
+        MarketDataError: Proxy failed after retries (no partial sessions)
     """
     
     # Calculate timestamp range (nanoseconds)
-    start_nano, end_nano = _get_session_timestamp_range(date, session)
-    
-    all_trades = []
-    url = f"{settings.POLYGON_PROXY_URL}/polygon/stocks/trades/{symbol}"
-    
-    params = {
-        "timestamp.gte": start_nano,
-        "timestamp.lte": end_nano,
-        "limit": 50000,  # Max per request
-        "order": "asc"
-    }
-    
-    headers = {"x-custom-key": settings.POLYGON_PROXY_KEY}
+    session_range = _get_session_timestamp_range(date, session)
+    if session_range is None:
+        print(f"📅 Market closed on {date} - skipping {symbol} fetch")
+        return []
+    start_nano, end_nano = session_range
     
     print(f"📡 Fetching {symbol} trades for {date} ({session} session)...")
     
-    # Use timestamp-based pagination (NOT cursors)
-    # Cursors were returning wrong-date data after page 1
-    current_start = start_nano
-    
-    async with httpx.AsyncClient() as client:
-        page = 1
-        while page <= 50 and current_start < end_nano:  # Max 50 pages
-            params = {
-                "timestamp.gte": current_start,
-                "timestamp.lte": end_nano,
-                "limit": 50000,
-                "order": "asc"
-            }
-            
-            response = await client.get(
-                url,
-                headers=headers,
-                params=params,
-                timeout=30.0
-            )
-            
-            if response.status_code != 200:
-                print(f"  ❌ Request failed: {response.status_code}")
-                break
-            
-            data = response.json()
-            
-            # YOUR proxy wraps: data.data.results
-            if "data" in data and "results" in data["data"]:
-                trades = data["data"]["results"]
-                
-                if not trades:
-                    print(f"  ✅ No more trades (reached end)")
-                    break
-                
-                # Debug: Check first trade structure
-                if page == 1:
-                    print(f"  🔍 First trade fields: {list(trades[0].keys())}")
-                    print(f"  🔍 First trade sample: {trades[0]}")
-                
-                all_trades.extend(trades)
-                print(f"  📄 Page {page}: {len(trades)} trades")
-                
-                # Advance timestamp to AFTER last trade
-                # This ensures we get next batch without duplicates
-                last_ts = trades[-1]['participant_timestamp']
-                current_start = last_ts + 1  # Add 1 nanosecond
-                
-                page += 1
-            else:
-                break
+    # Split the session into time slices fetched concurrently through the
+    # shared client (adaptive concurrency keeps us at the proxy's rate limit)
+    slice_span = -(-(end_nano - start_nano + 1) // TRADE_FETCH_SLICES)
+    slices = [
+        (slice_start, min(slice_start + slice_span - 1, end_nano))
+        for slice_start in range(start_nano, end_nano + 1, slice_span)
+    ]
+    pages = await asyncio.gather(*(
+        _fetch_trades_slice(symbol, slice_start, slice_end)
+        for slice_start, slice_end in slices
+    ))
+    all_trades = [trade for slice_trades in pages for trade in slice_trades]
+    
+    if all_trades:
+        print(f"  🔍 First trade fields: {list(all_trades[0].keys())}")
     
     print(f"  ✅ Total trades fetched: {len(all_trades):,}")
     
     # CLIENT-SIDE DATE FILTERING: Remove wrong-date trades
+    # (the session range is already date- and DST-specific; late after-hours
+    # trades fall on the next UTC date, so no UTC date check)
     print(f"  🔍 Filtering trades to match target date...")
     
-    target_date = datetime.strptime(date, "%Y-%m-%d").date()
     filtered_trades = []
     wrong_date_count = 0
     
     for trade in all_trades:
         ts_nano = trade.get('participant_timestamp', 0)
         if start_nano <= ts_nano <= end_nano:
-            # Additional date validation
-            ts_utc = datetime.fromtimestamp(ts_nano / 1e9, tz=timezone.utc)
-            if ts_utc.date() == target_date:
-                filtered_trades.append(trade)
-            else:
-                wrong_date_count += 1
+            filtered_trades.append(trade)
         else:
             wrong_date_count += 1
     
@@ -125,6 +85,56 @@ async def fetch_all_trades_for_session(
     return filtered_trades
 
 
+async def _fetch_trades_slice(symbol: str, start_nano: int, end_nano: int) -> List[Dict[str, Any]]:
+    """
+    Fetch every trade in [start_nano, end_nano] for one symbol
+    
+    Raises:
+        MarketDataError: Request failed after retries or the page cap was hit
+            (never returns a silently truncated slice)
+    """
+    trades_out = []
+    
+    # Use timestamp-based pagination (NOT cursors)
+    # Cursors were returning wrong-date data after page 1
+    current_start = start_nano
+    page = 1
+    
+    while current_start <= end_nano:
+        if page > MAX_TRADE_PAGES_PER_SLICE:
+            raise MarketDataError(
+                f"{symbol}: more than {MAX_TRADE_PAGES_PER_SLICE} pages in one slice - refusing to truncate"
+            )
+        
+        data = await market_data_client.get_json(
+            f"stocks/trades/{symbol}",
+            {
+                "timestamp.gte": current_start,
+                "timestamp.lte": end_nano,
+                "limit": TRADE_PAGE_LIMIT,
+                "order": "asc"
+            },
+            endpoint="stocks/trades"
+        )
+        trades = results_of(data)
+        
+        if not trades:
+            break
+        
+        trades_out.extend(trades)
+        print(f"  📄 {symbol} page {page}: {len(trades)} trades")
+        
+        if len(trades) < TRADE_PAGE_LIMIT:
+            break  # Short page = end of range
+        
+        # Advance timestamp to AFTER last trade
+        # This ensures we get next batch without duplicates
+        current_start = trades[-1]['participant_timestamp'] + 1  # Add 1 nanosecond
+        page += 1
+    
+    return trades_out
+
+
 def _get_session_timestamp_range(date: str, session: str) -> tuple:
     """
     Calculate nanosecond timestamp range for trading session
@@ -134,38 +144,10 @@ def _get_session_timestamp_range(date: str, session: str) -> tuple:
         session: 'pre', 'regular', 'after'
     
     Returns:
-        (start_nano, end_nano) tuple
+        (start_nano, end_nano) tuple (inclusive, DST-correct), or None if the
+        market is closed that day
     """
-    
-    year, month, day = map(int, date.split("-"))
-    
-    # EDT offset (assuming -4 for simplicity, should check DST)
-    et_offset = -4
-    
-    if session == "pre":
-        # 4:00 AM - 9:29 AM ET
-        start_hour, start_min = 4, 0
-        end_hour, end_min = 9, 29
-    elif session == "regular":
-        # 9:30 AM - 4:00 PM ET
-        start_hour, start_min = 9, 30
-        end_hour, end_min = 16, 0
-    elif session == "after":
-        # 4:01 PM - 8:00 PM ET
-        start_hour, start_min = 16, 1
-        end_hour, end_min = 20, 0
-    else:
-        raise ValueError(f"Invalid session: {session}")
-    
-    # Convert to UTC
-    start_dt = datetime(year, month, day, start_hour - et_offset, start_min, tzinfo=timezone.utc)
-    end_dt = datetime(year, month, day, end_hour - et_offset, end_min, tzinfo=timezone.utc)
-    
-    # Convert to nanoseconds
-    start_nano = int(start_dt.timestamp() * 1_000_000_000)
-    end_nano = int(end_dt.timestamp() * 1_000_000_000)
-    
-    return start_nano, end_nano
+    return session_timestamp_range_ns(date, session)
 
 
 def aggregate_to_minute_bars(trades: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
@@ -248,28 +230,14 @@ async def cache_intraday_bars(
     cached = 0
     failed = 0
     
-    # EDT timezone offset (UTC-4 for EDT, UTC-5 for EST)
-    # For simplicity, using -4 (should check DST in production)
-    edt_offset = timedelta(hours=-4)
-    
     # Track unique times to detect duplicates
     unique_times = set()
     duplicates = 0
     
     for idx, bar in enumerate(bars):
-        # Convert timestamp to HH:MM format IN EDT
+        # Convert timestamp to HH:MM format in Eastern Time (EDT or EST)
         # bar['timestamp'] is in milliseconds UTC
-        ts_ms = bar['timestamp']
-        
-        # Create UTC datetime
-        ts_utc = datetime.fromtimestamp(ts_ms / 1000, tz=timezone.utc)
-        
-        # Create EDT timezone (UTC-4)
-        edt_tz = timezone(timedelta(hours=-4))
-        
-        # Convert to EDT
-        ts_edt = ts_utc.astimezone(edt_tz)
-        minute_str = ts_edt.strftime('%H:%M')
+        minute_str = et_minute_label(bar['timestamp'])
         
         # Check for duplicates
         if minute_str in unique_times:
@@ -332,32 +300,38 @@ async def load_intraday_session(
     print(f"  Symbols: {', '.join(symbols)}")
     print()
     
-    stats = {}
+    if not is_trading_day(date):
+        print(f"📅 Market closed on {date} - nothing to load")
+        return {symbol: 0 for symbol in symbols}
     
-    for symbol in symbols:
+    async def _load_symbol(symbol: str) -> int:
         print(f"\n📈 Processing {symbol}:")
         print("-" * 80)
         
-        # Fetch all trades
-        trades = await fetch_all_trades_for_session(symbol, date, session)
+        # Fetch all trades (a failed fetch loads nothing rather than a partial session)
+        try:
+            trades = await fetch_all_trades_for_session(symbol, date, session)
+        except MarketDataError as e:
+            print(f"  ❌ {symbol} fetch failed: {e}")
+            return 0
         
         if not trades:
             print(f"  ⚠️  No trades found for {symbol}")
-            stats[symbol] = 0
-            continue
+            return 0
         
         # Aggregate to minute bars
         bars = aggregate_to_minute_bars(trades)
         
         if not bars:
             print(f"  ⚠️  No bars created for {symbol}")
-            stats[symbol] = 0
-            continue
+            return 0
         
         # Cache in Redis
-        cached = await cache_intraday_bars(model_id, date, symbol, bars)
-        
-        stats[symbol] = cached
+        return await cache_intraday_bars(model_id, date, symbol, bars)
+    
+    # Symbols load concurrently; the shared client paces requests
+    counts = await asyncio.gather(*(_load_symbol(symbol) for symbol in symbols))
+    stats = dict(zip(symbols, counts))
     
     print("\n" + "=" * 80)
     print("SESSION DATA LOADED")
@@ -3,7 +3,7 @@ AI-Trader FastAPI Backend
 Main application with authentication and private data access
 """
 
-from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi import FastAPI, HTTPException, Depends, Query, Request, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from supabase import create_client
@@ -33,11 +33,13 @@ from models import (
     ModelListResponse,
     PositionHistoryResponse,
     LatestPositionResponse,
+    EquityCurveResponse,
     LogResponse,
     PerformanceResponse,
     LeaderboardResponse,
     UserListResponse,
     SystemStatsResponse,
+    ActivitySeriesResponse,
     StartTradingRequest,
     DailyBacktestRequest,
     IntradayTradingRequest,
@@ -48,13 +50,22 @@ from models import (
     EnhanceStrategyRequest,
     EnhanceStrategyResponse
 )
-from pagination import create_pagination_params, PaginationParams
+from pagination import (
+    create_cursor_pagination_params, CursorPaginationParams,
+    encode_cursor, decode_cursor, POSITION_CURSOR_FIELDS
+)
 from errors import NotFoundError, AuthorizationError, log_error
 import services
 from trading.agent_manager import agent_manager
 from trading.mcp_manager import mcp_manager
 from streaming import event_stream
 from utils.redis_client import redis_client
+from utils.auth_cache import begin_request_scope, end_request_scope
+from utils.http_cache import cached_json, cached_static_json, model_scope, user_scope
+from utils.json_stream import (
+    NDJSON_MEDIA_TYPE, check_format, json_object_chunks, json_response, ndjson_chunks,
+    parse_fields, primed, rows_response, select_clause, stream_response
+)
 
 # ============================================================================
 # APP INITIALIZATION WITH LIFESPAN
@@ -98,6 +109,12 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         print(f"⚠️  Redis cleanup error: {e}")
     
+    try:
+        from utils.market_data_client import market_data_client
+        await market_data_client.close()
+    except Exception as e:
+        print(f"⚠️  Market data client cleanup error: {e}")
+    
     print("👋 AI-Trader API Shutting Down...")
 
 
@@ -117,8 +134,19 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
+# Request-scoped memo (repeated ownership checks within a request are free)
+@app.middleware("http")
+async def request_scope_middleware(request, call_next):
+    scope_token = begin_request_scope()
+    try:
+        return await call_next(request)
+    finally:
+        end_request_scope(scope_token)
+
+
 # Supabase client
 supabase = create_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_ROLE_KEY)
 
@@ -142,9 +170,18 @@ def root():
 @app.get("/api/health")
 def health_check():
     """Detailed health check"""
+    from utils.agent_cache import agent_graph_cache
+    from utils.market_data_client import market_data_client
+    from utils.auth_cache import token_claims_cache
+    from utils.http_cache import response_cache
+    
     return {
         "status": "healthy",
         "supabase_connected": True,
+        "agent_graph_cache": agent_graph_cache.stats(),
+        "market_data": market_data_client.stats(),
+        "token_cache": token_claims_cache.stats(),
+        "response_cache": response_cache.stats(),
         "timestamp": str(datetime.now())
     }
 
@@ -174,12 +211,27 @@ async def get_model_configuration(model_id: str):
     }
 
 
+AVAILABLE_MODELS_TTL = 600  # OpenRouter's catalogue changes rarely
+
+
 @app.get("/api/available-models")
-async def get_available_models():
+async def get_available_models(request: Request):
     """
     Fetch available AI models from OpenRouter
     Returns list of models with their IDs, names, and capabilities
+    (cached for AVAILABLE_MODELS_TTL seconds, ETag / 304 aware)
     """
+    return await cached_static_json(
+        request,
+        ("available-models",),
+        AVAILABLE_MODELS_TTL,
+        _fetch_available_models,
+        should_cache=lambda payload: payload.get("source") == "openrouter"
+    )
+
+
+async def _fetch_available_models() -> Dict:
+    """Fetch and rank OpenRouter's text models (fallback list on failure)"""
     try:
         import httpx
         async with httpx.AsyncClient(timeout=10.0) as client:
@@ -422,14 +474,22 @@ async def get_me(current_user: Dict = Depends(require_auth)):
 # ============================================================================
 
 @app.get("/api/models", response_model=ModelListResponse)
-async def get_my_models(current_user: Dict = Depends(require_auth)):
-    """Get current user's AI models"""
-    models = await services.get_user_models(current_user["id"])
+async def get_my_models(request: Request, current_user: Dict = Depends(require_auth)):
+    """Get current user's AI models (ETag / 304 aware)"""
+    async def build():
+        models = await services.get_user_models(current_user["id"])
+        return {
+            "models": models,
+            "total_models": len(models)
+        }
     
-    return {
-        "models": models,
-        "total_models": len(models)
-    }
+    return await cached_json(
+        request,
+        ("models", current_user["id"]),
+        [user_scope(current_user["id"])],
+        build,
+        ModelListResponse
+    )
 
 
 @app.post("/api/models", response_model=ModelInfo)
@@ -529,36 +589,57 @@ async def delete_my_model(model_id: int, current_user: Dict = Depends(require_au
 @app.get("/api/models/{model_id}/positions", response_model=PositionHistoryResponse)
 async def get_model_positions_endpoint(
     model_id: int,
+    run_id: Optional[int] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    symbol: Optional[str] = None,
     current_user: Dict = Depends(require_auth),
-    pagination: PaginationParams = Depends(create_pagination_params)
+    pagination: CursorPaginationParams = Depends(create_cursor_pagination_params)
 ):
-    """Get position history for user's model (paginated)"""
+    """
+    Get position history for user's model (paginated in the database)
+    
+    Follow next_cursor for constant-time pages; page/page_size still work for
+    random access. Optional filters: run_id, start_date, end_date, symbol.
+    """
     model = await services.get_model_by_id(model_id, current_user["id"])
     
     if not model:
         raise NotFoundError("Model")
     
-    # Get all positions (would add pagination to DB query in production)
-    positions = await services.get_model_positions(model_id, current_user["id"])
+    filters = {"run_id": run_id, "start_date": start_date, "end_date": end_date, "symbol": symbol}
+    cursor_key = decode_cursor(pagination.cursor, filters, POSITION_CURSOR_FIELDS) if pagination.cursor else None
+    
+    page, total = await asyncio.gather(
+        services.get_model_positions_page(
+            model_id,
+            current_user["id"],
+            page_size=pagination.page_size,
+            cursor_key=cursor_key,
+            offset=pagination.offset,
+            filters=filters
+        ),
+        services.count_model_positions(model_id, filters)
+    )
     
-    # Apply pagination
-    start = pagination.offset
-    end = start + pagination.limit
-    paginated_positions = positions[start:end]
+    if page is None:
+        raise NotFoundError("Model")
     
     return {
         "model_id": model_id,
         "model_name": model["signature"],
-        "positions": paginated_positions,
-        "total_records": len(positions),
-        "page": pagination.page,
-        "page_size": pagination.page_size
+        "positions": page["items"],
+        "total_records": total,
+        "page": None if cursor_key else pagination.page,
+        "page_size": pagination.page_size,
+        "has_next": page["has_next"],
+        "next_cursor": encode_cursor(page["last_key"], filters) if page["has_next"] else None
     }
 
 
 @app.get("/api/models/{model_id}/positions/latest", response_model=LatestPositionResponse)
-async def get_latest_position_endpoint(model_id: int, current_user: Dict = Depends(require_auth)):
-    """Get latest position for user's model"""
+async def get_latest_position_endpoint(model_id: int, request: Request, current_user: Dict = Depends(require_auth)):
+    """Get latest position for user's model (ETag / 304 aware)"""
     model = await services.get_model_by_id(model_id, current_user["id"])
     
     if not model:
@@ -567,6 +648,16 @@ async def get_latest_position_endpoint(model_id: int, current_user: Dict = Depen
             detail="Model not found or access denied"
         )
     
+    return await cached_json(
+        request,
+        ("positions/latest", model_id),
+        [model_scope(model_id)],
+        lambda: _build_latest_position(model_id, model, current_user),
+        LatestPositionResponse
+    )
+
+
+async def _build_latest_position(model_id: int, model: Dict, current_user: Dict) -> Dict:
     position = await services.get_latest_position(model_id, current_user["id"])
     
     if not position:
@@ -591,9 +682,67 @@ async def get_latest_position_endpoint(model_id: int, current_user: Dict = Depen
     }
 
 
+@app.get("/api/models/{model_id}/equity", response_model=EquityCurveResponse)
+async def get_equity_curve_endpoint(
+    model_id: int,
+    run_id: Optional[int] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    points: int = 500,
+    method: str = "lttb",
+    current_user: Dict = Depends(require_auth)
+):
+    """
+    Equity curve for user's model (or one run), downsampled server-side
+    
+    method: 'lttb' keeps the curve's shape, 'minmax' keeps every bucket's
+    peak and trough. points caps the response size.
+    """
+    model = await services.get_model_by_id(model_id, current_user["id"])
+    
+    if not model:
+        raise NotFoundError("Model")
+    
+    try:
+        curve = await services.get_equity_curve(
+            model_id,
+            run_id=run_id,
+            start_date=start_date,
+            end_date=end_date,
+            points=points,
+            method=method
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    return {
+        "model_id": model_id,
+        "model_name": model["signature"],
+        "run_id": run_id,
+        **curve
+    }
+
+
 @app.get("/api/models/{model_id}/logs", response_model=LogResponse)
-async def get_model_logs_endpoint(model_id: int, trade_date: Optional[str] = None, current_user: Dict = Depends(require_auth)):
-    """Get trading logs for user's model"""
+async def get_model_logs_endpoint(
+    model_id: int,
+    request: Request,
+    trade_date: Optional[str] = None,
+    format: str = "json",
+    fields: Optional[str] = None,
+    current_user: Dict = Depends(require_auth)
+):
+    """
+    Get trading logs for user's model (streamed)
+    
+    format=json keeps the LogResponse shape; format=ndjson sends one log per
+    line. fields=a,b,c returns only those log columns.
+    """
+    check_format(format)
+    log_fields = parse_fields(fields)
     model = await services.get_model_by_id(model_id, current_user["id"])
     
     if not model:
@@ -602,20 +751,25 @@ async def get_model_logs_endpoint(model_id: int, trade_date: Optional[str] = Non
             detail="Model not found or access denied"
         )
     
-    logs = await services.get_model_logs(model_id, current_user["id"], trade_date)
+    try:
+        logs = primed(services.iter_model_logs(model_id, trade_date, log_fields))
+    except Exception as e:
+        raise HTTPException(400, f"Invalid logs query: {e}")
     
-    return {
+    meta = {
         "model_id": model_id,
         "model_name": model["signature"],
-        "date": trade_date or "all",
-        "logs": logs,
-        "total_entries": len(logs)
+        "date": trade_date or "all"
     }
+    
+    if format == "ndjson":
+        return stream_response(request, ndjson_chunks(meta, [("log", logs, log_fields)]), NDJSON_MEDIA_TYPE)
+    return stream_response(request, json_object_chunks(meta, [("logs", logs, log_fields, "total_entries")]))
 
 
 @app.get("/api/models/{model_id}/performance", response_model=PerformanceResponse)
-async def get_model_performance_endpoint(model_id: int, current_user: Dict = Depends(require_auth)):
-    """Get performance metrics for user's model"""
+async def get_model_performance_endpoint(model_id: int, request: Request, current_user: Dict = Depends(require_auth)):
+    """Get performance metrics for user's model (ETag / 304 aware)"""
     model = await services.get_model_by_id(model_id, current_user["id"])
     
     if not model:
@@ -624,6 +778,16 @@ async def get_model_performance_endpoint(model_id: int, current_user: Dict = Dep
             detail="Model not found or access denied"
         )
     
+    return await cached_json(
+        request,
+        ("performance", model_id),
+        [model_scope(model_id)],
+        lambda: _build_model_performance(model_id, model, current_user),
+        PerformanceResponse
+    )
+
+
+async def _build_model_performance(model_id: int, model: Dict, current_user: Dict) -> Dict:
     # Check if cached metrics exist
     cached_metrics = await services.get_model_performance(model_id, current_user["id"])
     
@@ -641,7 +805,7 @@ async def get_model_performance_endpoint(model_id: int, current_user: Dict = Dep
                 "max_drawdown_start": cached_metrics.get("max_drawdown_start") or None,
                 "max_drawdown_end": cached_metrics.get("max_drawdown_end") or None
             },
-            "portfolio_values": {}
+            "portfolio_values": await services.get_daily_equity(model_id)
         }
     else:
         # Calculate fresh metrics
@@ -714,14 +878,42 @@ async def get_all_models_admin(current_user: Dict = Depends(require_admin)):
 
 
 @app.get("/api/admin/leaderboard", response_model=LeaderboardResponse)
-async def get_leaderboard_admin(current_user: Dict = Depends(require_admin)):
-    """Admin only: Get leaderboard of all models"""
-    leaderboard = await services.get_admin_leaderboard()
+async def get_leaderboard_admin(
+    metric: str = "cumulative_return",
+    trading_style: Optional[str] = None,
+    instrument: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    around_model_id: Optional[int] = None,
+    window: int = Query(5, ge=1, le=50),
+    current_user: Dict = Depends(require_admin)
+):
+    """
+    Admin only: Leaderboard of all models
     
-    return {
-        "leaderboard": leaderboard,
-        "total_models": len(leaderboard)
-    }
+    Ranks by metric (cumulative_return, annualized_return, sharpe_ratio,
+    win_rate, max_drawdown), optionally within a trading_style/instrument.
+    Pass around_model_id for that model's rank and `window` neighbours
+    instead of the top `limit`.
+    """
+    try:
+        if around_model_id is not None:
+            board = await services.get_leaderboard_around(
+                around_model_id, metric, trading_style, instrument, window
+            )
+            if board is None:
+                raise NotFoundError("Leaderboard entry")
+        else:
+            board = await services.get_admin_leaderboard(
+                metric, trading_style, instrument, limit, offset
+            )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    return board
 
 
 # ============================================================================
@@ -802,6 +994,43 @@ async def get_system_stats_admin(current_user: Dict = Depends(require_admin)):
     return stats
 
 
+@app.get("/api/admin/activity", response_model=ActivitySeriesResponse)
+async def get_activity_admin(
+    hours: int = Query(24, ge=1, le=24 * 14),
+    current_user: Dict = Depends(require_admin)
+):
+    """Admin only: Runs started / trades recorded per hour"""
+    return await services.get_activity_series(hours)
+
+
+@app.get("/api/admin/archive")
+async def get_run_archive_admin(current_user: Dict = Depends(require_admin)):
+    """Admin only: Run archive size and read-cache stats"""
+    from services.archive_service import run_archive
+    return run_archive.stats()
+
+
+@app.post("/api/admin/archive/runs")
+async def archive_runs_admin(
+    older_than_days: Optional[int] = Query(None, ge=1),
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    dry_run: bool = False,
+    current_user: Dict = Depends(require_admin)
+):
+    """
+    Admin only: Archive completed runs older than the threshold
+    
+    Moves their positions / ai_reasoning rows to the run archive (see
+    services/archive_service.py). dry_run=true lists candidates. 503 when
+    pyarrow is missing or no durable archive storage is configured.
+    """
+    from services.archive_service import archive_completed_runs
+    result = await asyncio.to_thread(archive_completed_runs, older_than_days, limit, dry_run)
+    if "error" in result:
+        raise HTTPException(503, result["error"])
+    return result
+
+
 @app.put("/api/admin/users/{user_id}/role")
 async def update_user_role_admin(user_id: str, new_role: str, current_user: Dict = Depends(require_admin)):
     """Admin only: Update user role"""
@@ -941,6 +1170,7 @@ async def stop_trading(model_id: int, current_user: Dict = Depends(require_auth)
         print(f"🛑 Revoking and deleting run: Run #{run_number} (task: {task_id})")
         
         # Revoke task (terminate=True stops it immediately)
+        await asyncio.to_thread(_cancel_scheduled_run, task_id)
         celery_app.control.revoke(task_id, terminate=True)
         
         # Delete run (auto-cleanup on stop)
@@ -961,6 +1191,72 @@ async def stop_trading(model_id: int, current_user: Dict = Depends(require_auth)
         return result
 
 
+async def _submit_run(task_name: str, kwargs: Dict, user_id: str, base_model: str, priority: str, slots: int = 1) -> str:
+    """
+    Queue a Celery run via the fair-share scheduler (or directly when it's
+    disabled or has no shared Redis store). slots: concurrent runs the job
+    holds (shards of a sharded run).
+    
+    Raises:
+        HTTPException(503): Scheduler state is locked - nothing was queued
+    """
+    if priority not in ("interactive", "batch"):
+        raise HTTPException(status_code=400, detail="priority must be 'interactive' or 'batch'")
+    
+    from workers.scheduler import run_scheduler, SchedulerUnavailable
+    if not run_scheduler.enabled:
+        from celery_app import celery_app
+        return celery_app.send_task(task_name, kwargs=kwargs).id
+    
+    try:
+        return await asyncio.to_thread(run_scheduler.submit, task_name, kwargs, user_id, base_model, priority, slots)
+    except SchedulerUnavailable as e:
+        raise HTTPException(status_code=503, detail=f"Run scheduler unavailable, try again: {e}")
+
+
+async def _submit_sharded_run(
+    model: Dict,
+    run_id: int,
+    user_id: str,
+    sharding: Dict,
+    date: str,
+    session: str,
+    priority: str
+) -> str:
+    """Queue a sharded run through the scheduler as one job holding a slot per shard"""
+    from workers.sharded_tasks import shard_slots
+    
+    return await _submit_run(
+        "workers.run_sharded_intraday",
+        {
+            "model_id": model["id"],
+            "user_id": user_id,
+            "symbols": sharding["symbols"],
+            "date": date,
+            "session": session,
+            "base_model": sharding["base_model"],
+            "run_id": run_id,
+            "initial_cash": model.get("initial_cash", 10000.0),
+            "shard_by": sharding["shard_by"],
+            "shard_count": sharding.get("shard_count", 4)
+        },
+        user_id=user_id,
+        base_model=sharding["base_model"],
+        priority=priority,
+        slots=shard_slots(sharding["symbols"], sharding["shard_by"], sharding.get("shard_count", 4))
+    )
+
+
+def _cancel_scheduled_run(task_id: str) -> None:
+    """Drop a not-yet-dispatched run from the scheduler queue"""
+    from workers.scheduler import run_scheduler, SchedulerUnavailable
+    if run_scheduler.enabled:
+        try:
+            run_scheduler.cancel(task_id)
+        except SchedulerUnavailable as e:
+            print(f"⚠️  Could not remove {task_id} from the scheduler queue: {e}")
+
+
 @app.post("/api/trading/start-intraday/{model_id}")
 async def start_intraday_trading(
     model_id: int,
@@ -978,16 +1274,36 @@ async def start_intraday_trading(
     if not model:
         raise NotFoundError("Model")
     
+    # Symbol shards each enforce limits on their own sleeve - refuse portfolio-wide ones
+    if request.shard_by == "symbol" and len(request.symbols or [request.symbol]) > 1:
+        from workers.sharded_tasks import portfolio_wide_limits
+        limits = await asyncio.to_thread(portfolio_wide_limits, model, services.get_supabase())
+        if limits:
+            raise HTTPException(
+                status_code=400,
+                detail=f"shard_by='symbol' can't enforce portfolio-wide limits per shard: {', '.join(limits)}. "
+                       "Use shard_by='time' or run the basket unsharded."
+            )
+    
     # Create trading run first
+    strategy_snapshot = {
+        "custom_rules": model.get("custom_rules"),
+        "custom_instructions": model.get("custom_instructions"),
+        "model_parameters": model.get("model_parameters"),
+        "default_ai_model": model.get("default_ai_model")
+    }
+    if request.shard_by:
+        # Shard plan, so /resume can queue the same shards again
+        strategy_snapshot["sharding"] = {
+            "shard_by": request.shard_by,
+            "symbols": request.symbols or [request.symbol],
+            "shard_count": request.shard_count,
+            "base_model": request.base_model
+        }
     run = await services.create_trading_run(
         model_id=model_id,
         trading_mode="intraday",
-        strategy_snapshot={
-            "custom_rules": model.get("custom_rules"),
-            "custom_instructions": model.get("custom_instructions"),
-            "model_parameters": model.get("model_parameters"),
-            "default_ai_model": model.get("default_ai_model")
-        },
+        strategy_snapshot=strategy_snapshot,
         intraday_symbol=request.symbol,
         intraday_date=request.date,
         intraday_session=request.session
@@ -996,28 +1312,66 @@ async def start_intraday_trading(
     run_id = run["id"]
     run_number = run["run_number"]
     
-    # Import Celery task
-    from workers.trading_tasks import run_intraday_trading
+    # Sharded run: chord of shards + reducer writing the single run row
+    if request.shard_by:
+        symbols = request.symbols or [request.symbol]
+        task_id = await _submit_sharded_run(
+            model,
+            run_id,
+            current_user["id"],
+            {
+                "shard_by": request.shard_by,
+                "symbols": symbols,
+                "shard_count": request.shard_count,
+                "base_model": request.base_model
+            },
+            request.date,
+            request.session,
+            request.priority
+        )
+        
+        await services.update_trading_run(run_id, {"task_id": task_id})
+        
+        print(f"✅ Queued sharded intraday run: {task_id} (Run #{run_number}, by {request.shard_by})")
+        
+        return {
+            "status": "queued",
+            "task_id": task_id,
+            "run_id": run_id,
+            "run_number": run_number,
+            "model_id": model_id,
+            "symbol": request.symbol,
+            "symbols": symbols,
+            "shard_by": request.shard_by,
+            "date": request.date,
+            "message": "Sharded trading session queued. task_id tracks the merge step."
+        }
     
-    # Queue task (returns immediately)
-    task = run_intraday_trading.delay(
-        model_id=model_id,
+    # Queue task (returns immediately) - through the fair-share scheduler when enabled
+    task_id = await _submit_run(
+        "workers.run_intraday_trading",
+        {
+            "model_id": model_id,
+            "user_id": current_user["id"],
+            "symbol": request.symbol,
+            "date": request.date,
+            "session": request.session,
+            "base_model": request.base_model,
+            "run_id": run_id  # Pass run_id to worker
+        },
         user_id=current_user["id"],
-        symbol=request.symbol,
-        date=request.date,
-        session=request.session,
         base_model=request.base_model,
-        run_id=run_id  # Pass run_id to worker
+        priority=request.priority
     )
     
     # Store task_id in run (enables stop functionality!)
-    await services.update_trading_run(run_id, {"task_id": task.id})
+    await services.update_trading_run(run_id, {"task_id": task_id})
     
-    print(f"✅ Queued intraday trading task: {task.id} (Run #{run_number})")
+    print(f"✅ Queued intraday trading task: {task_id} (Run #{run_number})")
     
     return {
         "status": "queued",
-        "task_id": task.id,
+        "task_id": task_id,
         "run_id": run_id,
         "run_number": run_number,
         "model_id": model_id,
@@ -1058,27 +1412,31 @@ async def start_daily_backtest(
     run_id = run["id"]
     run_number = run["run_number"]
     
-    # Queue task
-    from workers.trading_tasks import run_daily_backtest
-    
-    task = run_daily_backtest.delay(
-        model_id=model_id,
+    # Queue task (through the fair-share scheduler when enabled)
+    task_id = await _submit_run(
+        "workers.run_daily_backtest",
+        {
+            "model_id": model_id,
+            "user_id": current_user["id"],
+            "symbol": request.symbol,
+            "start_date": request.start_date,
+            "end_date": request.end_date,
+            "base_model": request.base_model,
+            "run_id": run_id
+        },
         user_id=current_user["id"],
-        symbol=request.symbol,
-        start_date=request.start_date,
-        end_date=request.end_date,
         base_model=request.base_model,
-        run_id=run_id
+        priority=request.priority
     )
     
     # Store task_id
-    await services.update_trading_run(run_id, {"task_id": task.id})
+    await services.update_trading_run(run_id, {"task_id": task_id})
     
-    print(f"✅ Queued daily backtest: {task.id} (Run #{run_number}, {request.symbol})")
+    print(f"✅ Queued daily backtest: {task_id} (Run #{run_number}, {request.symbol})")
     
     return {
         "status": "queued",
-        "task_id": task.id,
+        "task_id": task_id,
         "run_id": run_id,
         "run_number": run_number,
         "symbol": request.symbol,
@@ -1110,6 +1468,17 @@ async def get_task_status(task_id: str, current_user: Dict = Depends(require_aut
     if result.state == 'PENDING':
         response["status"] = "Task is waiting to start"
         
+        # Fair-share scheduler: queue position + ETA while not yet dispatched
+        from workers.scheduler import run_scheduler
+        if run_scheduler.enabled:
+            scheduled = await asyncio.to_thread(run_scheduler.status, task_id)
+            if scheduled and scheduled["state"] == "queued":
+                response["status"] = f"Queued (position {scheduled['queue_position']})"
+                response["queue_position"] = scheduled["queue_position"]
+                response["queued_total"] = scheduled["queued_total"]
+                response["eta_seconds"] = scheduled["eta_seconds"]
+                response["priority"] = scheduled["priority"]
+        
     elif result.state == 'PROGRESS':
         response["status"] = result.info.get('status', 'In progress')
         response["current"] = result.info.get('current', 0)
@@ -1204,12 +1573,21 @@ async def get_mcp_status(current_user: Dict = Depends(require_admin)):
 @app.get("/api/models/{model_id}/runs")
 async def get_model_runs_endpoint(
     model_id: int,
+    request: Request,
     current_user: Dict = Depends(require_auth)
 ):
-    """Get all trading runs for a model"""
-    try:
+    """Get all trading runs for a model (ETag / 304 aware)"""
+    async def build():
         runs = await services.get_model_runs(model_id, current_user["id"])
         return {"runs": runs, "total": len(runs)}
+    
+    try:
+        return await cached_json(
+            request,
+            ("runs", model_id, current_user["id"]),
+            [model_scope(model_id)],
+            build
+        )
     except PermissionError:
         raise HTTPException(403, "Access denied")
 
@@ -1218,27 +1596,98 @@ async def get_model_runs_endpoint(
 async def get_run_details_endpoint(
     model_id: int,
     run_id: int,
+    request: Request,
+    format: str = "json",
+    fields: Optional[str] = None,
+    reasoning_fields: Optional[str] = None,
+    include: Optional[str] = None,
+    trades_limit: int = Query(100, ge=1, le=1000),
+    trades_offset: int = Query(0, ge=0),
+    reasoning_limit: int = Query(100, ge=1, le=1000),
+    reasoning_offset: int = Query(0, ge=0),
     current_user: Dict = Depends(require_auth)
 ):
-    """Get detailed info about a specific run"""
-    try:
-        run = await services.get_run_by_id(model_id, run_id, current_user["id"])
+    """
+    Get detailed info about a specific run
+    
+    With include=summary,trades,reasoning: the run header plus only the
+    requested parts - SQL aggregates and paginated trades / reasoning
+    ({items, total, limit, offset, has_more}).
+    
+    Without include: the full run, streamed. Positions and reasoning are read
+    and written page by page. format=json keeps the usual object shape;
+    format=ndjson sends typed records.
+    
+    fields / reasoning_fields project position / reasoning columns.
+    """
+    check_format(format)
+    position_fields = parse_fields(fields)
+    reasoning_columns = parse_fields(reasoning_fields)
+    
+    if include is not None:
+        try:
+            run = await services.get_run_by_id(
+                model_id, run_id, current_user["id"],
+                include=services.parse_run_includes(include),
+                trades_limit=trades_limit,
+                trades_offset=trades_offset,
+                reasoning_limit=reasoning_limit,
+                reasoning_offset=reasoning_offset,
+                trade_fields=position_fields,
+                reasoning_fields=reasoning_columns
+            )
+        except PermissionError:
+            raise HTTPException(403, "Access denied")
+        except ValueError as e:
+            raise HTTPException(400, str(e))
         
         if not run:
             raise HTTPException(404, "Run not found")
-        
-        return run
+        return json_response(request, run)
+    
+    try:
+        run = await services.get_run_header(model_id, run_id, current_user["id"])
     except PermissionError:
         raise HTTPException(403, "Access denied")
+    
+    if not run:
+        raise HTTPException(404, "Run not found")
+    
+    try:
+        positions = primed(services.iter_run_positions(run_id, position_fields))
+        reasoning = primed(services.iter_run_reasoning(run_id, reasoning_columns))
+    except Exception as e:
+        raise HTTPException(400, f"Invalid run detail query: {e}")
+    
+    if format == "ndjson":
+        return stream_response(
+            request,
+            ndjson_chunks(run, [("position", positions, position_fields), ("reasoning", reasoning, reasoning_columns)]),
+            NDJSON_MEDIA_TYPE
+        )
+    
+    return stream_response(
+        request,
+        json_object_chunks(run, [
+            ("positions", positions, position_fields, "position_count"),
+            ("reasoning", reasoning, reasoning_columns, "reasoning_count")
+        ])
+    )
 
 
 @app.post("/api/models/{model_id}/runs/{run_id}/stop")
 async def stop_specific_run(
     model_id: int,
     run_id: int,
+    pause: bool = False,
     current_user: Dict = Depends(require_auth)
 ):
-    """Stop a specific running task and delete it (clean stop = auto-delete)"""
+    """
+    Stop a specific running task and delete it (clean stop = auto-delete)
+    
+    pause=true: stop at the next minute boundary, keep the run (status
+    'stopped') and its checkpoint so it can be resumed later.
+    """
     # Verify ownership
     model = await services.get_model_by_id(model_id, current_user["id"])
     if not model:
@@ -1256,12 +1705,30 @@ async def stop_specific_run(
     if not run.get("task_id"):
         return {"status": "no_task", "message": "Run has no task_id (old format)"}
     
-    # Revoke the Celery task
     from celery_app import celery_app
+    from trading.run_checkpoint import request_cancel
     task_id = run["task_id"]
     
+    if pause:
+        # Cooperative: the worker checkpoints and exits at the next minute
+        await request_cancel(run_id, reason="pause")
+        await services.update_trading_run(run_id, {"status": "stopped"})
+        
+        print(f"⏸️  Pausing Run #{run['run_number']} (task: {task_id})")
+        
+        return {
+            "status": "pausing",
+            "task_id": task_id,
+            "run_id": run_id,
+            "run_number": run["run_number"],
+            "message": "Run will pause at the next minute. Resume with POST .../resume"
+        }
+    
+    # Revoke the Celery task (cancel flag first so a loop that outlives the revoke still exits)
     print(f"🛑 Revoking and deleting run: Run #{run['run_number']} (task: {task_id})")
     
+    await request_cancel(run_id, reason="stop")
+    await asyncio.to_thread(_cancel_scheduled_run, task_id)
     celery_app.control.revoke(task_id, terminate=True)
     
     # Delete run instead of marking stopped (cascades delete positions/reasoning)
@@ -1278,6 +1745,116 @@ async def stop_specific_run(
     }
 
 
+@app.post("/api/models/{model_id}/runs/{run_id}/resume")
+async def resume_run(
+    model_id: int,
+    run_id: int,
+    priority: str = "interactive",
+    current_user: Dict = Depends(require_auth)
+):
+    """Resume a paused (or interrupted) intraday run from its last checkpoint"""
+    from trading.run_checkpoint import checkpoint_id, load_checkpoint, clear_cancel
+    
+    model = await services.get_model_by_id(model_id, current_user["id"])
+    if not model:
+        raise NotFoundError("Model")
+    
+    run = await services.get_run_by_id(model_id, run_id, current_user["id"])
+    if not run:
+        raise HTTPException(404, "Run not found")
+    
+    if run.get("trading_mode") != "intraday":
+        raise HTTPException(400, "Only intraday runs can be resumed")
+    if run.get("status") == "running":
+        return {"status": "already_running", "message": "Run is already running"}
+    if run.get("status") == "completed":
+        raise HTTPException(400, "Run already completed")
+    
+    sharding = (run.get("strategy_snapshot") or {}).get("sharding")
+    if sharding:
+        return await _resume_sharded_run(model, run, sharding, current_user["id"], priority)
+    
+    symbol = run.get("intraday_symbol")
+    checkpoint = await load_checkpoint(checkpoint_id(run_id, symbol))
+    if not checkpoint:
+        raise HTTPException(404, "No checkpoint found for this run")
+    
+    await clear_cancel(run_id)
+    
+    base_model = (
+        checkpoint.get("base_model")
+        or (run.get("strategy_snapshot") or {}).get("default_ai_model")
+        or model.get("default_ai_model")
+    )
+    if not base_model:
+        raise HTTPException(400, "Cannot determine the AI model for this run")
+    task_id = await _submit_run(
+        "workers.run_intraday_trading",
+        {
+            "model_id": model_id,
+            "user_id": current_user["id"],
+            "symbol": symbol,
+            "date": checkpoint["date"],
+            "session": checkpoint["session"],
+            "base_model": base_model,
+            "run_id": run_id
+        },
+        user_id=current_user["id"],
+        base_model=base_model,
+        priority=priority
+    )
+    
+    await services.update_trading_run(run_id, {"status": "running", "task_id": task_id})
+    
+    print(f"⏯️  Resuming Run #{run['run_number']} at minute {checkpoint['minute_index']} (task: {task_id})")
+    
+    return {
+        "status": "resumed",
+        "task_id": task_id,
+        "run_id": run_id,
+        "run_number": run["run_number"],
+        "resume_minute_index": checkpoint["minute_index"],
+        "resume_minute": checkpoint.get("last_minute")
+    }
+
+
+async def _resume_sharded_run(model: Dict, run: Dict, sharding: Dict, user_id: str, priority: str) -> Dict:
+    """Re-queue a sharded run's shards; each resumes from (or returns) its own checkpoint"""
+    from trading.run_checkpoint import load_checkpoint, clear_cancel
+    from workers.sharded_tasks import shard_checkpoint_ids, portfolio_wide_limits
+    
+    if sharding["shard_by"] == "symbol" and len(sharding["symbols"]) > 1:
+        limits = await asyncio.to_thread(portfolio_wide_limits, model, services.get_supabase())
+        if limits:
+            raise HTTPException(400, f"Model now has portfolio-wide limits symbol shards can't enforce: {', '.join(limits)}")
+    
+    run_id = run["id"]
+    date, session = run.get("intraday_date"), run.get("intraday_session") or "regular"
+    ckpt_ids = shard_checkpoint_ids(
+        run_id, sharding["symbols"], date, session, sharding["shard_by"], sharding.get("shard_count", 4)
+    )
+    checkpoints = await asyncio.gather(*(load_checkpoint(ckpt_id) for ckpt_id in ckpt_ids))
+    if not any(checkpoints):
+        raise HTTPException(404, "No checkpoint found for this run")
+    
+    await clear_cancel(run_id)
+    
+    task_id = await _submit_sharded_run(model, run_id, user_id, sharding, date, session, priority)
+    await services.update_trading_run(run_id, {"status": "running", "task_id": task_id})
+    
+    print(f"⏯️  Resuming sharded Run #{run['run_number']}: {sum(1 for c in checkpoints if c)}/{len(ckpt_ids)} shards checkpointed (task: {task_id})")
+    
+    return {
+        "status": "resumed",
+        "task_id": task_id,
+        "run_id": run_id,
+        "run_number": run["run_number"],
+        "shard_by": sharding["shard_by"],
+        "shards_checkpointed": sum(1 for c in checkpoints if c),
+        "shards": len(ckpt_ids)
+    }
+
+
 @app.delete("/api/models/{model_id}/runs/{run_id}")
 async def delete_run_endpoint(
     model_id: int,
@@ -1362,13 +1939,17 @@ async def chat_with_system_agent(
 async def get_chat_history_endpoint(
     model_id: int,
     run_id: int,
+    request: Request,
+    format: str = "json",
+    fields: Optional[str] = None,
     current_user: Dict = Depends(require_auth)
 ):
-    """Get chat message history for a run"""
+    """Get chat message history for a run (format=json|ndjson, fields=a,b,c)"""
+    message_fields = parse_fields(fields)
     try:
         from services.chat_service import get_chat_messages
         messages = await get_chat_messages(model_id, run_id, current_user["id"])
-        return {"messages": messages}
+        return rows_response(request, format, {}, "messages", messages, message_fields)
     except PermissionError:
         raise HTTPException(403, "Access denied")
 
@@ -1376,13 +1957,17 @@ async def get_chat_history_endpoint(
 @app.get("/api/models/{model_id}/chat-history")
 async def get_general_chat_history_endpoint(
     model_id: int,
+    request: Request,
+    format: str = "json",
+    fields: Optional[str] = None,
     current_user: Dict = Depends(require_auth)
 ):
-    """Get general chat message history (no run context)"""
+    """Get general chat message history, no run context (format=json|ndjson, fields=a,b,c)"""
+    message_fields = parse_fields(fields)
     try:
         from services.chat_service import get_chat_messages
         messages = await get_chat_messages(model_id, None, current_user["id"])
-        return {"messages": messages}
+        return rows_response(request, format, {}, "messages", messages, message_fields)
     except PermissionError:
         raise HTTPException(403, "Access denied")
 
@@ -1457,6 +2042,9 @@ async def save_global_chat_settings(
             .eq("id", 1)\
             .execute()
         
+        from services.context_bundle import invalidate_context_bundle
+        invalidate_context_bundle()
+        
         print(f"✅ Admin {current_user.get('email')} updated global chat:")
         print(f"   Model: {chat_model}")
         print(f"   Instructions: {len(chat_instructions)} chars")
@@ -1576,10 +2164,15 @@ async def resume_session_endpoint(
 @app.get("/api/chat/sessions/{session_id}/messages")
 async def get_session_messages_endpoint(
     session_id: int,
+    request: Request,
     limit: Optional[int] = 50,
+    format: str = "json",
+    fields: Optional[str] = None,
     current_user: Dict = Depends(require_auth)
 ):
-    """Get messages for a specific session"""
+    """Get messages for a specific session (format=json|ndjson, fields=a,b,c)"""
+    check_format(format)
+    message_fields = parse_fields(fields)
     try:
         from services.chat_service import get_or_create_session_v2
         
@@ -1592,13 +2185,13 @@ async def get_session_messages_endpoint(
         # Get messages
         supabase = services.get_supabase()
         result = supabase.table("chat_messages")\
-            .select("*")\
+            .select(select_clause(message_fields))\
             .eq("session_id", session_id)\
             .order("timestamp", desc=False)\
             .limit(limit)\
             .execute()
         
-        return {"messages": result.data if result.data else [], "session": session}
+        return rows_response(request, format, {"session": session}, "messages", result.data or [], message_fields)
     
     except PermissionError as e:
         raise HTTPException(403, str(e))
@@ -0,0 +1,34 @@
+-- ============================================================================
+-- MIGRATION 019: Keyset Pagination Indexes for Position History
+-- ============================================================================
+-- Purpose: Serve GET /api/models/{id}/positions pages straight from an index
+--          in (date DESC, action_id, id) order, with optional run/symbol filters
+-- Date: 2025-11-05
+-- ============================================================================
+
+-- Page order for a model's history (matches services.get_model_positions_page)
+CREATE INDEX IF NOT EXISTS idx_positions_model_keyset
+ON public.positions(model_id, date DESC, action_id, id);
+
+-- Run-filtered pages
+CREATE INDEX IF NOT EXISTS idx_positions_run_keyset
+ON public.positions(run_id, date DESC, action_id, id)
+WHERE run_id IS NOT NULL;
+
+-- Symbol-filtered pages
+CREATE INDEX IF NOT EXISTS idx_positions_model_symbol_keyset
+ON public.positions(model_id, symbol, date DESC, action_id, id)
+WHERE symbol IS NOT NULL;
+
+-- ============================================================================
+-- VERIFICATION QUERIES
+-- ============================================================================
+
+-- After running, verify the page query uses the index (no Sort node):
+-- EXPLAIN SELECT * FROM positions
+-- WHERE model_id = 1 AND (date < '2025-10-01' OR (date = '2025-10-01' AND action_id > 5))
+-- ORDER BY date DESC, action_id, id LIMIT 51;
+
+-- ============================================================================
+-- END MIGRATION 019
+-- ============================================================================
@@ -0,0 +1,138 @@
+-- ============================================================================
+-- MIGRATION 020: Materialized Equity Series
+-- ============================================================================
+-- Purpose: Store portfolio valuation (cash, holdings value, total) at every
+--          recorded trade so equity curves and dashboard valuation are an
+--          indexed read instead of a replay of positions + price lookups
+-- Date: 2025-11-06
+-- ============================================================================
+
+-- One row per recorded position (written by the trade recorders)
+CREATE TABLE IF NOT EXISTS public.model_equity (
+  id BIGSERIAL PRIMARY KEY,
+  model_id INT NOT NULL REFERENCES public.models(id) ON DELETE CASCADE,
+  run_id INT REFERENCES public.trading_runs(id) ON DELETE CASCADE,
+  position_id BIGINT REFERENCES public.positions(id) ON DELETE CASCADE,
+
+  -- Bar time: intraday minute, or market open for daily trades
+  ts TIMESTAMPTZ NOT NULL,
+  date DATE NOT NULL,
+  minute_time TIME,
+
+  cash DECIMAL(14,2) NOT NULL,
+  holdings_value DECIMAL(14,2) NOT NULL,
+  total_value DECIMAL(14,2) NOT NULL,
+  positions JSONB,
+
+  created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- Curve reads and "latest valuation" for a model
+CREATE INDEX IF NOT EXISTS idx_model_equity_model_ts
+ON public.model_equity(model_id, ts DESC, id DESC);
+
+-- Curve reads for a single run
+CREATE INDEX IF NOT EXISTS idx_model_equity_run_ts
+ON public.model_equity(run_id, ts)
+WHERE run_id IS NOT NULL;
+
+-- End-of-day value per date (performance portfolio_values)
+CREATE OR REPLACE FUNCTION public.model_equity_daily(p_model_id INT)
+RETURNS TABLE(date DATE, total_value DECIMAL) AS $$
+  SELECT DISTINCT ON (e.date) e.date, e.total_value
+  FROM public.model_equity e
+  WHERE e.model_id = p_model_id
+  ORDER BY e.date, e.ts DESC, e.id DESC;
+$$ LANGUAGE sql STABLE;
+
+-- Equity curve in at most p_buckets time buckets (equal-width over the
+-- series' time span); first/last/min/max point per bucket for downsampling
+CREATE OR REPLACE FUNCTION public.model_equity_curve(
+  p_model_id INT,
+  p_run_id INT DEFAULT NULL,
+  p_start_date DATE DEFAULT NULL,
+  p_end_date DATE DEFAULT NULL,
+  p_buckets INT DEFAULT 500
+)
+RETURNS TABLE(
+  bucket INT, n BIGINT,
+  first_ts TIMESTAMPTZ, first_value DECIMAL,
+  last_ts TIMESTAMPTZ, last_value DECIMAL,
+  min_ts TIMESTAMPTZ, min_value DECIMAL,
+  max_ts TIMESTAMPTZ, max_value DECIMAL
+) AS $$
+  WITH series AS (
+    SELECT e.id, e.ts, e.total_value, extract(epoch FROM e.ts) AS t
+    FROM public.model_equity e
+    WHERE e.model_id = p_model_id
+      AND (p_run_id IS NULL OR e.run_id = p_run_id)
+      AND (p_start_date IS NULL OR e.date >= p_start_date)
+      AND (p_end_date IS NULL OR e.date <= p_end_date)
+  ),
+  span AS (
+    SELECT MIN(t) AS lo, MAX(t) AS hi FROM series
+  ),
+  bucketed AS (
+    SELECT s.*,
+      CASE WHEN span.hi = span.lo THEN 1
+           -- width_bucket puts t = hi in bucket p_buckets + 1
+           ELSE LEAST(width_bucket(s.t, span.lo, span.hi, GREATEST(p_buckets, 1)), GREATEST(p_buckets, 1))
+      END AS bucket
+    FROM series s, span
+  )
+  SELECT
+    b.bucket,
+    COUNT(*),
+    (array_agg(b.ts ORDER BY b.ts, b.id))[1],
+    (array_agg(b.total_value ORDER BY b.ts, b.id))[1],
+    (array_agg(b.ts ORDER BY b.ts DESC, b.id DESC))[1],
+    (array_agg(b.total_value ORDER BY b.ts DESC, b.id DESC))[1],
+    (array_agg(b.ts ORDER BY b.total_value, b.ts))[1],
+    MIN(b.total_value),
+    (array_agg(b.ts ORDER BY b.total_value DESC, b.ts))[1],
+    MAX(b.total_value)
+  FROM bucketed b
+  GROUP BY b.bucket
+  ORDER BY b.bucket;
+$$ LANGUAGE sql STABLE;
+
+-- ROW LEVEL SECURITY
+ALTER TABLE public.model_equity ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can view own equity" ON public.model_equity
+  FOR SELECT USING (
+    EXISTS (
+      SELECT 1 FROM public.models
+      WHERE models.id = model_equity.model_id
+      AND models.user_id = auth.uid()
+    )
+  );
+
+CREATE POLICY "Admins can view all equity" ON public.model_equity
+  FOR SELECT USING (
+    EXISTS (
+      SELECT 1 FROM public.profiles
+      WHERE profiles.id = auth.uid()
+      AND profiles.role = 'admin'
+    )
+  );
+
+-- Existing history is not backfilled: services fall back to computing
+-- valuation from positions when a model has no equity rows yet.
+
+-- ============================================================================
+-- VERIFICATION QUERIES
+-- ============================================================================
+
+-- Latest valuation is a single index probe:
+-- EXPLAIN SELECT * FROM model_equity WHERE model_id = 1 ORDER BY ts DESC, id DESC LIMIT 1;
+
+-- Daily series:
+-- SELECT * FROM model_equity_daily(1);
+
+-- Curve in <= 200 buckets:
+-- SELECT * FROM model_equity_curve(1, NULL, NULL, NULL, 200);
+
+-- ============================================================================
+-- END MIGRATION 020
+-- ============================================================================
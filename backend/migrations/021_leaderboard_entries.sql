@@ -0,0 +1,153 @@
+-- ============================================================================
+-- MIGRATION 021: Incrementally Maintained Leaderboard
+-- ============================================================================
+-- Purpose: One pre-joined row per model holding its latest performance
+--          metrics, kept current by triggers, so leaderboard pages are
+--          index range scans (top-K / around-me) instead of joining every
+--          model with all of its performance_metrics rows per request
+-- Date: 2025-11-06
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS public.leaderboard_entries (
+  model_id INT PRIMARY KEY REFERENCES public.models(id) ON DELETE CASCADE,
+  user_id UUID NOT NULL,
+  model_name TEXT NOT NULL,
+  user_email TEXT,
+  trading_style TEXT,
+  instrument TEXT,
+
+  -- Latest performance_metrics row (by end_date)
+  cumulative_return DECIMAL(10,6) NOT NULL DEFAULT 0,
+  annualized_return DECIMAL(10,6) NOT NULL DEFAULT 0,
+  sharpe_ratio DECIMAL(10,6) NOT NULL DEFAULT 0,
+  max_drawdown DECIMAL(10,6) NOT NULL DEFAULT 0,
+  win_rate DECIMAL(10,6) NOT NULL DEFAULT 0,
+  final_value DECIMAL(12,2) NOT NULL DEFAULT 0,
+  trading_days INT NOT NULL DEFAULT 0,
+  end_date DATE,
+
+  updated_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- Ranking indexes: (metric, model_id) is the page order, ties broken by model_id.
+-- max_drawdown ranks ascending (smaller drawdown is better).
+CREATE INDEX IF NOT EXISTS idx_leaderboard_cumulative_return ON public.leaderboard_entries(cumulative_return DESC, model_id);
+CREATE INDEX IF NOT EXISTS idx_leaderboard_annualized_return ON public.leaderboard_entries(annualized_return DESC, model_id);
+CREATE INDEX IF NOT EXISTS idx_leaderboard_sharpe_ratio ON public.leaderboard_entries(sharpe_ratio DESC, model_id);
+CREATE INDEX IF NOT EXISTS idx_leaderboard_max_drawdown ON public.leaderboard_entries(max_drawdown, model_id);
+CREATE INDEX IF NOT EXISTS idx_leaderboard_win_rate ON public.leaderboard_entries(win_rate DESC, model_id);
+
+-- Filtered boards (trading_style / instrument) by the default metric
+CREATE INDEX IF NOT EXISTS idx_leaderboard_style_return
+ON public.leaderboard_entries(trading_style, instrument, cumulative_return DESC, model_id);
+
+-- ============================================================================
+-- MAINTENANCE TRIGGERS
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION public.refresh_leaderboard_entry(p_model_id INT)
+RETURNS VOID AS $$
+BEGIN
+  INSERT INTO public.leaderboard_entries (
+    model_id, user_id, model_name, user_email, trading_style, instrument,
+    cumulative_return, annualized_return, sharpe_ratio, max_drawdown, win_rate,
+    final_value, trading_days, end_date, updated_at
+  )
+  SELECT
+    m.id, m.user_id, m.signature, p.email, m.trading_style, m.instrument,
+    COALESCE(pm.cumulative_return, 0), COALESCE(pm.annualized_return, 0),
+    COALESCE(pm.sharpe_ratio, 0), COALESCE(pm.max_drawdown, 0), COALESCE(pm.win_rate, 0),
+    COALESCE(pm.final_value, 0), COALESCE(pm.total_trading_days, 0), pm.end_date, NOW()
+  FROM public.models m
+  LEFT JOIN public.profiles p ON p.id = m.user_id
+  JOIN LATERAL (
+    SELECT * FROM public.performance_metrics
+    WHERE model_id = m.id
+    ORDER BY end_date DESC, calculated_at DESC
+    LIMIT 1
+  ) pm ON TRUE
+  WHERE m.id = p_model_id
+  ON CONFLICT (model_id) DO UPDATE SET
+    model_name = EXCLUDED.model_name,
+    user_email = EXCLUDED.user_email,
+    trading_style = EXCLUDED.trading_style,
+    instrument = EXCLUDED.instrument,
+    cumulative_return = EXCLUDED.cumulative_return,
+    annualized_return = EXCLUDED.annualized_return,
+    sharpe_ratio = EXCLUDED.sharpe_ratio,
+    max_drawdown = EXCLUDED.max_drawdown,
+    win_rate = EXCLUDED.win_rate,
+    final_value = EXCLUDED.final_value,
+    trading_days = EXCLUDED.trading_days,
+    end_date = EXCLUDED.end_date,
+    updated_at = NOW();
+END;
+$$ LANGUAGE plpgsql;
+
+-- performance_metrics upsert -> refresh that model's entry
+CREATE OR REPLACE FUNCTION public.leaderboard_on_metrics_change()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF TG_OP = 'DELETE' THEN
+    DELETE FROM public.leaderboard_entries WHERE model_id = OLD.model_id;
+    PERFORM public.refresh_leaderboard_entry(OLD.model_id);
+    RETURN OLD;
+  END IF;
+  PERFORM public.refresh_leaderboard_entry(NEW.model_id);
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_leaderboard_metrics ON public.performance_metrics;
+CREATE TRIGGER trg_leaderboard_metrics
+AFTER INSERT OR UPDATE OR DELETE ON public.performance_metrics
+FOR EACH ROW EXECUTE FUNCTION public.leaderboard_on_metrics_change();
+
+-- Model rename / style change -> refresh denormalized columns
+CREATE OR REPLACE FUNCTION public.leaderboard_on_model_change()
+RETURNS TRIGGER AS $$
+BEGIN
+  UPDATE public.leaderboard_entries
+  SET model_name = NEW.signature,
+      trading_style = NEW.trading_style,
+      instrument = NEW.instrument,
+      updated_at = NOW()
+  WHERE model_id = NEW.id;
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_leaderboard_models ON public.models;
+CREATE TRIGGER trg_leaderboard_models
+AFTER UPDATE OF signature, trading_style, instrument ON public.models
+FOR EACH ROW EXECUTE FUNCTION public.leaderboard_on_model_change();
+
+-- Backfill from existing metrics
+SELECT public.refresh_leaderboard_entry(id) FROM public.models;
+
+-- ROW LEVEL SECURITY (admin-only board; the API reads with the service role)
+ALTER TABLE public.leaderboard_entries ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Admins can view leaderboard" ON public.leaderboard_entries
+  FOR SELECT USING (
+    EXISTS (
+      SELECT 1 FROM public.profiles
+      WHERE profiles.id = auth.uid()
+      AND profiles.role = 'admin'
+    )
+  );
+
+-- ============================================================================
+-- VERIFICATION QUERIES
+-- ============================================================================
+
+-- Entries match the latest metrics row per model:
+-- SELECT COUNT(*) FROM leaderboard_entries;
+-- SELECT COUNT(DISTINCT model_id) FROM performance_metrics;
+
+-- Top-K is an index scan (no Sort node):
+-- EXPLAIN SELECT * FROM leaderboard_entries ORDER BY sharpe_ratio DESC, model_id LIMIT 20;
+
+-- ============================================================================
+-- END MIGRATION 021
+-- ============================================================================
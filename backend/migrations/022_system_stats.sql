@@ -0,0 +1,194 @@
+-- ============================================================================
+-- MIGRATION 022: Write-Maintained System Statistics
+-- ============================================================================
+-- Purpose: Constant-time admin dashboard stats
+--   - system_counters: user/admin/model/run counts kept by triggers
+--     (inserts and deletes, so stopped/deleted runs and model cascades
+--     don't drift the totals)
+--   - positions/logs totals: planner estimates (pg_class.reltuples) instead
+--     of exact-count scans over the two largest tables
+--   - activity_hourly: runs started / trades recorded per hour, maintained
+--     by statement-level triggers (one upsert per insert batch)
+-- Date: 2025-11-07
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS public.system_counters (
+  name TEXT PRIMARY KEY,
+  value BIGINT NOT NULL DEFAULT 0,
+  updated_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS public.activity_hourly (
+  bucket TIMESTAMPTZ NOT NULL,  -- hour start (UTC)
+  kind TEXT NOT NULL CHECK (kind IN ('runs', 'trades')),
+  count BIGINT NOT NULL DEFAULT 0,
+  PRIMARY KEY (bucket, kind)
+);
+
+CREATE OR REPLACE FUNCTION public.bump_system_counter(p_name TEXT, p_delta BIGINT)
+RETURNS VOID AS $$
+  INSERT INTO public.system_counters (name, value, updated_at)
+  VALUES (p_name, p_delta, NOW())
+  ON CONFLICT (name) DO UPDATE
+  SET value = system_counters.value + EXCLUDED.value, updated_at = NOW();
+$$ LANGUAGE sql;
+
+-- ============================================================================
+-- COUNTER TRIGGERS
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION public.count_profiles()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    PERFORM public.bump_system_counter('users', 1);
+    IF NEW.role = 'admin' THEN PERFORM public.bump_system_counter('admins', 1); END IF;
+  ELSIF TG_OP = 'DELETE' THEN
+    PERFORM public.bump_system_counter('users', -1);
+    IF OLD.role = 'admin' THEN PERFORM public.bump_system_counter('admins', -1); END IF;
+  ELSIF NEW.role IS DISTINCT FROM OLD.role THEN
+    IF NEW.role = 'admin' THEN PERFORM public.bump_system_counter('admins', 1); END IF;
+    IF OLD.role = 'admin' THEN PERFORM public.bump_system_counter('admins', -1); END IF;
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_count_profiles ON public.profiles;
+CREATE TRIGGER trg_count_profiles
+AFTER INSERT OR DELETE OR UPDATE OF role ON public.profiles
+FOR EACH ROW EXECUTE FUNCTION public.count_profiles();
+
+CREATE OR REPLACE FUNCTION public.count_models()
+RETURNS TRIGGER AS $$
+BEGIN
+  PERFORM public.bump_system_counter('models', CASE WHEN TG_OP = 'INSERT' THEN 1 ELSE -1 END);
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_count_models ON public.models;
+CREATE TRIGGER trg_count_models
+AFTER INSERT OR DELETE ON public.models
+FOR EACH ROW EXECUTE FUNCTION public.count_models();
+
+-- ============================================================================
+-- ACTIVITY TRIGGERS (statement-level, batch inserts aggregate once)
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION public.track_run_activity()
+RETURNS TRIGGER AS $$
+BEGIN
+  INSERT INTO public.activity_hourly (bucket, kind, count)
+  SELECT date_trunc('hour', COALESCE(started_at, NOW()) AT TIME ZONE 'UTC') AT TIME ZONE 'UTC', 'runs', COUNT(*)
+  FROM new_rows
+  GROUP BY 1
+  ON CONFLICT (bucket, kind) DO UPDATE SET count = activity_hourly.count + EXCLUDED.count;
+
+  PERFORM public.bump_system_counter('runs', (SELECT COUNT(*) FROM new_rows));
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_track_run_activity ON public.trading_runs;
+CREATE TRIGGER trg_track_run_activity
+AFTER INSERT ON public.trading_runs
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION public.track_run_activity();
+
+-- Deleted runs (stop-and-delete, delete_trading_run, model cascade) leave
+-- the hourly activity history alone but come off the run total
+CREATE OR REPLACE FUNCTION public.count_deleted_runs()
+RETURNS TRIGGER AS $$
+BEGIN
+  PERFORM public.bump_system_counter('runs', -(SELECT COUNT(*) FROM old_rows));
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_count_deleted_runs ON public.trading_runs;
+CREATE TRIGGER trg_count_deleted_runs
+AFTER DELETE ON public.trading_runs
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION public.count_deleted_runs();
+
+-- Trades are bucketed by when they were recorded (created_at), not the
+-- simulated trade date, so backtests show up as activity when they ran
+CREATE OR REPLACE FUNCTION public.track_trade_activity()
+RETURNS TRIGGER AS $$
+BEGIN
+  INSERT INTO public.activity_hourly (bucket, kind, count)
+  SELECT date_trunc('hour', NOW() AT TIME ZONE 'UTC') AT TIME ZONE 'UTC', 'trades', COUNT(*)
+  FROM new_rows
+  HAVING COUNT(*) > 0
+  ON CONFLICT (bucket, kind) DO UPDATE SET count = activity_hourly.count + EXCLUDED.count;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_track_trade_activity ON public.positions;
+CREATE TRIGGER trg_track_trade_activity
+AFTER INSERT ON public.positions
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION public.track_trade_activity();
+
+-- ============================================================================
+-- STATS SNAPSHOT (one round trip)
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION public.system_stats_snapshot()
+RETURNS JSONB AS $$
+  SELECT jsonb_build_object(
+    'counters', COALESCE((SELECT jsonb_object_agg(name, value) FROM public.system_counters), '{}'::jsonb),
+    'counters_updated_at', (SELECT MAX(updated_at) FROM public.system_counters),
+    'positions_estimate', (SELECT GREATEST(reltuples, 0)::BIGINT FROM pg_class WHERE oid = 'public.positions'::regclass),
+    'logs_estimate', (SELECT GREATEST(reltuples, 0)::BIGINT FROM pg_class WHERE oid = 'public.logs'::regclass)
+  );
+$$ LANGUAGE sql STABLE SECURITY DEFINER;
+
+-- Seed counters from current data (one-time exact counts)
+INSERT INTO public.system_counters (name, value) VALUES
+  ('users', (SELECT COUNT(*) FROM public.profiles)),
+  ('admins', (SELECT COUNT(*) FROM public.profiles WHERE role = 'admin')),
+  ('models', (SELECT COUNT(*) FROM public.models)),
+  ('runs', (SELECT COUNT(*) FROM public.trading_runs))
+ON CONFLICT (name) DO UPDATE SET value = EXCLUDED.value, updated_at = NOW();
+
+-- Seed recent activity (last 7 days)
+INSERT INTO public.activity_hourly (bucket, kind, count)
+SELECT date_trunc('hour', started_at AT TIME ZONE 'UTC') AT TIME ZONE 'UTC', 'runs', COUNT(*)
+FROM public.trading_runs
+WHERE started_at >= NOW() - INTERVAL '7 days'
+GROUP BY 1
+ON CONFLICT (bucket, kind) DO NOTHING;
+
+INSERT INTO public.activity_hourly (bucket, kind, count)
+SELECT date_trunc('hour', created_at AT TIME ZONE 'UTC') AT TIME ZONE 'UTC', 'trades', COUNT(*)
+FROM public.positions
+WHERE created_at >= NOW() - INTERVAL '7 days'
+GROUP BY 1
+ON CONFLICT (bucket, kind) DO NOTHING;
+
+-- Admin-only tables; the API reads them with the service role
+ALTER TABLE public.system_counters ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.activity_hourly ENABLE ROW LEVEL SECURITY;
+
+-- ============================================================================
+-- VERIFICATION QUERIES
+-- ============================================================================
+
+-- Counters agree with exact counts:
+-- SELECT * FROM system_counters;
+-- SELECT COUNT(*) FROM profiles;
+-- SELECT value FROM system_counters WHERE name = 'runs';
+-- SELECT COUNT(*) FROM trading_runs;
+
+-- Snapshot:
+-- SELECT system_stats_snapshot();
+
+-- Last 24h of activity:
+-- SELECT * FROM activity_hourly WHERE bucket >= NOW() - INTERVAL '24 hours' ORDER BY bucket;
+
+-- ============================================================================
+-- END MIGRATION 022
+-- ============================================================================
@@ -0,0 +1,114 @@
+-- ============================================================================
+-- MIGRATION 023: Cache Version Counters for Conditional GETs
+-- ============================================================================
+-- Purpose: Monotonic version per model (and per user's model list), bumped
+--          by triggers on every write that changes a dashboard response, so
+--          the API can answer polling requests with ETag / 304 Not Modified
+--          without re-querying the data
+--
+-- Scopes:
+--   model:<id>   positions and model_equity inserts, run create/status
+--                change/delete, performance_metrics upserts, model update
+--   user:<uuid>  model create/update/delete for that user's model list
+-- Date: 2025-11-07
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS public.cache_versions (
+  scope TEXT PRIMARY KEY,
+  version BIGINT NOT NULL DEFAULT 1,
+  updated_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE OR REPLACE FUNCTION public.bump_cache_version(p_scope TEXT)
+RETURNS VOID AS $$
+  INSERT INTO public.cache_versions (scope, version, updated_at)
+  VALUES (p_scope, 1, NOW())
+  ON CONFLICT (scope) DO UPDATE
+  SET version = cache_versions.version + 1, updated_at = NOW();
+$$ LANGUAGE sql;
+
+-- ============================================================================
+-- TRIGGERS
+-- ============================================================================
+
+-- Positions / equity: statement-level so a batch insert bumps each model once
+CREATE OR REPLACE FUNCTION public.bump_versions_positions()
+RETURNS TRIGGER AS $$
+BEGIN
+  PERFORM public.bump_cache_version('model:' || model_id)
+  FROM (SELECT DISTINCT model_id FROM new_rows) changed;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_cache_version_positions ON public.positions;
+CREATE TRIGGER trg_cache_version_positions
+AFTER INSERT ON public.positions
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION public.bump_versions_positions();
+
+-- model_equity is written after its positions row: bump again so the
+-- latest valuation isn't served stale under the position's new ETag
+DROP TRIGGER IF EXISTS trg_cache_version_model_equity ON public.model_equity;
+CREATE TRIGGER trg_cache_version_model_equity
+AFTER INSERT ON public.model_equity
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION public.bump_versions_positions();
+
+-- Runs, performance metrics: row-level (low write rate)
+CREATE OR REPLACE FUNCTION public.bump_versions_model_child()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF TG_OP = 'DELETE' THEN
+    PERFORM public.bump_cache_version('model:' || OLD.model_id);
+    RETURN OLD;
+  END IF;
+  PERFORM public.bump_cache_version('model:' || NEW.model_id);
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_cache_version_runs ON public.trading_runs;
+CREATE TRIGGER trg_cache_version_runs
+AFTER INSERT OR DELETE OR UPDATE OF status, ended_at, total_trades, final_return, final_portfolio_value
+ON public.trading_runs
+FOR EACH ROW EXECUTE FUNCTION public.bump_versions_model_child();
+
+DROP TRIGGER IF EXISTS trg_cache_version_metrics ON public.performance_metrics;
+CREATE TRIGGER trg_cache_version_metrics
+AFTER INSERT OR UPDATE OR DELETE ON public.performance_metrics
+FOR EACH ROW EXECUTE FUNCTION public.bump_versions_model_child();
+
+-- Models: the model itself and its owner's model list
+CREATE OR REPLACE FUNCTION public.bump_versions_models()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF TG_OP = 'DELETE' THEN
+    PERFORM public.bump_cache_version('model:' || OLD.id);
+    PERFORM public.bump_cache_version('user:' || OLD.user_id);
+    RETURN OLD;
+  END IF;
+  PERFORM public.bump_cache_version('model:' || NEW.id);
+  PERFORM public.bump_cache_version('user:' || NEW.user_id);
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_cache_version_models ON public.models;
+CREATE TRIGGER trg_cache_version_models
+AFTER INSERT OR UPDATE OR DELETE ON public.models
+FOR EACH ROW EXECUTE FUNCTION public.bump_versions_models();
+
+-- Service-role only
+ALTER TABLE public.cache_versions ENABLE ROW LEVEL SECURITY;
+
+-- ============================================================================
+-- VERIFICATION QUERIES
+-- ============================================================================
+
+-- A trade bumps its model's version:
+-- SELECT * FROM cache_versions WHERE scope = 'model:1';
+
+-- ============================================================================
+-- END MIGRATION 023
+-- ============================================================================
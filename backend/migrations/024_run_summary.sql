@@ -0,0 +1,81 @@
+-- ============================================================================
+-- MIGRATION 024: Run Summary Aggregates
+-- ============================================================================
+-- Purpose: Compute run detail aggregates (trade counts, first/last trade
+--          time, reasoning counts, P/L) in one SQL call instead of loading
+--          every position and ai_reasoning row into the API
+--   - run_summary(run_id): JSONB aggregate used by run_service.get_run_summary
+--   - Index matching the run trade page order (date, minute_time, id)
+-- Date: 2025-11-08
+-- ============================================================================
+
+-- Run trade pages / streams: ORDER BY date, minute_time, id
+CREATE INDEX IF NOT EXISTS idx_positions_run_order
+ON public.positions(run_id, date, minute_time, id)
+WHERE run_id IS NOT NULL;
+
+CREATE OR REPLACE FUNCTION public.run_summary(p_run_id INT)
+RETURNS JSONB AS $$
+  WITH trades AS (
+    SELECT
+      COUNT(*) AS position_count,
+      COUNT(*) FILTER (WHERE action_type IN ('buy', 'sell')) AS trade_count,
+      COUNT(*) FILTER (WHERE action_type = 'buy') AS buy_count,
+      COUNT(*) FILTER (WHERE action_type = 'sell') AS sell_count,
+      COUNT(DISTINCT symbol) FILTER (WHERE action_type IN ('buy', 'sell')) AS symbols_traded,
+      MIN(date + COALESCE(minute_time, TIME '00:00')) FILTER (WHERE action_type IN ('buy', 'sell')) AS first_trade_at,
+      MAX(date + COALESCE(minute_time, TIME '00:00')) FILTER (WHERE action_type IN ('buy', 'sell')) AS last_trade_at
+    FROM public.positions
+    WHERE run_id = p_run_id
+  ),
+  reasoning AS (
+    SELECT reasoning_type, COUNT(*) AS n
+    FROM public.ai_reasoning
+    WHERE run_id = p_run_id
+    GROUP BY reasoning_type
+  ),
+  equity AS (
+    SELECT
+      (SELECT m.initial_cash
+       FROM public.trading_runs r JOIN public.models m ON m.id = r.model_id
+       WHERE r.id = p_run_id) AS start_value,
+      COALESCE(
+        (SELECT e.total_value FROM public.model_equity e
+         WHERE e.run_id = p_run_id
+         ORDER BY e.ts DESC, e.id DESC
+         LIMIT 1),
+        (SELECT final_portfolio_value FROM public.trading_runs WHERE id = p_run_id)
+      ) AS end_value
+  )
+  SELECT jsonb_build_object(
+    'position_count', t.position_count,
+    'trade_count', t.trade_count,
+    'buy_count', t.buy_count,
+    'sell_count', t.sell_count,
+    'symbols_traded', t.symbols_traded,
+    'first_trade_at', t.first_trade_at,
+    'last_trade_at', t.last_trade_at,
+    'reasoning_count', COALESCE((SELECT SUM(n) FROM reasoning), 0),
+    'reasoning_by_type', COALESCE((SELECT jsonb_object_agg(reasoning_type, n) FROM reasoning), '{}'::jsonb),
+    'start_value', e.start_value,
+    'end_value', e.end_value,
+    'pnl', e.end_value - e.start_value,
+    'pnl_pct', CASE WHEN e.start_value > 0 THEN ROUND((e.end_value - e.start_value) / e.start_value * 100, 4) END
+  )
+  FROM trades t, equity e;
+$$ LANGUAGE sql STABLE;
+
+-- ============================================================================
+-- VERIFICATION QUERIES
+-- ============================================================================
+
+-- Aggregates for a run:
+-- SELECT run_summary(1);
+
+-- Trade pages use the new index (no Sort node):
+-- EXPLAIN SELECT * FROM positions WHERE run_id = 1
+-- ORDER BY date, minute_time, id LIMIT 100 OFFSET 100;
+
+-- ============================================================================
+-- END MIGRATION 024
+-- ============================================================================
@@ -0,0 +1,53 @@
+-- ============================================================================
+-- MIGRATION 025: Run Archive Markers
+-- ============================================================================
+-- Purpose: Support moving old completed runs' positions / ai_reasoning rows
+--          out of the hot tables into Parquet files (services/archive_service.py)
+--   - trading_runs.archived_at / archived_rows: run is served from the archive
+--   - trading_runs.archive_manifest: archive files, row counts and summary
+--     aggregates (source of truth - no local manifest file)
+--   - model_equity.position_id: SET NULL instead of CASCADE, so pruning an
+--     archived run's positions keeps the model's equity series
+--   - Partial index for finding archive candidates
+-- Date: 2025-11-08
+-- ============================================================================
+
+ALTER TABLE public.trading_runs ADD COLUMN IF NOT EXISTS archived_at TIMESTAMPTZ;
+ALTER TABLE public.trading_runs ADD COLUMN IF NOT EXISTS archived_rows INT;
+ALTER TABLE public.trading_runs ADD COLUMN IF NOT EXISTS archive_manifest JSONB;
+
+COMMENT ON COLUMN public.trading_runs.archived_at IS 'When positions/ai_reasoning were moved to the run archive (NULL = hot)';
+COMMENT ON COLUMN public.trading_runs.archived_rows IS 'positions + ai_reasoning rows written to the archive';
+COMMENT ON COLUMN public.trading_runs.archive_manifest IS 'Archive entry: {storage, archived_at, summary, files: {positions, reasoning}}';
+
+-- Per-model archived run lookups (RunArchive.runs_for_model)
+CREATE INDEX IF NOT EXISTS idx_trading_runs_archived
+ON public.trading_runs(model_id, id)
+WHERE archived_at IS NOT NULL;
+
+-- Archive sweep: oldest completed, unarchived runs first
+CREATE INDEX IF NOT EXISTS idx_trading_runs_archive_candidates
+ON public.trading_runs(ended_at)
+WHERE status = 'completed' AND archived_at IS NULL;
+
+-- Keep equity points when their position row is archived
+ALTER TABLE public.model_equity DROP CONSTRAINT IF EXISTS model_equity_position_id_fkey;
+ALTER TABLE public.model_equity
+  ADD CONSTRAINT model_equity_position_id_fkey
+  FOREIGN KEY (position_id) REFERENCES public.positions(id) ON DELETE SET NULL;
+
+-- ============================================================================
+-- VERIFICATION QUERIES
+-- ============================================================================
+
+-- Archived runs and what they held:
+-- SELECT id, model_id, run_number, archived_at, archived_rows
+-- FROM trading_runs WHERE archived_at IS NOT NULL ORDER BY archived_at DESC;
+
+-- No hot rows left for archived runs (expect 0):
+-- SELECT COUNT(*) FROM positions p JOIN trading_runs r ON r.id = p.run_id
+-- WHERE r.archived_at IS NOT NULL;
+
+-- ============================================================================
+-- END MIGRATION 025
+-- ============================================================================
@@ -0,0 +1,50 @@
+-- ============================================================================
+-- MIGRATION 026: Chat Context Bundle
+-- ============================================================================
+-- Purpose: Everything the chat agents need before the first LLM call in one
+--          round trip (services/context_bundle.py):
+--   - model row (configuration + owner for the access check)
+--   - global chat settings
+--   - the run being discussed (only if it belongs to the model)
+--   - run_summary() aggregates for that run (migration 024)
+--   - the model's 10 most recent runs (model analysis prompt)
+-- Date: 2025-11-08
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION public.chat_context_bundle(p_model_id INT, p_run_id INT DEFAULT NULL)
+RETURNS JSONB AS $$
+  SELECT jsonb_build_object(
+    'model', (SELECT to_jsonb(m) FROM public.models m WHERE m.id = p_model_id),
+    'chat_settings', (SELECT to_jsonb(s) FROM public.global_chat_settings s WHERE s.id = 1),
+    'run', (
+      SELECT to_jsonb(r) FROM public.trading_runs r
+      WHERE p_run_id IS NOT NULL AND r.id = p_run_id AND r.model_id = p_model_id
+    ),
+    'run_summary', CASE WHEN p_run_id IS NOT NULL THEN public.run_summary(p_run_id) END,
+    'recent_runs', COALESCE((
+      SELECT jsonb_agg(to_jsonb(r) ORDER BY r.run_number DESC)
+      FROM (
+        SELECT id, run_number, status, trading_mode, total_trades, final_return,
+               final_portfolio_value, intraday_symbol, intraday_date
+        FROM public.trading_runs
+        WHERE model_id = p_model_id
+        ORDER BY run_number DESC
+        LIMIT 10
+      ) r
+    ), '[]'::jsonb)
+  );
+$$ LANGUAGE sql STABLE;
+
+-- ============================================================================
+-- VERIFICATION QUERIES
+-- ============================================================================
+
+-- Run chat bootstrap:
+-- SELECT chat_context_bundle(1, 85);
+
+-- Model chat bootstrap:
+-- SELECT chat_context_bundle(1);
+
+-- ============================================================================
+-- END MIGRATION 026
+-- ============================================================================
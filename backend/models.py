@@ -4,7 +4,7 @@ All data models for the AI-Trader API
 """
 
 from pydantic import BaseModel, EmailStr, Field
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Literal
 from datetime import datetime, date
 
 
@@ -110,6 +110,10 @@ class PositionHistoryResponse(BaseModel):
     model_name: str
     positions: List[Position]
     total_records: int
+    page: Optional[int] = None
+    page_size: Optional[int] = None
+    has_next: bool = False
+    next_cursor: Optional[str] = None  # Pass as ?cursor= for the next page
 
 
 class LatestPositionResponse(BaseModel):
@@ -122,6 +126,20 @@ class LatestPositionResponse(BaseModel):
     total_value: float
 
 
+class EquityPoint(BaseModel):
+    ts: str
+    total_value: float
+
+
+class EquityCurveResponse(BaseModel):
+    model_id: int
+    model_name: str
+    run_id: Optional[int] = None
+    method: str
+    total_points: int  # Points stored before downsampling
+    points: List[EquityPoint]
+
+
 # ============================================================================
 # CHAT/RUN MODELS (NEW)
 # ============================================================================
@@ -249,6 +267,22 @@ class SystemStatsResponse(BaseModel):
     active_models: int
     admin_count: int
     user_count: int
+    total_runs: int = 0
+    approximate: List[str] = []  # Fields that are planner estimates
+    as_of: Optional[str] = None  # When the numbers were read
+
+
+class ActivityBucket(BaseModel):
+    bucket: str  # Hour start (UTC)
+    runs: int
+    trades: int
+
+
+class ActivitySeriesResponse(BaseModel):
+    """Admin-only: Hourly activity"""
+    hours: int
+    series: List[ActivityBucket]
+    as_of: Optional[str] = None
 
 
 # ============================================================================
@@ -261,9 +295,13 @@ class LeaderboardEntry(BaseModel):
     model_name: str
     user_id: str
     user_email: str
+    trading_style: Optional[str] = None
+    instrument: Optional[str] = None
     cumulative_return: float
+    annualized_return: float = 0.0
     sharpe_ratio: float
     max_drawdown: float
+    win_rate: float = 0.0
     final_value: float
     trading_days: int
 
@@ -272,6 +310,8 @@ class LeaderboardResponse(BaseModel):
     """Admin-only: Compare all models across all users"""
     leaderboard: List[LeaderboardEntry]
     total_models: int
+    metric: str = "cumulative_return"
+    rank: Optional[int] = None  # Set for around-me queries
 
 
 # ============================================================================
@@ -289,6 +329,7 @@ class DailyBacktestRequest(BaseModel):
     base_model: str
     start_date: str
     end_date: str
+    priority: str = "batch"  # Scheduler class: 'interactive' or 'batch'
 
 
 class IntradayTradingRequest(BaseModel):
@@ -296,6 +337,11 @@ class IntradayTradingRequest(BaseModel):
     symbol: str  # Single stock for intraday
     date: str  # Specific date
     session: str = "regular"  # 'pre', 'regular', 'after'
+    priority: str = "interactive"  # Scheduler class: 'interactive' or 'batch'
+    # Sharded runs (optional): split across workers and merge into one run
+    shard_by: Optional[Literal["symbol", "time"]] = None  # 'symbol' (basket) or 'time' (flat at window boundaries)
+    symbols: Optional[List[str]] = None  # Basket for shard_by='symbol' (defaults to [symbol])
+    shard_count: int = Field(4, ge=1, le=32)  # Time windows for shard_by='time'
 
 
 # ============================================================================
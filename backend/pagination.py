@@ -3,12 +3,19 @@ Pagination Utilities
 Provides consistent pagination across API endpoints
 """
 
+import json
+import base64
+import hashlib
+from datetime import date
 from pydantic import BaseModel
-from typing import List, TypeVar, Generic
-from fastapi import Query
+from typing import Any, Dict, List, Optional, TypeVar, Generic
+from fastapi import HTTPException, Query
 
 T = TypeVar('T')
 
+# Sort key fields of /api/models/{id}/positions cursors and their types
+POSITION_CURSOR_FIELDS = {"date": date, "action_id": int, "id": int}
+
 
 class PaginationParams(BaseModel):
     """Pagination parameters"""
@@ -26,6 +33,86 @@ class PaginationParams(BaseModel):
         return self.page_size
 
 
+class CursorPaginationParams(PaginationParams):
+    """
+    Keyset pagination parameters
+    
+    With a cursor the next page is read from the last row's sort key (page
+    latency independent of history size); without one, page/page_size fall
+    back to a DB-side offset.
+    """
+    cursor: Optional[str] = None
+
+
+def encode_cursor(key: Dict[str, Any], filters: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Opaque cursor for the row a page ended on
+    
+    Args:
+        key: Sort key of the last row (e.g. {"date": ..., "action_id": ..., "id": ...})
+        filters: Filters the page was read with (cursor is rejected if they change)
+    """
+    payload = {"k": key, "f": _filters_fingerprint(filters)}
+    raw = json.dumps(payload, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(
+    cursor: str,
+    filters: Optional[Dict[str, Any]] = None,
+    fields: Optional[Dict[str, type]] = None
+) -> Dict[str, Any]:
+    """
+    Sort key from a cursor
+    
+    Args:
+        cursor: Cursor from a previous page's next_cursor
+        filters: Filters of the current request
+        fields: Expected key fields and types (int, str or date - dates must
+            be YYYY-MM-DD strings); the key is checked before it reaches a query
+    
+    Raises:
+        HTTPException(400): Malformed cursor or cursor from different filters
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        key = payload["k"]
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    if payload.get("f") != _filters_fingerprint(filters):
+        raise HTTPException(status_code=400, detail="Cursor does not match the current filters")
+    if fields is not None and not _valid_key(key, fields):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return key
+
+
+def _valid_key(key: Any, fields: Dict[str, type]) -> bool:
+    if not isinstance(key, dict) or set(key) != set(fields):
+        return False
+    for name, kind in fields.items():
+        value = key[name]
+        if kind is int:
+            if not isinstance(value, int) or isinstance(value, bool):
+                return False
+        elif kind is date:
+            if not isinstance(value, str) or len(value) != 10:
+                return False
+            try:
+                date.fromisoformat(value)
+            except ValueError:
+                return False
+        elif not isinstance(value, kind):
+            return False
+    return True
+
+
+def _filters_fingerprint(filters: Optional[Dict[str, Any]]) -> str:
+    active = {k: v for k, v in (filters or {}).items() if v is not None}
+    return hashlib.sha1(json.dumps(active, sort_keys=True, default=str).encode()).hexdigest()[:12]
+
+
 class PaginatedResponse(BaseModel, Generic[T]):
     """Paginated response wrapper"""
     items: List[T]
@@ -75,3 +162,11 @@ def paginate(
         has_prev=page > 1
     )
 
+
+def create_cursor_pagination_params(
+    page: int = Query(1, ge=1, description="Page number (ignored when cursor is set)"),
+    page_size: int = Query(50, ge=1, le=500, description="Items per page"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the previous page's next_cursor")
+) -> CursorPaginationParams:
+    """FastAPI dependency for keyset pagination parameters"""
+    return CursorPaginationParams(page=page, page_size=page_size, cursor=cursor)
@@ -5,6 +5,9 @@ Handles all database operations with Supabase
 
 import json
 import re
+import time
+import asyncio
+from collections import OrderedDict
 from pathlib import Path
 from typing import List, Dict, Optional, Any
 from datetime import date, datetime
@@ -52,6 +55,14 @@ from chat_service import (
     save_chat_message,
     get_chat_messages
 )
+from utils.auth_cache import invalidate_model
+from services.archive_service import run_archive
+from utils.http_cache import version_store, model_scope, user_scope
+from equity_service import (
+    get_latest_equity,
+    get_equity_curve,
+    get_daily_equity
+)
 
 
 # ============================================================================
@@ -132,14 +143,34 @@ async def get_all_models_admin() -> List[Dict]:
 
 
 async def get_model_by_id(model_id: int, user_id: str) -> Optional[Dict]:
-    """Get model by ID (checks ownership)"""
-    supabase = get_supabase()
+    """
+    Get model by ID (checks ownership)
     
-    result = supabase.table("models").select("*").eq("id", model_id).eq("user_id", user_id).execute()
+    Repeat checks within a request come from the request memo, and across
+    requests from a short-TTL ownership cache (utils/auth_cache.py) that
+    update_model / delete_model invalidate. Misses are never cached.
+    """
+    from utils.auth_cache import ownership_cache, request_memo
     
-    if result.data and len(result.data) > 0:
-        return result.data[0]
-    return None
+    memo = request_memo()
+    memo_key = ("model", model_id, user_id)
+    if memo is not None and memo_key in memo:
+        return dict(memo[memo_key])
+    
+    model = ownership_cache.get(user_id, model_id)
+    if model is None:
+        supabase = get_supabase()
+        
+        result = supabase.table("models").select("*").eq("id", model_id).eq("user_id", user_id).execute()
+        
+        if not result.data:
+            return None
+        model = result.data[0]
+        ownership_cache.put(user_id, model_id, model)
+    
+    if memo is not None:
+        memo[memo_key] = model
+    return dict(model)
 
 
 def generate_signature(name: str, user_id: str) -> str:
@@ -253,6 +284,7 @@ async def create_model(
         insert_data["custom_instructions"] = custom_instructions
     
     result = supabase.table("models").insert(insert_data).execute()
+    version_store.forget(user_scope(user_id))
     
     if result.data and len(result.data) > 0:
         return result.data[0]
@@ -345,6 +377,8 @@ async def update_model(
         update_data["custom_instructions"] = custom_instructions
     
     result = supabase.table("models").update(update_data).eq("id", model_id).eq("user_id", user_id).execute()
+    invalidate_model(model_id)
+    version_store.forget(model_scope(model_id), user_scope(user_id))
     
     if result.data and len(result.data) > 0:
         return result.data[0]
@@ -370,6 +404,11 @@ async def delete_model(model_id: int, user_id: str) -> bool:
     supabase = get_supabase()
     
     result = supabase.table("models").delete().eq("id", model_id).eq("user_id", user_id).execute()
+    invalidate_model(model_id)
+    version_store.forget(model_scope(model_id), user_scope(user_id))
+    
+    # Archived runs' files aren't covered by the cascade
+    await asyncio.to_thread(run_archive.delete_model, model_id)
     
     return True  # Supabase cascades delete to positions/logs
 
@@ -389,7 +428,241 @@ async def get_model_positions(model_id: int, user_id: str) -> List[Dict]:
     
     result = supabase.table("positions").select("*").eq("model_id", model_id).order("date", desc=True).order("action_id", desc=False).execute()
     
-    return result.data if result.data else []
+    archived = _archived_positions(model_id, {})
+    if not archived:
+        return result.data if result.data else []
+    return _sort_positions((result.data or []) + archived)
+
+
+POSITION_COUNT_TTL = 30.0  # Seconds a cached position count stays fresh
+
+_position_count_cache: Dict[tuple, tuple] = {}  # (model_id, filters) -> (count, cached_at)
+
+
+def _apply_position_filters(query, filters: Dict[str, Any]):
+    """Apply optional run/date/symbol filters to a positions query"""
+    if filters.get("run_id") is not None:
+        query = query.eq("run_id", filters["run_id"])
+    if filters.get("start_date"):
+        query = query.gte("date", filters["start_date"])
+    if filters.get("end_date"):
+        query = query.lte("date", filters["end_date"])
+    if filters.get("symbol"):
+        query = query.eq("symbol", filters["symbol"].upper())
+    return query
+
+
+def _position_sort_key(row: Dict) -> tuple:
+    return (row.get("action_id") or 0, row.get("id") or 0)
+
+
+def _sort_positions(rows: List[Dict]) -> List[Dict]:
+    """Position history order: date DESC, action_id ASC, id ASC"""
+    rows = sorted(rows, key=_position_sort_key)
+    rows.sort(key=lambda row: str(row.get("date")), reverse=True)
+    return rows
+
+
+def _after_position_key(row: Dict, key: Dict[str, Any]) -> bool:
+    """Row comes after the cursor key in position history order"""
+    row_date = str(row.get("date"))
+    if row_date != key["date"]:
+        return row_date < key["date"]
+    return _position_sort_key(row) > (key["action_id"], key["id"])
+
+
+def _archived_position_runs(model_id: int, filters: Dict[str, Any]) -> List[tuple]:
+    """
+    A model's archived runs that can hold matching positions
+    
+    Returns:
+        [(run_id, {date: matching rows} or None)] - None for entries archived
+        without position_counts (the file has to be read to know)
+    """
+    symbol = (filters.get("symbol") or "").upper()
+    start_date, end_date = filters.get("start_date"), filters.get("end_date")
+    
+    runs = []
+    for run_id in run_archive.runs_for_model(model_id):
+        if filters.get("run_id") is not None and run_id != filters["run_id"]:
+            continue
+        counts = (run_archive.entry(run_id) or {}).get("position_counts")
+        if counts is None:
+            runs.append((run_id, None))
+            continue
+        per_date = {}
+        for day, by_symbol in counts.items():
+            if (start_date and day < start_date) or (end_date and day > end_date):
+                continue
+            n = by_symbol.get(symbol, 0) if symbol else sum(by_symbol.values())
+            if n:
+                per_date[day] = n
+        if per_date:
+            runs.append((run_id, per_date))
+    return runs
+
+
+def _read_archived_positions(run_id: int, filters: Dict[str, Any]) -> List[Dict]:
+    """One archived run's positions, filtered like _apply_position_filters"""
+    symbol = (filters.get("symbol") or "").upper()
+    start_date, end_date = filters.get("start_date"), filters.get("end_date")
+    
+    def matches(row: Dict) -> bool:
+        row_date = str(row.get("date"))
+        return (not symbol or row.get("symbol") == symbol)\
+            and (not start_date or row_date >= start_date)\
+            and (not end_date or row_date <= end_date)
+    
+    return [row for row in run_archive.read(run_id, "positions") or [] if matches(row)]
+
+
+def _archived_positions(model_id: int, filters: Dict[str, Any]) -> List[Dict]:
+    """
+    A model's positions from archived runs (services/archive_service.py),
+    filtered like _apply_position_filters and in position history order
+    """
+    runs = _archived_position_runs(model_id, filters)
+    return _sort_positions([row for run_id, _ in runs for row in _read_archived_positions(run_id, filters)])
+
+
+def _archived_positions_head(
+    runs: List[tuple],
+    filters: Dict[str, Any],
+    cursor_key: Optional[Dict[str, Any]],
+    limit: int,
+    floor_date: Optional[str] = None
+) -> List[Dict]:
+    """
+    First `limit` archived positions after the cursor, in position history order
+    
+    Runs are opened newest-date first and only while they can still place a
+    row in the first `limit` (or above floor_date, the date of the last hot
+    row the page can use).
+    """
+    candidates = []
+    for run_id, per_date in runs:
+        days = [d for d in per_date if not cursor_key or d <= cursor_key["date"]] if per_date is not None else None
+        if days == []:
+            continue
+        candidates.append((max(days) if days else "9999-12-31", run_id))
+    candidates.sort(reverse=True)
+    
+    rows: List[Dict] = []
+    for max_date, run_id in candidates:
+        if floor_date and max_date < floor_date:
+            break
+        if len(rows) >= limit and str(rows[limit - 1]["date"]) > max_date:
+            break
+        run_rows = _read_archived_positions(run_id, filters)
+        if cursor_key:
+            run_rows = [row for row in run_rows if _after_position_key(row, cursor_key)]
+        rows = _sort_positions(rows + run_rows)[:limit]
+    return rows
+
+
+async def count_model_positions(model_id: int, filters: Optional[Dict[str, Any]] = None) -> int:
+    """
+    Position count for a model (cached for POSITION_COUNT_TTL seconds)
+    
+    Counting is kept off the page path: pages are keyset reads, the total is
+    one cached count query per model/filter combination, plus the archived
+    runs' per-date counts from their manifests.
+    """
+    filters = filters or {}
+    cache_key = (model_id, tuple(sorted((k, v) for k, v in filters.items() if v is not None)))
+    cached = _position_count_cache.get(cache_key)
+    if cached and time.monotonic() - cached[1] < POSITION_COUNT_TTL:
+        return cached[0]
+    
+    supabase = get_supabase()
+    query = supabase.table("positions").select("id", count="exact").eq("model_id", model_id)
+    result = _apply_position_filters(query, filters).limit(1).execute()
+    count = result.count or 0
+    for run_id, per_date in _archived_position_runs(model_id, filters):
+        count += sum(per_date.values()) if per_date is not None else len(_read_archived_positions(run_id, filters))
+    
+    _position_count_cache[cache_key] = (count, time.monotonic())
+    return count
+
+
+async def get_model_positions_page(
+    model_id: int,
+    user_id: str,
+    page_size: int = 50,
+    cursor_key: Optional[Dict[str, Any]] = None,
+    offset: int = 0,
+    filters: Optional[Dict[str, Any]] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    One page of position history, paginated in the database
+    
+    Order is (date DESC, action_id ASC, id ASC). With cursor_key the page
+    starts after that row (keyset, index-backed); otherwise at offset.
+    Positions of archived runs are merged in from the run archive, opening
+    only the archived runs whose dates can reach the page (offset pages then
+    read the first offset + page_size hot rows).
+    
+    Args:
+        model_id: Model ID
+        user_id: Owner (checked)
+        page_size: Rows per page
+        cursor_key: {"date", "action_id", "id"} of the previous page's last row
+            (validated by decode_cursor with POSITION_CURSOR_FIELDS)
+        offset: Row offset when no cursor is given
+        filters: Optional run_id / start_date / end_date / symbol
+    
+    Returns:
+        {"items", "has_next", "last_key"} or None if the model isn't the user's
+    """
+    model = await get_model_by_id(model_id, user_id)
+    if not model:
+        return None
+    
+    supabase = get_supabase()
+    if cursor_key:
+        offset = 0
+    
+    def build_query():
+        query = supabase.table("positions").select("*").eq("model_id", model_id)
+        query = _apply_position_filters(query, filters or {})
+        if cursor_key:
+            d, a, i = cursor_key["date"], cursor_key["action_id"], cursor_key["id"]
+            query = query.or_(
+                f"date.lt.{d},"
+                f"and(date.eq.{d},action_id.gt.{a}),"
+                f"and(date.eq.{d},action_id.eq.{a},id.gt.{i})"
+            )
+        return query.order("date", desc=True)\
+            .order("action_id", desc=False)\
+            .order("id", desc=False)
+    
+    archived_runs = _archived_position_runs(model_id, filters or {})
+    
+    # One extra row tells us whether another page exists
+    if not archived_runs:
+        rows = build_query().range(offset, offset + page_size).execute().data or []
+    else:
+        from utils.json_stream import iter_query_pages
+        need = offset + page_size + 1
+        hot = []
+        for chunk in iter_query_pages(build_query):
+            hot.extend(chunk)
+            if len(hot) >= need:
+                break
+        hot = hot[:need]
+        floor_date = str(hot[-1]["date"]) if len(hot) >= need else None
+        archived = _archived_positions_head(archived_runs, filters or {}, cursor_key, need, floor_date)
+        rows = _sort_positions(hot + archived)[offset:need]
+    
+    has_next = len(rows) > page_size
+    items = rows[:page_size]
+    last = items[-1] if items else None
+    
+    return {
+        "items": items,
+        "has_next": has_next,
+        "last_key": {"date": str(last["date"]), "action_id": last["action_id"], "id": last["id"]} if last else None
+    }
 
 
 async def get_latest_position(model_id: int, user_id: str) -> Optional[Dict]:
@@ -401,6 +674,18 @@ async def get_latest_position(model_id: int, user_id: str) -> Optional[Dict]:
     if not model:
         return None
     
+    # Materialized valuation written with every trade (single indexed read)
+    equity = await get_latest_equity(model_id)
+    if equity:
+        return {
+            **equity,
+            'model_name': model.get('signature', f'model-{model_id}'),
+            'cash': float(equity['cash']),
+            'stocks_value': float(equity['holdings_value']),
+            'total_value': float(equity['total_value'])
+        }
+    
+    # No equity rows yet (history recorded before model_equity existed)
     result = supabase.table("positions").select("*").eq("model_id", model_id).order("date", desc=True).order("id", desc=True).limit(2).execute()
     
     if result.data and len(result.data) > 0:
@@ -506,6 +791,26 @@ async def get_model_logs(model_id: int, user_id: str, trade_date: Optional[str]
     return result.data if result.data else []
 
 
+def iter_model_logs(model_id: int, trade_date: Optional[str] = None, fields: Optional[List[str]] = None):
+    """
+    Logs for a model in time order, page by page (ownership checked by caller)
+    
+    Yields lists of rows; unlike get_model_logs this isn't capped at one
+    PostgREST page and never holds the whole history in memory.
+    """
+    from utils.json_stream import iter_query_pages, select_clause
+    
+    supabase = get_supabase()
+    
+    def build_query():
+        query = supabase.table("logs").select(select_clause(fields)).eq("model_id", model_id)
+        if trade_date:
+            query = query.eq("date", trade_date)
+        return query.order("timestamp").order("id")
+    
+    return iter_query_pages(build_query)
+
+
 async def create_log(model_id: int, log_data: Dict) -> Dict:
     """Insert new log entry"""
     supabase = get_supabase()
@@ -627,8 +932,9 @@ async def calculate_and_cache_performance(model_id: int, model_signature: str) -
         "leverage_used": leverage_used
     }
     
-    # Upsert (insert or update if exists)
+    # Upsert (insert or update if exists) - the leaderboard trigger refreshes this model's entry
     result = supabase.table("performance_metrics").upsert(perf_data).execute()
+    _leaderboard_cache.clear()
     
     if result.data and len(result.data) > 0:
         return result.data[0]
@@ -639,82 +945,302 @@ async def calculate_and_cache_performance(model_id: int, model_signature: str) -
 # LEADERBOARD SERVICES (Admin Only)
 # ============================================================================
 
-async def get_admin_leaderboard() -> List[Dict]:
-    """Admin only: Get leaderboard of all models across all users"""
-    supabase = get_supabase()
+LEADERBOARD_METRICS = {
+    # metric -> True if higher is better
+    "cumulative_return": True,
+    "annualized_return": True,
+    "sharpe_ratio": True,
+    "win_rate": True,
+    "max_drawdown": False,
+}
+
+LEADERBOARD_CACHE_TTL = 15.0  # Seconds a cached leaderboard page stays fresh
+LEADERBOARD_CACHE_SIZE = 256  # Cached pages (LRU)
+
+_leaderboard_cache: "OrderedDict[tuple, tuple]" = OrderedDict()  # (query args) -> (result, cached_at)
+
+
+def _leaderboard_cached(cache_key: tuple) -> Optional[Dict]:
+    """Fresh cached leaderboard page, or None (expired entries are dropped)"""
+    cached = _leaderboard_cache.get(cache_key)
+    if cached is None:
+        return None
+    if time.monotonic() - cached[1] >= LEADERBOARD_CACHE_TTL:
+        _leaderboard_cache.pop(cache_key, None)
+        return None
+    _leaderboard_cache.move_to_end(cache_key)
+    return cached[0]
+
+
+def _leaderboard_store(cache_key: tuple, board: Dict) -> None:
+    _leaderboard_cache[cache_key] = (board, time.monotonic())
+    _leaderboard_cache.move_to_end(cache_key)
+    while len(_leaderboard_cache) > LEADERBOARD_CACHE_SIZE:
+        _leaderboard_cache.popitem(last=False)
+
+
+def _leaderboard_query(supabase, metric: str, trading_style: Optional[str], instrument: Optional[str], count: bool = False):
+    """leaderboard_entries query with style/instrument filters applied"""
+    if metric not in LEADERBOARD_METRICS:
+        raise ValueError(f"Invalid leaderboard metric: {metric} (use {', '.join(LEADERBOARD_METRICS)})")
+    
+    query = supabase.table("leaderboard_entries").select("*", count="exact" if count else None)
+    if trading_style:
+        query = query.eq("trading_style", trading_style)
+    if instrument:
+        query = query.eq("instrument", instrument)
+    return query
+
+
+def _leaderboard_entry(row: Dict, rank: int) -> Dict:
+    return {
+        "rank": rank,
+        "model_id": row["model_id"],
+        "model_name": row["model_name"],
+        "user_id": row["user_id"],
+        "user_email": row.get("user_email") or "unknown",
+        "trading_style": row.get("trading_style"),
+        "instrument": row.get("instrument"),
+        "cumulative_return": float(row.get("cumulative_return") or 0.0),
+        "annualized_return": float(row.get("annualized_return") or 0.0),
+        "sharpe_ratio": float(row.get("sharpe_ratio") or 0.0),
+        "max_drawdown": float(row.get("max_drawdown") or 0.0),
+        "win_rate": float(row.get("win_rate") or 0.0),
+        "final_value": float(row.get("final_value") or 0.0),
+        "trading_days": row.get("trading_days") or 0
+    }
+
+
+async def get_admin_leaderboard(
+    metric: str = "cumulative_return",
+    trading_style: Optional[str] = None,
+    instrument: Optional[str] = None,
+    limit: int = 50,
+    offset: int = 0
+) -> Dict:
+    """
+    Admin only: Top-K models by a metric (one indexed range read)
     
-    # Join models, performance_metrics, and profiles
-    result = supabase.table("models").select(
-        "id, signature, user_id, profiles(email), performance_metrics(cumulative_return, sharpe_ratio, max_drawdown, final_value, total_trading_days)"
-    ).execute()
+    Entries come from leaderboard_entries, kept current by a trigger on
+    performance_metrics (migration 021). Pages are cached for
+    LEADERBOARD_CACHE_TTL seconds.
     
-    if not result.data:
-        return []
+    Args:
+        metric: One of LEADERBOARD_METRICS
+        trading_style: Optional filter (e.g. 'day-trading')
+        instrument: Optional filter (e.g. 'stocks')
+        limit: K
+        offset: Skip the first N ranks
     
-    # Format for leaderboard
-    leaderboard = []
-    for item in result.data:
-        metrics = item.get("performance_metrics", [])
-        if metrics and len(metrics) > 0:
-            latest_metrics = metrics[0]  # Most recent
-            
-            leaderboard.append({
-                "model_id": item["id"],
-                "model_name": item["signature"],
-                "user_id": item["user_id"],
-                "user_email": item.get("profiles", {}).get("email", "unknown"),
-                "cumulative_return": latest_metrics.get("cumulative_return", 0.0),
-                "sharpe_ratio": latest_metrics.get("sharpe_ratio", 0.0),
-                "max_drawdown": latest_metrics.get("max_drawdown", 0.0),
-                "final_value": latest_metrics.get("final_value", 10000.0),
-                "trading_days": latest_metrics.get("total_trading_days", 0)
-            })
+    Returns:
+        {leaderboard: [...], total_models, metric}
     
-    # Sort by cumulative return (descending)
-    leaderboard.sort(key=lambda x: x["cumulative_return"], reverse=True)
+    Raises:
+        ValueError: Unknown metric
+    """
+    cache_key = ("top", metric, trading_style, instrument, limit, offset)
+    cached = _leaderboard_cached(cache_key)
+    if cached is not None:
+        return cached
     
-    # Add ranks
-    for i, entry in enumerate(leaderboard):
-        entry["rank"] = i + 1
+    supabase = get_supabase()
+    result = _leaderboard_query(supabase, metric, trading_style, instrument, count=True)\
+        .order(metric, desc=LEADERBOARD_METRICS[metric])\
+        .order("model_id")\
+        .range(offset, offset + limit - 1)\
+        .execute()
+    
+    board = {
+        "leaderboard": [_leaderboard_entry(row, offset + i + 1) for i, row in enumerate(result.data or [])],
+        "total_models": result.count or 0,
+        "metric": metric
+    }
+    _leaderboard_store(cache_key, board)
+    return board
+
+
+async def get_leaderboard_around(
+    model_id: int,
+    metric: str = "cumulative_return",
+    trading_style: Optional[str] = None,
+    instrument: Optional[str] = None,
+    window: int = 5
+) -> Optional[Dict]:
+    """
+    Admin only: A model's rank plus `window` neighbours on each side
+    
+    Neighbours are keyset reads from the model's position in the ranking
+    index; the rank is a count of entries ahead of it.
+    
+    Returns:
+        {leaderboard: [...], total_models, metric, rank} or None if the model
+        has no metrics (or doesn't match the filters)
+    
+    Raises:
+        ValueError: Unknown metric
+    """
+    cache_key = ("around", model_id, metric, trading_style, instrument, window)
+    cached = _leaderboard_cached(cache_key)
+    if cached is not None:
+        return cached
+    
+    supabase = get_supabase()
+    me = _leaderboard_query(supabase, metric, trading_style, instrument)\
+        .eq("model_id", model_id)\
+        .limit(1)\
+        .execute()
+    if not me.data:
+        return None
     
-    return leaderboard
+    value = me.data[0][metric]
+    desc = LEADERBOARD_METRICS[metric]
+    better, worse = ("gt", "lt") if desc else ("lt", "gt")
+    ahead_filter = f"{metric}.{better}.{value},and({metric}.eq.{value},model_id.lt.{model_id})"
+    behind_filter = f"{metric}.{worse}.{value},and({metric}.eq.{value},model_id.gt.{model_id})"
+    
+    ahead = _leaderboard_query(supabase, metric, trading_style, instrument, count=True)\
+        .or_(ahead_filter)\
+        .order(metric, desc=not desc)\
+        .order("model_id", desc=True)\
+        .limit(window)\
+        .execute()
+    behind = _leaderboard_query(supabase, metric, trading_style, instrument, count=True)\
+        .or_(behind_filter)\
+        .order(metric, desc=desc)\
+        .order("model_id")\
+        .limit(window)\
+        .execute()
+    
+    rank = (ahead.count or 0) + 1
+    above = list(reversed(ahead.data or []))
+    rows = above + me.data + (behind.data or [])
+    first_rank = rank - len(above)
+    
+    board = {
+        "leaderboard": [_leaderboard_entry(row, first_rank + i) for i, row in enumerate(rows)],
+        "total_models": rank + (behind.count or 0),
+        "metric": metric,
+        "rank": rank
+    }
+    _leaderboard_store(cache_key, board)
+    return board
 
 
 # ============================================================================
 # SYSTEM STATS (Admin Only)
 # ============================================================================
 
+SYSTEM_STATS_TTL = 30.0  # Seconds cached system stats / activity stay fresh
+
+APPROXIMATE_STATS = ["total_positions", "total_logs"]  # Planner estimates, not exact counts
+
+_system_stats_cache: Dict[tuple, tuple] = {}  # (kind, args) -> (result, cached_at)
+
+
+def _exact_system_stats(supabase) -> Dict:
+    """Count-query fallback for databases without migration 022"""
+    users = supabase.table("profiles").select("id", count="exact", head=True).execute().count or 0
+    admins = supabase.table("profiles").select("id", count="exact", head=True).eq("role", "admin").execute().count or 0
+    models = supabase.table("models").select("id", count="exact", head=True).execute().count or 0
+    runs = supabase.table("trading_runs").select("id", count="exact", head=True).execute().count or 0
+    # estimated = exact for small tables, planner estimate past PostgREST's threshold
+    positions = supabase.table("positions").select("id", count="estimated", head=True).execute().count or 0
+    logs = supabase.table("logs").select("id", count="estimated", head=True).execute().count or 0
+    return {
+        "users": users, "admins": admins, "models": models, "runs": runs,
+        "positions": positions, "logs": logs
+    }
+
+
 async def get_system_stats() -> Dict:
-    """Admin only: Get system-wide statistics"""
+    """
+    Admin only: Get system-wide statistics
+    
+    User/admin/model/run counts are trigger-maintained counters and the
+    positions/logs totals are planner estimates (migration 022), so this is
+    one constant-time RPC, cached for SYSTEM_STATS_TTL seconds. `as_of` says
+    when the numbers were read.
+    """
+    cached = _system_stats_cache.get(("stats",))
+    if cached and time.monotonic() - cached[1] < SYSTEM_STATS_TTL:
+        return cached[0]
+    
     supabase = get_supabase()
     
-    # Count users
-    users_result = supabase.table("profiles").select("id, role", count="exact").execute()
-    total_users = users_result.count or 0
+    try:
+        snapshot = supabase.rpc("system_stats_snapshot", {}).execute().data or {}
+        counters = snapshot.get("counters") or {}
+        counts = {
+            "users": counters.get("users", 0),
+            "admins": counters.get("admins", 0),
+            "models": counters.get("models", 0),
+            "runs": counters.get("runs", 0),
+            "positions": snapshot.get("positions_estimate") or 0,
+            "logs": snapshot.get("logs_estimate") or 0
+        }
+    except Exception as e:
+        print(f"Warning: system_stats_snapshot unavailable, counting directly: {e}")
+        counts = _exact_system_stats(supabase)
+    
+    stats = {
+        "total_users": counts["users"],
+        "admin_count": counts["admins"],
+        "user_count": counts["users"] - counts["admins"],
+        "total_models": counts["models"],
+        "active_models": counts["models"],  # Assume all active for now
+        "total_runs": counts["runs"],
+        "total_positions": counts["positions"],
+        "total_logs": counts["logs"],
+        "approximate": APPROXIMATE_STATS,
+        "as_of": datetime.utcnow().isoformat() + "Z"
+    }
     
-    admin_count = len([u for u in users_result.data if u.get("role") == "admin"]) if users_result.data else 0
-    user_count = total_users - admin_count
+    _system_stats_cache[("stats",)] = (stats, time.monotonic())
+    return stats
+
+
+async def get_activity_series(hours: int = 24) -> Dict:
+    """
+    Admin only: Runs started and trades recorded per hour
     
-    # Count models
-    models_result = supabase.table("models").select("id", count="exact").execute()
-    total_models = models_result.count or 0
-    active_models = total_models  # Assume all active for now
+    Args:
+        hours: Look-back window (hourly buckets, UTC)
     
-    # Count positions
-    positions_result = supabase.table("positions").select("id", count="exact").execute()
-    total_positions = positions_result.count or 0
+    Returns:
+        {hours, series: [{bucket, runs, trades}], as_of} - one entry per hour,
+        zero-filled
+    """
+    from datetime import timedelta, timezone
     
-    # Count logs
-    logs_result = supabase.table("logs").select("id", count="exact").execute()
-    total_logs = logs_result.count or 0
+    cached = _system_stats_cache.get(("activity", hours))
+    if cached and time.monotonic() - cached[1] < SYSTEM_STATS_TTL:
+        return cached[0]
     
-    return {
-        "total_users": total_users,
-        "admin_count": admin_count,
-        "user_count": user_count,
-        "total_models": total_models,
-        "active_models": active_models,
-        "total_positions": total_positions,
-        "total_logs": total_logs
+    now = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    start = now - timedelta(hours=hours - 1)
+    
+    supabase = get_supabase()
+    result = supabase.table("activity_hourly")\
+        .select("bucket, kind, count")\
+        .gte("bucket", start.isoformat())\
+        .order("bucket")\
+        .execute()
+    
+    buckets = {
+        (start + timedelta(hours=i)).isoformat(): {"runs": 0, "trades": 0}
+        for i in range(hours)
     }
+    for row in result.data or []:
+        bucket = datetime.fromisoformat(row["bucket"].replace("Z", "+00:00")).astimezone(timezone.utc).isoformat()
+        if bucket in buckets:
+            buckets[bucket][row["kind"]] = row["count"]
+    
+    activity = {
+        "hours": hours,
+        "series": [{"bucket": bucket, **counts} for bucket, counts in buckets.items()],
+        "as_of": datetime.utcnow().isoformat() + "Z"
+    }
+    
+    _system_stats_cache[("activity", hours)] = (activity, time.monotonic())
+    return activity
 
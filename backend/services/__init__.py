@@ -32,24 +32,38 @@ create_model = services_module.create_model
 update_model = services_module.update_model
 delete_model = services_module.delete_model
 get_model_positions = services_module.get_model_positions
+get_model_positions_page = services_module.get_model_positions_page
+count_model_positions = services_module.count_model_positions
 get_latest_position = services_module.get_latest_position
+get_latest_equity = services_module.get_latest_equity
+get_equity_curve = services_module.get_equity_curve
+get_daily_equity = services_module.get_daily_equity
 create_position = services_module.create_position
 get_model_logs = services_module.get_model_logs
+iter_model_logs = services_module.iter_model_logs
 create_log = services_module.create_log
 get_stock_prices = services_module.get_stock_prices
 create_stock_price = services_module.create_stock_price
 get_model_performance = services_module.get_model_performance
 calculate_and_cache_performance = services_module.calculate_and_cache_performance
 get_admin_leaderboard = services_module.get_admin_leaderboard
+get_leaderboard_around = services_module.get_leaderboard_around
 get_system_stats = services_module.get_system_stats
+get_activity_series = services_module.get_activity_series
 
 # Import NEW blueprint services (from run_service.py)
 from .run_service import (
     create_trading_run, 
     update_trading_run,
     complete_trading_run, 
+    fail_trading_run,
     get_model_runs, 
     get_run_by_id,
+    get_run_header,
+    get_run_summary,
+    parse_run_includes,
+    iter_run_positions,
+    iter_run_reasoning,
     get_active_run,
     delete_trading_run
 )
@@ -77,10 +91,16 @@ __all__ = [
     'delete_model',
     # Positions
     'get_model_positions',
+    'get_model_positions_page',
+    'count_model_positions',
     'get_latest_position',
+    'get_latest_equity',
+    'get_equity_curve',
+    'get_daily_equity',
     'create_position',
     # Logs
     'get_model_logs',
+    'iter_model_logs',
     'create_log',
     # Stock prices
     'get_stock_prices',
@@ -89,13 +109,21 @@ __all__ = [
     'get_model_performance',
     'calculate_and_cache_performance',
     'get_admin_leaderboard',
+    'get_leaderboard_around',
     'get_system_stats',
+    'get_activity_series',
     # NEW: Run management
     'create_trading_run',
     'update_trading_run',
     'complete_trading_run',
+    'fail_trading_run',
     'get_model_runs',
     'get_run_by_id',
+    'get_run_header',
+    'get_run_summary',
+    'parse_run_includes',
+    'iter_run_positions',
+    'iter_run_reasoning',
     'get_active_run',
     'delete_trading_run',
     # NEW: Backtesting
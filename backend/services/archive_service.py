@@ -0,0 +1,576 @@
+"""
+Run Archive Service - Columnar Cold Storage for Completed Runs
+Completed runs older than RUN_ARCHIVE_AFTER_DAYS have their positions and
+ai_reasoning rows exported to compressed Parquet files and removed from the
+hot tables, so per-model queries and counts stay bounded.
+
+trading_runs is the source of truth (migration 025): archived_at marks a
+run as served from the archive and archive_manifest holds its files, row
+counts, JSON columns and summary aggregates. File paths are derived from
+the ids and the archive attempt, so concurrent sweeps never overwrite
+each other's files:
+
+    model_<model_id>/run_<run_id>/<attempt>/positions.parquet
+    model_<model_id>/run_<run_id>/<attempt>/reasoning.parquet
+
+Storage - hot rows are only pruned when the files are durable and visible
+to every process (API and workers run on separate, ephemeral disks):
+- RUN_ARCHIVE_BUCKET: files are uploaded to Supabase Storage and verified
+  by checksum; RUN_ARCHIVE_DIR is only a local download cache
+- RUN_ARCHIVE_DIR_DURABLE: the operator asserts RUN_ARCHIVE_DIR is a
+  persistent disk mounted by every process
+Without either, archive_completed_runs refuses to run.
+
+Per run: export rows page by page -> write Parquet (zstd) -> read back and
+verify row counts -> upload -> claim the run (UPDATE ... WHERE archived_at
+IS NULL) -> delete hot rows (migration 025 keeps the model_equity series).
+Only the sweep that wins the claim deletes anything.
+
+Readers (run_service, reasoning_service, agent tools, result_tools_db) check
+entry() and read archived runs from the files; JSONB columns are stored as
+JSON text and decoded on read. The manifest also keeps position counts per
+(date, symbol), so position history counts and pages only open the files a
+page actually needs. A file that can't be read raises ArchiveUnavailableError
+(503) - the hot rows are gone, so an empty result would be wrong.
+
+Deleting a run or a model (delete_trading_run, delete_model) also deletes
+its archive files from the bucket and the local directory.
+
+pyarrow is optional (pip install pyarrow); without it nothing is archived
+and archived runs can't be read.
+"""
+
+import os
+import json
+import time
+import uuid
+import shutil
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+from config import settings
+from errors import ArchiveUnavailableError
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional
+    pa = pq = None
+
+
+ARCHIVE_COMPRESSION = "zstd"
+ARCHIVE_READ_CACHE_SIZE = 32  # (run, kind, columns) tables kept decoded in memory
+ARCHIVE_LOOKUP_TTL = 30.0  # Seconds a "not archived" / per-model lookup is reused
+ARCHIVE_ENTRY_CACHE_SIZE = 4096
+EXPORT_PAGE_SIZE = 1000
+BUCKET_LIST_PAGE = 1000  # Objects per Storage list call when deleting archives
+RUN_ARCHIVE_FIELDS = "id, model_id, run_number, ended_at, archived_at, archive_manifest"
+
+# kind -> (hot table, row order)
+ARCHIVE_TABLES = {
+    "positions": ("positions", ("date", "minute_time", "id")),
+    "reasoning": ("ai_reasoning", ("timestamp", "id")),
+}
+
+
+def archive_storage() -> Optional[str]:
+    """
+    Where archive files are kept durably
+
+    Returns:
+        "bucket" (Supabase Storage), "disk" (shared persistent RUN_ARCHIVE_DIR),
+        or None when neither is configured - archiving is refused
+    """
+    if settings.RUN_ARCHIVE_BUCKET:
+        return "bucket"
+    if settings.RUN_ARCHIVE_DIR_DURABLE:
+        return "disk"
+    return None
+
+
+def _encode_rows(rows: List[Dict]) -> tuple:
+    """JSON-encode dict/list columns (JSONB) so Parquet keeps them verbatim"""
+    json_columns = sorted({k for row in rows for k, v in row.items() if isinstance(v, (dict, list))})
+    if not json_columns:
+        return rows, []
+    encoded = []
+    for row in rows:
+        row = dict(row)
+        for column in json_columns:
+            if row.get(column) is not None:
+                row[column] = json.dumps(row[column], separators=(",", ":"))
+        encoded.append(row)
+    return encoded, json_columns
+
+
+class RunArchive:
+    """
+    Parquet reader/writer for archived runs (entries come from trading_runs)
+
+    Usage:
+        rows = run_archive.read(run_id, "positions")  # None if not archived
+    """
+
+    def __init__(self, root: Path, bucket: str = ""):
+        self.root = Path(root)
+        self.bucket = bucket
+        self._lock = threading.Lock()
+        self._client = None
+        # run_id -> (entry or None, cached_at); archived entries never change
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self._model_runs: Dict[int, tuple] = {}
+        self._tables: "OrderedDict[tuple, List[Dict]]" = OrderedDict()
+        self.reads = 0
+        self.cache_hits = 0
+        self.downloads = 0
+
+    @property
+    def available(self) -> bool:
+        return pq is not None
+
+    def _supabase(self):
+        if self._client is None:
+            from supabase import create_client
+            self._client = create_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_ROLE_KEY)
+        return self._client
+
+    def _storage(self):
+        return self._supabase().storage.from_(self.bucket)
+
+    # ------------------------------------------------------------------
+    # Entries (trading_runs.archived_at / archive_manifest)
+    # ------------------------------------------------------------------
+
+    def _cache_entry(self, run_id: int, entry: Optional[Dict]) -> None:
+        with self._lock:
+            self._entries[run_id] = (entry, time.monotonic())
+            self._entries.move_to_end(run_id)
+            while len(self._entries) > ARCHIVE_ENTRY_CACHE_SIZE:
+                self._entries.popitem(last=False)
+
+    def remember(self, run: Dict) -> None:
+        """Prime the entry cache from a trading_runs row the caller already fetched"""
+        if not run or "archived_at" not in run or run.get("id") is None:
+            return
+        manifest = run.get("archive_manifest")
+        self._cache_entry(int(run["id"]), dict(manifest) if run.get("archived_at") and manifest else None)
+
+    def entry(self, run_id: int) -> Optional[Dict]:
+        """Archive entry for a run (files, rows, summary), None if the run is hot"""
+        run_id = int(run_id)
+        with self._lock:
+            cached = self._entries.get(run_id)
+        if cached is not None:
+            entry, cached_at = cached
+            if entry is not None or time.monotonic() - cached_at < ARCHIVE_LOOKUP_TTL:
+                return entry
+        try:
+            result = self._supabase().table("trading_runs")\
+                .select(RUN_ARCHIVE_FIELDS)\
+                .eq("id", run_id)\
+                .execute()
+        except Exception as e:
+            print(f"⚠️  Could not look up archive state for run {run_id}: {e}")
+            return None
+        if not result.data:
+            self._cache_entry(run_id, None)
+            return None
+        self.remember(result.data[0])
+        return self._entries[run_id][0]
+
+    def runs_for_model(self, model_id: int) -> List[int]:
+        """A model's archived run ids (ascending)"""
+        with self._lock:
+            cached = self._model_runs.get(model_id)
+        if cached is not None and time.monotonic() - cached[1] < ARCHIVE_LOOKUP_TTL:
+            return cached[0]
+        try:
+            result = self._supabase().table("trading_runs")\
+                .select(RUN_ARCHIVE_FIELDS)\
+                .eq("model_id", model_id)\
+                .not_.is_("archived_at", "null")\
+                .order("id")\
+                .execute()
+        except Exception as e:
+            print(f"⚠️  Could not list archived runs for model {model_id}: {e}")
+            return cached[0] if cached else []
+        for run in result.data or []:
+            self.remember(run)
+        run_ids = [run["id"] for run in result.data or []]
+        with self._lock:
+            self._model_runs[model_id] = (run_ids, time.monotonic())
+        return run_ids
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def _local_file(self, info: Dict) -> Optional[Path]:
+        """Local path of an archive file, downloading it from the bucket if needed"""
+        path = self.root / info["path"]
+        if path.exists():
+            return path
+        if not self.bucket:
+            return None
+        data = self._storage().download(info["path"])
+        if info.get("sha256") and hashlib.sha256(data).hexdigest() != info["sha256"]:
+            raise IOError(f"Checksum mismatch for archived {info['path']}")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+        with self._lock:
+            self.downloads += 1
+        return path
+
+    def read(self, run_id: int, kind: str, columns: Optional[Sequence[str]] = None) -> Optional[List[Dict]]:
+        """
+        Rows of an archived run in hot-table order
+
+        Args:
+            run_id: Run ID
+            kind: "positions" or "reasoning"
+            columns: Optional projection (only these columns are decoded)
+
+        Returns:
+            List of row dicts, or None if the run isn't archived
+
+        Raises:
+            ArchiveUnavailableError: The run is archived but its file can't be read
+        """
+        entry = self.entry(run_id)
+        if entry is None:
+            return None
+        info = entry["files"].get(kind)
+        if not info or not info.get("rows"):
+            return []
+        if not self.available:
+            raise ArchiveUnavailableError(f"Run {run_id} is archived but pyarrow isn't installed")
+
+        columns = tuple(dict.fromkeys(columns)) if columns else None
+        key = (run_id, kind, columns)
+        with self._lock:
+            cached = self._tables.get(key)
+            if cached is not None:
+                self._tables.move_to_end(key)
+                self.cache_hits += 1
+                return [dict(row) for row in cached]
+
+        try:
+            path = self._local_file(info)
+            if path is None:
+                raise IOError(f"not found at {info['path']}")
+            available = set(pq.read_schema(path).names)
+            wanted = [c for c in columns if c in available] if columns else None
+            rows = pq.read_table(path, columns=wanted).to_pylist()
+        except Exception as e:
+            print(f"❌ Could not read archived {kind} for run {run_id}: {e}")
+            raise ArchiveUnavailableError(f"Archived {kind} for run {run_id} can't be read right now")
+
+        json_columns = [c for c in info.get("json_columns", []) if not columns or c in columns]
+        for row in rows:
+            for column in json_columns:
+                if isinstance(row.get(column), str):
+                    row[column] = json.loads(row[column])
+            if columns:
+                for column in columns:
+                    row.setdefault(column, None)
+
+        with self._lock:
+            self.reads += 1
+            self._tables[key] = rows
+            self._tables.move_to_end(key)
+            while len(self._tables) > ARCHIVE_READ_CACHE_SIZE:
+                self._tables.popitem(last=False)
+        return [dict(row) for row in rows]
+
+    def iter_pages(self, run_id: int, kind: str, columns: Optional[Sequence[str]] = None, page_size: int = 500) -> Optional[Iterator[List[Dict]]]:
+        """Archived rows in pages (same shape as utils.json_stream.iter_query_pages)"""
+        rows = self.read(run_id, kind, columns)
+        if rows is None:
+            return None
+        return (rows[i:i + page_size] for i in range(0, len(rows), page_size))
+
+    def read_model(
+        self,
+        model_id: int,
+        kind: str,
+        where: Optional[Callable[[Dict], bool]] = None,
+        columns: Optional[Sequence[str]] = None
+    ) -> List[Dict]:
+        """Archived rows across all of a model's archived runs (run order, then row order)"""
+        rows = []
+        for run_id in self.runs_for_model(model_id):
+            run_rows = self.read(run_id, kind, columns) or []
+            rows.extend(row for row in run_rows if where is None or where(row))
+        return rows
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def _write_file(self, rows: List[Dict], rel_path: str) -> Dict:
+        encoded, json_columns = _encode_rows(rows)
+        table = pa.Table.from_pylist(encoded)
+        path = self.root / rel_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.tmp")
+        pq.write_table(table, tmp, compression=ARCHIVE_COMPRESSION)
+        written = pq.read_metadata(tmp).num_rows
+        if written != len(rows):
+            tmp.unlink(missing_ok=True)
+            raise IOError(f"Archive verification failed for {rel_path}: wrote {written} of {len(rows)} rows")
+        os.replace(tmp, path)
+        data = path.read_bytes()
+        digest = hashlib.sha256(data).hexdigest()
+
+        if self.bucket:
+            self._storage().upload(rel_path, data, {"content-type": "application/vnd.apache.parquet", "upsert": "true"})
+            if hashlib.sha256(self._storage().download(rel_path)).hexdigest() != digest:
+                raise IOError(f"Archive upload verification failed for {rel_path}")
+
+        return {
+            "path": rel_path,
+            "rows": len(rows),
+            "bytes": len(data),
+            "sha256": digest,
+            "json_columns": json_columns
+        }
+
+    def write_run(self, run: Dict, tables: Dict[str, List[Dict]], summary: Dict) -> Dict:
+        """
+        Write (and upload) a run's files
+
+        Returns:
+            Entry to store in trading_runs.archive_manifest - the run isn't
+            archived until the caller claims it with that entry
+        """
+        archived_at = datetime.now(timezone.utc)
+        attempt = f"{archived_at:%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+        run_dir = f"model_{run['model_id']}/run_{run['id']}/{attempt}"
+        files = {
+            kind: self._write_file(rows, f"{run_dir}/{kind}.parquet") if rows else {"path": None, "rows": 0}
+            for kind, rows in tables.items()
+        }
+        position_counts: Dict[str, Dict[str, int]] = {}
+        for row in tables.get("positions", []):
+            by_symbol = position_counts.setdefault(str(row.get("date")), {})
+            by_symbol[row.get("symbol")] = by_symbol.get(row.get("symbol"), 0) + 1
+        return {
+            "storage": "bucket" if self.bucket else "disk",
+            "archived_at": archived_at.isoformat(),
+            "summary": summary,
+            "files": files,
+            "position_counts": position_counts  # date -> symbol -> rows
+        }
+
+    # ------------------------------------------------------------------
+    # Deletes
+    # ------------------------------------------------------------------
+
+    def _bucket_files(self, prefix: str) -> List[str]:
+        """Object paths under a bucket prefix (folders are listed recursively)"""
+        paths, offset = [], 0
+        while True:
+            items = self._storage().list(prefix, {"limit": BUCKET_LIST_PAGE, "offset": offset}) or []
+            for item in items:
+                path = f"{prefix}/{item['name']}"
+                if item.get("id") is None:  # Folder
+                    paths.extend(self._bucket_files(path))
+                else:
+                    paths.append(path)
+            if len(items) < BUCKET_LIST_PAGE:
+                return paths
+            offset += len(items)
+
+    def _delete_prefix(self, prefix: str) -> None:
+        """Remove every archive file (all attempts) under model_X[/run_Y]"""
+        if self.bucket:
+            paths = self._bucket_files(prefix)
+            for i in range(0, len(paths), 100):
+                self._storage().remove(paths[i:i + 100])
+        shutil.rmtree(self.root / prefix, ignore_errors=True)
+
+    def delete_run(self, model_id: int, run_id: int) -> None:
+        """Delete a run's archive files (after its trading_runs row is deleted)"""
+        try:
+            self._delete_prefix(f"model_{model_id}/run_{run_id}")
+        except Exception as e:
+            print(f"⚠️  Could not delete archive files of run {run_id}: {e}")
+        with self._lock:
+            self._entries.pop(int(run_id), None)
+            self._model_runs.pop(model_id, None)
+            for key in [k for k in self._tables if k[0] == int(run_id)]:
+                del self._tables[key]
+
+    def delete_model(self, model_id: int) -> None:
+        """Delete every archive file of a model (after the model row is deleted)"""
+        try:
+            self._delete_prefix(f"model_{model_id}")
+        except Exception as e:
+            print(f"⚠️  Could not delete archive files of model {model_id}: {e}")
+        with self._lock:
+            run_ids = set((self._model_runs.pop(model_id, None) or ([], 0))[0])
+            for run_id in run_ids:
+                self._entries.pop(run_id, None)
+            for key in [k for k in self._tables if k[0] in run_ids]:
+                del self._tables[key]
+
+    def forget_model(self, model_id: int) -> None:
+        """Drop the cached archived-run list for a model (after a new run is archived)"""
+        with self._lock:
+            self._model_runs.pop(model_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        archived_runs = None
+        try:
+            archived_runs = self._supabase().table("trading_runs")\
+                .select("id", count="exact", head=True)\
+                .not_.is_("archived_at", "null")\
+                .execute().count
+        except Exception as e:
+            print(f"⚠️  Could not count archived runs: {e}")
+        return {
+            "available": self.available,
+            "storage": archive_storage(),
+            "runs": archived_runs,
+            "cached_entries": len(self._entries),
+            "cached_tables": len(self._tables),
+            "reads": self.reads,
+            "cache_hits": self.cache_hits,
+            "downloads": self.downloads
+        }
+
+
+# ----------------------------------------------------------------------------
+# Archive sweep
+# ----------------------------------------------------------------------------
+
+def _export_rows(supabase, run_id: int, kind: str) -> List[Dict]:
+    from utils.json_stream import iter_query_pages
+
+    table, order = ARCHIVE_TABLES[kind]
+
+    def build_query():
+        query = supabase.table(table).select("*").eq("run_id", run_id)
+        for column in order:
+            query = query.order(column)
+        return query
+
+    return [row for page in iter_query_pages(build_query, EXPORT_PAGE_SIZE) for row in page]
+
+
+def find_archivable_runs(supabase, older_than_days: int, limit: int) -> List[Dict]:
+    """Completed, not yet archived runs that ended more than older_than_days ago"""
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=older_than_days)).isoformat()
+    result = supabase.table("trading_runs")\
+        .select("id, model_id, run_number, status, ended_at")\
+        .eq("status", "completed")\
+        .is_("archived_at", "null")\
+        .lt("ended_at", cutoff)\
+        .order("ended_at")\
+        .limit(limit)\
+        .execute()
+    return result.data or []
+
+
+def archive_run(supabase, run: Dict) -> Optional[Dict]:
+    """
+    Archive one completed run (export, verify, upload, claim, prune)
+
+    Returns:
+        Archive entry, or None if another sweep archived the run first
+    """
+    from services.run_service import get_run_summary, _forget_run
+    from utils.http_cache import version_store, model_scope
+
+    summary = get_run_summary(run["id"], supabase)
+    tables = {kind: _export_rows(supabase, run["id"], kind) for kind in ARCHIVE_TABLES}
+    entry = run_archive.write_run(run, tables, summary)
+
+    # Conditional claim - exactly one sweep marks the run and prunes it
+    claimed = supabase.table("trading_runs").update({
+        "archived_at": entry["archived_at"],
+        "archived_rows": sum(f["rows"] for f in entry["files"].values()),
+        "archive_manifest": entry
+    }).eq("id", run["id"]).is_("archived_at", "null").execute()
+    if not claimed.data:
+        print(f"  ⏭️  Run {run['id']} was archived by another sweep")
+        return None
+    run_archive.remember({"id": run["id"], "archived_at": entry["archived_at"], "archive_manifest": entry})
+    run_archive.forget_model(run["model_id"])
+
+    # Hot rows go only after the files are verified and the run is claimed
+    for kind in ARCHIVE_TABLES:
+        if tables[kind]:
+            supabase.table(ARCHIVE_TABLES[kind][0]).delete().eq("run_id", run["id"]).execute()
+
+    _forget_run(run["id"])
+    try:
+        supabase.rpc("bump_cache_version", {"p_scope": model_scope(run["model_id"])}).execute()
+    except Exception as e:
+        print(f"  ⚠️  Cache version bump failed: {e}")
+    version_store.forget(model_scope(run["model_id"]))
+
+    print(f"🗄️  Archived Run #{run.get('run_number')} (ID {run['id']}): "
+          f"{entry['files']['positions']['rows']} positions, {entry['files']['reasoning']['rows']} reasoning")
+    return entry
+
+
+def archive_completed_runs(
+    older_than_days: Optional[int] = None,
+    limit: Optional[int] = None,
+    dry_run: bool = False
+) -> Dict[str, Any]:
+    """
+    Archive completed runs older than the threshold
+
+    Args:
+        older_than_days: Age threshold (default settings.RUN_ARCHIVE_AFTER_DAYS)
+        limit: Max runs this sweep (default settings.RUN_ARCHIVE_BATCH)
+        dry_run: Only list candidate runs
+
+    Returns:
+        {candidates, archived, skipped, failed, rows}, or {error} when
+        archiving is unavailable
+    """
+    if not run_archive.available:
+        return {"error": "pyarrow is not installed - run archiving is disabled"}
+    if archive_storage() is None and not dry_run:
+        return {
+            "error": "Run archive storage is not durable - set RUN_ARCHIVE_BUCKET, or "
+                     "RUN_ARCHIVE_DIR_DURABLE=true if RUN_ARCHIVE_DIR is a persistent disk shared by API and workers"
+        }
+
+    from supabase import create_client
+    supabase = create_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_ROLE_KEY)
+
+    runs = find_archivable_runs(
+        supabase,
+        older_than_days if older_than_days is not None else settings.RUN_ARCHIVE_AFTER_DAYS,
+        limit or settings.RUN_ARCHIVE_BATCH
+    )
+    stats = {"candidates": [r["id"] for r in runs], "archived": [], "skipped": [], "failed": {}, "rows": 0}
+    if dry_run:
+        return stats
+
+    for run in runs:
+        try:
+            entry = archive_run(supabase, run)
+            if entry is None:
+                stats["skipped"].append(run["id"])
+                continue
+            stats["archived"].append(run["id"])
+            stats["rows"] += sum(f["rows"] for f in entry["files"].values())
+        except Exception as e:
+            print(f"❌ Failed to archive run {run['id']}: {e}")
+            stats["failed"][run["id"]] = str(e)
+    return stats
+
+
+# Global instance (one per process)
+run_archive = RunArchive(Path(settings.RUN_ARCHIVE_DIR), settings.RUN_ARCHIVE_BUCKET)
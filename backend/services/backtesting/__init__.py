@@ -4,8 +4,10 @@ Services for simulation, backtesting, and paper trading
 """
 
 from .trading_service import TradingService
+from .portfolio_ledger import PortfolioLedger
 
 __all__ = [
     'TradingService',
+    'PortfolioLedger',
 ]
 
@@ -0,0 +1,285 @@
+"""
+Portfolio Ledger - In-Memory Position State for Backtests
+
+Holds positions, cash and the action-id counter in memory for the life of a
+backtest so trade execution cost does not grow with position.jsonl history.
+
+Persistence:
+- position.jsonl stays the append-only journal (same record format, so every
+  existing reader keeps working)
+- position.snapshot.json is written every N appends with the journal byte
+  offset it covers, so loading replays only the journal tail
+
+Trades start from the same position get_latest_position would return: the
+highest-id record for the trading date, else the previous trading day's. The
+in-memory state is that record whenever the latest record is on the trading
+date; other dates are looked up in the journal index.
+"""
+
+import os
+import json
+import threading
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+
+from utils.market_calendar import previous_trading_day
+from utils.position_journal import get_position_journal
+
+
+SNAPSHOT_EVERY = 25  # Journal appends between snapshots
+
+
+class PortfolioLedger:
+    """
+    In-memory portfolio state backed by the position journal
+
+    Usage:
+        ledger = PortfolioLedger(position_file)
+        new_position, action_id = ledger.apply_trade(
+            date="2025-10-13", action="buy", symbol="AAPL",
+            amount=10, price=150.0, metadata={"execution_source": "ai"}
+        )
+    """
+
+    def __init__(self, position_file: Path, snapshot_every: int = SNAPSHOT_EVERY):
+        self.position_file = Path(position_file)
+        self.snapshot_file = self.position_file.with_name("position.snapshot.json")
+        self.snapshot_every = snapshot_every
+
+        self.positions: Dict[str, float] = {}
+        self.last_id = -1
+        self.last_date: Optional[str] = None
+        self._offset = 0  # Journal bytes reflected in memory
+        self._appends_since_snapshot = 0
+        self._lock = threading.Lock()
+
+        self._load()
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    def _load(self) -> None:
+        """Load from the latest snapshot, then replay the journal tail"""
+        self.positions, self.last_id, self.last_date, self._offset = {}, -1, None, 0
+
+        snapshot = self._read_snapshot()
+        if snapshot:
+            self.positions = snapshot["positions"]
+            self.last_id = snapshot["last_id"]
+            self.last_date = snapshot["last_date"]
+            self._offset = snapshot["offset"]
+
+        self._replay_tail()
+
+    def _read_snapshot(self) -> Optional[Dict[str, Any]]:
+        """Read the snapshot if it still matches the journal it was taken from"""
+        if not self.snapshot_file.exists() or not self.position_file.exists():
+            return None
+
+        try:
+            with self.snapshot_file.open("r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+
+            offset = snapshot["offset"]
+            if offset > self.position_file.stat().st_size:
+                return None  # Journal was truncated/rewritten
+
+            # The record ending at the snapshot offset must be the one it covers
+            if offset > 0:
+                with self.position_file.open("rb") as f:
+                    f.seek(max(0, offset - 65536))
+                    chunk = f.read(offset - max(0, offset - 65536))
+                lines = chunk.rstrip(b"\n").split(b"\n")
+                if json.loads(lines[-1]).get("id") != snapshot["last_id"]:
+                    return None
+
+            return snapshot
+        except Exception as e:
+            print(f"  ⚠️  Ignoring ledger snapshot {self.snapshot_file}: {e}")
+            return None
+
+    def _replay_tail(self) -> None:
+        """Apply journal records written after self._offset (by us or anyone else)"""
+        if not self.position_file.exists():
+            return
+
+        with self.position_file.open("rb") as f:
+            f.seek(self._offset)
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break  # Partial line still being written
+                self._offset += len(raw)
+                if not raw.strip():
+                    continue
+                try:
+                    doc = json.loads(raw)
+                except Exception:
+                    continue
+                if doc.get("id", -1) >= self.last_id:
+                    self.last_id = doc.get("id", -1)
+                    self.last_date = doc.get("date")
+                    self.positions = doc.get("positions", {})
+
+    def _sync(self) -> None:
+        """Pick up external appends (e.g. no-trade records) or a rewritten file"""
+        size = self.position_file.stat().st_size if self.position_file.exists() else 0
+        if size < self._offset:
+            self._load()
+        elif size > self._offset:
+            self._replay_tail()
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def get_position(self, date: Optional[str] = None) -> Tuple[Dict[str, float], int]:
+        """
+        Position and action id (same shape as price_tools.get_latest_position)
+
+        Args:
+            date: Trading date; None for the latest record in the journal
+
+        Returns:
+            (positions copy, action id of the selected record)
+        """
+        with self._lock:
+            self._sync()
+            if date is None:
+                return dict(self.positions), self.last_id
+            positions, action_id = self._position_for(date)
+            return dict(positions), action_id
+
+    def _position_for(self, date: str) -> Tuple[Dict[str, float], int]:
+        """Highest-id record for date, falling back to the previous trading day"""
+        if self.last_date == date:
+            return self.positions, self.last_id
+
+        journal = get_position_journal(self.position_file)
+        positions, action_id = journal.latest_for_date(date)
+        if action_id >= 0:
+            return positions, action_id
+
+        prev_date = previous_trading_day(date)
+        if self.last_date == prev_date:
+            return self.positions, self.last_id
+        return journal.latest_for_date(prev_date)
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def apply_trade(
+        self,
+        date: str,
+        action: str,
+        symbol: str,
+        amount: int,
+        price: float,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> Tuple[Dict[str, Any], int]:
+        """
+        Apply a validated buy/sell and append it to the journal
+
+        Args:
+            date: Trading date
+            action: 'buy' or 'sell'
+            symbol: Stock ticker
+            amount: Number of shares
+            price: Execution price
+            metadata: Extra journal metadata (price is always included)
+
+        Returns:
+            (new position, action id) or ({"error": ...}, -1) if the trade is invalid
+        """
+        with self._lock:
+            self._sync()
+
+            new_position = dict(self._position_for(date)[0])
+            value = price * amount
+
+            if action == "buy":
+                if new_position.get("CASH", 0) - value < 0:
+                    return {
+                        "error": "Insufficient cash! This action will not be allowed.",
+                        "required_cash": value,
+                        "cash_available": new_position.get("CASH", 0),
+                        "symbol": symbol,
+                        "date": date,
+                        "price": price
+                    }, -1
+                new_position["CASH"] = new_position.get("CASH", 0) - value
+                new_position[symbol] = new_position.get(symbol, 0) + amount
+            elif action == "sell":
+                if symbol not in new_position:
+                    return {
+                        "error": f"No position for {symbol}! This action will not be allowed.",
+                        "symbol": symbol,
+                        "date": date
+                    }, -1
+                if new_position.get(symbol, 0) < amount:
+                    return {
+                        "error": "Insufficient shares! This action will not be allowed.",
+                        "have": new_position.get(symbol, 0),
+                        "want_to_sell": amount,
+                        "symbol": symbol,
+                        "date": date
+                    }, -1
+                new_position[symbol] -= amount
+                if new_position[symbol] == 0:
+                    del new_position[symbol]
+                new_position["CASH"] = new_position.get("CASH", 0) + value
+            else:
+                raise ValueError(f"Invalid action: {action}. Must be 'buy' or 'sell'")
+
+            action_id = self.last_id + 1
+            record = {
+                "date": date,
+                "id": action_id,
+                "this_action": {
+                    "action": action,
+                    "symbol": symbol,
+                    "amount": amount
+                },
+                "positions": new_position,
+                "metadata": {"price": price, **(metadata or {})}
+            }
+            self._append(record)
+
+            self.positions = new_position
+            self.last_id = action_id
+            self.last_date = date
+
+            self._appends_since_snapshot += 1
+            if self._appends_since_snapshot >= self.snapshot_every:
+                self._write_snapshot()
+
+            return dict(new_position), action_id
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        """Append one record to the journal (keeps the journal index current)"""
+        self._offset = get_position_journal(self.position_file).append(record)
+
+    def _write_snapshot(self) -> None:
+        """Atomically persist the in-memory state with the journal offset it covers"""
+        snapshot = {
+            "offset": self._offset,
+            "last_id": self.last_id,
+            "last_date": self.last_date,
+            "positions": self.positions
+        }
+        tmp_file = self.snapshot_file.with_suffix(".json.tmp")
+        try:
+            with tmp_file.open("w", encoding="utf-8") as f:
+                json.dump(snapshot, f)
+            os.replace(tmp_file, self.snapshot_file)
+            self._appends_since_snapshot = 0
+        except Exception as e:
+            print(f"  ⚠️  Could not write ledger snapshot: {e}")
+
+    def flush(self) -> None:
+        """Write a snapshot now (call at the end of a backtest)"""
+        with self._lock:
+            self._sync()
+            self._write_snapshot()
+        get_position_journal(self.position_file).flush()
@@ -7,10 +7,19 @@ FIXES: SIGNATURE subprocess isolation issue by querying database directly
 
 import os
 import json
+from collections import OrderedDict
 from pathlib import Path
 from typing import Dict, Any, Optional
 from supabase import Client
 
+from .portfolio_ledger import PortfolioLedger
+
+
+# LRU bounds - warm workers share one TradingService across many runs
+MAX_CACHED_LEDGERS = 32
+MAX_CACHED_SIGNATURES = 256
+MAX_CACHED_PRICES = 8192
+
 
 class TradingService:
     """
@@ -22,7 +31,7 @@ class TradingService:
     
     Features:
     - Database signature lookup (no subprocess isolation)
-    - File-based position tracking (same as current)
+    - In-memory PortfolioLedger per model, journaled to position.jsonl
     - Full validation (cash, shares, prices)
     - Error handling and logging
     
@@ -41,6 +50,11 @@ class TradingService:
         """
         self.supabase = supabase_client
         self.project_root = Path(__file__).parent.parent.parent
+        
+        # In-memory state (LRU-bounded, evicted ledgers are flushed first)
+        self._signatures: "OrderedDict[int, str]" = OrderedDict()
+        self._ledgers: "OrderedDict[str, PortfolioLedger]" = OrderedDict()
+        self._price_cache: "OrderedDict[tuple, float]" = OrderedDict()
     
     def execute_trade(
         self,
@@ -89,13 +103,12 @@ class TradingService:
         Execute buy order
         
         Steps:
-        1. Get signature from database (FIXES subprocess isolation!)
-        2. Get current position and action ID
-        3. Get stock price for the date
-        4. Validate sufficient cash
-        5. Execute trade (update position)
-        6. Write to position.jsonl file
-        7. Return new position
+        1. Get signature (database lookup, cached per model)
+        2. Get stock price for the date (cached per date/symbol)
+        3. Validate and apply to the in-memory PortfolioLedger
+           (appends to position.jsonl)
+        4. Write to database
+        5. Return new position
         
         Args:
             symbol: Stock ticker
@@ -107,131 +120,7 @@ class TradingService:
         Returns:
             New position dict or error dict
         """
-        # Step 1: Get signature from DATABASE (NO subprocess issue!)
-        signature = self._get_signature(model_id)
-        if not signature:
-            return {
-                "error": f"Model {model_id} not found",
-                "model_id": model_id
-            }
-        
-        print(f"  🔑 Signature for model {model_id}: {signature}")
-        
-        # Step 2: Get current position and action ID
-        from utils.price_tools import get_latest_position
-        
-        try:
-            current_position, current_action_id = get_latest_position(date, signature)
-        except Exception as e:
-            print(f"  ❌ Error getting position: {e}")
-            return {
-                "error": f"Could not get current position: {str(e)}",
-                "symbol": symbol,
-                "date": date
-            }
-        
-        # Step 3: Get stock price for the date
-        from utils.price_tools import get_open_prices
-        
-        try:
-            prices = get_open_prices(date, [symbol])
-            current_price = prices.get(f'{symbol}_price')
-            
-            if current_price is None:
-                return {
-                    "error": f"Symbol {symbol} not found! This action will not be allowed.",
-                    "symbol": symbol,
-                    "date": date
-                }
-        except Exception as e:
-            print(f"  ❌ Error getting price: {e}")
-            return {
-                "error": f"Could not get price for {symbol}: {str(e)}",
-                "symbol": symbol,
-                "date": date
-            }
-        
-        # Step 4: Validate sufficient cash
-        cost = current_price * amount
-        cash_available = current_position.get("CASH", 0)
-        cash_left = cash_available - cost
-        
-        if cash_left < 0:
-            return {
-                "error": "Insufficient cash! This action will not be allowed.",
-                "required_cash": cost,
-                "cash_available": cash_available,
-                "symbol": symbol,
-                "date": date,
-                "price": current_price
-            }
-        
-        # Step 5: Execute trade - update position
-        new_position = current_position.copy()
-        new_position["CASH"] = cash_left
-        new_position[symbol] = new_position.get(symbol, 0) + amount
-        
-        # Step 6: Write to position.jsonl file
-        position_file_path = self.project_root / "data" / "agent_data" / signature / "position" / "position.jsonl"
-        
-        # Ensure directory exists
-        position_file_path.parent.mkdir(parents=True, exist_ok=True)
-        
-        trade_record = {
-            "date": date,
-            "id": current_action_id + 1,
-            "this_action": {
-                "action": "buy",
-                "symbol": symbol,
-                "amount": amount
-            },
-            "positions": new_position,
-            "metadata": {
-                "price": current_price,
-                "cost": cost,
-                "execution_source": execution_source
-            }
-        }
-        
-        try:
-            with open(position_file_path, "a") as f:
-                f.write(json.dumps(trade_record) + "\n")
-            
-            print(f"  ✅ BUY executed: {amount} {symbol} @ ${current_price:.2f} (cost: ${cost:.2f})")
-            print(f"  💰 New cash: ${cash_left:.2f} (was ${cash_available:.2f})")
-            
-        except Exception as e:
-            print(f"  ❌ Error writing position file: {e}")
-            return {
-                "error": f"Trade executed but could not save: {str(e)}",
-                "symbol": symbol,
-                "date": date
-            }
-        
-        # Step 7: Also write to DATABASE for frontend
-        try:
-            self.supabase.table("positions").insert({
-                "model_id": model_id,
-                "date": date,
-                "minute_time": None,
-                "action_id": current_action_id + 1,
-                "action_type": "buy",
-                "symbol": symbol,
-                "amount": amount,
-                "positions": new_position,
-                "cash": cash_left,
-                "reasoning": f"{execution_source} buy",
-                "run_id": run_id  # ← Link to run!
-            }).execute()
-            
-            print(f"  💾 Saved to database")
-            
-        except Exception as e:
-            print(f"  ⚠️  Database write failed (file write succeeded): {e}")
-            # Don't fail the trade if DB write fails
-        
-        # Step 8: Return new position
-        return new_position
+        return self._apply_trade("buy", symbol, amount, model_id, date, execution_source, run_id)
     
     def sell(
         self,
@@ -246,13 +135,12 @@ class TradingService:
         Execute sell order
         
         Steps:
-        1. Get signature from database
-        2. Get current position and action ID
-        3. Get stock price for the date
-        4. Validate position exists and sufficient shares
-        5. Execute trade (update position)
-        6. Write to position.jsonl file
-        7. Return new position
+        1. Get signature (database lookup, cached per model)
+        2. Get stock price for the date (cached per date/symbol)
+        3. Validate position and apply to the in-memory PortfolioLedger
+           (appends to position.jsonl)
+        4. Write to database
+        5. Return new position
         
         Args:
             symbol: Stock ticker
@@ -264,7 +152,55 @@ class TradingService:
         Returns:
             New position dict or error dict
         """
-        # Step 1: Get signature from DATABASE
+        return self._apply_trade("sell", symbol, amount, model_id, date, execution_source, run_id)
+    
+    def get_ledger(self, signature: str) -> PortfolioLedger:
+        """
+        Get the in-memory ledger for a model signature (loaded once per service)
+        
+        Args:
+            signature: Model signature
+        
+        Returns:
+            PortfolioLedger backed by the model's position.jsonl
+        """
+        ledger = self._ledgers.get(signature)
+        if ledger is None:
+            position_file_path = self.project_root / "data" / "agent_data" / signature / "position" / "position.jsonl"
+            ledger = PortfolioLedger(position_file_path)
+            self._ledgers[signature] = ledger
+            while len(self._ledgers) > MAX_CACHED_LEDGERS:
+                _, evicted = self._ledgers.popitem(last=False)
+                evicted.flush()
+        else:
+            self._ledgers.move_to_end(signature)
+        return ledger
+    
+    def flush(self) -> None:
+        """Snapshot every loaded ledger (call when a backtest finishes)"""
+        for ledger in self._ledgers.values():
+            ledger.flush()
+    
+    def cache_sizes(self) -> Dict[str, int]:
+        """Entries held by each in-memory cache (warm worker health)"""
+        return {
+            "ledgers": len(self._ledgers),
+            "signatures": len(self._signatures),
+            "prices": len(self._price_cache)
+        }
+    
+    def _apply_trade(
+        self,
+        action: str,
+        symbol: str,
+        amount: int,
+        model_id: int,
+        date: str,
+        execution_source: str,
+        run_id: Optional[int]
+    ) -> Dict[str, Any]:
+        """Shared buy/sell execution path"""
+        # Step 1: Get signature from DATABASE (NO subprocess issue!)
         signature = self._get_signature(model_id)
         if not signature:
             return {
@@ -272,27 +208,9 @@ class TradingService:
                 "model_id": model_id
             }
         
-        print(f"  🔑 Signature for model {model_id}: {signature}")
-        
-        # Step 2: Get current position and action ID
-        from utils.price_tools import get_latest_position
-        
-        try:
-            current_position, current_action_id = get_latest_position(date, signature)
-        except Exception as e:
-            print(f"  ❌ Error getting position: {e}")
-            return {
-                "error": f"Could not get current position: {str(e)}",
-                "symbol": symbol,
-                "date": date
-            }
-        
-        # Step 3: Get stock price for the date
-        from utils.price_tools import get_open_prices
-        
+        # Step 2: Get stock price for the date
         try:
-            prices = get_open_prices(date, [symbol])
-            current_price = prices.get(f'{symbol}_price')
+            current_price = self._get_open_price(date, symbol)
             
             if current_price is None:
                 return {
@@ -308,95 +226,94 @@ class TradingService:
                 "date": date
             }
         
-        # Step 4: Validate position exists and sufficient shares
-        if symbol not in current_position:
-            return {
-                "error": f"No position for {symbol}! This action will not be allowed.",
-                "symbol": symbol,
-                "date": date
-            }
-        
-        current_shares = current_position.get(symbol, 0)
-        if current_shares < amount:
-            return {
-                "error": "Insufficient shares! This action will not be allowed.",
-                "have": current_shares,
-                "want_to_sell": amount,
-                "symbol": symbol,
-                "date": date
-            }
-        
-        # Step 5: Execute trade - update position
-        new_position = current_position.copy()
-        new_position[symbol] -= amount
-        
-        # Remove symbol from position if now zero
-        if new_position[symbol] == 0:
-            del new_position[symbol]
-        
-        # Add proceeds to cash
-        proceeds = current_price * amount
-        new_position["CASH"] = new_position.get("CASH", 0) + proceeds
-        
-        # Step 6: Write to position.jsonl file
-        position_file_path = self.project_root / "data" / "agent_data" / signature / "position" / "position.jsonl"
-        
-        trade_record = {
-            "date": date,
-            "id": current_action_id + 1,
-            "this_action": {
-                "action": "sell",
-                "symbol": symbol,
-                "amount": amount
-            },
-            "positions": new_position,
-            "metadata": {
-                "price": current_price,
-                "proceeds": proceeds,
-                "execution_source": execution_source
-            }
-        }
+        # Step 3: Validate + apply in memory, append to position.jsonl
+        value = current_price * amount
+        metadata = {"cost": value} if action == "buy" else {"proceeds": value}
+        metadata["execution_source"] = execution_source
         
         try:
-            with open(position_file_path, "a") as f:
-                f.write(json.dumps(trade_record) + "\n")
-            
-            print(f"  ✅ SELL executed: {amount} {symbol} @ ${current_price:.2f} (proceeds: ${proceeds:.2f})")
-            print(f"  💰 New cash: ${new_position['CASH']:.2f}")
-            
+            ledger = self.get_ledger(signature)
+            cash_before = ledger.get_position(date)[0].get("CASH", 0)
+            new_position, action_id = ledger.apply_trade(
+                date=date,
+                action=action,
+                symbol=symbol,
+                amount=amount,
+                price=current_price,
+                metadata=metadata
+            )
         except Exception as e:
             print(f"  ❌ Error writing position file: {e}")
             return {
-                "error": f"Trade executed but could not save: {str(e)}",
+                "error": f"Trade could not be saved: {str(e)}",
                 "symbol": symbol,
                 "date": date
             }
         
-        # Step 7: Also write to DATABASE for frontend
+        if action_id < 0:
+            return new_position  # Validation error dict
+        
+        if action == "buy":
+            print(f"  ✅ BUY executed: {amount} {symbol} @ ${current_price:.2f} (cost: ${value:.2f})")
+            print(f"  💰 New cash: ${new_position['CASH']:.2f} (was ${cash_before:.2f})")
+        else:
+            print(f"  ✅ SELL executed: {amount} {symbol} @ ${current_price:.2f} (proceeds: ${value:.2f})")
+            print(f"  💰 New cash: ${new_position['CASH']:.2f}")
+        
+        # Step 4: Also write to DATABASE for frontend
         try:
-            self.supabase.table("positions").insert({
+            inserted = self.supabase.table("positions").insert({
                 "model_id": model_id,
                 "date": date,
                 "minute_time": None,
-                "action_id": current_action_id + 1,
-                "action_type": "sell",
+                "action_id": action_id,
+                "action_type": action,
                 "symbol": symbol,
                 "amount": amount,
                 "positions": new_position,
                 "cash": new_position["CASH"],
-                "reasoning": f"{execution_source} sell",
+                "reasoning": f"{execution_source} {action}",
                 "run_id": run_id  # ← Link to run!
             }).execute()
             
             print(f"  💾 Saved to database")
             
+            # Value every holding at today's open for the equity series
+            from services.equity_service import record_equity
+            
+            prices = {symbol: current_price}
+            for held, shares in new_position.items():
+                if held not in ("CASH", symbol) and shares:
+                    prices[held] = self._get_open_price(date, held)
+            record_equity(
+                model_id, run_id, date, new_position, prices,
+                position_id=inserted.data[0]["id"] if inserted.data else None,
+                supabase=self.supabase
+            )
+            
         except Exception as e:
             print(f"  ⚠️  Database write failed (file write succeeded): {e}")
             # Don't fail the trade if DB write fails
         
-        # Step 8: Return new position
+        # Step 5: Return new position
         return new_position
     
+    def _get_open_price(self, date: str, symbol: str) -> Optional[float]:
+        """Open price for (date, symbol), cached - historical opens never change"""
+        key = (date, symbol)
+        if key not in self._price_cache:
+            from utils.price_tools import get_open_prices
+            
+            price = get_open_prices(date, [symbol]).get(f'{symbol}_price')
+            if price is None:
+                return None
+            self._price_cache[key] = price
+            while len(self._price_cache) > MAX_CACHED_PRICES:
+                self._price_cache.popitem(last=False)
+        else:
+            self._price_cache.move_to_end(key)
+        return self._price_cache[key]
+    
     def _get_signature(self, model_id: int) -> Optional[str]:
         """
         Get model signature from database
@@ -411,6 +328,10 @@ class TradingService:
         Returns:
             Model signature or None if not found
         """
+        if model_id in self._signatures:
+            self._signatures.move_to_end(model_id)
+            return self._signatures[model_id]
+        
         try:
             result = self.supabase.table("models")\
                 .select("signature")\
@@ -419,6 +340,9 @@ class TradingService:
                 .execute()
             
             if result.data:
+                self._signatures[model_id] = result.data["signature"]
+                while len(self._signatures) > MAX_CACHED_SIGNATURES:
+                    self._signatures.popitem(last=False)
                 return result.data["signature"]
             else:
                 print(f"  ⚠️  Model {model_id} not found in database")
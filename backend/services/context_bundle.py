@@ -0,0 +1,153 @@
+"""
+Chat Context Bundle - One-Round-Trip Bootstrap for the Chat Agents
+SystemAgent and the model conversation agent need the model row, global chat
+settings, the run being discussed, its aggregates and the recent runs before
+the first LLM call. get_context_bundle() gathers all of it with one RPC
+(chat_context_bundle, migration 026), or concurrently when the RPC isn't
+available, and caches the result per (model, run):
+
+- Keyed by the model's cache version (migration 023), which run status /
+  completion, model updates and new trades bump - a finished run shows up
+  on the next chat turn, in every process
+- complete_trading_run / fail_trading_run also invalidate in-process
+- CONTEXT_BUNDLE_TTL bounds staleness of global chat settings and of
+  processes without cache versions
+
+Agents memoize their built prompt text on the bundle (bundle_prompt), so a
+cache hit skips prompt formatting too.
+"""
+
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from supabase import Client
+
+from utils.http_cache import version_store, model_scope
+
+
+CONTEXT_BUNDLE_TTL = 60.0  # Seconds a bundle is reused without a version change
+CONTEXT_BUNDLE_CACHE_SIZE = 256
+RECENT_RUNS_LIMIT = 10
+RECENT_RUN_FIELDS = "id, run_number, status, trading_mode, total_trades, final_return, final_portfolio_value, intraday_symbol, intraday_date"
+
+# (model_id, run_id) -> (bundle, model version, cached_at)
+_bundle_cache: Dict[tuple, tuple] = {}
+_bundle_lock = threading.Lock()
+
+
+def _fetch_concurrently(supabase: Client, model_id: int, run_id: Optional[int]) -> Dict[str, Any]:
+    """Fallback when the chat_context_bundle RPC (migration 026) isn't available"""
+    from services.run_service import get_run_summary
+
+    def first(result) -> Optional[Dict]:
+        return result.data[0] if result.data else None
+
+    queries = {
+        "model": lambda: first(supabase.table("models").select("*").eq("id", model_id).execute()),
+        "chat_settings": lambda: first(supabase.table("global_chat_settings").select("*").eq("id", 1).execute()),
+        "recent_runs": lambda: supabase.table("trading_runs")
+            .select(RECENT_RUN_FIELDS)
+            .eq("model_id", model_id)
+            .order("run_number", desc=True)
+            .limit(RECENT_RUNS_LIMIT)
+            .execute().data or []
+    }
+    if run_id:
+        queries["run"] = lambda: first(
+            supabase.table("trading_runs").select("*").eq("id", run_id).eq("model_id", model_id).execute()
+        )
+        queries["run_summary"] = lambda: get_run_summary(run_id, supabase)
+
+    with ThreadPoolExecutor(max_workers=len(queries)) as pool:
+        futures = {key: pool.submit(query) for key, query in queries.items()}
+        bundle = {"run": None, "run_summary": None}
+        for key, future in futures.items():
+            try:
+                bundle[key] = future.result()
+            except Exception as e:
+                print(f"  ⚠️  Context bundle: {key} failed: {e}")
+                bundle[key] = [] if key == "recent_runs" else None
+    return bundle
+
+
+def _fetch_bundle(supabase: Client, model_id: int, run_id: Optional[int]) -> Dict[str, Any]:
+    try:
+        result = supabase.rpc("chat_context_bundle", {"p_model_id": model_id, "p_run_id": run_id}).execute()
+        if isinstance(result.data, dict):
+            bundle = dict(result.data)
+        else:
+            bundle = _fetch_concurrently(supabase, model_id, run_id)
+    except Exception as e:
+        print(f"  ⚠️  chat_context_bundle RPC unavailable, querying concurrently: {e}")
+        bundle = _fetch_concurrently(supabase, model_id, run_id)
+
+    # Archived runs' aggregates live in trading_runs.archive_manifest
+    if run_id:
+        from services.archive_service import run_archive
+        if bundle.get("run"):
+            run_archive.remember(bundle["run"])
+            bundle["run"].pop("archive_manifest", None)
+        entry = run_archive.entry(run_id)
+        if entry is not None:
+            bundle["run_summary"] = dict(entry.get("summary") or {})
+
+    bundle["recent_runs"] = bundle.get("recent_runs") or []
+    bundle["prompts"] = {}
+    return bundle
+
+
+def get_context_bundle(model_id: int, run_id: Optional[int], supabase: Client) -> Dict[str, Any]:
+    """
+    Chat bootstrap data for a model (and optionally one of its runs)
+
+    Args:
+        model_id: Model ID
+        run_id: Run being discussed (None = model-wide chat)
+        supabase: Client to use on a miss
+
+    Returns:
+        {model, chat_settings, run, run_summary, recent_runs, prompts} -
+        model is None if it doesn't exist; run is None unless it belongs to
+        the model. Callers check model["user_id"] for access.
+    """
+    key = (model_id, run_id)
+    versions = version_store.get_sync([model_scope(model_id)])
+    version = versions.get(model_scope(model_id)) if versions else None
+    now = time.monotonic()
+
+    with _bundle_lock:
+        entry = _bundle_cache.get(key)
+    if entry is not None:
+        bundle, cached_version, cached_at = entry
+        if cached_version == version and now - cached_at < CONTEXT_BUNDLE_TTL:
+            return bundle
+
+    started = time.perf_counter()
+    bundle = _fetch_bundle(supabase, model_id, run_id)
+    print(f"📦 Context bundle for model {model_id}, run {run_id}: {(time.perf_counter() - started) * 1000:.0f}ms")
+
+    if bundle.get("model") is not None:
+        with _bundle_lock:
+            _bundle_cache[key] = (bundle, version, now)
+            while len(_bundle_cache) > CONTEXT_BUNDLE_CACHE_SIZE:
+                _bundle_cache.pop(min(_bundle_cache, key=lambda k: _bundle_cache[k][2]))
+    return bundle
+
+
+def bundle_prompt(bundle: Dict[str, Any], key: Hashable, build: Callable[[], str]) -> str:
+    """Prompt text built from a bundle, memoized on the (cached) bundle"""
+    prompts = bundle.setdefault("prompts", {})
+    if key not in prompts:
+        prompts[key] = build()
+    return prompts[key]
+
+
+def invalidate_context_bundle(model_id: Optional[int] = None) -> None:
+    """Drop cached bundles for a model (all models when None, e.g. chat settings changed)"""
+    with _bundle_lock:
+        for key in [k for k in _bundle_cache if model_id is None or k[0] == model_id]:
+            del _bundle_cache[key]
+    if model_id is not None:
+        version_store.forget(model_scope(model_id))
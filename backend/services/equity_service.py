@@ -0,0 +1,226 @@
+"""
+Equity Series Service
+Materialized portfolio valuation (model_equity table) written alongside every
+recorded position, so equity curves and dashboard valuation are indexed reads
+instead of replaying positions and re-pricing holdings.
+"""
+
+from typing import Dict, List, Optional
+from datetime import datetime
+from supabase import create_client, Client
+from config import settings
+from utils.market_calendar import EASTERN
+
+EQUITY_PAGE_SIZE = 1000  # PostgREST max rows per request
+MAX_CURVE_POINTS = 5000
+
+
+def get_supabase() -> Client:
+    """Get Supabase client"""
+    return create_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_ROLE_KEY)
+
+
+def equity_timestamp(date: str, minute: Optional[str] = None) -> str:
+    """
+    Bar time for an equity point (ISO, Eastern Time offset)
+
+    Intraday points use their HH:MM minute; daily trades execute at the open.
+    """
+    hh, mm = (minute or "09:30").split(":")[:2]
+    d = datetime.strptime(str(date)[:10], "%Y-%m-%d")
+    return datetime(d.year, d.month, d.day, int(hh), int(mm), tzinfo=EASTERN).isoformat()
+
+
+def record_equity(
+    model_id: int,
+    run_id: Optional[int],
+    date: str,
+    positions: Dict,
+    prices: Dict[str, float],
+    minute: Optional[str] = None,
+    position_id: Optional[int] = None,
+    supabase: Optional[Client] = None
+) -> Optional[Dict]:
+    """
+    Record portfolio valuation after a trade (best effort, never raises)
+
+    Args:
+        model_id: Model ID
+        run_id: Run ID (None for trades outside a run)
+        date: Trading date YYYY-MM-DD
+        positions: Portfolio after the trade ({symbol: shares, 'CASH': cash})
+        prices: {symbol: price} used to value holdings
+        minute: HH:MM for intraday trades
+        position_id: positions row this valuation belongs to
+        supabase: Reuse the caller's client
+
+    Returns:
+        Inserted row or None
+    """
+    cash = float(positions.get("CASH", 0) or 0)
+    holdings_value = sum(
+        float(shares) * float(prices[symbol])
+        for symbol, shares in positions.items()
+        if symbol != "CASH" and shares and prices.get(symbol)
+    )
+
+    try:
+        supabase = supabase or get_supabase()
+        result = supabase.table("model_equity").insert({
+            "model_id": model_id,
+            "run_id": run_id,
+            "position_id": position_id,
+            "ts": equity_timestamp(date, minute),
+            "date": str(date)[:10],
+            "minute_time": f"{minute}:00" if minute else None,
+            "cash": round(cash, 2),
+            "holdings_value": round(holdings_value, 2),
+            "total_value": round(cash + holdings_value, 2),
+            "positions": positions
+        }).execute()
+        return result.data[0] if result.data else None
+    except Exception as e:
+        print(f"  ⚠️  Equity write failed for model {model_id}: {e}")
+        return None
+
+
+async def get_latest_equity(model_id: int) -> Optional[Dict]:
+    """Most recent valuation for a model (single index read)"""
+    supabase = get_supabase()
+
+    result = supabase.table("model_equity")\
+        .select("*")\
+        .eq("model_id", model_id)\
+        .order("ts", desc=True)\
+        .order("id", desc=True)\
+        .limit(1)\
+        .execute()
+
+    return result.data[0] if result.data else None
+
+
+async def get_equity_curve(
+    model_id: int,
+    run_id: Optional[int] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    points: int = 500,
+    method: str = "lttb"
+) -> Dict:
+    """
+    Equity curve for a model (or one run), downsampled for charting
+
+    Args:
+        model_id: Model ID
+        run_id: Restrict to one run
+        start_date / end_date: Inclusive YYYY-MM-DD bounds
+        points: Max points returned (capped at MAX_CURVE_POINTS)
+        method: 'lttb' (shape-preserving) or 'minmax' (keeps peaks/troughs)
+
+    The database buckets the series (model_equity_curve RPC): at most
+    `points` time buckets, each contributing its first/last/min/max point,
+    which are then downsampled to `points` here. Without the RPC the raw
+    series is paged in (older databases).
+
+    Returns:
+        {points: [{ts, total_value}], total_points, method}
+
+    Raises:
+        ValueError: Unknown method
+    """
+    from utils.downsample import DOWNSAMPLE_METHODS, downsample_indices
+
+    if method not in DOWNSAMPLE_METHODS:
+        raise ValueError(f"Invalid downsample method: {method} (use {', '.join(DOWNSAMPLE_METHODS)})")
+
+    supabase = get_supabase()
+    points = max(3, min(points, MAX_CURVE_POINTS))
+
+    try:
+        buckets = supabase.rpc("model_equity_curve", {
+            "p_model_id": model_id,
+            "p_run_id": run_id,
+            "p_start_date": start_date,
+            "p_end_date": end_date,
+            "p_buckets": points
+        }).execute().data or []
+        rows, total_points = bucket_points(buckets), sum(b["n"] for b in buckets)
+    except Exception as e:
+        print(f"  ⚠️  model_equity_curve RPC unavailable, paging the series: {e}")
+        rows = _equity_rows(supabase, model_id, run_id, start_date, end_date)
+        total_points = len(rows)
+
+    if not rows:
+        return {"points": [], "total_points": 0, "method": method}
+
+    x = [datetime.fromisoformat(row["ts"].replace("Z", "+00:00")).timestamp() for row in rows]
+    y = [float(row["total_value"]) for row in rows]
+    keep = downsample_indices(x, y, points, method)
+
+    return {
+        "points": [{"ts": rows[i]["ts"], "total_value": y[i]} for i in keep],
+        "total_points": total_points,
+        "method": method
+    }
+
+
+def bucket_points(buckets: List[Dict]) -> List[Dict]:
+    """
+    Candidate points from model_equity_curve buckets: each bucket's first,
+    min, max and last point, de-duplicated and in time order
+    """
+    rows: List[Dict] = []
+    for bucket in buckets:
+        candidates = {}
+        for prefix in ("first", "min", "max", "last"):
+            ts = bucket[f"{prefix}_ts"]
+            candidates.setdefault(ts, {"ts": ts, "total_value": bucket[f"{prefix}_value"]})
+        rows.extend(sorted(
+            candidates.values(),
+            key=lambda row: datetime.fromisoformat(row["ts"].replace("Z", "+00:00"))
+        ))
+    return rows
+
+
+def _equity_rows(
+    supabase: Client,
+    model_id: int,
+    run_id: Optional[int],
+    start_date: Optional[str],
+    end_date: Optional[str]
+) -> List[Dict]:
+    """Full (ts, total_value) series, paged"""
+    rows: List[Dict] = []
+    offset = 0
+    while True:
+        query = supabase.table("model_equity")\
+            .select("ts, total_value")\
+            .eq("model_id", model_id)
+        if run_id is not None:
+            query = query.eq("run_id", run_id)
+        if start_date:
+            query = query.gte("date", start_date)
+        if end_date:
+            query = query.lte("date", end_date)
+
+        page = query.order("ts").order("id")\
+            .range(offset, offset + EQUITY_PAGE_SIZE - 1)\
+            .execute()
+        rows.extend(page.data or [])
+        if not page.data or len(page.data) < EQUITY_PAGE_SIZE:
+            break
+        offset += EQUITY_PAGE_SIZE
+    return rows
+
+
+async def get_daily_equity(model_id: int) -> Dict[str, float]:
+    """End-of-day portfolio value per date ({date: value}), {} if none recorded"""
+    supabase = get_supabase()
+
+    try:
+        result = supabase.rpc("model_equity_daily", {"p_model_id": model_id}).execute()
+    except Exception as e:
+        print(f"Warning: Could not load daily equity for model {model_id}: {e}")
+        return {}
+
+    return {str(row["date"]): float(row["total_value"]) for row in (result.data or [])}
@@ -7,6 +7,7 @@ from typing import Dict, List, Optional
 from datetime import datetime
 from supabase import create_client, Client
 from config import settings
+from services.archive_service import run_archive
 
 def get_supabase() -> Client:
     """Get Supabase client"""
@@ -59,6 +60,10 @@ async def get_reasoning_for_run(
     Returns:
         List of reasoning records ordered by time
     """
+    archived = run_archive.read(run_id, "reasoning")
+    if archived is not None:
+        return archived
+    
     supabase = get_supabase()
     
     result = supabase.table("ai_reasoning")\
@@ -96,8 +101,18 @@ async def get_recent_reasoning(
         query = query.eq("reasoning_type", reasoning_type)
     
     result = query.order("timestamp", desc=True).limit(limit).execute()
-    
-    return result.data or []
+    rows = result.data or []
+    
+    # Archived runs are older than anything hot: fill up from the archive
+    if len(rows) < limit:
+        archived = run_archive.read_model(
+            model_id, "reasoning",
+            where=lambda row: not reasoning_type or row.get("reasoning_type") == reasoning_type
+        )
+        archived.sort(key=lambda row: str(row.get("timestamp")), reverse=True)
+        rows += archived[:limit - len(rows)]
+    
+    return rows
 
 
 async def get_reasoning_by_type(
@@ -121,6 +136,10 @@ async def get_reasoning_by_type(
     Returns:
         List of reasoning records
     """
+    archived = run_archive.read(run_id, "reasoning")
+    if archived is not None:
+        return [row for row in archived if row.get("model_id") == model_id and row.get("reasoning_type") == reasoning_type]
+    
     supabase = get_supabase()
     
     result = supabase.table("ai_reasoning")\
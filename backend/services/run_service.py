@@ -3,10 +3,17 @@ Trading Run Management Service
 Handles creation, tracking, and querying of trading runs
 """
 
-from typing import Dict, List, Optional
+import copy
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
 from datetime import datetime
 from supabase import create_client, Client
 from config import settings
+from utils.http_cache import version_store, model_scope
+from services.archive_service import ARCHIVE_TABLES, run_archive
+from services.context_bundle import invalidate_context_bundle
 
 def get_supabase() -> Client:
     """Get Supabase client"""
@@ -55,6 +62,7 @@ async def create_trading_run(
     }
     
     result = supabase.table("trading_runs").insert(run_data).execute()
+    version_store.forget(model_scope(model_id))
     
     if not result.data:
         raise Exception("Failed to create trading run")
@@ -80,6 +88,9 @@ async def update_trading_run(
     supabase = get_supabase()
     
     result = supabase.table("trading_runs").update(updates).eq("id", run_id).execute()
+    _forget_run(run_id)
+    if result.data:
+        version_store.forget(model_scope(result.data[0]["model_id"]))
     
     return result.data[0] if result.data else {}
 
@@ -113,6 +124,9 @@ async def complete_trading_run(
         "final_portfolio_value": final_stats.get("final_portfolio_value"),
         "max_drawdown_during_run": final_stats.get("max_drawdown")
     }).eq("id", run_id).execute()
+    _forget_run(run_id)
+    if result.data:
+        invalidate_context_bundle(result.data[0]["model_id"])
     
     print(f"✅ Completed Run ID {run_id}")
     return result.data[0] if result.data else {}
@@ -129,6 +143,8 @@ async def fail_trading_run(
         "status": "failed",
         "ended_at": datetime.now().isoformat()
     }).eq("id", run_id).execute()
+    if result.data:
+        invalidate_context_bundle(result.data[0]["model_id"])
     
     print(f"❌ Failed Run ID {run_id}: {error_message}")
     return result.data[0] if result.data else {}
@@ -168,35 +184,230 @@ async def get_model_runs(
     
     result = query.execute()
     
-    return result.data or []
+    runs = result.data or []
+    for run in runs:
+        run_archive.remember(run)
+        run.pop("archive_manifest", None)
+    return runs
+
+
+# Run detail includes (get_run_by_id include=...)
+RUN_INCLUDES = ("summary", "trades", "reasoning")
+RUN_PAGE_LIMIT = 100  # Default rows per include page
+RUN_PAGE_MAX = 1000  # PostgREST max rows per request
+# Reasoning columns returned by default (context_json is large; request it explicitly)
+REASONING_DEFAULT_FIELDS = ("id", "run_id", "timestamp", "reasoning_type", "content", "created_at")
+COMPLETED_RUN_CACHE_SIZE = 256
+COMPLETED_RUN_TTL = 600.0  # Bounds staleness across processes (runs deleted elsewhere)
+
+# (run_id, include, paging, fields) -> (owner_id, model_id, run detail, cached_at)
+_completed_run_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+_completed_run_lock = threading.Lock()
+
+
+def parse_run_includes(include: Optional[str]) -> Tuple[str, ...]:
+    """
+    Parse ?include=summary,trades,reasoning
+    
+    Raises:
+        ValueError: Unknown include
+    """
+    if not include:
+        return ()
+    names = [name.strip() for name in include.split(",") if name.strip()]
+    unknown = [name for name in names if name not in RUN_INCLUDES]
+    if unknown:
+        raise ValueError(f"Unknown include(s): {', '.join(unknown)} (use {', '.join(RUN_INCLUDES)})")
+    return tuple(name for name in RUN_INCLUDES if name in names)
+
+
+def _forget_run(run_id: int) -> None:
+    """Drop cached details for a run (after update/delete in this process)"""
+    with _completed_run_lock:
+        for key in [k for k in _completed_run_cache if k[0] == run_id]:
+            del _completed_run_cache[key]
+
+
+def _exact_run_summary(supabase: Client, run_id: int) -> Dict:
+    """Fallback when the run_summary RPC (migration 024) isn't available"""
+    def count(table: str, **filters) -> int:
+        query = supabase.table(table).select("id", count="exact", head=True).eq("run_id", run_id)
+        if filters.get("action_type"):
+            query = query.in_("action_type", filters["action_type"])
+        return query.execute().count or 0
+    
+    def edge_trade(desc: bool) -> Optional[str]:
+        rows = supabase.table("positions")\
+            .select("date, minute_time")\
+            .eq("run_id", run_id)\
+            .in_("action_type", ["buy", "sell"])\
+            .order("date", desc=desc)\
+            .order("minute_time", desc=desc)\
+            .limit(1)\
+            .execute().data
+        if not rows:
+            return None
+        return f"{rows[0]['date']}T{rows[0].get('minute_time') or '00:00:00'}"
+    
+    return {
+        "position_count": count("positions"),
+        "trade_count": count("positions", action_type=["buy", "sell"]),
+        "buy_count": count("positions", action_type=["buy"]),
+        "sell_count": count("positions", action_type=["sell"]),
+        "first_trade_at": edge_trade(False),
+        "last_trade_at": edge_trade(True),
+        "reasoning_count": count("ai_reasoning"),
+        "pnl": None,
+        "pnl_pct": None
+    }
+
+
+def get_run_summary(run_id: int, supabase: Optional[Client] = None) -> Dict:
+    """
+    Aggregates for a run, computed in SQL (one RPC)
+    
+    Args:
+        run_id: Run ID
+        supabase: Optional client to reuse (sync callers like the system agent)
+    
+    Returns:
+        {position_count, trade_count, buy_count, sell_count, symbols_traded,
+         first_trade_at, last_trade_at, reasoning_count, reasoning_by_type,
+         start_value, end_value, pnl, pnl_pct}
+    """
+    entry = run_archive.entry(run_id)
+    if entry is not None:
+        return dict(entry.get("summary") or {})
+    
+    supabase = supabase or get_supabase()
+    try:
+        result = supabase.rpc("run_summary", {"p_run_id": run_id}).execute()
+        if isinstance(result.data, dict):
+            return result.data
+    except Exception as e:
+        print(f"  ⚠️  run_summary RPC unavailable, counting directly: {e}")
+    return _exact_run_summary(supabase, run_id)
+
+
+def _run_page(
+    supabase: Client,
+    kind: str,
+    run_id: int,
+    fields: Optional[Sequence[str]],
+    limit: int,
+    offset: int,
+    total: Optional[int] = None
+) -> Dict:
+    """One page of a run's rows ("positions" / "reasoning"); counts only when the total isn't already known"""
+    from utils.json_stream import select_clause
+    
+    archived = run_archive.read(run_id, kind, ("id", *fields) if fields else None)
+    if archived is not None:
+        items = archived[offset:offset + limit]
+        return {
+            "items": items,
+            "total": len(archived),
+            "limit": limit,
+            "offset": offset,
+            "has_more": offset + len(items) < len(archived)
+        }
+    
+    table, order = ARCHIVE_TABLES[kind]
+    query = supabase.table(table)\
+        .select(select_clause(fields), count="exact" if total is None else None)\
+        .eq("run_id", run_id)
+    for column in order:
+        query = query.order(column)
+    result = query.range(offset, offset + limit - 1).execute()
+    
+    items = result.data or []
+    if total is None:
+        total = result.count if result.count is not None else offset + len(items)
+    return {
+        "items": items,
+        "total": total,
+        "limit": limit,
+        "offset": offset,
+        "has_more": offset + len(items) < total
+    }
 
 
 async def get_run_by_id(
     model_id: int,
     run_id: int,
-    user_id: str
+    user_id: str,
+    include: Sequence[str] = (),
+    trades_limit: int = RUN_PAGE_LIMIT,
+    trades_offset: int = 0,
+    reasoning_limit: int = RUN_PAGE_LIMIT,
+    reasoning_offset: int = 0,
+    trade_fields: Optional[Sequence[str]] = None,
+    reasoning_fields: Optional[Sequence[str]] = None
 ) -> Optional[Dict]:
     """
-    Get specific run with associated data
+    Get specific run, with optional associated data
+    
+    The header (run row + ownership) is one query. Everything else is opt-in:
+    
+    - "summary": SQL aggregates (see get_run_summary)
+    - "trades": a page of positions {items, total, limit, offset, has_more}
+    - "reasoning": a page of ai_reasoning entries (context_json only when
+      listed in reasoning_fields)
+    
+    Completed runs don't change, so their details are cached per process.
     
     Args:
         model_id: Model ID
         run_id: Run ID
         user_id: User ID (for ownership verification)
+        include: Any of RUN_INCLUDES
+        trades_limit / trades_offset: Trade page (limit capped at RUN_PAGE_MAX)
+        reasoning_limit / reasoning_offset: Reasoning page
+        trade_fields / reasoning_fields: Column projections
     
     Returns:
-        Run record with positions and reasoning
+        Run record (plus requested includes), or None if not found
+    
+    Raises:
+        PermissionError: User doesn't own the model
     """
-    supabase = get_supabase()
+    include = tuple(name for name in RUN_INCLUDES if name in include)
+    trades_limit = max(1, min(trades_limit, RUN_PAGE_MAX))
+    reasoning_limit = max(1, min(reasoning_limit, RUN_PAGE_MAX))
+    trades_offset = max(0, trades_offset)
+    reasoning_offset = max(0, reasoning_offset)
+    reasoning_fields = tuple(reasoning_fields or REASONING_DEFAULT_FIELDS)
+    trade_fields = tuple(trade_fields) if trade_fields else None
+    
+    cache_key = (
+        run_id, include,
+        (trades_limit, trades_offset) if "trades" in include else None,
+        (reasoning_limit, reasoning_offset) if "reasoning" in include else None,
+        trade_fields if "trades" in include else None,
+        reasoning_fields if "reasoning" in include else None
+    )
+    
+    import time
+    now = time.monotonic()
+    with _completed_run_lock:
+        cached = _completed_run_cache.get(cache_key)
+        if cached and now - cached[3] < COMPLETED_RUN_TTL:
+            _completed_run_cache.move_to_end(cache_key)
+        else:
+            cached = None
+    if cached:
+        owner_id, cached_model_id, detail, _ = cached
+        if cached_model_id != model_id:
+            return None
+        if owner_id != user_id:
+            raise PermissionError(f"User {user_id} does not own model {model_id}")
+        return copy.deepcopy(detail)
     
-    # Verify model ownership
-    model = supabase.table("models").select("user_id").eq("id", model_id).execute()
-    if not model.data or model.data[0]["user_id"] != user_id:
-        raise PermissionError(f"User {user_id} does not own model {model_id}")
+    supabase = get_supabase()
     
-    # Get run
+    # Run + owner in one query (embedded models row)
     result = supabase.table("trading_runs")\
-        .select("*")\
+        .select("*, models!inner(user_id)")\
         .eq("id", run_id)\
         .eq("model_id", model_id)\
         .execute()
@@ -205,28 +416,91 @@ async def get_run_by_id(
         return None
     
     run = result.data[0]
+    owner_id = (run.pop("models", None) or {}).get("user_id")
+    if owner_id != user_id:
+        raise PermissionError(f"User {user_id} does not own model {model_id}")
+    run_archive.remember(run)
+    run.pop("archive_manifest", None)
+    
+    if "summary" in include:
+        run["summary"] = await asyncio.to_thread(get_run_summary, run_id, supabase)
+    
+    summary = run.get("summary") or {}
+    pages = []
+    if "trades" in include:
+        pages.append(("trades", asyncio.to_thread(
+            _run_page, supabase, "positions", run_id,
+            trade_fields, trades_limit, trades_offset, summary.get("position_count")
+        )))
+    if "reasoning" in include:
+        pages.append(("reasoning", asyncio.to_thread(
+            _run_page, supabase, "reasoning", run_id,
+            reasoning_fields, reasoning_limit, reasoning_offset, summary.get("reasoning_count")
+        )))
+    if pages:
+        results = await asyncio.gather(*(page for _, page in pages))
+        for (key, _), page in zip(pages, results):
+            run[key] = page
+    
+    if run.get("status") == "completed":
+        with _completed_run_lock:
+            _completed_run_cache[cache_key] = (owner_id, model_id, copy.deepcopy(run), now)
+            _completed_run_cache.move_to_end(cache_key)
+            while len(_completed_run_cache) > COMPLETED_RUN_CACHE_SIZE:
+                _completed_run_cache.popitem(last=False)
     
-    # Get associated data
-    positions = supabase.table("positions")\
-        .select("*")\
-        .eq("run_id", run_id)\
-        .order("date")\
-        .order("minute_time")\
-        .execute()
+    return run
+
+
+async def get_run_header(
+    model_id: int,
+    run_id: int,
+    user_id: str
+) -> Optional[Dict]:
+    """
+    Run record only (ownership checked), for streaming run detail
     
-    reasoning = supabase.table("ai_reasoning")\
-        .select("*")\
-        .eq("run_id", run_id)\
-        .order("timestamp")\
-        .execute()
+    Raises:
+        PermissionError: User doesn't own the model
+    """
+    return await get_run_by_id(model_id, run_id, user_id)
+
+
+def iter_run_positions(run_id: int, fields: Optional[Sequence[str]] = None) -> Iterator[List[Dict]]:
+    """A run's positions in trade order, page by page (see utils/json_stream.py)"""
+    from utils.json_stream import iter_query_pages, select_clause
     
-    # Attach to run
-    run["positions"] = positions.data or []
-    run["reasoning"] = reasoning.data or []
-    run["position_count"] = len(positions.data) if positions.data else 0
-    run["reasoning_count"] = len(reasoning.data) if reasoning.data else 0
+    archived = run_archive.iter_pages(run_id, "positions", ("id", *fields) if fields else None)
+    if archived is not None:
+        return archived
     
-    return run
+    supabase = get_supabase()
+    return iter_query_pages(
+        lambda: supabase.table("positions")
+            .select(select_clause(fields))
+            .eq("run_id", run_id)
+            .order("date")
+            .order("minute_time")
+            .order("id")
+    )
+
+
+def iter_run_reasoning(run_id: int, fields: Optional[Sequence[str]] = None) -> Iterator[List[Dict]]:
+    """A run's reasoning entries in time order, page by page"""
+    from utils.json_stream import iter_query_pages, select_clause
+    
+    archived = run_archive.iter_pages(run_id, "reasoning", ("id", *fields) if fields else None)
+    if archived is not None:
+        return archived
+    
+    supabase = get_supabase()
+    return iter_query_pages(
+        lambda: supabase.table("ai_reasoning")
+            .select(select_clause(fields))
+            .eq("run_id", run_id)
+            .order("timestamp")
+            .order("id")
+    )
 
 
 async def get_active_run(model_id: int) -> Optional[Dict]:
@@ -291,6 +565,11 @@ async def delete_trading_run(
     
     # Delete run (cascades to positions and reasoning via ON DELETE CASCADE)
     result = supabase.table("trading_runs").delete().eq("id", run_id).execute()
+    version_store.forget(model_scope(model_id))
+    _forget_run(run_id)
+    
+    # Archived rows live in files, not behind the cascade
+    await asyncio.to_thread(run_archive.delete_run, model_id, run_id)
     
     print(f"🗑️  Deleted Run ID {run_id}")
     
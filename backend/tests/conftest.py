@@ -0,0 +1,13 @@
+"""
+Test setup: import backend modules from the tests directory and give the
+required settings placeholder values (no Supabase / Redis is contacted).
+"""
+
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+for name in ("SUPABASE_URL", "SUPABASE_ANON_KEY", "SUPABASE_SERVICE_ROLE_KEY", "SUPABASE_JWT_SECRET", "DATABASE_URL"):
+    os.environ.setdefault(name, "http://localhost" if name == "SUPABASE_URL" else "test")
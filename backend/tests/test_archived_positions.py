@@ -0,0 +1,95 @@
+"""Position history over archived runs (services.py + services/archive_service.py)"""
+
+import pytest
+
+from errors import ArchiveUnavailableError
+from services import services_module as svc
+from services.archive_service import RunArchive
+
+
+def position(run_id, day, action_id, symbol="AAPL"):
+    return {"id": run_id * 1000 + action_id, "run_id": run_id, "date": day, "action_id": action_id, "symbol": symbol}
+
+
+class FakeArchive:
+    """runs_for_model / entry / read over in-memory runs, counting file reads"""
+
+    def __init__(self, runs, legacy=()):
+        self.runs = runs
+        self.legacy = set(legacy)
+        self.reads = []
+
+    def runs_for_model(self, model_id):
+        return sorted(self.runs)
+
+    def entry(self, run_id):
+        counts = {}
+        for row in self.runs[run_id]:
+            by_symbol = counts.setdefault(row["date"], {})
+            by_symbol[row["symbol"]] = by_symbol.get(row["symbol"], 0) + 1
+        return {"files": {}, **({} if run_id in self.legacy else {"position_counts": counts})}
+
+    def read(self, run_id, kind):
+        self.reads.append(run_id)
+        return list(self.runs[run_id])
+
+
+@pytest.fixture
+def archive(monkeypatch):
+    fake = FakeArchive({
+        1: [position(1, "2025-01-02", 1), position(1, "2025-01-03", 2, "MSFT")],
+        2: [position(2, "2025-02-03", 1), position(2, "2025-02-04", 2)],
+        3: [position(3, "2025-03-03", 1), position(3, "2025-03-04", 2, "MSFT")],
+    })
+    monkeypatch.setattr(svc, "run_archive", fake)
+    return fake
+
+
+def test_counts_come_from_manifests(archive):
+    runs = dict(svc._archived_position_runs(1, {"symbol": "msft"}))
+    assert runs == {1: {"2025-01-03": 1}, 3: {"2025-03-04": 1}}
+    assert dict(svc._archived_position_runs(1, {"start_date": "2025-02-04", "end_date": "2025-03-03"})) == {
+        2: {"2025-02-04": 1}, 3: {"2025-03-03": 1}
+    }
+    assert archive.reads == []
+
+
+def test_head_reads_only_the_newest_runs(archive):
+    runs = svc._archived_position_runs(1, {})
+    rows = svc._archived_positions_head(runs, {}, None, limit=2)
+    assert [row["date"] for row in rows] == ["2025-03-04", "2025-03-03"]
+    assert archive.reads == [3]
+
+
+def test_head_skips_runs_after_the_cursor(archive):
+    runs = svc._archived_position_runs(1, {})
+    cursor = {"date": "2025-02-03", "action_id": 1, "id": 2001}
+    rows = svc._archived_positions_head(runs, {}, cursor, limit=5)
+    assert [row["date"] for row in rows] == ["2025-01-03", "2025-01-02"]
+    assert archive.reads == [2, 1]
+
+
+def test_head_stops_at_the_hot_floor(archive):
+    runs = svc._archived_position_runs(1, {})
+    assert svc._archived_positions_head(runs, {}, None, limit=3, floor_date="2025-03-01") == [
+        position(3, "2025-03-04", 2, "MSFT"), position(3, "2025-03-03", 1)
+    ]
+    assert archive.reads == [3]
+
+
+def test_legacy_entries_are_read(archive):
+    archive.legacy.add(1)
+    runs = dict(svc._archived_position_runs(1, {}))
+    assert runs[1] is None
+    rows = svc._archived_positions_head(list(runs.items()), {}, None, limit=1)
+    assert archive.reads[0] == 1 and rows[0]["date"] == "2025-03-04"
+
+
+def test_unreadable_archive_raises(tmp_path, monkeypatch):
+    archive = RunArchive(tmp_path)
+    monkeypatch.setattr(archive, "entry", lambda run_id: {
+        "files": {"positions": {"path": "model_1/run_1/x/positions.parquet", "rows": 3}}
+    })
+    with pytest.raises(ArchiveUnavailableError) as exc:
+        archive.read(1, "positions")
+    assert exc.value.status_code == 503
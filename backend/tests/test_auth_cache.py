@@ -0,0 +1,65 @@
+"""Auth caches (utils/auth_cache.py)"""
+
+import time
+
+from utils import auth_cache
+from utils.auth_cache import OwnershipCache, TokenClaimsCache
+
+
+def test_token_cache_serves_until_exp():
+    cache = TokenClaimsCache()
+    cache.put("live", {"sub": "u1", "exp": time.time() + 60})
+    cache.put("expired", {"sub": "u2", "exp": time.time() - 1})
+    cache.put("no-exp", {"sub": "u3"})
+
+    assert cache.get("live")["sub"] == "u1"
+    assert cache.get("expired") is None
+    assert cache.get("no-exp") is None
+    assert cache.stats()["size"] == 1
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_token_cache_is_lru_bounded():
+    cache = TokenClaimsCache(max_size=2)
+    exp = time.time() + 60
+    cache.put("a", {"exp": exp})
+    cache.put("b", {"exp": exp})
+    cache.get("a")
+    cache.put("c", {"exp": exp})
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+
+
+def test_ownership_cache_ttl_and_copies():
+    cache = OwnershipCache(ttl=60)
+    cache.put("u1", 5, {"id": 5, "user_id": "u1"})
+    model = cache.get("u1", 5)
+    model["signature"] = "mutated"
+    assert "signature" not in cache.get("u1", 5)
+    assert cache.get("u2", 5) is None
+
+    expired = OwnershipCache(ttl=0)
+    expired.put("u1", 5, {"id": 5})
+    assert expired.get("u1", 5) is None
+
+
+def test_invalidate_model_clears_cache_and_request_memo(monkeypatch):
+    cache = OwnershipCache()
+    monkeypatch.setattr(auth_cache, "ownership_cache", cache)
+    cache.put("u1", 5, {"id": 5})
+    cache.put("u2", 5, {"id": 5})
+    cache.put("u1", 6, {"id": 6})
+
+    token = auth_cache.begin_request_scope()
+    try:
+        memo = auth_cache.request_memo()
+        memo[("model", 5, "u1")] = {"id": 5}
+        memo[("model", 6, "u1")] = {"id": 6}
+        auth_cache.invalidate_model(5)
+        assert list(memo) == [("model", 6, "u1")]
+    finally:
+        auth_cache.end_request_scope(token)
+
+    assert cache.get("u1", 5) is None and cache.get("u2", 5) is None
+    assert cache.get("u1", 6) is not None
+    assert auth_cache.request_memo() is None
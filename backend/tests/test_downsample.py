@@ -0,0 +1,69 @@
+"""Equity curve downsampling (utils/downsample.py, equity_service.bucket_points)"""
+
+import numpy as np
+import pytest
+
+from services.equity_service import bucket_points
+from utils.downsample import downsample, downsample_indices, lttb, minmax
+
+
+def test_short_series_is_untouched():
+    x = np.arange(10)
+    assert list(lttb(x, x * 2.0, 20)) == list(range(10))
+    assert list(minmax(x * 2.0, 20)) == list(range(10))
+
+
+def test_lttb_keeps_endpoints_and_spike():
+    x = np.arange(1000)
+    y = np.zeros(1000)
+    y[500] = 100.0
+    idx = lttb(x, y, 50)
+    assert len(idx) == 50
+    assert idx[0] == 0 and idx[-1] == 999
+    assert 500 in idx
+    assert np.all(np.diff(idx) > 0)
+
+
+def test_minmax_keeps_extremes():
+    rng = np.random.default_rng(0)
+    y = rng.normal(size=1000).cumsum()
+    idx = minmax(y, 100)
+    assert len(idx) <= 102
+    assert y.argmin() in idx and y.argmax() in idx
+    assert idx[0] == 0 and idx[-1] == 999
+
+
+def test_downsample_returns_kept_points():
+    x = np.arange(500) * 60_000
+    y = np.sin(np.arange(500) / 20.0)
+    xs, ys = downsample(x, y, 60)
+    assert len(xs) == len(ys) == 60
+    assert np.array_equal(ys, y[np.searchsorted(x, xs)])
+
+
+def test_unknown_method():
+    with pytest.raises(ValueError):
+        downsample_indices([1, 2, 3], [1, 2, 3], 2, method="average")
+
+
+def test_bucket_points_dedupes_and_orders():
+    buckets = [
+        {
+            "first_ts": "2025-10-13T13:30:00Z", "first_value": 100.0,
+            "min_ts": "2025-10-13T14:00:00Z", "min_value": 95.0,
+            "max_ts": "2025-10-13T13:30:00Z", "max_value": 100.0,
+            "last_ts": "2025-10-13T15:00:00Z", "last_value": 98.0,
+        },
+        {
+            "first_ts": "2025-10-13T15:01:00+00:00", "first_value": 99.0,
+            "min_ts": "2025-10-13T15:01:00+00:00", "min_value": 99.0,
+            "max_ts": "2025-10-13T15:01:00+00:00", "max_value": 99.0,
+            "last_ts": "2025-10-13T15:01:00+00:00", "last_value": 99.0,
+        },
+    ]
+    assert bucket_points(buckets) == [
+        {"ts": "2025-10-13T13:30:00Z", "total_value": 100.0},
+        {"ts": "2025-10-13T14:00:00Z", "total_value": 95.0},
+        {"ts": "2025-10-13T15:00:00Z", "total_value": 98.0},
+        {"ts": "2025-10-13T15:01:00+00:00", "total_value": 99.0},
+    ]
@@ -0,0 +1,49 @@
+"""Pre-decision feasibility (utils/feasibility.py)"""
+
+from utils.feasibility import evaluate_trade_feasibility
+
+
+class FakeBounds:
+    def __init__(self, bounds):
+        self.bounds = bounds
+
+    def get_trade_bounds(self, *args, **kwargs):
+        return self.bounds
+
+
+def test_cash_limits_buy_size():
+    result = evaluate_trade_feasibility("AAPL", 100.0, {"CASH": 1050.0}, {"total_value": 1050.0})
+    assert result["feasible_actions"] == ["buy", "hold"]
+    assert result["max_buy_shares"] == 10
+    assert result["max_sell_shares"] == 0
+    assert result["binding_limit"] == "available cash"
+    assert "No AAPL shares to sell" in result["reasons"]
+
+
+def test_less_than_one_share_is_hold_only():
+    result = evaluate_trade_feasibility("AAPL", 100.0, {"CASH": 50.0}, {"total_value": 50.0})
+    assert result["hold_only"]
+    assert result["max_buy_shares"] == 0
+    assert any("less than 1 share" in reason for reason in result["reasons"])
+
+
+def test_tightest_bound_wins():
+    risk_gates = FakeBounds({"buy": True, "sell": True, "max_buy_value": 500.0, "binding_limit": "position size", "limits": ["position size"]})
+    enforcer = FakeBounds({"buy": True, "sell": True, "max_buy_value": 300.0, "binding_limit": "rule: max $300", "limits": ["rule: max $300"]})
+    result = evaluate_trade_feasibility(
+        "AAPL", 100.0, {"CASH": 10000.0, "AAPL": 5}, {"total_value": 10500.0},
+        enforcer=enforcer, risk_gates=risk_gates
+    )
+    assert result["feasible_actions"] == ["buy", "sell", "hold"]
+    assert result["max_buy_shares"] == 3
+    assert result["max_sell_shares"] == 5
+    assert result["binding_limit"] == "rule: max $300"
+    assert result["limits"] == ["position size", "rule: max $300"]
+
+
+def test_blocked_action_is_removed():
+    enforcer = FakeBounds({"buy": False, "sell": True, "blocked_reason": "Outside trading window"})
+    result = evaluate_trade_feasibility("AAPL", 100.0, {"CASH": 10000.0, "AAPL": 5}, {}, enforcer=enforcer)
+    assert result["feasible_actions"] == ["sell", "hold"]
+    assert result["max_buy_shares"] == 0
+    assert "Outside trading window" in result["reasons"]
@@ -0,0 +1,43 @@
+"""Conditional GET helpers (utils/http_cache.py)"""
+
+import pytest
+from starlette.requests import Request
+
+from utils.http_cache import ResponseCache, _etag_matches, make_etag
+
+
+def request_with(if_none_match=None) -> Request:
+    headers = [] if if_none_match is None else [(b"if-none-match", if_none_match.encode())]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+
+ETAG = make_etag(("models", "u1"), {"user:u1": 3})
+
+
+def test_make_etag_is_weak_and_version_keyed():
+    assert ETAG.startswith('W/"')
+    assert make_etag(("models", "u1"), {"user:u1": 3}) == ETAG
+    assert make_etag(("models", "u1"), {"user:u1": 4}) != ETAG
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, False),
+    ("", False),
+    (ETAG, True),
+    (ETAG.removeprefix("W/"), True),
+    (f'"other", {ETAG}', True),
+    ("*", True),
+    ('W/"other"', False),
+])
+def test_etag_matches(header, expected):
+    assert _etag_matches(request_with(header), ETAG) is expected
+
+
+def test_response_cache_requires_current_etag():
+    cache = ResponseCache(max_size=1)
+    cache.put(("a",), ETAG, b"{}")
+    assert cache.get(("a",), ETAG) == b"{}"
+    assert cache.get(("a",), 'W/"stale"') is None
+    cache.put(("b",), ETAG, b"[]")
+    assert cache.get(("a",), ETAG) is None
+    assert cache.stats()["size"] == 1
@@ -0,0 +1,95 @@
+"""Streamed JSON / NDJSON bodies (utils/json_stream.py)"""
+
+import json
+from decimal import Decimal
+
+import pytest
+from fastapi import HTTPException
+
+from utils.json_stream import (
+    iter_query_pages, json_object_chunks, ndjson_chunks, parse_fields, primed, select_clause
+)
+
+
+ROWS = [{"id": i, "symbol": "AAPL", "price": Decimal("1.5") * i} for i in range(5)]
+
+
+def pages(rows, size=2):
+    return iter([rows[i:i + size] for i in range(0, len(rows), size)])
+
+
+def test_json_object_matches_plain_json():
+    body = b"".join(json_object_chunks(
+        {"run_id": 7, "status": "completed"},
+        [("trades", pages(ROWS), None, "trade_count"), ("reasoning", iter([]), ["id"], None)]
+    ))
+    assert json.loads(body) == {
+        "run_id": 7,
+        "status": "completed",
+        "trades": [{"id": i, "symbol": "AAPL", "price": 1.5 * i} for i in range(5)],
+        "trade_count": 5,
+        "reasoning": []
+    }
+
+
+def test_json_object_with_empty_head_and_projection():
+    body = b"".join(json_object_chunks({}, [("items", pages(ROWS), ["id"], None)]))
+    assert json.loads(body) == {"items": [{"id": i} for i in range(5)]}
+
+
+def test_ndjson_lines():
+    lines = [json.loads(line) for line in b"".join(ndjson_chunks(
+        {"model_id": 1},
+        [("trade", pages(ROWS), ["id", "symbol"]), ("log", iter([]), None)]
+    )).splitlines()]
+    assert lines[0] == {"type": "meta", "data": {"model_id": 1}}
+    assert lines[1:-1] == [{"type": "trade", "data": {"id": i, "symbol": "AAPL"}} for i in range(5)]
+    assert lines[-1] == {"type": "end", "counts": {"trade": 5, "log": 0}}
+
+
+class FakeQuery:
+    def __init__(self, rows, calls):
+        self.rows, self.calls = rows, calls
+
+    def range(self, start, end):
+        self.calls.append((start, end))
+        self.page = self.rows[start:end + 1]
+        return self
+
+    def execute(self):
+        return type("Result", (), {"data": self.page})
+
+
+def test_iter_query_pages_uses_fresh_queries():
+    calls = []
+    rows = list(range(5))
+    assert list(iter_query_pages(lambda: FakeQuery(rows, calls), page_size=2)) == [[0, 1], [2, 3], [4]]
+    assert calls == [(0, 1), (2, 3), (4, 5)]
+
+    calls.clear()
+    assert list(iter_query_pages(lambda: FakeQuery(rows[:4], calls), page_size=2)) == [[0, 1], [2, 3]]
+    assert calls == [(0, 1), (2, 3), (4, 5)]
+
+
+def test_primed_fetches_first_page_eagerly():
+    fetched = []
+
+    def gen():
+        for page in ([1], [2]):
+            fetched.append(page)
+            yield page
+
+    stream = primed(gen())
+    assert fetched == [[1]]
+    assert list(stream) == [[1], [2]]
+    assert list(primed(iter([]))) == []
+
+
+def test_field_projection_parsing():
+    assert parse_fields(None) is None
+    assert parse_fields("symbol, price,") == ["symbol", "price"]
+    assert select_clause(["symbol", "id"]) == "id, symbol"
+    assert select_clause(None) == "*"
+    with pytest.raises(HTTPException) as exc:
+        parse_fields("symbol,price;drop")
+    assert exc.value.status_code == 400
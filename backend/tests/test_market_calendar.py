@@ -0,0 +1,68 @@
+"""Exchange calendar (utils/market_calendar.py)"""
+
+import pytest
+
+from utils.market_calendar import (
+    et_minute_label, holiday_dates, is_half_day, is_trading_day, next_trading_day,
+    previous_trading_day, session_bounds, session_minute_grid_ms, session_minutes,
+    trading_days, utc_offset_hours
+)
+
+
+def test_2025_holidays():
+    assert holiday_dates(2025) == [
+        "2025-01-01", "2025-01-09", "2025-01-20", "2025-02-17", "2025-04-18", "2025-05-26",
+        "2025-06-19", "2025-07-04", "2025-09-01", "2025-11-27", "2025-12-25"
+    ]
+
+
+def test_observed_holidays():
+    assert not is_trading_day("2021-12-24")  # Christmas on Saturday -> Friday
+    assert not is_trading_day("2022-01-17")  # MLK Day
+    assert is_trading_day("2021-12-31")  # New Year's on Saturday isn't observed
+    assert not is_trading_day("2023-01-02")  # New Year's on Sunday -> Monday
+
+
+def test_half_days():
+    assert is_half_day("2025-07-03")
+    assert is_half_day("2025-11-28")
+    assert is_half_day("2025-12-24")
+    assert not is_half_day("2025-07-04")
+    bounds = session_bounds("2025-11-28", "regular")
+    assert (bounds.close_et.hour, bounds.close_et.minute) == (13, 0)
+    after = session_bounds("2025-11-28", "after")
+    assert (after.open_et.hour, after.close_et.hour) == (13, 17)
+
+
+def test_trading_days_and_neighbours():
+    assert trading_days("2025-04-17", "2025-04-22") == ["2025-04-17", "2025-04-21", "2025-04-22"]
+    assert previous_trading_day("2025-04-21") == "2025-04-17"
+    assert next_trading_day("2025-04-17") == "2025-04-21"
+    assert next_trading_day("2025-01-08") == "2025-01-10"  # Special closure
+
+
+def test_closed_day_has_no_session():
+    assert session_bounds("2025-07-04", "regular") is None
+    assert session_minutes("2025-07-05", "regular") == ()
+    assert len(session_minute_grid_ms("2025-07-04", "regular")) == 0
+
+
+def test_dst_offsets():
+    assert utc_offset_hours("2025-03-07") == -5
+    assert utc_offset_hours("2025-03-10") == -4
+    assert session_bounds("2025-03-07", "regular").open_ns // 1_000_000_000 % 86400 == 14 * 3600 + 30 * 60
+    assert session_bounds("2025-03-10", "regular").open_ns // 1_000_000_000 % 86400 == 13 * 3600 + 30 * 60
+
+
+def test_minute_grid_matches_labels():
+    minutes = session_minutes("2025-10-13", "regular")
+    grid = session_minute_grid_ms("2025-10-13", "regular")
+    assert len(minutes) == len(grid) == 390
+    assert minutes[0] == "09:30" and minutes[-1] == "15:59"
+    assert [et_minute_label(int(ts)) for ts in grid[[0, -1]]] == ["09:30", "15:59"]
+    assert not grid.flags.writeable
+
+
+def test_invalid_session():
+    with pytest.raises(ValueError):
+        session_bounds("2025-10-13", "overnight")
@@ -0,0 +1,59 @@
+"""Keyset cursors (pagination.py)"""
+
+import datetime
+
+import pytest
+from fastapi import HTTPException
+
+from pagination import POSITION_CURSOR_FIELDS, decode_cursor, encode_cursor
+
+
+FILTERS = {"run_id": 7, "start_date": None, "end_date": None, "symbol": "AAPL"}
+KEY = {"date": "2025-10-13", "action_id": 3, "id": 42}
+
+
+def test_roundtrip():
+    cursor = encode_cursor(KEY, FILTERS)
+    assert decode_cursor(cursor, FILTERS, POSITION_CURSOR_FIELDS) == KEY
+
+
+def test_date_objects_encode_as_iso():
+    cursor = encode_cursor({**KEY, "date": datetime.date(2025, 10, 13)}, FILTERS)
+    assert decode_cursor(cursor, FILTERS, POSITION_CURSOR_FIELDS) == KEY
+
+
+def test_unset_filters_are_ignored():
+    cursor = encode_cursor(KEY, {"run_id": None})
+    assert decode_cursor(cursor, {}) == KEY
+
+
+def test_filter_change_is_rejected():
+    cursor = encode_cursor(KEY, FILTERS)
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor(cursor, {**FILTERS, "symbol": "MSFT"})
+    assert exc.value.status_code == 400
+
+
+@pytest.mark.parametrize("cursor", ["not-base64!", "e30", encode_cursor([1, 2, 3])[:-2]])
+def test_malformed_cursor(cursor):
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor(cursor)
+    assert exc.value.status_code == 400
+
+
+@pytest.mark.parametrize("key", [
+    {**KEY, "date": "2025-10-13),id.gt.0"},
+    {**KEY, "date": "2025-13-01"},
+    {**KEY, "date": 20251013},
+    {**KEY, "action_id": "3,id.gt.0"},
+    {**KEY, "action_id": 3.5},
+    {**KEY, "id": True},
+    {"date": "2025-10-13", "id": 42},
+    {**KEY, "extra": 1},
+    ["2025-10-13", 3, 42],
+])
+def test_invalid_position_key(key):
+    cursor = encode_cursor(key, FILTERS)
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor(cursor, FILTERS, POSITION_CURSOR_FIELDS)
+    assert exc.value.status_code == 400
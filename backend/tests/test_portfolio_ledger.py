@@ -0,0 +1,54 @@
+"""Backtest ledger position seeding (services/backtesting/portfolio_ledger.py)"""
+
+import json
+
+from services.backtesting.portfolio_ledger import PortfolioLedger
+
+
+def _write(position_file, records):
+    position_file.parent.mkdir(parents=True, exist_ok=True)
+    with position_file.open("w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+
+
+def _record(date, action_id, positions):
+    return {
+        "date": date,
+        "id": action_id,
+        "this_action": {"action": "no_trade", "symbol": "", "amount": 0},
+        "positions": positions
+    }
+
+
+def test_trade_starts_from_previous_trading_day(tmp_path):
+    position_file = tmp_path / "position" / "position.jsonl"
+    # 2025-10-10 is a Friday, 2025-10-13 the next trading day
+    _write(position_file, [_record("2025-10-10", 0, {"CASH": 1000.0})])
+    ledger = PortfolioLedger(position_file)
+
+    new_position, action_id = ledger.apply_trade("2025-10-13", "buy", "AAPL", 2, 100.0)
+    assert new_position == {"CASH": 800.0, "AAPL": 2}
+    assert action_id == 1
+    assert ledger.get_position("2025-10-13") == ({"CASH": 800.0, "AAPL": 2}, 1)
+
+
+def test_trade_is_keyed_by_date_not_latest_record(tmp_path):
+    position_file = tmp_path / "position" / "position.jsonl"
+    _write(position_file, [
+        _record("2025-10-09", 0, {"CASH": 1000.0}),
+        _record("2025-10-10", 1, {"CASH": 500.0, "MSFT": 1}),
+        _record("2025-10-14", 2, {"CASH": 10.0, "MSFT": 5})
+    ])
+    ledger = PortfolioLedger(position_file)
+    assert ledger.get_position() == ({"CASH": 10.0, "MSFT": 5}, 2)
+
+    # Rerunning 2025-10-13 starts from Friday's record, not the later 10-14 one
+    new_position, action_id = ledger.apply_trade("2025-10-13", "sell", "MSFT", 1, 50.0)
+    assert new_position == {"CASH": 550.0}
+    assert action_id == 3
+
+    # A date with no record on it or the day before has no position
+    assert ledger.get_position("2025-10-20") == ({}, -1)
+    error, action_id = ledger.apply_trade("2025-10-20", "buy", "AAPL", 1, 1.0)
+    assert action_id == -1 and "Insufficient cash" in error["error"]
@@ -0,0 +1,53 @@
+"""Daily price index coverage and saves (utils/price_index.py)"""
+
+from utils.price_index import DailyPriceIndex, _merge_ranges
+
+
+BAR = {"open": 1.0, "high": 2.0, "low": 0.5, "close": 1.5, "volume": 100}
+
+
+def test_merge_ranges_joins_adjacent_trading_days():
+    # 2025-10-10 is a Friday, so the Monday range is adjacent
+    assert _merge_ranges([["2025-10-13", "2025-10-17"], ["2025-10-06", "2025-10-10"]]) == [["2025-10-06", "2025-10-17"]]
+    assert _merge_ranges([["2025-10-01", "2025-10-08"], ["2025-10-03", "2025-10-06"]]) == [["2025-10-01", "2025-10-08"]]
+    assert _merge_ranges([["2025-10-01", "2025-10-02"], ["2025-10-06", "2025-10-07"]]) == [
+        ["2025-10-01", "2025-10-02"], ["2025-10-06", "2025-10-07"]
+    ]
+
+
+def test_missing_ranges(tmp_path):
+    index = DailyPriceIndex(tmp_path / "index.json")
+    assert index.missing_ranges("AAPL", "2025-10-06", "2025-10-17") == [("2025-10-06", "2025-10-17")]
+
+    index.upsert("AAPL", {}, "2025-10-08", "2025-10-10")
+    assert index.missing_ranges("AAPL", "2025-10-06", "2025-10-17") == [
+        ("2025-10-06", "2025-10-07"), ("2025-10-13", "2025-10-17")
+    ]
+    assert index.missing_ranges("AAPL", "2025-10-08", "2025-10-10") == []
+    # Gaps are trimmed to trading days (weekend before the covered range)
+    assert index.missing_ranges("AAPL", "2025-10-04", "2025-10-10") == [("2025-10-06", "2025-10-07")]
+
+
+def test_concurrent_saves_merge(tmp_path):
+    path = tmp_path / "index.json"
+    first, second = DailyPriceIndex(path), DailyPriceIndex(path)
+    first.upsert("AAPL", {"2025-10-13": BAR}, "2025-10-13", "2025-10-13")
+    second.upsert("MSFT", {"2025-10-13": BAR}, "2025-10-13", "2025-10-13")
+    first.save()
+    second.save()
+
+    reader = DailyPriceIndex(path)
+    assert reader.symbols() == ["AAPL", "MSFT"]
+    assert reader.get_open("AAPL", "2025-10-13") == 1.0
+    assert reader.missing_ranges("AAPL", "2025-10-13", "2025-10-13") == []
+
+
+def test_unsaved_upserts_survive_reload(tmp_path):
+    path = tmp_path / "index.json"
+    first, second = DailyPriceIndex(path), DailyPriceIndex(path)
+    first.upsert("AAPL", {"2025-10-13": BAR}, "2025-10-13", "2025-10-13")
+    second.upsert("MSFT", {"2025-10-13": BAR}, "2025-10-13", "2025-10-13")
+    second.save()
+
+    assert first.symbols() == ["AAPL", "MSFT"]
+    assert first.get_range("AAPL", "2025-10-01", "2025-10-31") == {"2025-10-13": BAR}
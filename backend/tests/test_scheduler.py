@@ -0,0 +1,192 @@
+"""Fair-share run scheduler (workers/scheduler.py) against an in-memory Redis"""
+
+import pytest
+
+from config import settings
+from trading.run_checkpoint import MAX_DELIVERIES
+from workers.scheduler import (
+    PRIORITY_BATCH, RunScheduler, SchedulerUnavailable, provider_for_model, stale_run_seconds
+)
+
+
+class FakeRedis:
+    """The subset of sync_redis_config.command the scheduler uses"""
+
+    def __init__(self):
+        self.data = {}
+
+    def command(self, *args):
+        name, key = args[0], args[1]
+        if name == "GET":
+            return self.data.get(key)
+        if name == "SET":
+            if "NX" in args and key in self.data:
+                return None
+            self.data[key] = args[2]
+            return "OK"
+        if name == "DEL":
+            return int(self.data.pop(key, None) is not None)
+        raise NotImplementedError(name)
+
+
+@pytest.fixture
+def scheduler(monkeypatch):
+    redis = FakeRedis()
+    monkeypatch.setattr(RunScheduler, "_redis", property(lambda self: redis))
+    monkeypatch.setattr(settings, "SCHEDULER_ENABLED", True)
+    monkeypatch.setattr(settings, "SCHEDULER_MAX_RUNS_PER_USER", 1)
+    monkeypatch.setattr(settings, "SCHEDULER_PROVIDER_CONCURRENCY", 8)
+    monkeypatch.setattr(settings, "SCHEDULER_PROVIDER_RATE_PER_MIN", 6.0)
+    monkeypatch.setattr(settings, "SCHEDULER_PROVIDER_BURST", 100)
+    monkeypatch.setattr(settings, "SCHEDULER_PROVIDER_LIMITS", "")
+    monkeypatch.setattr("workers.scheduler.stale_run_seconds", lambda: 3600)
+
+    sched = RunScheduler()
+    sched.sent = []
+    sched._send = lambda dispatched, drop=None: sched.sent.extend(dispatched)
+    sched.redis = redis
+    return sched
+
+
+def submit(sched, user, priority="interactive", base_model="openai/gpt-4o", slots=1):
+    return sched.submit("workers.run_intraday_trading", {"user": user}, user, base_model, priority, slots)
+
+
+def sent_users(sched):
+    return [job["user_id"] for job in sched.sent if "job_id" in job]
+
+
+def test_provider_for_model():
+    assert provider_for_model("openai/gpt-4o") == "openai"
+    assert provider_for_model("Anthropic/claude") == "anthropic"
+    assert provider_for_model("") == "default"
+
+
+def test_per_user_cap_and_round_robin(scheduler):
+    a1, a2, a3 = (submit(scheduler, "alice") for _ in range(3))
+    b1 = submit(scheduler, "bob")
+    c1 = submit(scheduler, "carol")
+    assert sent_users(scheduler) == ["alice", "bob", "carol"]
+    assert scheduler.status(a2)["state"] == "queued"
+
+    # Alice's finished run frees her slot for her next job only
+    scheduler.release(a1)
+    assert sent_users(scheduler)[-1] == "alice"
+    assert scheduler.status(a2)["state"] == "running"
+    assert scheduler.status(a3)["queue_position"] == 1
+    scheduler.release(b1)
+    scheduler.release(c1)
+    assert len(sent_users(scheduler)) == 4
+
+
+def test_interactive_before_batch(scheduler, monkeypatch):
+    monkeypatch.setattr(settings, "SCHEDULER_MAX_RUNS_PER_USER", 5)
+    monkeypatch.setattr(settings, "SCHEDULER_PROVIDER_CONCURRENCY", 1)
+    blocker = submit(scheduler, "alice")
+    batch = submit(scheduler, "bob", priority=PRIORITY_BATCH)
+    interactive = submit(scheduler, "carol")
+    assert scheduler.status(interactive)["queue_position"] == 1
+    assert scheduler.status(batch)["queue_position"] == 2
+
+    scheduler.release(blocker)
+    assert sent_users(scheduler) == ["alice", "carol"]
+
+
+def test_token_bucket_defers_and_schedules_tick(scheduler, monkeypatch):
+    monkeypatch.setattr(settings, "SCHEDULER_MAX_RUNS_PER_USER", 5)
+    monkeypatch.setattr(settings, "SCHEDULER_PROVIDER_BURST", 2)
+    for _ in range(3):
+        submit(scheduler, "alice")
+    assert len(sent_users(scheduler)) == 2
+    ticks = [job["tick_in"] for job in scheduler.sent if "tick_in" in job]
+    assert len(ticks) == 1 and 0 < ticks[0] <= 10
+
+
+def test_multi_slot_job_is_capped_at_limit(scheduler, monkeypatch):
+    monkeypatch.setattr(settings, "SCHEDULER_MAX_RUNS_PER_USER", 2)
+    sharded = submit(scheduler, "alice", slots=4)
+    single = submit(scheduler, "alice")
+    assert sent_users(scheduler) == ["alice"]
+    assert scheduler.status(sharded)["slots"] == 4
+    assert scheduler.status(single)["state"] == "queued"
+
+    scheduler.release(sharded)
+    assert scheduler.status(single)["state"] == "running"
+
+
+def test_cancel_queued_job(scheduler):
+    submit(scheduler, "alice")
+    queued = submit(scheduler, "alice")
+    assert scheduler.cancel(queued)
+    assert scheduler.status(queued) is None
+    assert not scheduler.cancel(queued)
+
+
+def test_only_completed_runs_update_eta(scheduler):
+    failed = submit(scheduler, "alice")
+    scheduler.release(failed, succeeded=False)
+    assert scheduler.stats()["avg_run_seconds"] == 600
+
+
+def test_busy_lock_raises(scheduler, monkeypatch):
+    monkeypatch.setattr("workers.scheduler.LOCK_WAIT_SECONDS", 0.1)
+    scheduler.redis.data["sched:lock"] = "held-by-someone-else"
+    with pytest.raises(SchedulerUnavailable):
+        submit(scheduler, "alice")
+    assert scheduler.sent == []
+
+
+def test_disabled_without_redis(monkeypatch):
+    monkeypatch.setattr(RunScheduler, "_redis", property(lambda self: None))
+    sched = RunScheduler()
+    assert not sched.enabled
+    with pytest.raises(SchedulerUnavailable):
+        sched.dispatch()
+
+
+def test_stale_timeout_covers_every_delivery():
+    from celery_app import celery_app
+    assert stale_run_seconds() > celery_app.conf.task_time_limit * MAX_DELIVERIES
+
+
+def test_stale_runs_are_reaped(scheduler):
+    stuck = submit(scheduler, "alice")
+    state = scheduler._load()
+    state["running"][stuck]["started_at"] -= 3601
+    scheduler._save(state)
+
+    queued = submit(scheduler, "alice")
+    assert scheduler.status(stuck) is None
+    assert scheduler.status(queued)["state"] == "running"
+
+
+def test_failed_publish_rolls_back(scheduler, monkeypatch):
+    from celery_app import celery_app
+
+    sent, down_for = [], {"bob"}
+
+    def send_task(name, kwargs=None, task_id=None, **options):
+        if kwargs and kwargs["user"] in down_for:
+            raise ConnectionError("broker down")
+        sent.append(task_id)
+
+    monkeypatch.setattr(celery_app, "send_task", send_task)
+    del scheduler._send  # Real publishing path
+
+    first = submit(scheduler, "alice")
+    queued = submit(scheduler, "alice")
+    assert sent == [first]
+
+    # Bob's own job can't be sent: the caller gets the error and nothing stays queued
+    with pytest.raises(SchedulerUnavailable):
+        submit(scheduler, "bob")
+    assert scheduler.stats()["running"] == 1
+    assert scheduler.stats()["queued"]["interactive"] == 1
+
+    # Alice's next job is re-queued at the head when its publish fails
+    down_for.add("alice")
+    with pytest.raises(SchedulerUnavailable):
+        scheduler.release(first)
+    assert scheduler.status(queued)["state"] == "queued"
+    assert scheduler.status(queued)["queue_position"] == 1
+    assert scheduler.stats()["running"] == 0
@@ -271,27 +271,23 @@ Consider these instructions when making trading decisions.
 
 
 
-def get_intraday_system_prompt(
-    minute: str, 
-    symbol: str, 
-    bar: dict, 
-    position: dict,
+def get_intraday_static_prefix(
+    symbol: str,
     custom_rules: Optional[str] = None,
     custom_instructions: Optional[str] = None,
-    # NEW CONFIGURATION PARAMETERS:
     trading_style: str = "day-trading",
     allow_shorting: bool = False,
     margin_account: bool = False,
     allowed_order_types: Optional[List[str]] = None
 ) -> str:
     """
-    Generate intraday-specific trading prompt
+    Generate the session-constant part of the intraday prompt
+    
+    Contains nothing that changes minute to minute, so the rendered text is
+    byte-identical across the whole session (lets provider prompt caching hit).
     
     Args:
-        minute: Current minute HH:MM
         symbol: Stock symbol
-        bar: Current minute's OHLCV data
-        position: Current portfolio
         custom_rules: Optional custom rules
         custom_instructions: Optional custom instructions
         trading_style: Trading style
@@ -300,40 +296,20 @@ def get_intraday_system_prompt(
         allowed_order_types: List of allowed order types
     
     Returns:
-        Prompt string for AI
+        Static prompt prefix
     """
     
-    cash = position.get("CASH", 0)
-    holdings = position.get(symbol, 0)
-    
-    # Calculate max shares we can afford
-    current_price = bar.get('close', 0)
-    max_affordable_shares = int(cash / current_price) if current_price > 0 else 0
-    
     prompt = f"""You are trading {symbol} on a minute-by-minute basis.
 
-CURRENT TIME: {minute}
-CURRENT MINUTE BAR:
-- Open: ${bar.get('open', 0):.2f}
-- High: ${bar.get('high', 0):.2f}
-- Low: ${bar.get('low', 0):.2f}
-- Close: ${bar.get('close', 0):.2f}
-- Volume: {bar.get('volume', 0):,}
-
-CURRENT PORTFOLIO:
-- Cash: ${cash:.2f}
-- {symbol} Holdings: {holdings} shares
-
-⚠️ TRADING LIMITS:
-- Maximum BUY: {max_affordable_shares} shares (based on available cash)
-- Maximum SELL: {holdings} shares (can't sell more than you own)
+Each message gives you the CURRENT TIME, the CURRENT MINUTE BAR, technical context,
+your CURRENT PORTFOLIO and your TRADING LIMITS for that minute.
 
 INSTRUCTIONS:
-Make a FAST trading decision for this minute. You have limited time.
+Make a FAST trading decision for each minute. You have limited time.
 
 Respond in ONE of these formats with BRIEF reasoning:
-- "BUY X shares - [reason in 5-10 words]" (X must be ≤ {max_affordable_shares})
-- "SELL X shares - [reason in 5-10 words]" (X must be ≤ {holdings})
+- "BUY X shares - [reason in 5-10 words]" (X must be ≤ Maximum BUY)
+- "SELL X shares - [reason in 5-10 words]" (X must be ≤ Maximum SELL)
 - "HOLD - [reason in 5-10 words]"
 
 Examples:
@@ -345,11 +321,10 @@ Examples:
 
 Consider:
 - Price movement this minute (open vs close)
-- Available cash (${cash:.2f})
-- Current holdings ({holdings} shares)
+- Available cash
+- Current holdings
 - Volume (market activity)
-
-Make your decision NOW (action + brief reasoning):"""
+- Technical context (VWAP, trend, RSI, volatility) when provided"""
     
     # Add configuration constraints
     order_types_list = allowed_order_types or ["market", "limit"]
@@ -394,6 +369,173 @@ Use these instructions to guide your minute-by-minute decisions.
     return prompt
 
 
+def get_intraday_minute_delta(
+    minute: str,
+    symbol: str,
+    bar: dict,
+    position: dict,
+    features: Optional[dict] = None,
+    bounds: Optional[dict] = None
+) -> str:
+    """
+    Generate the per-minute part of the intraday prompt
+    
+    Args:
+        minute: Current minute HH:MM
+        symbol: Stock symbol
+        bar: Current minute's OHLCV data
+        position: Current portfolio
+        features: Optional precomputed indicator row (see trading.intraday_features)
+        bounds: Optional feasibility result (see utils.feasibility) - replaces
+            the cash-only limits with limits that pass rules and risk gates
+    
+    Returns:
+        Per-minute prompt text
+    """
+    
+    from trading.intraday_features import format_features_for_prompt
+    
+    cash = position.get("CASH", 0)
+    holdings = position.get(symbol, 0)
+    
+    # Calculate max shares we can afford
+    current_price = bar.get('close', 0)
+    max_affordable_shares = int(cash / current_price) if current_price > 0 else 0
+    buy_limit_note = "based on available cash"
+    
+    if bounds:
+        max_affordable_shares = bounds['max_buy_shares']
+        holdings = bounds['max_sell_shares']
+        buy_limit_note = "after risk gates and your rules"
+        if bounds.get('binding_limit'):
+            buy_limit_note += f"; limited by: {bounds['binding_limit']}"
+    
+    return f"""CURRENT TIME: {minute}
+CURRENT MINUTE BAR:
+- Open: ${bar.get('open', 0):.2f}
+- High: ${bar.get('high', 0):.2f}
+- Low: ${bar.get('low', 0):.2f}
+- Close: ${bar.get('close', 0):.2f}
+- Volume: {bar.get('volume', 0):,}
+{format_features_for_prompt(features, current_price)}
+CURRENT PORTFOLIO:
+- Cash: ${cash:.2f}
+- {symbol} Holdings: {holdings} shares
+
+⚠️ TRADING LIMITS:
+- Maximum BUY: {max_affordable_shares} shares ({buy_limit_note})
+- Maximum SELL: {holdings} shares (can't sell more than you own)
+
+Make your decision NOW (action + brief reasoning):"""
+
+
+def get_intraday_system_prompt(
+    minute: str, 
+    symbol: str, 
+    bar: dict, 
+    position: dict,
+    custom_rules: Optional[str] = None,
+    custom_instructions: Optional[str] = None,
+    # NEW CONFIGURATION PARAMETERS:
+    trading_style: str = "day-trading",
+    allow_shorting: bool = False,
+    margin_account: bool = False,
+    allowed_order_types: Optional[List[str]] = None,
+    features: Optional[dict] = None,
+    bounds: Optional[dict] = None
+) -> str:
+    """
+    Generate the full intraday trading prompt (static prefix + minute delta)
+    
+    Sessions should prefer IntradayPromptCompiler, which renders the prefix once.
+    
+    Returns:
+        Prompt string for AI
+    """
+    
+    prefix = get_intraday_static_prefix(
+        symbol=symbol,
+        custom_rules=custom_rules,
+        custom_instructions=custom_instructions,
+        trading_style=trading_style,
+        allow_shorting=allow_shorting,
+        margin_account=margin_account,
+        allowed_order_types=allowed_order_types
+    )
+    return prefix + "\n\n" + get_intraday_minute_delta(minute, symbol, bar, position, features, bounds)
+
+
+def _load_token_encoder():
+    """Load a tiktoken encoder, or None if unavailable (falls back to char estimate)"""
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        return None
+
+
+class IntradayPromptCompiler:
+    """
+    Renders the static intraday prompt prefix once per session and
+    tracks prompt token counts for the per-minute deltas
+    """
+    
+    def __init__(self, symbol: str, agent):
+        self.symbol = symbol
+        self.prefix = get_intraday_static_prefix(
+            symbol=symbol,
+            custom_rules=agent.custom_rules,
+            custom_instructions=agent.custom_instructions,
+            trading_style=agent.trading_style,
+            allow_shorting=agent.allow_shorting,
+            margin_account=agent.margin_account,
+            allowed_order_types=agent.allowed_order_types
+        )
+        self._encoder = _load_token_encoder()
+        self.prefix_tokens = self.count_tokens(self.prefix)
+        self.delta_tokens = 0
+        self.max_delta_tokens = 0
+        self.calls = 0
+    
+    def count_tokens(self, text: str) -> int:
+        """Count tokens (tiktoken when available, ~4 chars/token otherwise)"""
+        if self._encoder is not None:
+            return len(self._encoder.encode(text))
+        return (len(text) + 3) // 4
+    
+    def render_minute(
+        self,
+        minute: str,
+        bar: dict,
+        position: dict,
+        features: Optional[dict] = None,
+        bounds: Optional[dict] = None
+    ) -> str:
+        """Render only the per-minute delta"""
+        return get_intraday_minute_delta(minute, self.symbol, bar, position, features, bounds)
+    
+    def record(self, message: str) -> int:
+        """Record token usage of one per-minute message"""
+        tokens = self.count_tokens(message)
+        self.delta_tokens += tokens
+        self.max_delta_tokens = max(self.max_delta_tokens, tokens)
+        self.calls += 1
+        return tokens
+    
+    def stats(self) -> Dict:
+        """Prompt token counts for the session"""
+        return {
+            "prefix_tokens": self.prefix_tokens,
+            "delta_tokens_total": self.delta_tokens,
+            "delta_tokens_avg": round(self.delta_tokens / self.calls, 1) if self.calls else 0,
+            "delta_tokens_max": self.max_delta_tokens,
+            "decisions": self.calls,
+            # What the session would have sent re-rendering the full prompt every minute
+            "input_tokens_uncached": self.delta_tokens + self.prefix_tokens * self.calls,
+            "tokenizer": "tiktoken" if self._encoder is not None else "estimate"
+        }
+
+
 if __name__ == "__main__":
     today_date = get_config_value("TODAY_DATE")
     signature = get_config_value("SIGNATURE")
@@ -12,7 +12,6 @@ from pathlib import Path
 
 from langchain_mcp_adapters.client import MultiServerMCPClient
 from langchain_openai import ChatOpenAI
-from langchain.agents import create_agent
 from dotenv import load_dotenv
 
 # Import project tools
@@ -22,6 +21,9 @@ sys.path.insert(0, project_root)
 
 from utils.general_tools import extract_conversation, extract_tool_messages, get_config_value, write_config_value
 from utils.price_tools import add_no_trade_record
+from utils.position_journal import get_position_journal
+from utils.market_calendar import trading_days
+from utils.agent_cache import agent_graph_cache, with_system_prompt
 from trading.agent_prompt import get_agent_system_prompt, STOP_SIGNAL
 
 # Load environment variables
@@ -179,7 +181,8 @@ class BaseAgent:
         except ImportError:
             self.event_stream = None
         
-    def _get_default_mcp_config(self) -> Dict[str, Dict[str, Any]]:
+    @staticmethod
+    def _get_default_mcp_config() -> Dict[str, Dict[str, Any]]:
         """Get default MCP configuration with June 2025 compliant timeouts"""
         return {
             "math": {
@@ -203,14 +206,23 @@ class BaseAgent:
             # "trade" removed - now using TradingService instead of MCP subprocess
         }
     
-    async def initialize(self) -> None:
-        """Initialize MCP client and AI model"""
+    async def initialize(self, mcp_tools: Optional[List] = None) -> None:
+        """
+        Initialize MCP client and AI model
+        
+        Args:
+            mcp_tools: Preloaded MCP tools to reuse (skips MCP connection,
+                used by warm Celery workers)
+        """
         print(f"🚀 Initializing agent: {self.signature}")
         
         # Try to connect to MCP services (optional - graceful degradation)
         self.mcp_tools = []
         
-        if self.mcp_config:
+        if mcp_tools is not None:
+            self.mcp_tools = list(mcp_tools)
+            print(f"♻️  Reusing {len(self.mcp_tools)} preloaded MCP tools")
+        elif self.mcp_config:
             try:
                 # Create MCP client
                 print(f"📡 Connecting to MCP services...")
@@ -454,29 +466,26 @@ class BaseAgent:
         # Set up logging
         log_file = self._setup_logging(today_date)
         
-        # Update system prompt
-        self.agent = create_agent(
-            self.model,
-            tools=self.tools,
-            system_prompt=get_agent_system_prompt(
-                today_date, 
-                self.signature,
-                custom_rules=self.custom_rules,
-                custom_instructions=self.custom_instructions,
-                # NEW: Pass configuration to prompt
-                trading_style=self.trading_style,
-                instrument=self.instrument,
-                allow_shorting=self.allow_shorting,
-                margin_account=self.margin_account,
-                allow_options_strategies=self.allow_options_strategies,
-                allow_hedging=self.allow_hedging,
-                allowed_order_types=self.allowed_order_types
-            ),
+        # Reuse the compiled graph across days - today's system prompt is passed as input
+        self.agent = agent_graph_cache.get_agent(self.model, self.tools)
+        system_prompt = get_agent_system_prompt(
+            today_date, 
+            self.signature,
+            custom_rules=self.custom_rules,
+            custom_instructions=self.custom_instructions,
+            # NEW: Pass configuration to prompt
+            trading_style=self.trading_style,
+            instrument=self.instrument,
+            allow_shorting=self.allow_shorting,
+            margin_account=self.margin_account,
+            allow_options_strategies=self.allow_options_strategies,
+            allow_hedging=self.allow_hedging,
+            allowed_order_types=self.allowed_order_types
         )
         
         # Initial user query
         user_query = [{"role": "user", "content": f"Please analyze and update today's ({today_date}) positions."}]
-        message = user_query.copy()
+        message = with_system_prompt(system_prompt, user_query)
         
         # Log initial message
         self._log_message(log_file, user_query)
@@ -633,18 +642,8 @@ class BaseAgent:
             self.register_agent()
             max_date = init_date
         else:
-            # Read existing position file, find latest date
-            with open(self.position_file, "r") as f:
-                for line in f:
-                    doc = json.loads(line)
-                    current_date = doc['date']
-                    if max_date is None:
-                        max_date = current_date
-                    else:
-                        current_date_obj = datetime.strptime(current_date, "%Y-%m-%d")
-                        max_date_obj = datetime.strptime(max_date, "%Y-%m-%d")
-                        if current_date_obj > max_date_obj:
-                            max_date = current_date
+            # Latest date comes from the journal index (no full-file scan)
+            max_date = get_position_journal(self.position_file).get_max_date() or init_date
         
         # Use init_date if it's later than historical max_date
         init_date_obj = datetime.strptime(init_date, "%Y-%m-%d")
@@ -657,16 +656,8 @@ class BaseAgent:
         if end_date_obj < start_from:
             return []
         
-        # Generate trading date list
-        trading_dates = []
-        current_date = start_from
-        
-        while current_date <= end_date_obj:
-            if current_date.weekday() < 5:  # Weekdays
-                trading_dates.append(current_date.strftime("%Y-%m-%d"))
-            current_date += timedelta(days=1)
-        
-        return trading_dates
+        # Generate trading date list (weekends and exchange holidays skipped)
+        return trading_days(start_from.strftime("%Y-%m-%d"), end_date)
     
     async def run_with_retry(self, today_date: str) -> None:
         """Run method with retry"""
@@ -720,6 +711,10 @@ class BaseAgent:
                 print(e)
                 raise
         
+        # Snapshot in-memory ledger so the next run replays only new journal records
+        if self.trading_service:
+            self.trading_service.flush()
+        
         print(f"✅ {self.signature} processing completed")
     
     def get_position_summary(self) -> Dict[str, Any]:
@@ -727,20 +722,17 @@ class BaseAgent:
         if not os.path.exists(self.position_file):
             return {"error": "Position file does not exist"}
         
-        positions = []
-        with open(self.position_file, "r") as f:
-            for line in f:
-                positions.append(json.loads(line))
+        journal = get_position_journal(self.position_file)
+        latest_position = journal.last_record()
         
-        if not positions:
+        if not latest_position:
             return {"error": "No position records"}
         
-        latest_position = positions[-1]
         return {
             "signature": self.signature,
             "latest_date": latest_position.get("date"),
             "positions": latest_position.get("positions", {}),
-            "total_records": len(positions)
+            "total_records": journal.get_count()
         }
     
     def __str__(self) -> str:
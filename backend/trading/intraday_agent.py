@@ -3,7 +3,7 @@ Intraday Trading Agent - Minute-by-Minute Trading Logic
 Extends base agent with intraday-specific functionality
 """
 
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime, timedelta, timezone
 import asyncio
 import json
@@ -13,6 +13,7 @@ from intraday_loader import (
     load_intraday_session,
     get_all_symbols_at_minute
 )
+from utils.market_calendar import SESSIONS, is_trading_day, session_minutes
 
 # Import event stream for real-time updates
 try:
@@ -29,7 +30,10 @@ async def run_intraday_session(
     date: str,
     session: str = "regular",
     run_id: Optional[int] = None,
-    celery_task=None  # ← NEW: For progress updates from Celery worker
+    celery_task=None,  # ← NEW: For progress updates from Celery worker
+    minute_window: Optional[Tuple[str, str]] = None,
+    flatten_at_window_end: bool = False,
+    starting_cash: Optional[float] = None
 ) -> Dict[str, Any]:
     # Set run_id on agent so trades link to this run
     if hasattr(agent, '_current_run_id'):
@@ -44,6 +48,18 @@ async def run_intraday_session(
         symbol: Stock symbol (single stock for intraday)
         date: Trading date YYYY-MM-DD
         session: 'pre', 'regular', 'after'
+        minute_window: (start, end) HH:MM - only trade minutes in [start, end)
+            (sharded runs; indicators still use the whole session up to each minute)
+        flatten_at_window_end: Sell any open position at the window's last bar
+        starting_cash: Cash to start with (defaults to agent.initial_cash)
+    
+    State is checkpointed every CHECKPOINT_EVERY minutes and after every
+    executed trade, and the loop resumes from the last checkpoint when re-run
+    with the same run_id - recorded trades are never replayed. A finished loop
+    leaves its result in the checkpoint (returned as-is if the task is
+    redelivered) until the caller clears it after completing the run. A
+    cancel request (run_checkpoint.request_cancel) stops the loop at the next
+    minute with status 'cancelled'.
     
     Returns:
         Session results
@@ -90,6 +106,14 @@ async def run_intraday_session(
             "message": f"Starting intraday session for {symbol} on {date}"
         })
     
+    # Holidays/weekends: no bars exist, don't fetch or call the model
+    if not is_trading_day(date):
+        closed_msg = f"📅 Market closed on {date} (weekend/holiday) - nothing to trade"
+        print(closed_msg)
+        if event_stream:
+            await event_stream.emit(model_id, "terminal", {"message": closed_msg})
+        return {"status": "failed", "error": f"Market closed on {date}"}
+    
     # Step 1: Pre-load all data into Redis
     print("📥 Step 1: Loading Session Data")
     print("-" * 80)
@@ -107,7 +131,8 @@ async def run_intraday_session(
     from intraday_loader import get_minute_bar_from_cache
     
     # Quick check: sample a few minutes to estimate cache completeness
-    test_minutes = ["09:30", "10:00", "12:00", "14:00", "15:30"]
+    grid = _get_session_minutes(date, session)
+    test_minutes = grid[::max(len(grid) // 5, 1)][:5]
     found = 0
     for test_min in test_minutes:
         bar = await get_minute_bar_from_cache(model_id, date, symbol, test_min)
@@ -162,17 +187,18 @@ async def run_intraday_session(
             "message": f"\n🤖 Creating Intraday Agent\n{'-' * 80}"
         })
     
-    from langchain.agents import create_agent
-    from trading.agent_prompt import get_intraday_system_prompt
+    from trading.agent_prompt import IntradayPromptCompiler
+    from utils.agent_cache import agent_graph_cache
     
-    # Create agent with simple prompt (will be customized per minute)
-    agent.agent = create_agent(
-        agent.model,
-        tools=agent.tools,
-        system_prompt=f"You are an intraday trader for {symbol}."
-    )
+    # Render the static prompt prefix ONCE - byte-stable system prompt for the
+    # whole session, each minute only sends its delta
+    prompt_compiler = IntradayPromptCompiler(symbol, agent)
     
-    print(f"✅ Agent created and ready for decisions")
+    # Reuse compiled graph (system prompt is passed as the first message)
+    agent.agent = agent_graph_cache.get_agent(agent.model, agent.tools)
+    
+    print(f"✅ Agent ready for decisions (graph cache: {agent_graph_cache.stats()['hits']} hits)")
+    print(f"  📝 Static prompt prefix: {prompt_compiler.prefix_tokens} tokens")
     
     if event_stream:
         await event_stream.emit(model_id, "terminal", {
@@ -238,6 +264,18 @@ async def run_intraday_session(
     print(f"  ⚠️  Missing {missing_count} bars")
     print(f"  📊 Success rate: {(found_count / len(minutes) * 100):.1f}%")
     
+    # Step 2.5: Precompute rolling indicator features once (O(1) lookup per minute)
+    from trading.intraday_features import compute_session_features
+    
+    session_features = compute_session_features(all_bars, minutes)
+    print(f"  📈 Computed indicator features for {len(session_features)} bars")
+    
+    # Sharded run: trade only this shard's window (features above keep full-session history)
+    if minute_window:
+        window_start, window_end = minute_window
+        minutes = [m for m in minutes if window_start <= m < window_end]
+        print(f"  🧩 Shard window {window_start}-{window_end}: {len(minutes)} minutes")
+    
     print(f"\n🕐 Step 3: Minute-by-Minute Trading")
     print("-" * 80)
     print(f"  Trading {len(minutes)} minutes with in-memory data")
@@ -266,10 +304,15 @@ async def run_intraday_session(
     if model_params.get('max_daily_loss_dollars'):
         print(f"  🛑 Max daily loss: ${model_params['max_daily_loss_dollars']:.2f}")
     
+    from utils.feasibility import evaluate_trade_feasibility
+    
     trades_executed = 0
     trades_rejected_rules = 0
     trades_rejected_gates = 0
-    current_position = {"CASH": agent.initial_cash}
+    llm_calls_skipped = 0
+    initial_cash = starting_cash if starting_cash is not None else agent.initial_cash
+    current_position = {"CASH": initial_cash}
+    last_minute, last_price = None, None
     
     # NEW: Track recent rejections for AI learning
     recent_rejections = []  # Last 10 rejections with reasons
@@ -277,8 +320,83 @@ async def run_intraday_session(
     # NEW: Track conversation context for strategic decision-making
     conversation_history = []  # AI's decisions + results over time
     
+    # Resume from the last checkpoint if this run was interrupted or paused
+    from trading.run_checkpoint import (
+        CHECKPOINT_EVERY, checkpoint_id, load_checkpoint, save_checkpoint,
+        get_cancel_request
+    )
+    
+    ckpt_id = checkpoint_id(run_id, symbol, minute_window) if run_id else None
+    checkpoint = await load_checkpoint(ckpt_id) if ckpt_id else None
+    resume_index = 0
+    if checkpoint and checkpoint.get("result") and checkpoint.get("date") == date:
+        print(f"  ⏭️  Loop {ckpt_id} already finished - returning its recorded result")
+        return checkpoint["result"]
+    if checkpoint and checkpoint.get("date") == date and checkpoint.get("session") == session:
+        resume_index = checkpoint["minute_index"]
+        current_position = checkpoint["current_position"]
+        initial_cash = checkpoint.get("initial_cash", initial_cash)
+        last_minute, last_price = checkpoint.get("last_minute"), checkpoint.get("last_price")
+        recent_rejections = checkpoint.get("recent_rejections", [])
+        conversation_history = checkpoint.get("conversation_history", [])
+        counters = checkpoint.get("counters", {})
+        trades_executed = counters.get("trades_executed", 0)
+        trades_rejected_rules = counters.get("trades_rejected_rules", 0)
+        trades_rejected_gates = counters.get("trades_rejected_gates", 0)
+        llm_calls_skipped = counters.get("llm_calls_skipped", 0)
+        resume_msg = f"  ⏯️  Resuming from checkpoint at minute {resume_index + 1}/{len(minutes)} ({minutes[resume_index] if resume_index < len(minutes) else 'end'})"
+        print(resume_msg)
+        if event_stream:
+            await event_stream.emit(model_id, "terminal", {"message": resume_msg})
+    
+    def _checkpoint_state(minute_index: int) -> Dict[str, Any]:
+        return {
+            "run_id": run_id,
+            "symbol": symbol,
+            "date": date,
+            "session": session,
+            "base_model": getattr(agent, "basemodel", None),
+            "minute_window": list(minute_window) if minute_window else None,
+            "minute_index": minute_index,
+            "last_minute": last_minute,
+            "last_price": last_price,
+            "initial_cash": initial_cash,
+            "current_position": current_position,
+            "recent_rejections": recent_rejections,
+            "conversation_history": conversation_history,
+            "counters": {
+                "trades_executed": trades_executed,
+                "trades_rejected_rules": trades_rejected_rules,
+                "trades_rejected_gates": trades_rejected_gates,
+                "llm_calls_skipped": llm_calls_skipped
+            }
+        }
+    
+    async def _checkpoint_after_trade(next_index: int) -> None:
+        # Recorded trades must not be replayed on resume
+        if ckpt_id:
+            await save_checkpoint(ckpt_id, _checkpoint_state(next_index))
+    
+    cancel_request = None
+    
     # Step 4: Trade each minute using in-memory bars
     for idx, minute in enumerate(minutes):
+        if idx < resume_index:
+            continue  # Already traded before the checkpoint
+        
+        if ckpt_id:
+            # Cooperative cancel: stop at a minute boundary with state saved
+            cancel_request = await get_cancel_request(run_id)
+            if cancel_request:
+                await save_checkpoint(ckpt_id, _checkpoint_state(idx))
+                cancel_msg = f"  ⏸️  Run {run_id} {cancel_request.get('reason', 'stop')} requested - stopping at {minute} (checkpoint saved)"
+                print(cancel_msg)
+                if event_stream:
+                    await event_stream.emit(model_id, "terminal", {"message": cancel_msg})
+                break
+            if idx > resume_index and idx % CHECKPOINT_EVERY == 0:
+                await save_checkpoint(ckpt_id, _checkpoint_state(idx))
+        
         # Get price from memory (no Redis call!)
         bar = all_bars.get(minute)
         
@@ -286,6 +404,7 @@ async def run_intraday_session(
             continue  # No data for this minute
         
         current_price = bar.get('close', 0)
+        last_minute, last_price = minute, current_price
         
         # Every 10 minutes, show progress and emit status
         if idx % 10 == 0:
@@ -316,19 +435,55 @@ async def run_intraday_session(
                     "progress": int((idx / len(minutes)) * 100)
                 })
         
-        # AI decision with full context (rejections + conversation history)
-        decision = await _ai_decide_intraday(
-            agent,
-            minute=minute,
+        # Simulated wall-clock time of this bar (timing rules use it, not datetime.now())
+        minute_time = datetime.strptime(f"{date} {minute}", "%Y-%m-%d %H:%M")
+        
+        # Pre-decision feasibility: which actions can pass config/gates/rules right now
+        minute_cash = current_position.get("CASH", 0)
+        minute_total_value = minute_cash + sum(
+            current_position.get(s, 0) * current_price
+            for s in current_position if s != 'CASH'
+        )
+        feasibility = evaluate_trade_feasibility(
             symbol=symbol,
-            current_price=current_price,
-            bar=bar,
+            price=current_price,
             current_position=current_position,
-            run_id=run_id,
-            recent_rejections=recent_rejections,
-            conversation_history=conversation_history  # ← NEW: Full context memory
+            portfolio_snapshot={
+                'cash': minute_cash,
+                'positions': current_position,
+                'total_value': minute_total_value,
+                'initial_value': initial_cash
+            },
+            enforcer=enforcer,
+            risk_gates=risk_gates,
+            current_time=minute_time
         )
         
+        if feasibility['hold_only']:
+            # Nothing but HOLD can pass validation - skip the LLM call entirely
+            llm_calls_skipped += 1
+            why = feasibility['reasons'] + feasibility['limits']
+            decision = {
+                "action": "hold",
+                "reasoning": f"No feasible trade ({'; '.join(why[:2]) or 'limits reached'})"
+            }
+        else:
+            # AI decision with full context (rejections + conversation history)
+            decision = await _ai_decide_intraday(
+                agent,
+                minute=minute,
+                symbol=symbol,
+                current_price=current_price,
+                bar=bar,
+                current_position=current_position,
+                run_id=run_id,
+                recent_rejections=recent_rejections,
+                conversation_history=conversation_history,  # ← NEW: Full context memory
+                features=session_features.get(minute),
+                prompt_compiler=prompt_compiler,
+                bounds=feasibility
+            )
+        
         # Execute decision and show reasoning
         action = decision.get("action")
         reasoning = decision.get("reasoning", "No reasoning provided")
@@ -358,7 +513,7 @@ async def run_intraday_session(
                 'cash': available_cash,
                 'positions': current_position,
                 'total_value': total_value,
-                'initial_value': agent.initial_cash
+                'initial_value': initial_cash
             }
             
             # NEW: Configuration Validator (order types, shorting, etc.)
@@ -444,7 +599,7 @@ async def run_intraday_session(
                 current_position=current_position,
                 total_portfolio_value=total_value,
                 asset_type='equity',
-                current_time=datetime.now()
+                current_time=minute_time
             )
             
             if not rules_passed:
@@ -527,6 +682,7 @@ async def run_intraday_session(
             # Keep last 20 minutes of context
             if len(conversation_history) > 20:
                 conversation_history.pop(0)
+            await _checkpoint_after_trade(idx + 1)
             
         elif action == "sell":
             amount = decision.get("amount", 0)
@@ -542,7 +698,7 @@ async def run_intraday_session(
                     "quantity": amount,
                     "order_type": decision.get("order_type", "market"),
                     "price": current_price,
-                    "current_cash": available_cash,
+                    "current_cash": current_position.get("CASH", 0),
                     "instrument": "stocks"
                 },
                 agent=agent
@@ -628,6 +784,7 @@ async def run_intraday_session(
             # Keep last 20 minutes of context
             if len(conversation_history) > 20:
                 conversation_history.pop(0)
+            await _checkpoint_after_trade(idx + 1)
             
         else:
             # HOLD - show reasoning occasionally in console
@@ -647,25 +804,57 @@ async def run_intraday_session(
             if len(conversation_history) > 20:
                 conversation_history.pop(0)
     
+    if cancel_request:
+        return {
+            "status": "cancelled",
+            "reason": cancel_request.get("reason", "stop"),
+            "resume_minute_index": idx,
+            "minutes_processed": idx,
+            "trades_executed": trades_executed,
+            "final_position": current_position,
+            "llm_calls_skipped": llm_calls_skipped,
+            "initial_cash": initial_cash,
+            "minute_window": list(minute_window) if minute_window else None
+        }
+    
+    # Sharded time window: close out so the next window starts flat
+    open_shares = current_position.get(symbol, 0)
+    if flatten_at_window_end and open_shares > 0 and last_price:
+        current_position["CASH"] += open_shares * last_price
+        current_position[symbol] = 0
+        await _record_intraday_trade(
+            model_id=model_id,
+            user_id=user_id,
+            run_id=run_id,
+            date=date,
+            minute=last_minute,
+            action="sell",
+            symbol=symbol,
+            amount=open_shares,
+            price=last_price,
+            position=current_position,
+            reasoning="Window end: flattening position (sharded run)"
+        )
+        trades_executed += 1
+        await _checkpoint_after_trade(len(minutes))
+        print(f"    🧩 Flattened {open_shares} {symbol} @ ${last_price:.2f} at window end")
+    
     # Calculate final portfolio value (CASH + STOCKS)
     final_cash = current_position.get("CASH", 0)
     final_stock_value = 0.0
     
-    # Value all stock holdings at current price
+    # Value all stock holdings at the last traded bar's price
     for stock_symbol, shares in current_position.items():
         if stock_symbol != "CASH" and shares > 0:
-            # Get final price from last bar
-            if all_bars and len(all_bars) > 0:
-                last_minute = list(all_bars.keys())[-1]
-                last_bar = all_bars[last_minute]
-                stock_price = last_bar.get('close', 0) if last_bar else 0
-                stock_value = shares * stock_price
-                final_stock_value += stock_value
-                print(f"   {stock_symbol}: {shares} shares × ${stock_price:.2f} = ${stock_value:.2f}")
+            stock_price = last_price or 0
+            stock_value = shares * stock_price
+            final_stock_value += stock_value
+            print(f"   {stock_symbol}: {shares} shares × ${stock_price:.2f} = ${stock_value:.2f}")
     
     total_portfolio_value = final_cash + final_stock_value
+    prompt_stats = prompt_compiler.stats()
     
-    completion_summary = f"\n✅ Session Complete:\n   Minutes Processed: {len(minutes)}\n   Trades Executed: {trades_executed}\n   Trades Rejected (Rules): {trades_rejected_rules}\n   Trades Rejected (Safety Gates): {trades_rejected_gates}\n   Final Cash: ${final_cash:,.2f}\n   Final Stock Value: ${final_stock_value:,.2f}"
+    completion_summary = f"\n✅ Session Complete:\n   Minutes Processed: {len(minutes)}\n   Trades Executed: {trades_executed}\n   Trades Rejected (Rules): {trades_rejected_rules}\n   Trades Rejected (Safety Gates): {trades_rejected_gates}\n   Final Cash: ${final_cash:,.2f}\n   Final Stock Value: ${final_stock_value:,.2f}\n   Prompt Tokens: {prompt_stats['prefix_tokens']} prefix + {prompt_stats['delta_tokens_total']:,} delta ({prompt_stats['decisions']} decisions)\n   LLM Calls Skipped (HOLD only): {llm_calls_skipped}"
     
     print(completion_summary)
     
@@ -691,53 +880,65 @@ async def run_intraday_session(
             "final_value": total_portfolio_value
         })
     
-    return {
+    result = {
         "status": "completed",
         "minutes_processed": len(minutes),
         "trades_executed": trades_executed,
         "final_position": current_position,
         "final_cash": final_cash,
         "final_stock_value": final_stock_value,
-        "total_portfolio_value": total_portfolio_value
+        "total_portfolio_value": total_portfolio_value,
+        "prompt_stats": prompt_stats,
+        "llm_calls_skipped": llm_calls_skipped,
+        "initial_cash": initial_cash,
+        "minute_window": list(minute_window) if minute_window else None,
+        "resumed_from_minute_index": resume_index or None
     }
+    
+    # Kept until the run is completed (clear_checkpoint in the task / shard reducer)
+    if ckpt_id:
+        await save_checkpoint(ckpt_id, {**_checkpoint_state(len(minutes)), "result": result})
+    
+    return result
 
 
 def _get_session_minutes(date: str, session: str) -> List[str]:
     """
-    Get list of minute timestamps for a session IN EDT
+    Get list of minute timestamps for a session in Eastern Time
     
     Args:
         date: YYYY-MM-DD
         session: 'pre', 'regular', 'after'
     
     Returns:
-        List of HH:MM strings in EDT (matching Redis cache keys)
+        List of HH:MM strings in ET (matching Redis cache keys). Empty on
+        market holidays/weekends; half days stop at the early close.
     """
-    
-    if session == "pre":
-        # 4:00 AM - 9:29 AM EDT = 329 minutes
-        start_hour, start_min = 4, 0
-        end_hour, end_min = 9, 29
-    elif session == "regular":
-        # 9:30 AM - 4:00 PM EDT = 390 minutes
-        start_hour, start_min = 9, 30
-        end_hour, end_min = 15, 59  # ← FIX: Should be 15:59 not 16:00 (4:00 PM = 16:00 but last minute is 15:59)
-    elif session == "after":
-        # 4:00 PM - 8:00 PM EDT = 240 minutes
-        start_hour, start_min = 16, 0
-        end_hour, end_min = 20, 0
-    else:
+    if session not in SESSIONS:
         return []
+    return list(session_minutes(date, session))
+
+
+def split_session_windows(date: str, session: str, shard_count: int) -> List[Tuple[str, str]]:
+    """
+    Split a session into contiguous minute windows for sharded runs
     
-    minutes = []
-    current = datetime(2000, 1, 1, start_hour, start_min)
-    end = datetime(2000, 1, 1, end_hour, end_min)
+    Args:
+        date: YYYY-MM-DD
+        session: 'pre', 'regular', 'after'
+        shard_count: Number of windows
     
-    while current <= end:
-        minutes.append(current.strftime('%H:%M'))
-        current += timedelta(minutes=1)
+    Returns:
+        List of (start, end) HH:MM pairs, end exclusive (last end is past the session)
+    """
+    minutes = _get_session_minutes(date, session)
+    if not minutes or shard_count <= 1:
+        return [(minutes[0], "24:00")] if minutes else []
     
-    return minutes
+    size = -(-len(minutes) // shard_count)  # Ceiling division
+    starts = minutes[::size]
+    ends = starts[1:] + ["24:00"]
+    return list(zip(starts, ends))
 
 
 async def _ai_decide_intraday(
@@ -749,7 +950,10 @@ async def _ai_decide_intraday(
     current_position: Dict,
     run_id: Optional[int] = None,
     recent_rejections: Optional[List] = None,
-    conversation_history: Optional[List] = None  # ← NEW: Full context memory
+    conversation_history: Optional[List] = None,  # ← NEW: Full context memory
+    features: Optional[Dict] = None,
+    prompt_compiler=None,
+    bounds: Optional[Dict] = None
 ) -> Dict[str, Any]:
     """
     AI makes intraday trading decision for current minute
@@ -764,27 +968,36 @@ async def _ai_decide_intraday(
         bar: Minute bar with OHLCV
         current_position: Current portfolio
         run_id: Optional run ID for linking reasoning
+        features: Precomputed indicator row for this minute
+        prompt_compiler: Session IntradayPromptCompiler (static prefix already
+            set as the agent's system prompt, so only the delta is sent)
+        bounds: Feasible action set and size bounds for this minute
     
     Returns:
         Decision dict with action and amount
     """
     
-    # Build intraday prompt
-    from trading.agent_prompt import get_intraday_system_prompt
-    
-    prompt = get_intraday_system_prompt(
-        minute=minute,
-        symbol=symbol,
-        bar=bar,
-        position=current_position,
-        custom_rules=agent.custom_rules,
-        custom_instructions=agent.custom_instructions,
-        # NEW: Pass configuration
-        trading_style=agent.trading_style,
-        allow_shorting=agent.allow_shorting,
-        margin_account=agent.margin_account,
-        allowed_order_types=agent.allowed_order_types
-    )
+    # Build intraday prompt (only the per-minute delta when a compiler is given)
+    if prompt_compiler is not None:
+        prompt = prompt_compiler.render_minute(minute, bar, current_position, features, bounds)
+    else:
+        from trading.agent_prompt import get_intraday_system_prompt
+        
+        prompt = get_intraday_system_prompt(
+            minute=minute,
+            symbol=symbol,
+            bar=bar,
+            position=current_position,
+            custom_rules=agent.custom_rules,
+            custom_instructions=agent.custom_instructions,
+            # NEW: Pass configuration
+            trading_style=agent.trading_style,
+            allow_shorting=agent.allow_shorting,
+            margin_account=agent.margin_account,
+            allowed_order_types=agent.allowed_order_types,
+            features=features,
+            bounds=bounds
+        )
     
     # NEW: Add conversation context so AI builds strategy over time
     context_additions = []
@@ -813,7 +1026,7 @@ async def _ai_decide_intraday(
         context_additions.append(f"   Portfolio: ${total_value:.0f} | 50% limit per trade")
     
     # 3. Strategic guidance
-    if len(conversation_history) > 5:
+    if conversation_history and len(conversation_history) > 5:
         context_additions.append("\n\n🎯 STRATEGIC REMINDER:")
         context_additions.append("• You don't need to trade every minute")
         context_additions.append("• HOLD when conditions aren't favorable")
@@ -823,14 +1036,22 @@ async def _ai_decide_intraday(
     if context_additions:
         prompt += "\n".join(context_additions)
     
+    if prompt_compiler is not None:
+        prompt_compiler.record(prompt)
+    
     # Call AI agent (actual decision making)
     try:
         print(f"    🤖 Calling AI for decision at {minute}...")
         
         # Add timeout wrapper to prevent hanging
+        messages = [{"role": "user", "content": prompt}]
+        if prompt_compiler is not None:
+            from utils.agent_cache import with_system_prompt
+            messages = with_system_prompt(prompt_compiler.prefix, messages)
+        
         response = await asyncio.wait_for(
             agent.agent.ainvoke(
-                {"messages": [{"role": "user", "content": prompt}]},
+                {"messages": messages},
                 {"recursion_limit": 5}  # Fast decisions for intraday
             ),
             timeout=3.0  # 3 second hard limit for fast intraday trading
@@ -883,6 +1104,7 @@ async def _ai_decide_intraday(
                     "minute": minute,
                     "symbol": symbol,
                     "bar": bar,
+                    "features": features,
                     "action": content_upper[:10]  # BUY/SELL/HOLD
                 }
             )
@@ -960,7 +1182,7 @@ async def _record_intraday_trade(
     
     # Insert intraday trade (RLS works through model_id → models.user_id)
     try:
-        supabase.table("positions").insert({
+        inserted = supabase.table("positions").insert({
             "model_id": model_id,
             "run_id": run_id,  # ← NEW: Link to run
             "date": date,
@@ -975,6 +1197,15 @@ async def _record_intraday_trade(
         }).execute()
         
         print(f"    💾 Recorded: {action.upper()} {amount} {symbol} @ ${price:.2f}")
+        
+        # Valuation at the fill price feeds the equity curve / dashboard
+        from services.equity_service import record_equity
+        record_equity(
+            model_id, run_id, date, position, {symbol: price},
+            minute=minute,
+            position_id=inserted.data[0]["id"] if inserted.data else None,
+            supabase=supabase
+        )
     except Exception as e:
         error_msg = str(e)
         if "positions_model_id_fkey" in error_msg:
@@ -0,0 +1,187 @@
+"""
+Intraday Feature Engineering - Rolling Technical Indicators
+Computes session-wide indicator arrays ONCE after bars are loaded,
+so each minute's decision gets its feature row with a dict lookup.
+"""
+
+from typing import Dict, List, Optional, Any
+import math
+
+import numpy as np
+
+
+# Window sizes (in minutes / bars)
+EMA_FAST = 9
+EMA_SLOW = 21
+SMA_WINDOW = 20
+RSI_WINDOW = 14
+ATR_WINDOW = 14
+ZSCORE_WINDOW = 20
+
+
+def _rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing rolling mean via cumulative sums (expanding until window is full)"""
+    n = len(values)
+    csum = np.concatenate(([0.0], np.cumsum(values)))
+    idx = np.arange(1, n + 1)
+    start = np.maximum(idx - window, 0)
+    return (csum[idx] - csum[start]) / (idx - start)
+
+
+def _rolling_std(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing rolling population std via cumulative sums of x and x²"""
+    n = len(values)
+    csum = np.concatenate(([0.0], np.cumsum(values)))
+    csum_sq = np.concatenate(([0.0], np.cumsum(values * values)))
+    idx = np.arange(1, n + 1)
+    start = np.maximum(idx - window, 0)
+    count = idx - start
+    mean = (csum[idx] - csum[start]) / count
+    var = (csum_sq[idx] - csum_sq[start]) / count - mean * mean
+    return np.sqrt(np.maximum(var, 0.0))
+
+
+def _ema(values: np.ndarray, span: int) -> np.ndarray:
+    """Exponential moving average seeded with the first value"""
+    out = np.empty_like(values)
+    if len(values) == 0:
+        return out
+    alpha = 2.0 / (span + 1)
+    out[0] = values[0]
+    for i in range(1, len(values)):
+        out[i] = alpha * values[i] + (1 - alpha) * out[i - 1]
+    return out
+
+
+def _wilder(values: np.ndarray, window: int) -> np.ndarray:
+    """Wilder smoothing (used by RSI and ATR)"""
+    out = np.empty_like(values)
+    if len(values) == 0:
+        return out
+    out[0] = values[0]
+    for i in range(1, len(values)):
+        out[i] = out[i - 1] + (values[i] - out[i - 1]) / window
+    return out
+
+
+def compute_session_features(all_bars: Dict[str, Dict], minutes: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Compute rolling indicator features for a whole session
+
+    Runs once per session in O(n). Minutes with no bar are skipped, so
+    indicators are computed over the bars that actually traded. Every value
+    at minute i only uses bars up to i (no lookahead).
+
+    Args:
+        all_bars: minute_str -> bar dict (open/high/low/close/volume)
+        minutes: Ordered session minutes (HH:MM)
+
+    Returns:
+        minute_str -> feature row dict
+    """
+
+    ordered = [m for m in minutes if all_bars.get(m)]
+    if not ordered:
+        return {}
+
+    bars = [all_bars[m] for m in ordered]
+    high = np.array([float(b.get('high', 0) or 0) for b in bars])
+    low = np.array([float(b.get('low', 0) or 0) for b in bars])
+    close = np.array([float(b.get('close', 0) or 0) for b in bars])
+    volume = np.array([float(b.get('volume', 0) or 0) for b in bars])
+
+    # VWAP and cumulative volume (typical price weighted)
+    typical = (high + low + close) / 3.0
+    cum_volume = np.cumsum(volume)
+    cum_pv = np.cumsum(typical * volume)
+    vwap = np.where(cum_volume > 0, cum_pv / np.where(cum_volume > 0, cum_volume, 1), close)
+
+    # Moving averages
+    ema_fast = _ema(close, EMA_FAST)
+    ema_slow = _ema(close, EMA_SLOW)
+    sma = _rolling_mean(close, SMA_WINDOW)
+
+    # RSI (Wilder)
+    delta = np.diff(close, prepend=close[0])
+    avg_gain = _wilder(np.maximum(delta, 0.0), RSI_WINDOW)
+    avg_loss = _wilder(np.maximum(-delta, 0.0), RSI_WINDOW)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rs = np.where(avg_loss > 0, avg_gain / np.where(avg_loss > 0, avg_loss, 1), np.inf)
+    rsi = np.where(avg_loss > 0, 100.0 - 100.0 / (1.0 + rs), np.where(avg_gain > 0, 100.0, 50.0))
+
+    # ATR (Wilder) on true range
+    prev_close = np.concatenate(([close[0]], close[:-1]))
+    true_range = np.maximum.reduce([
+        high - low,
+        np.abs(high - prev_close),
+        np.abs(low - prev_close)
+    ])
+    atr = _wilder(true_range, ATR_WINDOW)
+
+    # Z-scores of price and volume against trailing window
+    price_mean = _rolling_mean(close, ZSCORE_WINDOW)
+    price_std = _rolling_std(close, ZSCORE_WINDOW)
+    volume_mean = _rolling_mean(volume, ZSCORE_WINDOW)
+    volume_std = _rolling_std(volume, ZSCORE_WINDOW)
+    price_z = np.where(price_std > 0, (close - price_mean) / np.where(price_std > 0, price_std, 1), 0.0)
+    volume_z = np.where(volume_std > 0, (volume - volume_mean) / np.where(volume_std > 0, volume_std, 1), 0.0)
+
+    # Session-relative context
+    session_high = np.maximum.accumulate(high)
+    session_low = np.minimum.accumulate(low)
+    session_open = float(bars[0].get('open', close[0]) or close[0])
+
+    features = {}
+    for i, minute in enumerate(ordered):
+        features[minute] = {
+            'vwap': float(vwap[i]),
+            'ema_fast': float(ema_fast[i]),
+            'ema_slow': float(ema_slow[i]),
+            'sma': float(sma[i]),
+            'rsi': float(rsi[i]),
+            'atr': float(atr[i]),
+            'price_zscore': float(price_z[i]),
+            'volume_zscore': float(volume_z[i]),
+            'cum_volume': int(cum_volume[i]),
+            'session_high': float(session_high[i]),
+            'session_low': float(session_low[i]),
+            'session_change_pct': float((close[i] - session_open) / session_open * 100) if session_open else 0.0,
+            'bars_seen': i + 1
+        }
+
+    return features
+
+
+def format_features_for_prompt(features: Optional[Dict[str, Any]], price: float) -> str:
+    """
+    Render a feature row as a compact prompt block
+
+    Args:
+        features: Feature row from compute_session_features (or None)
+        price: Current close price
+
+    Returns:
+        Prompt text (empty string when no features)
+    """
+
+    if not features:
+        return ""
+
+    vwap = features['vwap']
+    vwap_side = "above" if price >= vwap else "below"
+    trend = "bullish" if features['ema_fast'] >= features['ema_slow'] else "bearish"
+    rsi = features['rsi']
+    rsi_note = " (overbought)" if rsi >= 70 else " (oversold)" if rsi <= 30 else ""
+    atr_pct = (features['atr'] / price * 100) if price > 0 and not math.isnan(features['atr']) else 0.0
+
+    return f"""
+TECHNICAL CONTEXT ({features['bars_seen']} bars this session):
+- VWAP: ${vwap:.2f} (price {vwap_side} VWAP)
+- EMA{EMA_FAST}/EMA{EMA_SLOW}: ${features['ema_fast']:.2f} / ${features['ema_slow']:.2f} ({trend})
+- SMA{SMA_WINDOW}: ${features['sma']:.2f}
+- RSI{RSI_WINDOW}: {rsi:.1f}{rsi_note}
+- ATR{ATR_WINDOW}: ${features['atr']:.3f} ({atr_pct:.2f}% of price)
+- Price z-score: {features['price_zscore']:+.2f} | Volume z-score: {features['volume_zscore']:+.2f}
+- Session: High ${features['session_high']:.2f} | Low ${features['session_low']:.2f} | Change {features['session_change_pct']:+.2f}%
+- Cumulative volume: {features['cum_volume']:,}
+"""
@@ -0,0 +1,167 @@
+"""
+Run Checkpoints and Cooperative Cancellation
+Periodically saves intraday loop state so a run interrupted by a worker
+restart, time-limit kill or pause can resume from its last checkpoint, and
+lets the API ask a running loop to stop at the next minute boundary.
+Delivery counters cap how often a crashing task is redelivered.
+
+Storage: Redis (Upstash) when configured, JSON files under
+data/run_checkpoints otherwise.
+"""
+
+import os
+import json
+import time
+from pathlib import Path
+from typing import Dict, Any, Optional, Sequence
+
+from config import settings
+from utils.redis_client import redis_client
+
+
+CHECKPOINT_EVERY = 10  # Minutes between checkpoints
+CHECKPOINT_TTL = 7 * 24 * 3600  # Keep checkpoints for a week
+CANCEL_TTL = 24 * 3600
+MAX_DELIVERIES = 3  # Worker-lost redeliveries + time-limit requeues before a run is failed
+
+_CHECKPOINT_DIR = Path(settings.DATA_DIR) / "run_checkpoints"
+
+
+def _redis_enabled() -> bool:
+    return bool(settings.UPSTASH_REDIS_REST_URL and settings.UPSTASH_REDIS_REST_TOKEN)
+
+
+def checkpoint_id(run_id: int, symbol: str, minute_window: Optional[Sequence[str]] = None) -> str:
+    """
+    Checkpoint identity for one intraday loop
+
+    Sharded runs execute several loops under one run_id, so the symbol and
+    window start are part of the id.
+    """
+    ckpt_id = f"{run_id}:{symbol}"
+    if minute_window:
+        ckpt_id += f":{minute_window[0]}"
+    return ckpt_id
+
+
+def _checkpoint_key(ckpt_id: str) -> str:
+    return f"run_checkpoint:{ckpt_id}"
+
+
+def _cancel_key(run_id: int) -> str:
+    return f"run_cancel:{run_id}"
+
+
+def _delivery_key(task_id: str) -> str:
+    return f"task_deliveries:{task_id}"
+
+
+def _file_path(key: str) -> Path:
+    return _CHECKPOINT_DIR / f"{key.replace(':', '_')}.json"
+
+
+async def _put(key: str, value: Any, ttl: int) -> None:
+    if _redis_enabled() and await redis_client.set(key, value, ex=ttl):
+        return
+    _CHECKPOINT_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = _file_path(key).with_suffix(".tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        json.dump(value, f, separators=(",", ":"))
+    os.replace(tmp, _file_path(key))
+
+
+async def _get(key: str) -> Optional[Any]:
+    if _redis_enabled():
+        value = await redis_client.get(key)
+        if value is not None:
+            return value
+    path = _file_path(key)
+    if path.exists():
+        try:
+            with path.open("r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception:
+            return None
+    return None
+
+
+async def _delete(key: str) -> None:
+    if _redis_enabled():
+        await redis_client.delete(key)
+    _file_path(key).unlink(missing_ok=True)
+
+
+async def save_checkpoint(ckpt_id: str, state: Dict[str, Any]) -> None:
+    """
+    Save intraday loop state
+
+    Args:
+        ckpt_id: Checkpoint id (see checkpoint_id())
+        state: {minute_index, last_minute, current_position, conversation_history,
+                recent_rejections, counters, ...}
+    """
+    try:
+        await _put(_checkpoint_key(ckpt_id), {**state, "saved_at": time.time()}, CHECKPOINT_TTL)
+    except Exception as e:
+        print(f"  ⚠️  Checkpoint save failed for {ckpt_id}: {e}")
+
+
+async def load_checkpoint(ckpt_id: str) -> Optional[Dict[str, Any]]:
+    """Latest checkpoint (None if the loop never checkpointed)"""
+    try:
+        return await _get(_checkpoint_key(ckpt_id))
+    except Exception as e:
+        print(f"  ⚠️  Checkpoint load failed for {ckpt_id}: {e}")
+        return None
+
+
+async def clear_checkpoint(ckpt_id: str) -> None:
+    """Drop a checkpoint (loop finished)"""
+    try:
+        await _delete(_checkpoint_key(ckpt_id))
+    except Exception as e:
+        print(f"  ⚠️  Checkpoint delete failed for {ckpt_id}: {e}")
+
+
+async def request_cancel(run_id: int, reason: str = "stop") -> None:
+    """Ask a running loop to stop at the next minute boundary"""
+    await _put(_cancel_key(run_id), {"reason": reason, "requested_at": time.time()}, CANCEL_TTL)
+
+
+async def clear_cancel(run_id: int) -> None:
+    """Clear a cancel request (before resuming)"""
+    await _delete(_cancel_key(run_id))
+
+
+async def get_cancel_request(run_id: int) -> Optional[Dict[str, Any]]:
+    """Pending cancel request for a run, if any"""
+    if not run_id:
+        return None
+    try:
+        return await _get(_cancel_key(run_id))
+    except Exception:
+        return None
+
+
+async def record_delivery(task_id: str) -> int:
+    """
+    Count one execution of a task (first delivery, redelivery or requeue)
+
+    Returns:
+        Number of times the task has started, including this one
+    """
+    try:
+        count = int(await _get(_delivery_key(task_id)) or 0) + 1
+        await _put(_delivery_key(task_id), count, CHECKPOINT_TTL)
+        return count
+    except Exception as e:
+        print(f"  ⚠️  Delivery count failed for {task_id}: {e}")
+        return 1
+
+
+async def clear_deliveries(task_id: str) -> None:
+    """Drop a task's delivery counter (task finished)"""
+    try:
+        await _delete(_delivery_key(task_id))
+    except Exception:
+        pass
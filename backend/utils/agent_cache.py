@@ -0,0 +1,207 @@
+"""
+Compiled Agent Graph Cache
+Reuses compiled LangChain/LangGraph agent graphs instead of rebuilding them
+per trading day, per intraday session or per chat request.
+
+Graphs are compiled WITHOUT a system prompt - callers pass the (per-day,
+per-session or per-request) system prompt as the first message instead,
+so one graph serves every prompt for the same (model, tools, parameters).
+
+Chat graphs outlive the request that built them, so their tools are built
+against request_client, which forwards to the Supabase client bound with
+bind_request_client() in the current request (asyncio task / thread context)
+instead of holding on to the first request's client.
+"""
+
+import threading
+from contextvars import ContextVar
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+
+# Model attributes that change the behaviour of a compiled graph
+_MODEL_KEY_FIELDS = (
+    "model_name", "model", "openai_api_base", "base_url", "temperature", "top_p",
+    "max_tokens", "max_completion_tokens", "frequency_penalty", "presence_penalty"
+)
+
+
+def _freeze(value: Any) -> Hashable:
+    """Convert dicts/lists into hashable tuples for cache keys"""
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple, set)):
+        return tuple(_freeze(v) for v in value)
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        return repr(value)
+
+
+def model_cache_key(model: Any) -> Hashable:
+    """
+    Cache key for a chat model instance or its constructor params dict
+
+    Args:
+        model: ChatOpenAI instance or the params dict passed to ChatOpenAI(**params)
+
+    Returns:
+        Hashable key (api keys are never part of the key)
+    """
+    if isinstance(model, dict):
+        return _freeze({k: v for k, v in model.items() if k not in ("api_key", "default_headers")})
+
+    fields = {}
+    for field in _MODEL_KEY_FIELDS:
+        value = getattr(model, field, None)
+        if value is not None:
+            fields[field] = value
+    fields["model_kwargs"] = getattr(model, "model_kwargs", None) or {}
+    return (type(model).__name__, _freeze(fields))
+
+
+def tools_cache_key(tools: List[Any]) -> Hashable:
+    """
+    Identity key for a list of tool instances
+
+    Tools are usually closures bound to an agent or a model, so identity (not
+    name) is what makes two tool lists interchangeable. The cache entry keeps
+    the tools alive, so ids cannot be recycled while the entry exists.
+    """
+    return tuple(id(t) for t in tools)
+
+
+class AgentGraphCache:
+    """
+    LRU cache of compiled agent graphs with hit/miss stats
+    """
+
+    def __init__(self, max_size: int = 64):
+        self.max_size = max_size
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_build(self, key: Hashable, builder: Callable[[], Any], keepalive: Any = None) -> Any:
+        """
+        Return the cached graph for key, building it on a miss
+
+        Args:
+            key: Hashable cache key
+            builder: Zero-arg callable that compiles the graph
+            keepalive: Objects to keep referenced with the entry (e.g. tools
+                keyed by identity)
+
+        Returns:
+            Compiled graph
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        # Build outside the lock (graph compilation is the slow part)
+        graph = builder()
+
+        with self._lock:
+            existing = self._entries.get(key)
+            if existing is not None:
+                self._entries.move_to_end(key)
+                return existing[0]
+            self._entries[key] = (graph, keepalive)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return graph
+
+    def get_agent(self, model: Any, tools: List[Any], kind: str = "create_agent") -> Any:
+        """
+        Get a compiled agent for (model, tools) without a baked-in system prompt
+
+        Args:
+            model: Chat model instance
+            tools: Tool instances (keyed by identity)
+            kind: "create_agent" (langchain) or "react" (langgraph prebuilt)
+
+        Returns:
+            Compiled agent graph
+        """
+        key = (kind, model_cache_key(model), tools_cache_key(tools))
+        return self.get_or_build(key, lambda: _build_agent(kind, model, tools), keepalive=list(tools))
+
+    def invalidate(self, predicate: Optional[Callable[[Hashable], bool]] = None) -> int:
+        """Drop all entries (or those whose key matches predicate)"""
+        with self._lock:
+            if predicate is None:
+                removed = len(self._entries)
+                self._entries.clear()
+                return removed
+            keys = [k for k in self._entries if predicate(k)]
+            for k in keys:
+                del self._entries[k]
+            return len(keys)
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache hit/miss statistics"""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0
+        }
+
+
+_request_client: ContextVar[Any] = ContextVar("agent_request_client", default=None)
+
+
+def bind_request_client(client: Any) -> None:
+    """
+    Bind the Supabase client used by cached graphs' tools in the current context
+
+    Call from the task that invokes the graph (context is copied into the
+    tasks and executor threads LangGraph runs tools in).
+    """
+    _request_client.set(client)
+
+
+class RequestClient:
+    """
+    Stand-in for a Supabase client inside tools of cached graphs
+
+    Attribute access forwards to the client bound by bind_request_client.
+    """
+
+    def __getattr__(self, name: str) -> Any:
+        client = _request_client.get()
+        if client is None:
+            raise RuntimeError("No Supabase client bound for this request (call bind_request_client)")
+        return getattr(client, name)
+
+
+def _build_agent(kind: str, model: Any, tools: List[Any]) -> Any:
+    """Compile an agent graph of the requested kind"""
+    if kind == "react":
+        from langgraph.prebuilt import create_react_agent
+        return create_react_agent(model, tools)
+
+    from langchain.agents import create_agent
+    return create_agent(model, tools=tools)
+
+
+def with_system_prompt(system_prompt: str, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Prepend the system prompt to a message list for a prompt-less cached graph"""
+    return [{"role": "system", "content": system_prompt}] + list(messages)
+
+
+# Global instances (one per process)
+agent_graph_cache = AgentGraphCache()
+request_client = RequestClient()
@@ -0,0 +1,148 @@
+"""
+Auth Caches - Verified Tokens, Model Ownership, Per-Request Memo
+Keeps repeated auth work off the hot path:
+
+- Token cache: bounded LRU of verified JWT claims keyed by SHA-256 of the
+  token; entries are only served until the token's own `exp`
+- Ownership cache: short-TTL (user_id, model_id) -> model row, invalidated
+  by services.update_model / delete_model (and any other model writer)
+- Request memo: a dict scoped to the current HTTP request (ContextVar set
+  by middleware in main.py), so repeated checks within a request are free
+
+All caches are per process; the ownership TTL bounds staleness across
+processes (API vs Celery workers).
+"""
+
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from contextvars import ContextVar, Token
+from typing import Any, Dict, Optional, Tuple
+
+
+TOKEN_CACHE_SIZE = 2048
+OWNERSHIP_CACHE_SIZE = 4096
+OWNERSHIP_TTL = 10.0  # Seconds a cached ownership check stays valid
+
+
+def _token_key(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+class TokenClaimsCache:
+    """
+    LRU of verified JWT claims
+
+    Only successfully verified tokens are stored; an entry is dropped as soon
+    as its `exp` passes, so an expired token always goes back through
+    jwt.decode (and fails there).
+    """
+
+    def __init__(self, max_size: int = TOKEN_CACHE_SIZE):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        key = _token_key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            claims, exp = entry
+            if exp <= time.time():
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return claims
+
+    def put(self, token: str, claims: Dict[str, Any]) -> None:
+        exp = claims.get("exp")
+        if not exp:
+            return  # Never cache tokens without an expiry
+        key = _token_key(token)
+        with self._lock:
+            self._entries[key] = (claims, float(exp))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+class OwnershipCache:
+    """Short-TTL cache of (user_id, model_id) -> model row"""
+
+    def __init__(self, ttl: float = OWNERSHIP_TTL, max_size: int = OWNERSHIP_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, int], Tuple[Dict[str, Any], float]]" = OrderedDict()
+
+    def get(self, user_id: str, model_id: int) -> Optional[Dict[str, Any]]:
+        key = (user_id, model_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            model, cached_at = entry
+            if time.monotonic() - cached_at >= self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return dict(model)
+
+    def put(self, user_id: str, model_id: int, model: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[(user_id, model_id)] = (dict(model), time.monotonic())
+            self._entries.move_to_end((user_id, model_id))
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, model_id: int) -> None:
+        """Drop every cached check for a model (any user)"""
+        with self._lock:
+            for key in [k for k in self._entries if k[1] == model_id]:
+                del self._entries[key]
+
+
+# ----------------------------------------------------------------------------
+# Per-request memo
+# ----------------------------------------------------------------------------
+
+_request_memo: ContextVar[Optional[Dict[Any, Any]]] = ContextVar("request_memo", default=None)
+
+
+def begin_request_scope() -> Token:
+    """Start a request-scoped memo (call from middleware)"""
+    return _request_memo.set({})
+
+
+def end_request_scope(token: Token) -> None:
+    _request_memo.reset(token)
+
+
+def request_memo() -> Optional[Dict[Any, Any]]:
+    """Memo dict for the current request, None outside a request"""
+    return _request_memo.get()
+
+
+def invalidate_model(model_id: int) -> None:
+    """Forget cached ownership checks for a model (after update/delete)"""
+    ownership_cache.invalidate(model_id)
+    memo = _request_memo.get()
+    if memo:
+        for key in [k for k in memo if isinstance(k, tuple) and k[:2] == ("model", model_id)]:
+            del memo[key]
+
+
+# Global instances (one per process)
+token_claims_cache = TokenClaimsCache()
+ownership_cache = OwnershipCache()
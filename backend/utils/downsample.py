@@ -0,0 +1,116 @@
+"""
+Series Downsampling - Shrink Equity Curves for Charts
+Charts never need more points than pixels, so long series are decimated
+server-side before they go over the wire.
+
+- lttb: Largest-Triangle-Three-Buckets, keeps the visual shape of the curve
+- minmax: keeps the low and high of every bucket, so drawdown troughs and
+  peaks always survive
+"""
+
+from typing import Tuple
+
+import numpy as np
+
+
+DOWNSAMPLE_METHODS = ("lttb", "minmax")
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Indices of the points LTTB keeps
+
+    Args:
+        x: Monotonic x values (e.g. epoch ms)
+        y: Values
+        threshold: Points to keep (>= 3)
+
+    Returns:
+        Sorted index array (first and last points always included)
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    # Bucket edges over the interior points (first/last are fixed)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    keep = np.empty(threshold, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        # Average of the next bucket (or the last point for the final bucket)
+        next_start, next_end = end, (edges[i + 2] if i + 2 < len(edges) else n)
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        # Point in this bucket forming the largest triangle with a and the average
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(area.argmax())
+        keep[i + 1] = a
+
+    return keep
+
+
+def minmax(y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Indices of each bucket's min and max (in time order)
+
+    Args:
+        y: Values
+        threshold: Approximate points to keep (two per bucket)
+
+    Returns:
+        Sorted, de-duplicated index array including first and last points
+    """
+    n = len(y)
+    if threshold >= n or threshold < 4:
+        return np.arange(n)
+
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(0, n, threshold // 2 + 1).astype(np.int64)
+
+    keep = [0, n - 1]
+    for start, end in zip(edges[:-1], edges[1:]):
+        if end <= start:
+            continue
+        bucket = y[start:end]
+        keep.append(start + int(bucket.argmin()))
+        keep.append(start + int(bucket.argmax()))
+
+    return np.unique(np.asarray(keep, dtype=np.int64))
+
+
+def downsample_indices(x, y, points: int, method: str = "lttb") -> np.ndarray:
+    """
+    Indices of the points to keep when downsampling to about `points` points
+
+    Args:
+        x: x values (monotonic, numeric)
+        y: y values
+        points: Target point count
+        method: 'lttb' or 'minmax'
+
+    Raises:
+        ValueError: Unknown method
+    """
+    if method not in DOWNSAMPLE_METHODS:
+        raise ValueError(f"Invalid downsample method: {method} (use {', '.join(DOWNSAMPLE_METHODS)})")
+
+    y = np.asarray(y, dtype=np.float64)
+    if method == "lttb":
+        return lttb(np.asarray(x, dtype=np.float64), y, points)
+    return minmax(y, points)
+
+
+def downsample(x, y, points: int, method: str = "lttb") -> Tuple[np.ndarray, np.ndarray]:
+    """Downsample a series to about `points` points, returning the kept (x, y)"""
+    idx = downsample_indices(x, y, points, method)
+    return np.asarray(x)[idx], np.asarray(y, dtype=np.float64)[idx]
@@ -0,0 +1,97 @@
+"""
+Pre-Decision Feasibility Evaluator
+Computes the feasible action set and size bounds for the current minute
+from portfolio state, user rules and risk gates - BEFORE paying for an LLM call
+"""
+
+from typing import Dict, List, Optional
+from datetime import datetime
+
+
+def evaluate_trade_feasibility(
+    symbol: str,
+    price: float,
+    current_position: Dict,
+    portfolio_snapshot: Dict,
+    enforcer=None,
+    risk_gates=None,
+    asset_type: str = 'equity',
+    current_time: Optional[datetime] = None
+) -> Dict:
+    """
+    Evaluate which actions can pass validation right now
+
+    Args:
+        symbol: Stock symbol
+        price: Current price
+        current_position: Current portfolio ({"CASH": ..., symbol: shares})
+        portfolio_snapshot: Same snapshot passed to RiskGates.validate_all
+        enforcer: RuleEnforcer (optional)
+        risk_gates: RiskGates (optional)
+        asset_type: Asset type for rule matching
+        current_time: Simulated time (for timing rules)
+
+    Returns:
+        {
+            'feasible_actions': List[str] ('buy' / 'sell' / 'hold'),
+            'hold_only': bool,
+            'max_buy_shares': int,
+            'max_sell_shares': int,
+            'binding_limit': str (tightest limit on buy size),
+            'limits': List[str] (every limit on buy size),
+            'reasons': List[str] (why actions are infeasible)
+        }
+    """
+
+    cash = current_position.get("CASH", 0)
+    holdings = current_position.get(symbol, 0)
+    total_value = portfolio_snapshot.get('total_value', cash)
+
+    buy_ok = price > 0
+    sell_ok = holdings > 0
+    max_buy_value = cash
+    binding_limit = "available cash"
+    limits: List[str] = []
+    reasons: List[str] = []
+
+    all_bounds = []
+    if risk_gates is not None:
+        all_bounds.append(risk_gates.get_trade_bounds(symbol, price, portfolio_snapshot))
+    if enforcer is not None:
+        all_bounds.append(enforcer.get_trade_bounds(
+            symbol=symbol,
+            price=price,
+            current_position=current_position,
+            total_portfolio_value=total_value,
+            asset_type=asset_type,
+            current_time=current_time
+        ))
+
+    for bounds in all_bounds:
+        if bounds.get('blocked_reason'):
+            reasons.append(bounds['blocked_reason'])
+        buy_ok = buy_ok and bounds['buy']
+        sell_ok = sell_ok and bounds['sell']
+        if bounds.get('max_buy_value') is not None and bounds['max_buy_value'] < max_buy_value:
+            max_buy_value = bounds['max_buy_value']
+            binding_limit = bounds.get('binding_limit') or binding_limit
+        limits.extend(bounds.get('limits', []))
+
+    max_buy_shares = int(max_buy_value // price) if buy_ok and price > 0 else 0
+    if buy_ok and max_buy_shares < 1:
+        buy_ok = False
+        reasons.append(f"Buy limits allow ${max_buy_value:,.2f}, less than 1 share at ${price:.2f}")
+    if holdings <= 0:
+        reasons.append(f"No {symbol} shares to sell")
+
+    feasible_actions = (['buy'] if buy_ok else []) + (['sell'] if sell_ok else []) + ['hold']
+
+    return {
+        'feasible_actions': feasible_actions,
+        'hold_only': feasible_actions == ['hold'],
+        'max_buy_shares': max_buy_shares if buy_ok else 0,
+        'max_sell_shares': int(holdings) if sell_ok else 0,
+        'binding_limit': binding_limit,
+        'limits': limits,
+        'reasons': reasons
+    }
@@ -1,6 +1,8 @@
 
 import os
 import json
+import time
+import threading
 from pathlib import Path
 from dotenv import load_dotenv
 load_dotenv()
@@ -11,10 +13,20 @@ try:
 except ImportError:
     sync_redis_config = None
 
+# Seconds between cross-process version checks (reads in between are dict lookups)
+CONFIG_VERSION_CHECK_INTERVAL = 1.0
+
+_MISSING = object()
+
+
+def _runtime_env_path(model_id: str) -> str:
+    return f"./data/.runtime_env_{model_id}.json"
+
+
 def _load_runtime_env() -> dict:
     # Use per-model runtime file for multi-user isolation
     model_id = os.environ.get("CURRENT_MODEL_ID", "global")
-    path = f"./data/.runtime_env_{model_id}.json"
+    path = _runtime_env_path(model_id)
     try:
         if os.path.exists(path):
             with open(path, "r", encoding="utf-8") as f:
@@ -26,22 +38,84 @@ def _load_runtime_env() -> dict:
     return {}
 
 
-def get_config_value(key: str, default=None):
+class RuntimeConfigCache:
     """
-    Get configuration value with triple fallback:
-    1. Redis (cross-process, works in subprocesses, persists across restarts)
-    2. File (local dev, backward compatibility)
-    3. Environment variable (static config)
-    
-    Args:
-        key: Configuration key (e.g., 'SIGNATURE', 'TODAY_DATE', 'IF_TRADE')
-        default: Default value if not found
+    Process-local runtime config with versioned cross-process invalidation
     
-    Returns:
-        Configuration value or default
+    Resolved values (Redis -> file -> env) are cached per model. Every write
+    bumps `config:{model_id}:__version__` in Redis; other processes compare
+    that stamp (and the runtime file mtime) at most once per
+    CONFIG_VERSION_CHECK_INTERVAL and drop their cache when it moved.
     """
-    model_id = os.environ.get("CURRENT_MODEL_ID", "global")
     
+    def __init__(self, check_interval: float = CONFIG_VERSION_CHECK_INTERVAL):
+        self.check_interval = check_interval
+        self._values: dict = {}      # model_id -> {key: value}
+        self._versions: dict = {}    # model_id -> (redis version, file mtime)
+        self._checked_at: dict = {}  # model_id -> monotonic time of last check
+        self._lock = threading.Lock()
+    
+    def _version_token(self, model_id: str) -> tuple:
+        redis_version = None
+        if sync_redis_config:
+            redis_version = sync_redis_config.get_raw(f"config:{model_id}:__version__")
+        try:
+            file_mtime = os.stat(_runtime_env_path(model_id)).st_mtime_ns
+        except OSError:
+            file_mtime = None
+        return (redis_version, file_mtime)
+    
+    def _values_for(self, model_id: str) -> dict:
+        """Cached values for a model, invalidated if another process wrote"""
+        now = time.monotonic()
+        if now - self._checked_at.get(model_id, float("-inf")) >= self.check_interval:
+            token = self._version_token(model_id)
+            self._checked_at[model_id] = now
+            if self._versions.get(model_id) != token:
+                self._versions[model_id] = token
+                self._values[model_id] = {}
+        return self._values.setdefault(model_id, {})
+    
+    def get(self, model_id: str, key: str, default=None):
+        with self._lock:
+            values = self._values_for(model_id)
+            value = values.get(key, _MISSING)
+            if value is _MISSING:
+                value = _resolve_config_value(model_id, key)
+                values[key] = value
+        return default if value is None else value
+    
+    def put(self, model_id: str, key: str, value, redis_version=None) -> None:
+        with self._lock:
+            values = self._values_for(model_id)
+            values[key] = value
+            # Adopt our own write's stamp so we don't invalidate ourselves
+            token = self._versions.get(model_id, (None, None))
+            try:
+                file_mtime = os.stat(_runtime_env_path(model_id)).st_mtime_ns
+            except OSError:
+                file_mtime = None
+            self._versions[model_id] = (
+                str(redis_version) if redis_version is not None else token[0],
+                file_mtime
+            )
+            self._checked_at[model_id] = time.monotonic()
+    
+    def invalidate(self, model_id: str = None) -> None:
+        """Drop cached values (all models when model_id is None)"""
+        with self._lock:
+            if model_id is None:
+                self._values.clear()
+                self._versions.clear()
+                self._checked_at.clear()
+            else:
+                self._values.pop(model_id, None)
+                self._versions.pop(model_id, None)
+                self._checked_at.pop(model_id, None)
+
+
+def _resolve_config_value(model_id: str, key: str):
+    """Uncached lookup: Redis, then runtime file, then environment"""
     # 1. Try Redis first (PRODUCTION: cross-process, multi-user isolation)
     if sync_redis_config:
         try:
@@ -59,7 +133,33 @@ def get_config_value(key: str, default=None):
         return _RUNTIME_ENV[key]
     
     # 3. Fallback to environment variable (STATIC CONFIG)
-    return os.getenv(key, default)
+    return os.getenv(key)
+
+
+# Global instance (one per process)
+runtime_config_cache = RuntimeConfigCache()
+
+
+def get_config_value(key: str, default=None):
+    """
+    Get configuration value with triple fallback:
+    1. Redis (cross-process, works in subprocesses, persists across restarts)
+    2. File (local dev, backward compatibility)
+    3. Environment variable (static config)
+    
+    Resolved values are cached in-process (see RuntimeConfigCache), so hot-path
+    reads are a dict lookup; writes from other processes are picked up via
+    the Redis version stamp within CONFIG_VERSION_CHECK_INTERVAL seconds.
+    
+    Args:
+        key: Configuration key (e.g., 'SIGNATURE', 'TODAY_DATE', 'IF_TRADE')
+        default: Default value if not found
+    
+    Returns:
+        Configuration value or default
+    """
+    model_id = os.environ.get("CURRENT_MODEL_ID", "global")
+    return runtime_config_cache.get(model_id, key, default)
 
 def write_config_value(key: str, value: any):
     """
@@ -67,6 +167,9 @@ def write_config_value(key: str, value: any):
     - Redis: For cross-process visibility (subprocesses can read)
     - File: For local dev and backward compatibility
     
+    The process-local cache is updated in place and the model's Redis
+    version stamp is bumped so other processes drop their cached values.
+    
     Args:
         key: Configuration key
         value: Value to store (JSON serializable)
@@ -76,12 +179,14 @@ def write_config_value(key: str, value: any):
     print(f"📝 write_config_value called: {key} = {value} (model_id={model_id})")
     
     # 1. Write to Redis (PRODUCTION: cross-process, persists across container restarts)
+    redis_version = None
     if sync_redis_config:
         print(f"  🔧 Using Redis for config write")
         try:
             redis_key = f"config:{model_id}:{key}"
             # 1 hour TTL - config shouldn't persist forever
             sync_redis_config.set(redis_key, value, ex=3600)
+            redis_version = sync_redis_config.incr(f"config:{model_id}:__version__")
         except Exception as e:
             print(f"  ⚠️  Redis config write failed for {key}: {e}")
             # Continue to file write even if Redis fails
@@ -91,13 +196,16 @@ def write_config_value(key: str, value: any):
     # 2. Write to file (LOCAL DEV: backward compatibility)
     _RUNTIME_ENV = _load_runtime_env()
     _RUNTIME_ENV[key] = value
-    path = f"./data/.runtime_env_{model_id}.json"
+    path = _runtime_env_path(model_id)
     
     # Ensure directory exists
     os.makedirs(os.path.dirname(path), exist_ok=True)
     
     with open(path, "w", encoding="utf-8") as f:
         json.dump(_RUNTIME_ENV, f, ensure_ascii=False, indent=4)
+    
+    # 3. Update process-local cache
+    runtime_config_cache.put(model_id, key, value, redis_version=redis_version)
 
 def extract_conversation(conversation: dict, output_type: str):
     """Extract information from a conversation payload.
@@ -0,0 +1,236 @@
+"""
+HTTP Response Cache - ETags and Conditional GETs for Polled Endpoints
+Dashboard endpoints are polled far more often than their data changes.
+Every write that changes a response bumps a version counter in the
+cache_versions table (triggers, migration 023), and responses are keyed by
+those versions:
+
+- ETag = hash(endpoint, caller, query, versions)
+- If-None-Match matching the ETag -> 304 with no body and no data queries
+- Otherwise a small in-process LRU of serialized bodies is checked before
+  rebuilding the response
+
+Version reads are themselves cached for VERSION_TTL seconds, so a client
+polling faster than that costs no database work at all; a write becomes
+visible within VERSION_TTL.
+"""
+
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple, Type
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+
+from config import settings
+
+
+VERSION_TTL = 2.0  # Seconds a version read is reused
+RESPONSE_CACHE_SIZE = 512
+CACHE_CONTROL = "private, no-cache"  # Always revalidate, but allow 304s
+
+
+def model_scope(model_id: int) -> str:
+    return f"model:{model_id}"
+
+
+def user_scope(user_id: str) -> str:
+    return f"user:{user_id}"
+
+
+class VersionStore:
+    """Reads cache_versions rows, memoized briefly per process"""
+
+    def __init__(self, ttl: float = VERSION_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._versions: Dict[str, Tuple[int, float]] = {}
+        self._client = None
+
+    def _supabase(self):
+        if self._client is None:
+            from supabase import create_client
+            self._client = create_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_ROLE_KEY)
+        return self._client
+
+    async def get(self, scopes: Iterable[str]) -> Optional[Dict[str, int]]:
+        """
+        Current version per scope (0 if never bumped)
+
+        Returns None when versions can't be read (e.g. migration 023 not
+        applied) - callers then skip caching.
+        """
+        return self.get_sync(scopes)
+
+    def get_sync(self, scopes: Iterable[str]) -> Optional[Dict[str, int]]:
+        """Same as get(), for sync callers (agent construction)"""
+        scopes = list(scopes)
+        now = time.monotonic()
+        with self._lock:
+            fresh = {s: self._versions[s][0] for s in scopes if s in self._versions and now - self._versions[s][1] < self.ttl}
+        missing = [s for s in scopes if s not in fresh]
+        if not missing:
+            return fresh
+
+        try:
+            result = self._supabase().table("cache_versions")\
+                .select("scope, version")\
+                .in_("scope", missing)\
+                .execute()
+        except Exception as e:
+            print(f"  ⚠️  Cache version read failed: {e}")
+            return None
+
+        found = {row["scope"]: row["version"] for row in result.data or []}
+        with self._lock:
+            for scope in missing:
+                fresh[scope] = found.get(scope, 0)
+                self._versions[scope] = (fresh[scope], now)
+        return fresh
+
+    def forget(self, *scopes: str) -> None:
+        """Drop memoized versions after a write in this process (next read hits the table)"""
+        with self._lock:
+            for scope in scopes:
+                self._versions.pop(scope, None)
+
+
+class ResponseCache:
+    """Small LRU of serialized JSON bodies keyed by (cache key) -> (etag, body)"""
+
+    def __init__(self, max_size: int = RESPONSE_CACHE_SIZE):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[tuple, Tuple[str, bytes]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def get(self, key: tuple, etag: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != etag:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: tuple, etag: str, body: bytes) -> None:
+        with self._lock:
+            self._entries[key] = (etag, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified
+        }
+
+
+def make_etag(key: tuple, versions: Dict[str, int]) -> str:
+    digest = hashlib.sha1(repr((key, sorted(versions.items()))).encode("utf-8")).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    """Weak If-None-Match comparison (W/"x" matches "x")"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return "*" in candidates or etag.removeprefix("W/") in candidates
+
+
+def _serialize(payload: Any, response_model: Optional[Type[BaseModel]]) -> bytes:
+    if response_model is not None:
+        payload = response_model.model_validate(payload).model_dump(mode="json")
+    return json.dumps(jsonable_encoder(payload), separators=(",", ":")).encode("utf-8")
+
+
+async def cached_json(
+    request: Request,
+    key: tuple,
+    scopes: Iterable[str],
+    build: Callable[[], Awaitable[Any]],
+    response_model: Optional[Type[BaseModel]] = None
+) -> Response:
+    """
+    Serve a JSON endpoint through the version-keyed cache
+
+    Args:
+        request: Incoming request (for If-None-Match)
+        key: Identifies the response (endpoint, caller, query params)
+        scopes: Version scopes the response depends on
+        build: Coroutine factory producing the payload on a miss
+        response_model: Validates/filters the payload like FastAPI's
+            response_model (the cached Response bypasses that step)
+
+    Returns:
+        304 Not Modified, or a 200 JSON response with ETag
+    """
+    versions = await version_store.get(scopes)
+    if versions is None:
+        return Response(_serialize(await build(), response_model), media_type="application/json")
+
+    etag = make_etag(key, versions)
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+    if _etag_matches(request, etag):
+        response_cache.not_modified += 1
+        return Response(status_code=304, headers=headers)
+
+    body = response_cache.get(key, etag)
+    if body is None:
+        body = _serialize(await build(), response_model)
+        response_cache.put(key, etag, body)
+
+    return Response(body, media_type="application/json", headers=headers)
+
+
+async def cached_static_json(
+    request: Request,
+    key: tuple,
+    ttl: float,
+    build: Callable[[], Awaitable[Any]],
+    should_cache: Callable[[Any], bool] = lambda payload: True
+) -> Response:
+    """
+    Cache a response that has no version counter (external data) for `ttl`
+    seconds; the ETag is a hash of the body. Payloads rejected by
+    should_cache (e.g. error fallbacks) are served but not kept.
+    """
+    now = time.monotonic()
+    with _static_lock:
+        entry = _static_cache.get(key)
+    if entry is None or now - entry[2] >= ttl:
+        payload = await build()
+        body = _serialize(payload, None)
+        etag = f'W/"{hashlib.sha1(body).hexdigest()[:20]}"'
+        entry = (etag, body, now)
+        if should_cache(payload):
+            with _static_lock:
+                _static_cache[key] = entry
+
+    etag, body, _ = entry
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if _etag_matches(request, etag):
+        response_cache.not_modified += 1
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+
+_static_lock = threading.Lock()
+_static_cache: Dict[tuple, Tuple[str, bytes, float]] = {}
+
+# Global instances (one per process)
+version_store = VersionStore()
+response_cache = ResponseCache()
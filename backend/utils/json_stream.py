@@ -0,0 +1,269 @@
+"""
+JSON Streaming - Fast Serialization, Chunked / NDJSON Bodies, Compression
+Large history endpoints (logs, run detail, chat history) are sent as they are
+read instead of being built into one list and one JSON blob:
+
+- dumps(): orjson when installed (falls back to the stdlib json module)
+- iter_query_pages(): reads a Supabase query in fixed-size pages
+- ndjson_chunks(): one typed record per line
+  {"type": "meta"|<kind>|"end", "data": {...}}
+- json_object_chunks(): the endpoint's usual JSON object, written
+  incrementally (same shape as the non-streamed response)
+- gzip / brotli negotiated from Accept-Encoding, flushed per page so the
+  client can start parsing before the last page is read
+- project(): field projection (?fields=a,b,c) also narrows the SELECT
+
+Brotli is optional (pip install Brotli); without it only gzip is offered.
+"""
+
+import re
+import json
+import zlib
+import itertools
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional
+    brotli = None
+
+
+STREAM_PAGE_SIZE = 500  # Rows per Supabase read / per flushed chunk
+COMPRESS_MIN_BYTES = 1024  # Smaller bodies aren't worth compressing
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+STREAM_FORMATS = ("json", "ndjson")
+
+_FIELD_RE = re.compile(r"^[a-z_][a-z0-9_]*$")
+
+
+# ----------------------------------------------------------------------------
+# Serialization
+# ----------------------------------------------------------------------------
+
+def _default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+
+def dumps(obj: Any) -> bytes:
+    """Serialize to compact JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, default=_default, separators=(",", ":")).encode("utf-8")
+
+
+# ----------------------------------------------------------------------------
+# Field projection
+# ----------------------------------------------------------------------------
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """
+    Parse ?fields=a,b,c
+
+    Raises:
+        HTTPException: 400 on a malformed column name
+    """
+    if not fields:
+        return None
+    names = [f.strip() for f in fields.split(",") if f.strip()]
+    bad = [f for f in names if not _FIELD_RE.match(f)]
+    if bad:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid field name(s): {', '.join(bad)}"
+        )
+    return names or None
+
+
+def select_clause(fields: Optional[Sequence[str]], required: Sequence[str] = ("id",)) -> str:
+    """Supabase select string for a projection ('*' when not projecting)"""
+    if not fields:
+        return "*"
+    return ", ".join(dict.fromkeys([*required, *fields]))
+
+
+def project(row: Dict, fields: Optional[Sequence[str]]) -> Dict:
+    if not fields:
+        return row
+    return {f: row.get(f) for f in fields}
+
+
+def check_format(fmt: str) -> str:
+    if fmt not in STREAM_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid format: {fmt} (use {', '.join(STREAM_FORMATS)})"
+        )
+    return fmt
+
+
+# ----------------------------------------------------------------------------
+# Paged reads
+# ----------------------------------------------------------------------------
+
+def iter_query_pages(build_query: Callable[[], Any], page_size: int = STREAM_PAGE_SIZE) -> Iterator[List[Dict]]:
+    """
+    Read a query page by page
+
+    Args:
+        build_query: Returns a fresh, fully filtered and ordered query
+        page_size: Rows per request
+    """
+    offset = 0
+    while True:
+        rows = build_query().range(offset, offset + page_size - 1).execute().data or []
+        if rows:
+            yield rows
+        if len(rows) < page_size:
+            return
+        offset += page_size
+
+
+def primed(pages: Iterator[List[Dict]]) -> Iterator[List[Dict]]:
+    """Fetch the first page now, so query errors surface before the response starts"""
+    first = next(pages, None)
+    return itertools.chain([] if first is None else [first], pages)
+
+
+# ----------------------------------------------------------------------------
+# Body writers
+# ----------------------------------------------------------------------------
+
+def ndjson_chunks(
+    meta: Dict,
+    sections: Iterable[Tuple[str, Iterator[List[Dict]], Optional[Sequence[str]]]]
+) -> Iterator[bytes]:
+    """
+    NDJSON body: a meta line, one line per row, then an end line with counts
+
+    Args:
+        meta: Header object (first line)
+        sections: (kind, pages, fields) per collection, streamed in order
+    """
+    yield dumps({"type": "meta", "data": meta}) + b"\n"
+    counts = {}
+    for kind, pages, fields in sections:
+        count = 0
+        for rows in pages:
+            yield b"".join(dumps({"type": kind, "data": project(row, fields)}) + b"\n" for row in rows)
+            count += len(rows)
+        counts[kind] = count
+    yield dumps({"type": "end", "counts": counts}) + b"\n"
+
+
+def json_object_chunks(
+    head: Dict,
+    arrays: Iterable[Tuple[str, Iterator[List[Dict]], Optional[Sequence[str]], Optional[str]]]
+) -> Iterator[bytes]:
+    """
+    One JSON object written incrementally: head fields, then arrays
+
+    Args:
+        head: Scalar fields written first
+        arrays: (key, pages, fields, count_key) - count_key, if set, is
+            written after the array with its length
+    """
+    opening = dumps(head)[:-1]  # '{...' without the closing brace
+    yield opening
+    separator = b"," if len(head) else b""
+    for key, pages, fields, count_key in arrays:
+        yield separator + dumps(key) + b":["
+        separator = b","
+        count = 0
+        for rows in pages:
+            chunk = b",".join(dumps(project(row, fields)) for row in rows)
+            yield (b"," if count else b"") + chunk
+            count += len(rows)
+        yield b"]"
+        if count_key:
+            yield b"," + dumps(count_key) + b":" + dumps(count)
+    yield b"}"
+
+
+# ----------------------------------------------------------------------------
+# Compression
+# ----------------------------------------------------------------------------
+
+def negotiate_encoding(request: Request) -> Optional[str]:
+    """Best supported Content-Encoding the client accepts ('br', 'gzip' or None)"""
+    accepted = set()
+    for part in request.headers.get("accept-encoding", "").lower().split(","):
+        token, _, params = part.strip().partition(";")
+        try:
+            q = float(params.strip()[2:]) if params.strip().startswith("q=") else 1.0
+        except ValueError:
+            q = 1.0
+        if q > 0:
+            accepted.add(token.strip())
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+
+def compress_chunks(chunks: Iterable[bytes], encoding: str) -> Iterator[bytes]:
+    """Compress a chunk stream, flushing after each chunk"""
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=5)
+        for chunk in chunks:
+            out = compressor.process(chunk) + compressor.flush()
+            if out:
+                yield out
+        yield compressor.finish()
+        return
+
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 -> gzip container
+    for chunk in chunks:
+        out = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if out:
+            yield out
+    yield compressor.flush()
+
+
+def stream_response(request: Request, chunks: Iterator[bytes], media_type: str = "application/json") -> StreamingResponse:
+    """Chunked response, compressed when the client accepts it"""
+    headers = {"Vary": "Accept-Encoding"}
+    encoding = negotiate_encoding(request)
+    if encoding:
+        chunks = compress_chunks(chunks, encoding)
+        headers["Content-Encoding"] = encoding
+    return StreamingResponse(chunks, media_type=media_type, headers=headers)
+
+
+def json_response(request: Request, payload: Any, status_code: int = 200) -> Response:
+    """Whole-body JSON response (fast serializer, compressed past COMPRESS_MIN_BYTES)"""
+    body = dumps(payload)
+    headers = {"Vary": "Accept-Encoding"}
+    encoding = negotiate_encoding(request) if len(body) >= COMPRESS_MIN_BYTES else None
+    if encoding:
+        body = b"".join(compress_chunks([body], encoding))
+        headers["Content-Encoding"] = encoding
+    return Response(body, status_code=status_code, media_type="application/json", headers=headers)
+
+
+def rows_response(
+    request: Request,
+    fmt: str,
+    meta: Dict,
+    kind: str,
+    rows: List[Dict],
+    fields: Optional[Sequence[str]] = None
+) -> Response:
+    """
+    Response for an already-loaded list: {**meta, kind: rows} as JSON, or
+    NDJSON records
+    """
+    if check_format(fmt) == "ndjson":
+        return stream_response(request, ndjson_chunks(meta, [(kind, iter([rows]), fields)]), NDJSON_MEDIA_TYPE)
+    return json_response(request, {**meta, kind: [project(row, fields) for row in rows]})
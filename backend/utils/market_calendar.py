@@ -0,0 +1,292 @@
+"""
+Market Calendar - US Equity Sessions, Holidays and Minute Grids
+Single source of truth for which days trade and when each session opens and
+closes, with DST-correct Eastern Time <-> UTC conversion.
+
+- Trading days skip weekends, NYSE full-day holidays and special closures
+- Half days (day after Thanksgiving, July 3, Christmas Eve) close at 13:00 ET
+  (after-hours ends at 17:00 ET)
+- Sessions are half-open [open, close) in Eastern Time:
+    pre      04:00 - 09:30
+    regular  09:30 - 16:00 (13:00 on half days)
+    after    16:00 - 20:00 (13:00 - 17:00 on half days)
+
+Per-year holiday sets and per-(date, session) minute grids are computed once
+per process and cached.
+"""
+
+from datetime import date as date_cls, datetime, timedelta, timezone
+from functools import lru_cache
+from typing import FrozenSet, List, NamedTuple, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+
+EASTERN = ZoneInfo("America/New_York")
+
+SESSIONS = ("pre", "regular", "after")
+
+# One-off closures (national days of mourning, etc.)
+SPECIAL_CLOSURES = frozenset({
+    date_cls(2012, 10, 29), date_cls(2012, 10, 30),  # Hurricane Sandy
+    date_cls(2018, 12, 5),  # President G.H.W. Bush
+    date_cls(2025, 1, 9),  # President Carter
+})
+
+
+class SessionBounds(NamedTuple):
+    """Session open/close for one date (close exclusive)"""
+    date: str
+    session: str
+    open_et: datetime
+    close_et: datetime
+    open_ns: int
+    close_ns: int
+    utc_offset_hours: int
+
+
+# ----------------------------------------------------------------------------
+# Holiday rules
+# ----------------------------------------------------------------------------
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date_cls:
+    """n-th weekday (0=Mon) of a month; n=-1 for the last one"""
+    if n > 0:
+        first = date_cls(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = date_cls(year + (month == 12), month % 12 + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _easter(year: int) -> date_cls:
+    """Gregorian Easter Sunday (anonymous algorithm)"""
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = b // 4, b % 4
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month = (h + l - 7 * m + 114) // 31
+    day = (h + l - 7 * m + 114) % 31 + 1
+    return date_cls(year, month, day)
+
+
+def _observed(day: date_cls) -> date_cls:
+    """Saturday holidays are observed Friday, Sunday holidays Monday"""
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+
+@lru_cache(maxsize=64)
+def _year_calendar(year: int) -> Tuple[FrozenSet[date_cls], FrozenSet[date_cls]]:
+    """(full-day closures, half days) for a year"""
+    holidays = set()
+
+    # New Year's Day: Sunday -> Monday; Saturday is NOT observed on Dec 31
+    new_year = date_cls(year, 1, 1)
+    if new_year.weekday() == 6:
+        holidays.add(new_year + timedelta(days=1))
+    elif new_year.weekday() < 5:
+        holidays.add(new_year)
+
+    if year >= 1998:
+        holidays.add(_nth_weekday(year, 1, 0, 3))  # Martin Luther King Jr. Day
+    holidays.add(_nth_weekday(year, 2, 0, 3))  # Presidents' Day
+    holidays.add(_easter(year) - timedelta(days=2))  # Good Friday
+    holidays.add(_nth_weekday(year, 5, 0, -1))  # Memorial Day
+    if year >= 2022:
+        holidays.add(_observed(date_cls(year, 6, 19)))  # Juneteenth
+    holidays.add(_observed(date_cls(year, 7, 4)))  # Independence Day
+    holidays.add(_nth_weekday(year, 9, 0, 1))  # Labor Day
+    thanksgiving = _nth_weekday(year, 11, 3, 4)
+    holidays.add(thanksgiving)
+    holidays.add(_observed(date_cls(year, 12, 25)))  # Christmas
+
+    holidays.update(d for d in SPECIAL_CLOSURES if d.year == year)
+
+    half_days = {
+        d for d in (date_cls(year, 7, 3), thanksgiving + timedelta(days=1), date_cls(year, 12, 24))
+        if d.weekday() < 5 and d not in holidays
+    }
+
+    return frozenset(holidays), frozenset(half_days)
+
+
+def _parse(day) -> date_cls:
+    if isinstance(day, datetime):
+        return day.date()
+    if isinstance(day, date_cls):
+        return day
+    return datetime.strptime(day, "%Y-%m-%d").date()
+
+
+# ----------------------------------------------------------------------------
+# Trading days
+# ----------------------------------------------------------------------------
+
+def is_trading_day(day) -> bool:
+    """Whether the market is open on a date (YYYY-MM-DD, date or datetime)"""
+    d = _parse(day)
+    return d.weekday() < 5 and d not in _year_calendar(d.year)[0]
+
+
+def is_half_day(day) -> bool:
+    """Whether a date is an early-close (13:00 ET) trading day"""
+    d = _parse(day)
+    return d in _year_calendar(d.year)[1]
+
+
+def holiday_dates(year: int) -> List[str]:
+    """Full-day market closures in a year (weekdays only)"""
+    return sorted(d.strftime("%Y-%m-%d") for d in _year_calendar(year)[0])
+
+
+def trading_days(start_date: str, end_date: str) -> List[str]:
+    """
+    Trading days in [start_date, end_date]
+
+    Args:
+        start_date: YYYY-MM-DD
+        end_date: YYYY-MM-DD
+
+    Returns:
+        List of YYYY-MM-DD strings
+    """
+    current, end = _parse(start_date), _parse(end_date)
+    days = []
+    while current <= end:
+        if is_trading_day(current):
+            days.append(current.strftime("%Y-%m-%d"))
+        current += timedelta(days=1)
+    return days
+
+
+def previous_trading_day(day) -> str:
+    """Most recent trading day strictly before a date"""
+    d = _parse(day) - timedelta(days=1)
+    while not is_trading_day(d):
+        d -= timedelta(days=1)
+    return d.strftime("%Y-%m-%d")
+
+
+def next_trading_day(day) -> str:
+    """First trading day strictly after a date"""
+    d = _parse(day) + timedelta(days=1)
+    while not is_trading_day(d):
+        d += timedelta(days=1)
+    return d.strftime("%Y-%m-%d")
+
+
+# ----------------------------------------------------------------------------
+# Sessions
+# ----------------------------------------------------------------------------
+
+def _session_hours(d: date_cls, session: str) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+    half = d in _year_calendar(d.year)[1]
+    if session == "pre":
+        return (4, 0), (9, 30)
+    if session == "regular":
+        return (9, 30), ((13, 0) if half else (16, 0))
+    if session == "after":
+        return ((13, 0), (17, 0)) if half else ((16, 0), (20, 0))
+    raise ValueError(f"Invalid session: {session}")
+
+
+@lru_cache(maxsize=1024)
+def session_bounds(day: str, session: str) -> Optional[SessionBounds]:
+    """
+    Open/close of a session in ET and as UTC epoch nanoseconds
+
+    Args:
+        day: YYYY-MM-DD
+        session: 'pre', 'regular', 'after'
+
+    Returns:
+        SessionBounds, or None if the market is closed that day
+
+    Raises:
+        ValueError: Unknown session
+    """
+    d = _parse(day)
+    (open_h, open_m), (close_h, close_m) = _session_hours(d, session)
+    if not is_trading_day(d):
+        return None
+
+    open_et = datetime(d.year, d.month, d.day, open_h, open_m, tzinfo=EASTERN)
+    close_et = datetime(d.year, d.month, d.day, close_h, close_m, tzinfo=EASTERN)
+    offset = int(open_et.utcoffset().total_seconds() // 3600)
+
+    return SessionBounds(
+        date=d.strftime("%Y-%m-%d"),
+        session=session,
+        open_et=open_et,
+        close_et=close_et,
+        open_ns=int(open_et.timestamp()) * 1_000_000_000,
+        close_ns=int(close_et.timestamp()) * 1_000_000_000,
+        utc_offset_hours=offset
+    )
+
+
+def session_timestamp_range_ns(day: str, session: str) -> Optional[Tuple[int, int]]:
+    """(start_ns, end_ns) inclusive range for trade queries, None if closed"""
+    bounds = session_bounds(day, session)
+    if bounds is None:
+        return None
+    return bounds.open_ns, bounds.close_ns - 1
+
+
+def session_timestamp_range_ms(day: str, session: str) -> Optional[Tuple[int, int]]:
+    """(start_ms, end_ms) inclusive range for aggregate queries, None if closed"""
+    bounds = session_bounds(day, session)
+    if bounds is None:
+        return None
+    return bounds.open_ns // 1_000_000, bounds.close_ns // 1_000_000 - 1
+
+
+@lru_cache(maxsize=1024)
+def session_minute_grid_ms(day: str, session: str) -> np.ndarray:
+    """
+    UTC epoch-ms start of every minute bar in a session (read-only array)
+
+    Returns an empty array when the market is closed.
+    """
+    bounds = session_bounds(day, session)
+    if bounds is None:
+        grid = np.empty(0, dtype=np.int64)
+    else:
+        grid = np.arange(bounds.open_ns // 1_000_000, bounds.close_ns // 1_000_000, 60_000, dtype=np.int64)
+    grid.flags.writeable = False
+    return grid
+
+
+@lru_cache(maxsize=1024)
+def session_minutes(day: str, session: str) -> Tuple[str, ...]:
+    """
+    HH:MM Eastern Time labels of every minute bar in a session
+
+    These match the intraday Redis cache keys. Empty when the market is closed.
+    """
+    bounds = session_bounds(day, session)
+    if bounds is None:
+        return ()
+    start = bounds.open_et.hour * 60 + bounds.open_et.minute
+    end = bounds.close_et.hour * 60 + bounds.close_et.minute
+    return tuple(f"{m // 60:02d}:{m % 60:02d}" for m in range(start, end))
+
+
+def utc_offset_hours(day: str) -> int:
+    """Eastern Time UTC offset on a date (-4 EDT, -5 EST)"""
+    d = _parse(day)
+    noon = datetime(d.year, d.month, d.day, 12, tzinfo=EASTERN)
+    return int(noon.utcoffset().total_seconds() // 3600)
+
+
+def et_minute_label(ts_ms: int) -> str:
+    """HH:MM Eastern Time label for a UTC epoch-ms timestamp (DST-aware)"""
+    return datetime.fromtimestamp(ts_ms / 1000, tz=timezone.utc).astimezone(EASTERN).strftime("%H:%M")
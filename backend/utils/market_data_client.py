@@ -0,0 +1,361 @@
+"""
+Market Data Client - Shared HTTP Client for the Polygon Proxy
+One pooled HTTP/2 client per event loop with:
+- Adaptive concurrency (AIMD): grows while requests succeed, halves on 429,
+  and is capped by the proxy's X-RateLimit-* headers
+- Retry with full-jitter exponential backoff (429, 5xx, timeouts, resets),
+  honouring Retry-After
+- Request hedging: a page slower than the endpoint's p95 gets a duplicate
+  request, first response wins
+- Per-endpoint latency histograms
+
+Failures after all retries raise MarketDataError instead of returning
+partial data.
+"""
+
+import time
+import random
+import asyncio
+from bisect import bisect_left
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from config import settings
+
+
+# Latency histogram bucket upper bounds (ms); last bucket is open-ended
+LATENCY_BUCKETS_MS = (25, 50, 100, 200, 400, 800, 1600, 3200, 6400, 12800, 25600)
+HEDGE_MIN_SAMPLES = 20  # Latency samples before an endpoint is hedged
+RETRY_BASE_DELAY = 0.5  # Seconds
+RETRY_MAX_DELAY = 20.0
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class MarketDataError(Exception):
+    """Market data request failed after retries (data would be incomplete)"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram with percentile estimates"""
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.total = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, latency_ms: float) -> None:
+        self.counts[bisect_left(LATENCY_BUCKETS_MS, latency_ms)] += 1
+        self.total += 1
+        self.sum_ms += latency_ms
+        self.max_ms = max(self.max_ms, latency_ms)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Upper bound (ms) of the bucket holding the q-th percentile"""
+        if not self.total:
+            return None
+        rank = q * self.total
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return float(LATENCY_BUCKETS_MS[i]) if i < len(LATENCY_BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.total,
+            "mean_ms": round(self.sum_ms / self.total, 1) if self.total else None,
+            "p50_ms": self.percentile(0.50),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "max_ms": round(self.max_ms, 1),
+            "buckets": dict(zip([f"<={b}" for b in LATENCY_BUCKETS_MS] + ["inf"], self.counts))
+        }
+
+
+class AdaptiveLimiter:
+    """
+    Concurrency limiter whose limit follows the proxy's capacity (AIMD)
+
+    Additive increase (+1 per limit successes), multiplicative decrease on
+    throttling, and a global pause until the rate-limit window resets.
+    """
+
+    def __init__(self, initial: int, minimum: int, maximum: int):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self._cond = asyncio.Condition()
+
+    async def acquire(self) -> None:
+        while True:
+            async with self._cond:
+                wait = self.paused_until - time.monotonic()
+                if wait <= 0 and self.in_flight < int(self.limit):
+                    self.in_flight += 1
+                    return
+                if wait <= 0:
+                    await self._cond.wait()
+                    continue
+            await asyncio.sleep(wait)
+
+    async def release(self) -> None:
+        async with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    def has_spare(self) -> bool:
+        return self.in_flight < int(self.limit) and time.monotonic() >= self.paused_until
+
+    def on_success(self) -> None:
+        self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+
+    def on_throttle(self, retry_after: Optional[float]) -> None:
+        self.limit = max(self.minimum, self.limit / 2)
+        if retry_after:
+            self.paused_until = max(self.paused_until, time.monotonic() + retry_after)
+
+    def on_rate_headers(self, remaining: Optional[int], reset_in: Optional[float]) -> None:
+        if remaining is None:
+            return
+        if remaining <= 0 and reset_in:
+            self.paused_until = max(self.paused_until, time.monotonic() + reset_in)
+        elif remaining < self.limit:
+            self.limit = max(self.minimum, float(remaining))
+
+
+def _header_float(headers: httpx.Headers, *names: str) -> Optional[float]:
+    for name in names:
+        value = headers.get(name)
+        if value is None:
+            continue
+        try:
+            return float(value)
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+            except Exception:
+                continue
+    return None
+
+
+def _reset_seconds(headers: httpx.Headers) -> Optional[float]:
+    """Seconds until the rate-limit window resets (delta or epoch header)"""
+    reset = _header_float(headers, "x-ratelimit-reset", "ratelimit-reset")
+    if reset is None:
+        return None
+    if reset > 1e12:  # Epoch ms
+        reset = reset / 1000 - time.time()
+    elif reset > 1e9:  # Epoch seconds
+        reset = reset - time.time()
+    return max(0.0, reset)
+
+
+class MarketDataClient:
+    """
+    Polygon proxy client shared by all loaders
+
+    Usage:
+        data = await market_data_client.get_json(
+            f"stocks/trades/{symbol}", params, endpoint="stocks/trades"
+        )
+    """
+
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._limiter: Optional[AdaptiveLimiter] = None
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self._stats = {"requests": 0, "retries": 0, "throttled": 0, "hedged": 0, "hedge_wins": 0, "failures": 0}
+
+    def _ensure(self) -> None:
+        """Client and limiter bound to the running loop (Celery tasks may use fresh loops)"""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._client is not None:
+            return
+        self._loop = loop
+        self._client = httpx.AsyncClient(
+            base_url=f"{settings.POLYGON_PROXY_URL.rstrip('/')}/polygon/",
+            headers={"x-custom-key": settings.POLYGON_PROXY_KEY},
+            timeout=httpx.Timeout(settings.POLYGON_TIMEOUT, connect=10.0),
+            limits=httpx.Limits(
+                max_connections=settings.POLYGON_MAX_CONCURRENCY * 2,
+                max_keepalive_connections=settings.POLYGON_MAX_CONCURRENCY
+            ),
+            http2=True
+        )
+        self._limiter = AdaptiveLimiter(
+            initial=max(settings.POLYGON_MIN_CONCURRENCY, settings.POLYGON_MAX_CONCURRENCY // 2),
+            minimum=settings.POLYGON_MIN_CONCURRENCY,
+            maximum=settings.POLYGON_MAX_CONCURRENCY
+        )
+
+    async def close(self) -> None:
+        """Close the pooled client (call on shutdown)"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _histogram(self, endpoint: str) -> LatencyHistogram:
+        histogram = self.histograms.get(endpoint)
+        if histogram is None:
+            histogram = self.histograms[endpoint] = LatencyHistogram()
+        return histogram
+
+    def _hedge_delay(self, endpoint: str) -> Optional[float]:
+        """Seconds to wait before hedging (endpoint p95), None if not enough samples"""
+        histogram = self.histograms.get(endpoint)
+        if histogram is None or histogram.total < HEDGE_MIN_SAMPLES:
+            return None
+        return max(settings.POLYGON_HEDGE_MIN_DELAY, histogram.percentile(0.95) / 1000)
+
+    async def _send_once(self, endpoint: str, path: str, params: Dict[str, Any]) -> httpx.Response:
+        """One request under the adaptive limiter"""
+        await self._limiter.acquire()
+        started = time.perf_counter()
+        try:
+            response = await self._client.get(path, params=params)
+        finally:
+            # Cancelled (out-hedged) attempts count too, or slow tails never show up
+            self._histogram(endpoint).record((time.perf_counter() - started) * 1000)
+            self._stats["requests"] += 1
+            await self._limiter.release()
+
+        remaining = _header_float(response.headers, "x-ratelimit-remaining", "ratelimit-remaining")
+        self._limiter.on_rate_headers(
+            remaining=int(remaining) if remaining is not None else None,
+            reset_in=_reset_seconds(response.headers)
+        )
+        return response
+
+    async def _send_hedged(self, endpoint: str, path: str, params: Dict[str, Any]) -> httpx.Response:
+        """Send, duplicating the request if it runs past the endpoint's p95"""
+        primary = asyncio.ensure_future(self._send_once(endpoint, path, params))
+        delay = self._hedge_delay(endpoint)
+        if delay is None:
+            return await primary
+
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done or not self._limiter.has_spare():
+            return await primary
+
+        self._stats["hedged"] += 1
+        hedge = asyncio.ensure_future(self._send_once(endpoint, path, params))
+        pending = {primary, hedge}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self._stats["hedge_wins"] += 1
+                        return task.result()
+            return await primary  # Both failed: surface the primary's error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def get(
+        self,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        endpoint: Optional[str] = None,
+        hedge: bool = True
+    ) -> httpx.Response:
+        """
+        GET a proxy path with retries, adaptive concurrency and hedging
+
+        Args:
+            path: Path under /polygon/ (e.g. "stocks/trades/AAPL")
+            params: Query parameters
+            endpoint: Histogram/hedging key (defaults to the first two path segments)
+            hedge: Allow hedged requests (idempotent reads only)
+
+        Returns:
+            Successful (2xx) response
+
+        Raises:
+            MarketDataError: Non-retryable status or retries exhausted
+        """
+        self._ensure()
+        endpoint = endpoint or "/".join(path.strip("/").split("/")[:2])
+        params = params or {}
+        last_error = None
+
+        for attempt in range(settings.POLYGON_MAX_RETRIES + 1):
+            retry_after = None
+            try:
+                if hedge:
+                    response = await self._send_hedged(endpoint, path, params)
+                else:
+                    response = await self._send_once(endpoint, path, params)
+
+                if response.status_code < 300:
+                    self._limiter.on_success()
+                    return response
+
+                last_error = MarketDataError(
+                    f"{endpoint} returned {response.status_code}: {response.text[:200]}",
+                    status_code=response.status_code
+                )
+                if response.status_code not in RETRYABLE_STATUS:
+                    break
+                if response.status_code == 429:
+                    self._stats["throttled"] += 1
+                    retry_after = _header_float(response.headers, "retry-after") or _reset_seconds(response.headers)
+                    self._limiter.on_throttle(retry_after)
+
+            except (httpx.TimeoutException, httpx.TransportError) as e:
+                last_error = MarketDataError(f"{endpoint} request failed: {type(e).__name__}: {e}")
+
+            if attempt == settings.POLYGON_MAX_RETRIES:
+                break
+
+            # Full jitter backoff (at least Retry-After when the proxy sent one)
+            delay = random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * (2 ** attempt)))
+            if retry_after:
+                delay = max(delay, retry_after)
+            self._stats["retries"] += 1
+            print(f"  ⚠️  {last_error} (attempt {attempt + 1}), retrying in {delay:.1f}s...")
+            await asyncio.sleep(delay)
+
+        self._stats["failures"] += 1
+        raise last_error
+
+    async def get_json(self, path: str, params: Optional[Dict[str, Any]] = None, **kwargs) -> Dict[str, Any]:
+        """GET and decode JSON (see get())"""
+        response = await self.get(path, params, **kwargs)
+        try:
+            return response.json()
+        except ValueError as e:
+            raise MarketDataError(f"Invalid JSON from {path}: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Request counters, current concurrency and latency histograms"""
+        return {
+            **self._stats,
+            "concurrency_limit": round(self._limiter.limit, 2) if self._limiter else None,
+            "in_flight": self._limiter.in_flight if self._limiter else 0,
+            "latency": {endpoint: h.to_dict() for endpoint, h in self.histograms.items()}
+        }
+
+
+def results_of(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Results list from a proxy payload (proxy wraps as data.results)"""
+    if "data" in data and isinstance(data["data"], dict):
+        return data["data"].get("results") or []
+    return data.get("results") or []
+
+
+# Global instance (one per process)
+market_data_client = MarketDataClient()
@@ -0,0 +1,275 @@
+"""
+Position Journal - Indexed Access to position.jsonl
+Keeps a sidecar index (position.index.json) next to each position journal so
+"latest position", "position at date" and "max date" lookups seek straight to
+the record they need instead of scanning the whole file.
+
+Index layout:
+- size: journal bytes covered by the index
+- count / max_id / max_date: running totals
+- last: [offset, id] of the last record in the file
+- dates: date -> [first_offset, last_offset, max_id_offset, max_id]
+
+The index is self-healing: records appended by other writers (MCP trade tool,
+other processes) are picked up by scanning only the bytes past `size`, and a
+truncated or rewritten journal triggers a full rebuild.
+"""
+
+import os
+import json
+import threading
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+
+
+INDEX_VERSION = 1
+INDEX_SAVE_EVERY = 50  # Indexed records between sidecar writes
+
+
+class PositionJournal:
+    """
+    Append-only position.jsonl with an incrementally maintained offset index
+
+    Usage:
+        journal = get_position_journal(position_file)
+        positions, action_id = journal.latest_for_date("2025-10-13")
+    """
+
+    def __init__(self, position_file: Path):
+        self.position_file = Path(position_file)
+        self.index_file = self.position_file.with_name("position.index.json")
+        self._lock = threading.Lock()
+        self._reset()
+        self._load_index()
+
+    # ------------------------------------------------------------------
+    # Index maintenance
+    # ------------------------------------------------------------------
+
+    def _reset(self) -> None:
+        self.size = 0
+        self.count = 0
+        self.max_id = -1
+        self.max_date: Optional[str] = None
+        self.last: Optional[list] = None  # [offset, id]
+        self.dates: Dict[str, list] = {}
+        self._unsaved = 0
+
+    def _load_index(self) -> None:
+        """Load the sidecar index if it still matches the journal"""
+        if not self.index_file.exists() or not self.position_file.exists():
+            return
+
+        try:
+            with self.index_file.open("r", encoding="utf-8") as f:
+                index = json.load(f)
+
+            if index.get("version") != INDEX_VERSION:
+                return
+            if index["size"] > self.position_file.stat().st_size:
+                return  # Journal was truncated/rewritten
+            if index["last"] is not None:
+                record = self._read_at(index["last"][0])
+                if record is None or record.get("id") != index["last"][1]:
+                    return
+
+            self.size = index["size"]
+            self.count = index["count"]
+            self.max_id = index["max_id"]
+            self.max_date = index["max_date"]
+            self.last = index["last"]
+            self.dates = index["dates"]
+        except Exception as e:
+            print(f"  ⚠️  Rebuilding position index {self.index_file}: {e}")
+            self._reset()
+
+    def _index_record(self, offset: int, doc: Dict[str, Any]) -> None:
+        """Add one parsed record at offset to the in-memory index"""
+        record_id = doc.get("id", -1)
+        date = doc.get("date")
+
+        self.count += 1
+        self.last = [offset, record_id]
+        if record_id > self.max_id:
+            self.max_id = record_id
+        if date is None:
+            return
+        if self.max_date is None or date > self.max_date:
+            self.max_date = date
+
+        entry = self.dates.get(date)
+        if entry is None:
+            self.dates[date] = [offset, offset, offset, record_id]
+        else:
+            entry[1] = offset
+            if record_id > entry[3]:
+                entry[2] = offset
+                entry[3] = record_id
+
+    def _scan_from(self, offset: int) -> None:
+        """Index complete records from offset to EOF"""
+        with self.position_file.open("rb") as f:
+            f.seek(offset)
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break  # Partial line still being written
+                line_offset = offset
+                offset += len(raw)
+                if not raw.strip():
+                    continue
+                try:
+                    doc = json.loads(raw)
+                except Exception:
+                    continue
+                self._index_record(line_offset, doc)
+                self._unsaved += 1
+        self.size = offset
+
+    def refresh(self) -> None:
+        """Bring the index up to date with the journal (O(new bytes))"""
+        with self._lock:
+            self._refresh()
+
+    def _refresh(self) -> None:
+        if not self.position_file.exists():
+            if self.size:
+                self._reset()
+            return
+
+        file_size = self.position_file.stat().st_size
+        if file_size < self.size:
+            self._reset()
+        if file_size > self.size:
+            self._scan_from(self.size)
+        if self._unsaved >= INDEX_SAVE_EVERY:
+            self._save_index()
+
+    def _save_index(self) -> None:
+        """Atomically write the sidecar index"""
+        index = {
+            "version": INDEX_VERSION,
+            "size": self.size,
+            "count": self.count,
+            "max_id": self.max_id,
+            "max_date": self.max_date,
+            "last": self.last,
+            "dates": self.dates
+        }
+        tmp_file = self.index_file.with_suffix(".json.tmp")
+        try:
+            with tmp_file.open("w", encoding="utf-8") as f:
+                json.dump(index, f)
+            os.replace(tmp_file, self.index_file)
+            self._unsaved = 0
+        except Exception as e:
+            print(f"  ⚠️  Could not write position index: {e}")
+
+    def flush(self) -> None:
+        """Persist the index now"""
+        with self._lock:
+            self._refresh()
+            self._save_index()
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def _read_at(self, offset: int) -> Optional[Dict[str, Any]]:
+        """Read the record starting at offset"""
+        with self.position_file.open("rb") as f:
+            f.seek(offset)
+            raw = f.readline()
+        try:
+            return json.loads(raw)
+        except Exception:
+            return None
+
+    def latest_for_date(self, date: str) -> Tuple[Dict[str, float], int]:
+        """
+        Highest-id record for a date
+
+        Args:
+            date: Date string (YYYY-MM-DD)
+
+        Returns:
+            (positions, id) or ({}, -1) if the date has no records
+        """
+        with self._lock:
+            self._refresh()
+            entry = self.dates.get(date)
+            if entry is None:
+                return {}, -1
+            record = self._read_at(entry[2])
+        if record is None:
+            return {}, -1
+        return record.get("positions", {}), record.get("id", -1)
+
+    def last_record(self) -> Optional[Dict[str, Any]]:
+        """Last record in the journal (file order)"""
+        with self._lock:
+            self._refresh()
+            if self.last is None:
+                return None
+            return self._read_at(self.last[0])
+
+    def get_max_date(self) -> Optional[str]:
+        """Latest date present in the journal"""
+        with self._lock:
+            self._refresh()
+            return self.max_date
+
+    def get_count(self) -> int:
+        """Number of records in the journal"""
+        with self._lock:
+            self._refresh()
+            return self.count
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def append(self, record: Dict[str, Any]) -> int:
+        """
+        Append a record and index it
+
+        Args:
+            record: Position record ({date, id, this_action, positions, ...})
+
+        Returns:
+            Journal size in bytes after the append
+        """
+        line = (json.dumps(record) + "\n").encode("utf-8")
+
+        with self._lock:
+            self.position_file.parent.mkdir(parents=True, exist_ok=True)
+            self._refresh()  # Index anything other writers appended first
+
+            with self.position_file.open("ab") as f:
+                offset = f.tell()
+                f.write(line)
+
+            if offset == self.size:
+                self._index_record(offset, record)
+                self.size = offset + len(line)
+                self._unsaved += 1
+            else:
+                self._scan_from(self.size)  # Raced with another writer
+            if self._unsaved >= INDEX_SAVE_EVERY:
+                self._save_index()
+            return self.size
+
+
+# Process-local journals (one per position file)
+_journals: Dict[str, PositionJournal] = {}
+_journals_lock = threading.Lock()
+
+
+def get_position_journal(position_file: Path) -> PositionJournal:
+    """Get the shared PositionJournal for a position file"""
+    key = os.path.abspath(str(position_file))
+    with _journals_lock:
+        journal = _journals.get(key)
+        if journal is None:
+            journal = PositionJournal(Path(key))
+            _journals[key] = journal
+        return journal
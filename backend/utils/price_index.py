@@ -0,0 +1,252 @@
+"""
+Daily Price Index - Local OHLCV Store for Backtests
+Daily bars ingested from Polygon (daily_loader.ingest_daily_universe) are kept
+in data/daily_price_index.json so price lookups are a dict access instead of
+Redis round-trips or merged.jsonl scans.
+
+Layout:
+- bars: symbol -> date -> [open, high, low, close, volume]
+- coverage: symbol -> [[start, end], ...] date ranges already fetched
+  (a fetched range with no bar for a date means the symbol didn't trade)
+
+Coverage lets reruns fetch only the gaps. The file is reloaded when another
+process (API vs Celery worker) rewrites it. save() holds an exclusive flock on
+daily_price_index.json.lock (fcntl on POSIX, msvcrt on Windows) and merges
+the on-disk index before writing, so concurrent ingests from several workers
+add up instead of the last writer dropping the others' bars.
+"""
+
+import os
+import json
+import time
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from config import settings
+from utils.market_calendar import EASTERN, next_trading_day, previous_trading_day, trading_days
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+INDEX_VERSION = 1
+
+OPEN, HIGH, LOW, CLOSE, VOLUME = range(5)
+
+
+def _lock_file(f) -> None:
+    """Block until we hold the exclusive lock on an open lock file"""
+    if fcntl is not None:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        return
+    f.seek(0)
+    while True:
+        try:
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            return
+        except OSError:  # LK_LOCK gives up after ~10s
+            time.sleep(0.1)
+
+
+def _unlock_file(f) -> None:
+    if fcntl is not None:
+        fcntl.flock(f, fcntl.LOCK_UN)
+        return
+    f.seek(0)
+    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class DailyPriceIndex:
+    """
+    Per-process view of the local daily price index
+
+    Usage:
+        price = daily_price_index.get_open("AAPL", "2025-10-13")
+    """
+
+    def __init__(self, index_file: Path):
+        self.index_file = Path(index_file)
+        self._lock = threading.Lock()
+        self._bars: Dict[str, Dict[str, list]] = {}
+        self._coverage: Dict[str, List[List[str]]] = {}
+        self._mtime: Optional[float] = None
+        self._dirty = False  # Upserts not saved yet
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def _read_file(self) -> Optional[dict]:
+        """On-disk index, or None if missing / unreadable / another version"""
+        try:
+            with self.index_file.open("r", encoding="utf-8") as f:
+                index = json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"  ⚠️  Could not read price index {self.index_file}: {e}")
+            return None
+        return index if index.get("version") == INDEX_VERSION else None
+
+    def _merge(self, index: dict) -> None:
+        """Fold another process's bars and coverage into ours"""
+        for symbol, series in index.get("bars", {}).items():
+            ours = self._bars.setdefault(symbol, {})
+            for date, bar in series.items():
+                ours.setdefault(date, bar)
+        for symbol, ranges in index.get("coverage", {}).items():
+            self._coverage[symbol] = _merge_ranges(self._coverage.get(symbol, []) + ranges)
+
+    def _maybe_reload(self) -> None:
+        """Reload if the file changed since we last read/wrote it"""
+        try:
+            mtime = self.index_file.stat().st_mtime
+        except FileNotFoundError:
+            return
+        if mtime == self._mtime:
+            return
+        index = self._read_file()
+        if index is not None:
+            if self._dirty:
+                # Keep our unsaved upserts
+                self._merge(index)
+            else:
+                self._bars = index.get("bars", {})
+                self._coverage = index.get("coverage", {})
+        self._mtime = mtime
+
+    def save(self) -> None:
+        """Merge with the on-disk index and atomically write it (file-locked across processes)"""
+        with self._lock:
+            self.index_file.parent.mkdir(parents=True, exist_ok=True)
+            with self.index_file.with_suffix(".json.lock").open("a+") as lock_file:
+                _lock_file(lock_file)
+                try:
+                    index = self._read_file()
+                    if index is not None:
+                        self._merge(index)
+                    tmp_file = self.index_file.with_suffix(".json.tmp")
+                    with tmp_file.open("w", encoding="utf-8") as f:
+                        json.dump(
+                            {"version": INDEX_VERSION, "bars": self._bars, "coverage": self._coverage},
+                            f, separators=(",", ":")
+                        )
+                    os.replace(tmp_file, self.index_file)
+                    self._mtime = self.index_file.stat().st_mtime
+                    self._dirty = False
+                finally:
+                    _unlock_file(lock_file)
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def get_bar(self, symbol: str, date: str) -> Optional[Dict[str, float]]:
+        """OHLCV bar for (symbol, date) or None"""
+        with self._lock:
+            self._maybe_reload()
+            bar = self._bars.get(symbol, {}).get(date)
+        if bar is None:
+            return None
+        return {"open": bar[OPEN], "high": bar[HIGH], "low": bar[LOW], "close": bar[CLOSE], "volume": bar[VOLUME]}
+
+    def get_field(self, symbol: str, date: str, field: int) -> Optional[float]:
+        """One field (OPEN/HIGH/LOW/CLOSE/VOLUME) of a bar"""
+        with self._lock:
+            self._maybe_reload()
+            bar = self._bars.get(symbol, {}).get(date)
+        return bar[field] if bar is not None else None
+
+    def get_open(self, symbol: str, date: str) -> Optional[float]:
+        return self.get_field(symbol, date, OPEN)
+
+    def get_range(self, symbol: str, start_date: str, end_date: str) -> Dict[str, Dict[str, float]]:
+        """Bars for a symbol in [start_date, end_date], keyed by date"""
+        with self._lock:
+            self._maybe_reload()
+            series = dict(self._bars.get(symbol, {}))
+        return {
+            date: {"open": bar[OPEN], "high": bar[HIGH], "low": bar[LOW], "close": bar[CLOSE], "volume": bar[VOLUME]}
+            for date, bar in sorted(series.items())
+            if start_date <= date <= end_date
+        }
+
+    def missing_ranges(self, symbol: str, start_date: str, end_date: str) -> List[Tuple[str, str]]:
+        """
+        Sub-ranges of [start_date, end_date] not fetched yet for a symbol
+
+        Ranges are trimmed to trading days; fully covered requests return [].
+        """
+        with self._lock:
+            self._maybe_reload()
+            covered = list(self._coverage.get(symbol, []))
+
+        gaps = []
+        cursor = start_date
+        for cov_start, cov_end in covered:
+            if cov_end < cursor:
+                continue
+            if cov_start > end_date:
+                break
+            if cov_start > cursor:
+                gaps.append((cursor, min(previous_trading_day(cov_start), end_date)))
+            cursor = max(cursor, next_trading_day(cov_end))
+            if cursor > end_date:
+                break
+        if cursor <= end_date:
+            gaps.append((cursor, end_date))
+
+        trimmed = []
+        for gap_start, gap_end in gaps:
+            days = trading_days(gap_start, gap_end)
+            if days:
+                trimmed.append((days[0], days[-1]))
+        return trimmed
+
+    def symbols(self) -> List[str]:
+        with self._lock:
+            self._maybe_reload()
+            return sorted(self._bars)
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def upsert(self, symbol: str, bars: Dict[str, Dict[str, float]], start_date: str, end_date: str) -> None:
+        """
+        Store bars for a symbol and mark [start_date, end_date] as fetched
+
+        Call save() once after a batch of upserts.
+        """
+        with self._lock:
+            self._maybe_reload()
+            series = self._bars.setdefault(symbol, {})
+            for date, bar in bars.items():
+                series[date] = [bar["open"], bar["high"], bar["low"], bar["close"], bar["volume"]]
+            self._coverage[symbol] = _merge_ranges(self._coverage.get(symbol, []) + [[start_date, end_date]])
+            self._dirty = True
+
+
+def _merge_ranges(ranges: List[List[str]]) -> List[List[str]]:
+    """Merge overlapping / trading-day-adjacent date ranges"""
+    merged: List[List[str]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= next_trading_day(merged[-1][1]):
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def last_final_date() -> str:
+    """Latest date whose daily bar is final (yesterday's trading day in ET)"""
+    return previous_trading_day(datetime.now(EASTERN).date())
+
+
+# Global instance (one per process)
+daily_price_index = DailyPriceIndex(Path(settings.DATA_DIR) / "daily_price_index.json")
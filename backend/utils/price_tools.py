@@ -12,6 +12,9 @@ project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 from utils.general_tools import get_config_value
+from utils.position_journal import get_position_journal
+from utils.market_calendar import previous_trading_day
+from utils.price_index import daily_price_index
 
 all_nasdaq_100_symbols = [
     "NVDA", "MSFT", "AAPL", "GOOG", "GOOGL", "AMZN", "META", "AVGO", "TSLA",
@@ -36,30 +39,30 @@ def get_yesterday_date(today_date: str) -> str:
     Returns:
         yesterday_date: 昨日日期字符串，格式 YYYY-MM-DD。
     """
-    # 计算昨日日期，考虑休市日
-    today_dt = datetime.strptime(today_date, "%Y-%m-%d")
-    yesterday_dt = today_dt - timedelta(days=1)
-    
-    # 如果昨日是周末，向前找到最近的交易日
-    while yesterday_dt.weekday() >= 5:  # 5=Saturday, 6=Sunday
-        yesterday_dt -= timedelta(days=1)
-    
-    yesterday_date = yesterday_dt.strftime("%Y-%m-%d")
-    return yesterday_date
+    # 计算昨日日期，考虑休市日（周末 + 交易所节假日）
+    return previous_trading_day(today_date)
 
 def get_open_prices(today_date: str, symbols: List[str], merged_path: Optional[str] = None) -> Dict[str, Optional[float]]:
     """
     Get opening prices for symbols on a date
     
     Priority:
-    1. Redis cache (from Polygon API via daily_loader)
-    2. Supabase stock_prices table
+    1. Local daily price index (from daily_loader ingestion)
+    2. Redis cache (from Polygon API via daily_loader)
     3. Fallback to merged.jsonl file
     """
-    wanted = set(symbols)
     results: Dict[str, Optional[float]] = {}
     
-    # Try Redis cache first (Polygon data)
+    # Local index first (no network)
+    for symbol in symbols:
+        price = daily_price_index.get_open(symbol, today_date)
+        if price is not None:
+            results[f'{symbol}_price'] = price
+    wanted = {symbol for symbol in symbols if f'{symbol}_price' not in results}
+    if not wanted:
+        return results
+    
+    # Then Redis cache (Polygon data)
     try:
         import asyncio
         from utils.redis_client import redis_client
@@ -82,6 +85,7 @@ def get_open_prices(today_date: str, symbols: List[str], merged_path: Optional[s
             # Return if all symbols found
             if len(cached_results) == len(wanted):
                 return results
+            wanted -= {key[:-len('_price')] for key in cached_results}
     except:
         pass  # Cache miss, continue to file
     
@@ -131,10 +135,20 @@ def get_yesterday_open_and_close_price(today_date: str, symbols: List[str], merg
     Returns:
         (买入价字典, 卖出价字典) 的元组；若未找到对应日期或标的，则值为 None。
     """
-    wanted = set(symbols)
     buy_results: Dict[str, Optional[float]] = {}
     sell_results: Dict[str, Optional[float]] = {}
 
+    # Local daily price index first (buy = open, sell = close)
+    yesterday_date = get_yesterday_date(today_date)
+    for symbol in symbols:
+        bar = daily_price_index.get_bar(symbol, yesterday_date)
+        if bar is not None:
+            buy_results[f'{symbol}_price'] = bar["open"]
+            sell_results[f'{symbol}_price'] = bar["close"]
+    wanted = {symbol for symbol in symbols if f'{symbol}_price' not in buy_results}
+    if not wanted:
+        return buy_results, sell_results
+
     if merged_path is None:
         base_dir = Path(__file__).resolve().parents[1]
         merged_file = base_dir / "data" / "merged.jsonl"
@@ -144,8 +158,6 @@ def get_yesterday_open_and_close_price(today_date: str, symbols: List[str], merg
     if not merged_file.exists():
         return buy_results, sell_results
 
-    yesterday_date = get_yesterday_date(today_date)
-
     with merged_file.open("r", encoding="utf-8") as f:
         for line in f:
             if not line.strip():
@@ -178,19 +190,12 @@ def get_yesterday_open_and_close_price(today_date: str, symbols: List[str], merg
                     sell_results[f'{sym}_price'] = None
             else:
                 # 如果昨日没有数据，尝试向前查找最近的交易日
-                today_dt = datetime.strptime(today_date, "%Y-%m-%d")
-                yesterday_dt = today_dt - timedelta(days=1)
-                current_date = yesterday_dt
+                check_date = yesterday_date
                 found_data = False
                 
-                # 最多向前查找5个交易日
+                # 最多向前查找5个交易日（跳过周末和节假日）
                 for _ in range(5):
-                    current_date -= timedelta(days=1)
-                    # 跳过周末
-                    while current_date.weekday() >= 5:
-                        current_date -= timedelta(days=1)
-                    
-                    check_date = current_date.strftime("%Y-%m-%d")
+                    check_date = previous_trading_day(check_date)
                     bar = series.get(check_date)
                     if isinstance(bar, dict):
                         buy_val = bar.get("1. buy price")
@@ -266,23 +271,7 @@ def get_today_init_position(today_date: str, modelname: str) -> Dict[str, float]
         return {}
     
     yesterday_date = get_yesterday_date(today_date)
-    max_id = -1
-    latest_positions = {}
-  
-    with position_file.open("r", encoding="utf-8") as f:
-        for line in f:
-            if not line.strip():
-                continue
-            try:
-                doc = json.loads(line)
-                if doc.get("date") == yesterday_date:
-                    current_id = doc.get("id", 0)
-                    if current_id > max_id:
-                        max_id = current_id
-                        latest_positions = doc.get("positions", {})
-            except Exception:
-                continue
-    
+    latest_positions, _ = get_position_journal(position_file).latest_for_date(yesterday_date)
     return latest_positions
 
 def get_latest_position(today_date: str, modelname: str) -> Dict[str, float]:
@@ -306,47 +295,15 @@ def get_latest_position(today_date: str, modelname: str) -> Dict[str, float]:
     if not position_file.exists():
         return {}, -1
     
-    # 先尝试读取当天记录
-    max_id_today = -1
-    latest_positions_today: Dict[str, float] = {}
-    
-    with position_file.open("r", encoding="utf-8") as f:
-        for line in f:
-            if not line.strip():
-                continue
-            try:
-                doc = json.loads(line)
-                if doc.get("date") == today_date:
-                    current_id = doc.get("id", -1)
-                    if current_id > max_id_today:
-                        max_id_today = current_id
-                        latest_positions_today = doc.get("positions", {})
-            except Exception:
-                continue
-    
+    # 先尝试读取当天记录（通过索引直接定位，无需扫描整个文件）
+    journal = get_position_journal(position_file)
+    latest_positions_today, max_id_today = journal.latest_for_date(today_date)
     if max_id_today >= 0:
         return latest_positions_today, max_id_today
 
     # 当天没有记录，则回退到上一个交易日
     prev_date = get_yesterday_date(today_date)
-    max_id_prev = -1
-    latest_positions_prev: Dict[str, float] = {}
-
-    with position_file.open("r", encoding="utf-8") as f:
-        for line in f:
-            if not line.strip():
-                continue
-            try:
-                doc = json.loads(line)
-                if doc.get("date") == prev_date:
-                    current_id = doc.get("id", -1)
-                    if current_id > max_id_prev:
-                        max_id_prev = current_id
-                        latest_positions_prev = doc.get("positions", {})
-            except Exception:
-                continue
-
-    return latest_positions_prev, max_id_prev
+    return journal.latest_for_date(prev_date)
 
 def add_no_trade_record(today_date: str, modelname: str):
     """
@@ -369,8 +326,7 @@ def add_no_trade_record(today_date: str, modelname: str):
     base_dir = Path(__file__).resolve().parents[1]
     position_file = base_dir / "data" / "agent_data" / modelname / "position" / "position.jsonl"
 
-    with position_file.open("a", encoding="utf-8") as f:
-        f.write(json.dumps(save_item) + "\n")
+    get_position_journal(position_file).append(save_item)
     return 
 
 if __name__ == "__main__":
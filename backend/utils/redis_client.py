@@ -4,7 +4,7 @@ Used for intraday trading data and session state
 """
 
 import httpx
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 import json
 import asyncio
 from config import settings
@@ -199,6 +199,39 @@ class UpstashRedis:
             print(f"  ❌ Redis EXISTS failed for key {key}: {e}")
             return False
     
+    async def pipeline(self, commands: List[List[Any]], chunk_size: int = 1000) -> List[Any]:
+        """
+        Run many commands in one round-trip per chunk (Upstash /pipeline)
+        
+        Args:
+            commands: Commands as lists, e.g. [["SETEX", key, 3600, value], ...]
+            chunk_size: Commands per HTTP request
+        
+        Returns:
+            Per-command results in order (None for failed commands)
+        """
+        results: List[Any] = []
+        
+        for offset in range(0, len(commands), chunk_size):
+            chunk = commands[offset:offset + chunk_size]
+            try:
+                response = await self._request_with_retry(
+                    "POST",
+                    f"{self.base_url}/pipeline",
+                    headers=self.headers,
+                    json=[[str(arg) for arg in command] for command in chunk]
+                )
+                if response.status_code != 200:
+                    print(f"  ❌ Redis PIPELINE failed: HTTP {response.status_code}")
+                    results.extend([None] * len(chunk))
+                    continue
+                results.extend(item.get("result") if "error" not in item else None for item in response.json())
+            except Exception as e:
+                print(f"  ❌ Redis PIPELINE failed ({len(chunk)} commands): {e}")
+                results.extend([None] * len(chunk))
+        
+        return results
+    
     async def ping(self) -> bool:
         """Test connection"""
         try:
@@ -11,6 +11,7 @@ from typing import Dict, List, Optional, Tuple
 from supabase import create_client, Client
 import os
 from dotenv import load_dotenv
+from services.archive_service import run_archive
 
 load_dotenv()
 
@@ -47,11 +48,7 @@ def get_available_date_range_db(model_id: int) -> Tuple[str, str]:
             .limit(1)\
             .execute()
         
-        if not result.data:
-            print(f"⚠️  No positions found for model_id={model_id}")
-            return "", ""
-        
-        earliest = result.data[0]["date"]
+        dates = [row["date"] for row in result.data or []]
         
         result = supabase.table("positions")\
             .select("date")\
@@ -59,11 +56,16 @@ def get_available_date_range_db(model_id: int) -> Tuple[str, str]:
             .order("date", desc=True)\
             .limit(1)\
             .execute()
+        dates += [row["date"] for row in result.data or []]
         
-        if not result.data:
-            return earliest, earliest
+        # Include archived runs (older completed runs moved out of positions)
+        dates += [row["date"] for row in run_archive.read_model(model_id, "positions", columns=("date",))]
         
-        latest = result.data[0]["date"]
+        if not dates:
+            print(f"⚠️  No positions found for model_id={model_id}")
+            return "", ""
+        
+        earliest, latest = min(dates), max(dates)
         
         print(f"📅 Date range found: {earliest} to {latest}")
         return earliest, latest
@@ -106,6 +108,14 @@ def get_daily_portfolio_values_db(
         
         result = query.order("date").order("minute_time", desc=False).execute()
         
+        # Merge archived runs in the same date window
+        archived = run_archive.read_model(
+            model_id, "positions",
+            where=lambda p: (not start_date or p["date"] >= start_date) and (not end_date or p["date"] <= end_date)
+        )
+        if archived:
+            result.data = sorted(archived + (result.data or []), key=lambda p: (p["date"], p.get("minute_time") or ""))
+        
         print(f"📊 Query returned {len(result.data) if result.data else 0} positions")
         
         if not result.data:
@@ -172,10 +182,13 @@ def calculate_intraday_metrics_db(model_id: int, trade_date: str) -> Dict:
         .order("minute_time")\
         .execute()
     
-    if not result.data or len(result.data) < 2:
-        return _empty_metrics()
+    positions = result.data or []
+    archived = run_archive.read_model(model_id, "positions", where=lambda p: p["date"] == trade_date)
+    if archived:
+        positions = sorted(archived + positions, key=lambda p: p.get("minute_time") or "")
     
-    positions = result.data
+    if len(positions) < 2:
+        return _empty_metrics()
     
     # Get starting capital from model
     model_result = supabase.table("models").select("initial_cash").eq("id", model_id).execute()
@@ -130,6 +130,77 @@ class RiskGates:
                 return False, f"SAFETY GATE: Must maintain minimum 10% cash reserve (${min_cash:.2f}), would have ${cash_after:.2f}"
         
         return True, None  # All gates passed
+    
+    def get_trade_bounds(
+        self,
+        symbol: str,
+        price: float,
+        portfolio_snapshot: Dict
+    ) -> Dict:
+        """
+        Compute which actions the gates allow BEFORE a trade is proposed
+        
+        Mirrors validate_all: any trade that respects these bounds passes it.
+        
+        Returns:
+            {
+                'buy': bool,
+                'sell': bool,
+                'max_buy_value': float,
+                'binding_limit': str (gate that sets max_buy_value),
+                'max_sell_shares': float,
+                'limits': List[str],
+                'blocked_reason': str | None (set when every action is blocked)
+            }
+        """
+        
+        cash = portfolio_snapshot['cash']
+        total_value = portfolio_snapshot.get('total_value', cash)
+        bounds = {
+            'buy': True,
+            'sell': True,
+            'max_buy_value': cash,  # GATE 1: no negative cash
+            'binding_limit': "available cash",
+            'max_sell_shares': portfolio_snapshot['positions'].get(symbol, 0),  # GATE 2
+            'limits': [],
+            'blocked_reason': None
+        }
+        
+        # GATES 4 + 5: circuit breakers block every action
+        max_daily_loss_dollars = self.model_config.get('max_daily_loss_dollars')
+        max_loss = max_daily_loss_dollars or abs(self.user_profile.get('stop_trading_if_daily_loss_exceeds') or 0)
+        daily_pnl = portfolio_snapshot.get('daily_pnl', 0)
+        if max_loss and daily_pnl < -max_loss:
+            bounds['blocked_reason'] = f"CIRCUIT BREAKER: Daily loss ${abs(daily_pnl):.2f} exceeds limit ${max_loss:.2f}"
+        
+        initial_value = portfolio_snapshot.get('initial_value', 10000)
+        if initial_value > 0 and (initial_value - portfolio_snapshot['total_value']) / initial_value > 0.25:
+            bounds['blocked_reason'] = bounds['blocked_reason'] or "CIRCUIT BREAKER: Portfolio drawdown exceeds 25% of initial value"
+        
+        if bounds['blocked_reason']:
+            bounds['buy'] = False
+            bounds['sell'] = False
+            return bounds
+        
+        def cap_buy(value: float, label: str):
+            if value < bounds['max_buy_value']:
+                bounds['max_buy_value'] = max(value, 0.0)
+                bounds['binding_limit'] = label
+            bounds['limits'].append(label)
+        
+        # GATE 6: position size
+        max_position_dollars = self.model_config.get('max_position_size_dollars')
+        if max_position_dollars:
+            cap_buy(max_position_dollars, f"max position size ${max_position_dollars:,.0f}")
+        cap_buy(total_value * 0.50, "50% of portfolio per trade")
+        
+        # GATE 7: 10% cash reserve
+        cap_buy(cash - total_value * 0.10, "10% minimum cash reserve")
+        
+        if bounds['max_sell_shares'] <= 0:
+            bounds['sell'] = False
+        
+        return bounds
 
 
 def create_risk_gates(model_id: int, user_profile: Optional[Dict] = None, model_config: Optional[Dict] = None) -> RiskGates:
@@ -2,12 +2,136 @@
 Rule Enforcement Engine
 Validates trades against structured rules before execution
 Pattern from ttgaibots risk gates
+
+Rules are compiled once at load time into an indexed form:
+- per-asset buckets (priority order preserved)
+- frozensets for symbol whitelists / blacklists / approved lists
+- pre-parsed blackout windows
+- per-(asset, symbol) reduced constraint sets, so validation cost does not
+  grow with the number of rules
+
+Hot reload polls model_rules on a background thread; validation only swaps
+in rules that thread has already fetched, so it never waits on the database.
 """
 
+import json
+import threading
+import time as time_module
 from typing import Dict, List, Optional, Tuple
-from datetime import datetime
+from datetime import datetime, time
 from supabase import Client
 
+import numpy as np
+
+
+# How often (seconds) to check model_rules for changes (hot reload)
+RULES_RELOAD_INTERVAL = 30.0
+
+
+class _CompiledRule:
+    """One active rule with pre-parsed parameters"""
+    
+    __slots__ = (
+        "name", "category", "assets", "applies_to_symbols", "exclude_symbols",
+        "max_position_pct", "max_positions", "min_cash_reserve_pct",
+        "blackout", "blackout_label", "approved_symbols"
+    )
+    
+    def __init__(self, rule: Dict):
+        params = rule.get("enforcement_params") or {}
+        
+        self.name = rule["rule_name"]
+        self.category = rule["rule_category"]
+        self.assets = frozenset(rule.get("applies_to_assets") or ['equity'])
+        self.applies_to_symbols = frozenset(rule["applies_to_symbols"]) if rule.get("applies_to_symbols") else None
+        self.exclude_symbols = frozenset(rule.get("exclude_symbols") or ())
+        
+        self.max_position_pct = None
+        self.max_positions = None
+        self.min_cash_reserve_pct = None
+        self.blackout = None
+        self.blackout_label = None
+        self.approved_symbols = None
+        
+        if self.category == "position_sizing":
+            self.max_position_pct = params.get("max_position_pct") or None
+        elif self.category == "risk":
+            self.max_positions = params.get("max_positions") or None
+            self.min_cash_reserve_pct = params.get("min_cash_reserve_pct") or None
+        elif self.category == "timing":
+            blackout_start = params.get("blackout_start")
+            blackout_end = params.get("blackout_end")
+            if blackout_start and blackout_end:
+                self.blackout = (
+                    datetime.strptime(blackout_start, "%H:%M").time(),
+                    datetime.strptime(blackout_end, "%H:%M").time()
+                )
+                self.blackout_label = f"{blackout_start}-{blackout_end}"
+        elif self.category == "screening":
+            approved = params.get("approved_symbols") or []
+            self.approved_symbols = frozenset(approved) if approved else None
+    
+    def applies(self, asset_type: str, symbol: str) -> bool:
+        if asset_type not in self.assets:
+            return False
+        return self.applies_to_symbols is None or symbol in self.applies_to_symbols
+
+
+class _SymbolConstraints:
+    """
+    All active rules for one (asset_type, symbol) reduced to their tightest form
+    
+    Reasons name the highest-priority rule that sets each constraint.
+    """
+    
+    __slots__ = (
+        "block_reason", "max_position_pct", "max_position_rule", "max_positions",
+        "max_positions_rule", "min_cash_reserve_pct", "min_cash_rule", "blackouts"
+    )
+    
+    def __init__(self, rules: List[_CompiledRule], symbol: str):
+        self.block_reason = None
+        self.max_position_pct = None
+        self.max_position_rule = None
+        self.max_positions = None
+        self.max_positions_rule = None
+        self.min_cash_reserve_pct = None
+        self.min_cash_rule = None
+        self.blackouts: List[Tuple[time, time, str]] = []
+        
+        for rule in rules:
+            if symbol in rule.exclude_symbols and self.block_reason is None:
+                self.block_reason = f"Rule '{rule.name}': Symbol {symbol} is on exclusion list"
+                continue
+            
+            if rule.max_position_pct and (self.max_position_pct is None or rule.max_position_pct < self.max_position_pct):
+                self.max_position_pct = rule.max_position_pct
+                self.max_position_rule = rule.name
+            if rule.max_positions and (self.max_positions is None or rule.max_positions < self.max_positions):
+                self.max_positions = rule.max_positions
+                self.max_positions_rule = rule.name
+            if rule.min_cash_reserve_pct and (self.min_cash_reserve_pct is None or rule.min_cash_reserve_pct > self.min_cash_reserve_pct):
+                self.min_cash_reserve_pct = rule.min_cash_reserve_pct
+                self.min_cash_rule = rule.name
+            if rule.blackout:
+                self.blackouts.append((rule.blackout[0], rule.blackout[1], f"Rule '{rule.name}': Trading not allowed during {rule.blackout_label}"))
+            if rule.approved_symbols is not None and symbol not in rule.approved_symbols and self.block_reason is None:
+                self.block_reason = f"Rule '{rule.name}': Symbol {symbol} not on approved screening list"
+    
+    def blackout_reason(self, current_time: Optional[datetime]) -> Optional[str]:
+        if current_time is None or not self.blackouts:
+            return None
+        current_time_only = current_time.time()
+        for start_time, end_time, reason in self.blackouts:
+            if start_time <= current_time_only <= end_time:
+                return reason
+        return None
+
+
+def _count_open_positions(current_position: Dict) -> int:
+    return sum(1 for s, qty in current_position.items() if s != 'CASH' and qty > 0)
+
+
 class RuleEnforcer:
     """
     Enforces structured trading rules programmatically
@@ -27,10 +151,16 @@ class RuleEnforcer:
             reject_trade(reason)
     """
     
-    def __init__(self, supabase: Client, model_id: int):
+    def __init__(self, supabase: Client, model_id: int, reload_interval: float = RULES_RELOAD_INTERVAL):
         self.supabase = supabase
         self.model_id = model_id
-        self.rules = self._load_active_rules()
+        self.reload_interval = reload_interval
+        self.rules: List[Dict] = []
+        self._fingerprint = None
+        self._last_check = 0.0
+        self._pending_rules: Optional[List[Dict]] = None  # Fetched by the refresh thread
+        self._refreshing = False
+        self._compile(self._load_active_rules())
     
     def _load_active_rules(self) -> List[Dict]:
         """Load active rules from database, sorted by priority"""
@@ -43,6 +173,80 @@ class RuleEnforcer:
         
         return result.data or []
     
+    def _compile(self, rules: List[Dict]) -> None:
+        """Compile raw rule rows into the indexed structure"""
+        self.rules = rules
+        self._fingerprint = json.dumps(rules, sort_keys=True, default=str)
+        self._last_check = time_module.monotonic()
+        
+        compiled = [_CompiledRule(rule) for rule in rules]
+        
+        # Category buckets (priority order preserved)
+        self.rules_by_category: Dict[str, List[_CompiledRule]] = {}
+        for rule in compiled:
+            self.rules_by_category.setdefault(rule.category, []).append(rule)
+        
+        # Asset buckets (priority order preserved)
+        self._rules_by_asset: Dict[str, List[_CompiledRule]] = {}
+        for rule in compiled:
+            for asset in rule.assets:
+                self._rules_by_asset.setdefault(asset, []).append(rule)
+        
+        # (asset_type, symbol) -> _SymbolConstraints, filled lazily
+        self._constraints: Dict[Tuple[str, str], _SymbolConstraints] = {}
+    
+    def reload(self) -> bool:
+        """
+        Re-read model_rules and recompile if anything changed
+        
+        Returns:
+            True if the rules changed
+        """
+        rules = self._load_active_rules()
+        self._last_check = time_module.monotonic()
+        if json.dumps(rules, sort_keys=True, default=str) == self._fingerprint:
+            return False
+        self._compile(rules)
+        print(f"🔄 Rules reloaded for model {self.model_id} ({len(rules)} active)")
+        return True
+    
+    def _refresh(self) -> None:
+        """Background poll: stage changed rules for the next validation"""
+        try:
+            rules = self._load_active_rules()
+            if json.dumps(rules, sort_keys=True, default=str) != self._fingerprint:
+                self._pending_rules = rules
+        except Exception as e:
+            print(f"⚠️  Rule reload failed, keeping current rules: {e}")
+        finally:
+            self._refreshing = False
+    
+    def _maybe_reload(self) -> None:
+        """
+        Hot reload without I/O on the validation path: compile rules staged
+        by the refresh thread, and start a new poll at most once per
+        reload_interval
+        """
+        pending = self._pending_rules
+        if pending is not None:
+            self._pending_rules = None
+            self._compile(pending)
+            print(f"🔄 Rules reloaded for model {self.model_id} ({len(pending)} active)")
+        
+        if self.reload_interval and not self._refreshing and time_module.monotonic() - self._last_check >= self.reload_interval:
+            self._refreshing = True
+            self._last_check = time_module.monotonic()
+            threading.Thread(target=self._refresh, name=f"rules-refresh-{self.model_id}", daemon=True).start()
+    
+    def _constraints_for(self, asset_type: str, symbol: str) -> _SymbolConstraints:
+        key = (asset_type, symbol)
+        constraints = self._constraints.get(key)
+        if constraints is None:
+            rules = [r for r in self._rules_by_asset.get(asset_type, ()) if r.applies(asset_type, symbol)]
+            constraints = _SymbolConstraints(rules, symbol)
+            self._constraints[key] = constraints
+        return constraints
+    
     def validate_trade(
         self,
         action: str,
@@ -71,97 +275,168 @@ class RuleEnforcer:
             (is_valid, rejection_reason)
         """
         
-        for rule in self.rules:
-            # Check if rule applies to this asset type
-            applies_to = rule.get("applies_to_assets", ['equity'])
-            if asset_type not in applies_to:
-                continue
-            
-            # Check symbol whitelist
-            if rule.get("applies_to_symbols") and symbol not in rule["applies_to_symbols"]:
-                continue
-            
-            # Check symbol blacklist
-            if rule.get("exclude_symbols") and symbol in rule["exclude_symbols"]:
-                return False, f"Rule '{rule['rule_name']}': Symbol {symbol} is on exclusion list"
-            
-            # Get enforcement parameters
-            params = rule.get("enforcement_params", {})
-            category = rule["rule_category"]
-            
-            # ====================================================================
-            # POSITION SIZING RULES
-            # ====================================================================
-            if category == "position_sizing":
-                max_position_pct = params.get("max_position_pct")
-                if max_position_pct and action in ['buy', 'short']:
-                    trade_value = amount * price
-                    max_allowed = total_portfolio_value * max_position_pct
-                    
-                    if trade_value > max_allowed:
-                        return False, f"Rule '{rule['rule_name']}': Trade value ${trade_value:.2f} exceeds {max_position_pct*100}% limit (${max_allowed:.2f})"
+        self._maybe_reload()
+        c = self._constraints_for(asset_type, symbol)
+        
+        if c.block_reason:
+            return False, c.block_reason
+        
+        blackout = c.blackout_reason(current_time)
+        if blackout:
+            return False, blackout
+        
+        if action in ['buy', 'short']:
+            trade_value = amount * price
             
-            # ====================================================================
-            # RISK MANAGEMENT RULES
-            # ====================================================================
-            elif category == "risk":
-                # Max positions check
-                max_positions = params.get("max_positions")
-                if max_positions and action in ['buy', 'short']:
-                    current_positions = len([s for s in current_position if s != 'CASH' and current_position[s] > 0])
-                    if current_positions >= max_positions:
-                        return False, f"Rule '{rule['rule_name']}': Already at max {max_positions} open positions"
-                
-                # Min cash reserve check
-                min_cash_reserve_pct = params.get("min_cash_reserve_pct")
-                if min_cash_reserve_pct and action in ['buy', 'short']:
-                    cash_after = current_position.get("CASH", 0) - (amount * price)
-                    min_required = total_portfolio_value * min_cash_reserve_pct
-                    
-                    if cash_after < min_required:
-                        return False, f"Rule '{rule['rule_name']}': Would violate {min_cash_reserve_pct*100}% cash reserve (need ${min_required:.2f}, would have ${cash_after:.2f})"
-                
-                # Max trades per session
-                max_trades = params.get("max_trades_per_session")
-                if max_trades:
-                    # This would need to be tracked during session
-                    # For now, just a placeholder for the check
-                    pass
+            # POSITION SIZING
+            if c.max_position_pct:
+                max_allowed = total_portfolio_value * c.max_position_pct
+                if trade_value > max_allowed:
+                    return False, f"Rule '{c.max_position_rule}': Trade value ${trade_value:.2f} exceeds {c.max_position_pct*100}% limit (${max_allowed:.2f})"
             
-            # ====================================================================
-            # TIMING RULES
-            # ====================================================================
-            elif category == "timing":
-                if current_time:
-                    # Blackout periods (no trading during these times)
-                    blackout_start = params.get("blackout_start")
-                    blackout_end = params.get("blackout_end")
-                    
-                    if blackout_start and blackout_end:
-                        current_time_only = current_time.time()
-                        start_time = datetime.strptime(blackout_start, "%H:%M").time()
-                        end_time = datetime.strptime(blackout_end, "%H:%M").time()
-                        
-                        if start_time <= current_time_only <= end_time:
-                            return False, f"Rule '{rule['rule_name']}': Trading not allowed during {blackout_start}-{blackout_end}"
+            # RISK: max open positions
+            if c.max_positions and _count_open_positions(current_position) >= c.max_positions:
+                return False, f"Rule '{c.max_positions_rule}': Already at max {c.max_positions} open positions"
             
-            # ====================================================================
-            # SCREENING RULES
-            # ====================================================================
-            elif category == "screening":
-                # Stock must be on approved list (from Finviz/screening)
-                approved_symbols = params.get("approved_symbols", [])
-                if approved_symbols and symbol not in approved_symbols:
-                    return False, f"Rule '{rule['rule_name']}': Symbol {symbol} not on approved screening list"
-                
-                # Check required screening passed
-                requires_screening = params.get("requires_screening", False)
-                if requires_screening:
-                    # Would need to verify symbol passed screening
-                    # Placeholder for now
-                    pass
+            # RISK: min cash reserve
+            if c.min_cash_reserve_pct:
+                cash_after = current_position.get("CASH", 0) - trade_value
+                min_required = total_portfolio_value * c.min_cash_reserve_pct
+                if cash_after < min_required:
+                    return False, f"Rule '{c.min_cash_rule}': Would violate {c.min_cash_reserve_pct*100}% cash reserve (need ${min_required:.2f}, would have ${cash_after:.2f})"
         
         return True, None  # All rules passed!
+    
+    def validate_trades_batch(
+        self,
+        trades: List[Dict],
+        current_position: Dict,
+        total_portfolio_value: float,
+        asset_type: str = 'equity',
+        current_time: Optional[datetime] = None
+    ) -> List[Tuple[bool, Optional[str]]]:
+        """
+        Validate many candidate trades against the same portfolio state
+        
+        Numeric checks are vectorized across candidates; the open-position
+        count and blackout windows are evaluated once per symbol.
+        
+        Args:
+            trades: [{"action": str, "symbol": str, "amount": int, "price": float}, ...]
+            current_position: Current portfolio state
+            total_portfolio_value: Total portfolio value
+            asset_type: Asset type for rule matching
+            current_time: Time of trades (for timing rules)
+        
+        Returns:
+            (is_valid, rejection_reason) per trade, same order as input
+        """
+        
+        self._maybe_reload()
+        n = len(trades)
+        if n == 0:
+            return []
+        
+        results: List[Tuple[bool, Optional[str]]] = [(True, None)] * n
+        open_positions = _count_open_positions(current_position)
+        cash = current_position.get("CASH", 0)
+        
+        values = np.array([t["amount"] * t["price"] for t in trades], dtype=float)
+        is_entry = np.array([t["action"] in ('buy', 'short') for t in trades])
+        pct_limit = np.full(n, np.inf)
+        reserve_pct = np.zeros(n)
+        at_max_positions = np.zeros(n, dtype=bool)
+        constraints: List[_SymbolConstraints] = []
+        
+        blocked = {}
+        for i, trade in enumerate(trades):
+            c = self._constraints_for(asset_type, trade["symbol"])
+            constraints.append(c)
+            if trade["symbol"] not in blocked:
+                blocked[trade["symbol"]] = c.block_reason or c.blackout_reason(current_time)
+            if c.max_position_pct:
+                pct_limit[i] = c.max_position_pct
+            if c.min_cash_reserve_pct:
+                reserve_pct[i] = c.min_cash_reserve_pct
+            if c.max_positions:
+                at_max_positions[i] = open_positions >= c.max_positions
+        
+        max_allowed = total_portfolio_value * pct_limit
+        size_fail = is_entry & (values > max_allowed)
+        positions_fail = is_entry & at_max_positions
+        cash_after = cash - values
+        min_required = total_portfolio_value * reserve_pct
+        reserve_fail = is_entry & (reserve_pct > 0) & (cash_after < min_required)
+        
+        for i, trade in enumerate(trades):
+            c = constraints[i]
+            if blocked[trade["symbol"]]:
+                results[i] = (False, blocked[trade["symbol"]])
+            elif size_fail[i]:
+                results[i] = (False, f"Rule '{c.max_position_rule}': Trade value ${values[i]:.2f} exceeds {c.max_position_pct*100}% limit (${max_allowed[i]:.2f})")
+            elif positions_fail[i]:
+                results[i] = (False, f"Rule '{c.max_positions_rule}': Already at max {c.max_positions} open positions")
+            elif reserve_fail[i]:
+                results[i] = (False, f"Rule '{c.min_cash_rule}': Would violate {c.min_cash_reserve_pct*100}% cash reserve (need ${min_required[i]:.2f}, would have ${cash_after[i]:.2f})")
+        
+        return results
+    
+    def get_trade_bounds(
+        self,
+        symbol: str,
+        price: float,
+        current_position: Dict,
+        total_portfolio_value: float,
+        asset_type: str = 'equity',
+        current_time: Optional[datetime] = None
+    ) -> Dict:
+        """
+        Compute which actions the active rules allow BEFORE a trade is proposed
+        
+        Mirrors validate_trade: any trade that respects these bounds passes it.
+        
+        Returns:
+            {
+                'buy': bool,
+                'sell': bool,
+                'max_buy_value': float | None (None = no rule limit),
+                'binding_limit': str | None (rule that sets max_buy_value),
+                'limits': List[str] (rules that bound buy size),
+                'blocked_reason': str | None (set when every action is blocked)
+            }
+        """
+        
+        self._maybe_reload()
+        c = self._constraints_for(asset_type, symbol)
+        bounds = {'buy': True, 'sell': True, 'max_buy_value': None, 'binding_limit': None, 'limits': [], 'blocked_reason': None}
+        
+        blocked_reason = c.block_reason or c.blackout_reason(current_time)
+        if blocked_reason:
+            bounds['buy'] = False
+            bounds['sell'] = False
+            bounds['blocked_reason'] = blocked_reason
+            return bounds
+        
+        def cap_buy(value: float, label: str):
+            if bounds['max_buy_value'] is None or value < bounds['max_buy_value']:
+                bounds['max_buy_value'] = max(value, 0.0)
+                bounds['binding_limit'] = label
+            bounds['limits'].append(label)
+        
+        if c.max_position_pct:
+            cap_buy(total_portfolio_value * c.max_position_pct, f"Rule '{c.max_position_rule}': max {c.max_position_pct*100}% per trade")
+        
+        if c.max_positions and _count_open_positions(current_position) >= c.max_positions:
+            bounds['buy'] = False
+            bounds['limits'].append(f"Rule '{c.max_positions_rule}': Already at max {c.max_positions} open positions")
+        
+        if c.min_cash_reserve_pct:
+            cap_buy(
+                current_position.get("CASH", 0) - total_portfolio_value * c.min_cash_reserve_pct,
+                f"Rule '{c.min_cash_rule}': keep {c.min_cash_reserve_pct*100}% cash reserve"
+            )
+        
+        return bounds
 
 
 def create_rule_enforcer(supabase: Client, model_id: int) -> RuleEnforcer:
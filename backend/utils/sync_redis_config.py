@@ -145,6 +145,58 @@ class SyncRedisConfig:
             print(f"  ⚠️  Redis config GET failed for key {key}: {e}")
             return None
     
+    def command(self, *args: Any) -> Any:
+        """
+        Run an arbitrary Redis command (e.g. command("SET", key, value, "NX", "PX", 5000))
+        
+        Returns:
+            Raw command result, or None on failure
+        """
+        if not self._client:
+            return None
+        
+        try:
+            response = self._client.post(self.base_url, json=[str(a) for a in args])
+            if response.status_code == 200:
+                return response.json().get("result")
+            return None
+        except Exception as e:
+            print(f"  ⚠️  Redis command {args[0] if args else ''} failed: {e}")
+            return None
+    
+    def incr(self, key: str) -> Optional[int]:
+        """
+        Atomically increment a counter (used for config version stamps)
+        
+        Returns:
+            New counter value or None on failure
+        """
+        if not self._client:
+            return None
+        
+        try:
+            url = f"{self.base_url}/incr/{key}"
+            response = self._client.post(url)
+            if response.status_code == 200:
+                return int(response.json().get("result"))
+            return None
+        except Exception as e:
+            print(f"  ⚠️  Redis config INCR failed for key {key}: {e}")
+            return None
+    
+    def get_raw(self, key: str) -> Optional[str]:
+        """GET without logging or JSON parsing (for frequent version checks)"""
+        if not self._client:
+            return None
+        
+        try:
+            response = self._client.get(f"{self.base_url}/get/{key}")
+            if response.status_code == 200:
+                return response.json().get("result")
+            return None
+        except Exception:
+            return None
+    
     def delete(self, key: str) -> bool:
         """Delete config key"""
         if not self._client:
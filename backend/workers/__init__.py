@@ -2,7 +2,16 @@
 Celery workers package
 """
 
-from .trading_tasks import run_intraday_trading, run_daily_backtest
+from .trading_tasks import run_intraday_trading, run_daily_backtest, worker_health, dispatch_runs
+from .sharded_tasks import run_intraday_shard, merge_intraday_shards, start_sharded_intraday
 
-__all__ = ['run_intraday_trading', 'run_daily_backtest']
+__all__ = [
+    'run_intraday_trading',
+    'run_daily_backtest',
+    'worker_health',
+    'dispatch_runs',
+    'run_intraday_shard',
+    'merge_intraday_shards',
+    'start_sharded_intraday',
+]
 
@@ -0,0 +1,480 @@
+"""
+Fair-Share Run Scheduler
+Admission layer in front of the Celery workers:
+- Per-user fair queuing (round-robin across users, per-user concurrency cap)
+- Per-LLM-provider concurrency cap + token bucket on run starts
+- Priority classes: interactive runs always dispatch before batch runs
+- Multi-slot jobs: a sharded run holds one slot per shard (capped at the
+  user / provider limit so it can still be admitted)
+- Queue position / ETA for /api/trading/task-status/{task_id}
+
+Jobs are dispatched with a pre-assigned Celery task_id, so the id returned
+at submit time is the task id the frontend already polls. State lives in
+one Redis document guarded by a short lock. Slots are released from the
+worker processes (celery_app signals), so the state must be shared: without
+Redis the scheduler is disabled (enabled=False) and runs go straight to
+Celery.
+
+If publishing an admitted job fails, the job is put back at the head of its
+user's queue (slots and start tokens returned) so the scheduler state never
+holds a "running" job that Celery has not received.
+"""
+
+import json
+import math
+import time
+import uuid
+from typing import Dict, Any, List, Optional
+
+from config import settings
+from trading.run_checkpoint import MAX_DELIVERIES
+from utils.sync_redis_config import sync_redis_config
+
+
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_BATCH = "batch"
+PRIORITIES = (PRIORITY_INTERACTIVE, PRIORITY_BATCH)
+
+# Celery message priority (redis transport: lower number = served first)
+CELERY_PRIORITY = {PRIORITY_INTERACTIVE: 0, PRIORITY_BATCH: 6}
+
+STATE_KEY = "sched:state"
+LOCK_KEY = "sched:lock"
+LOCK_TTL_MS = 5000
+LOCK_WAIT_SECONDS = 3.0
+DEFAULT_RUN_SECONDS = 600.0  # ETA seed until real durations are observed
+STALE_RUN_MARGIN_SECONDS = 600
+
+
+def provider_for_model(base_model: str) -> str:
+    """LLM provider from an OpenRouter model id ('openai/gpt-4o' -> 'openai')"""
+    if base_model and "/" in base_model:
+        return base_model.split("/", 1)[0].lower()
+    return "default"
+
+
+def stale_run_seconds() -> float:
+    """
+    Age after which a running job whose completion signal never arrived is reaped
+
+    A run can be delivered MAX_DELIVERIES times (soft-time-limit retries resume
+    from the checkpoint, worker-lost runs come back after the broker visibility
+    timeout), each lasting up to the Celery hard time limit.
+    """
+    from celery_app import celery_app
+
+    conf = celery_app.conf
+    per_delivery = max(
+        conf.task_time_limit or 0,
+        (conf.broker_transport_options or {}).get("visibility_timeout", 0)
+    )
+    return per_delivery * MAX_DELIVERIES + STALE_RUN_MARGIN_SECONDS
+
+
+class SchedulerUnavailable(RuntimeError):
+    """Scheduler state can't be locked (Redis busy or not configured)"""
+
+
+class RunScheduler:
+    """
+    Fair-share admission control for trading runs
+    """
+
+    def __init__(self):
+        try:
+            self._provider_overrides = json.loads(settings.SCHEDULER_PROVIDER_LIMITS or "{}")
+        except Exception:
+            print("⚠️  Invalid SCHEDULER_PROVIDER_LIMITS JSON - using defaults")
+            self._provider_overrides = {}
+
+    # ------------------------------------------------------------------
+    # State storage (Redis document + lock)
+    # ------------------------------------------------------------------
+
+    @property
+    def _redis(self):
+        return sync_redis_config if sync_redis_config and sync_redis_config._client else None
+
+    @property
+    def enabled(self) -> bool:
+        """SCHEDULER_ENABLED and a store shared by the API and the workers"""
+        return settings.SCHEDULER_ENABLED and self._redis is not None
+
+    def _acquire(self) -> str:
+        """
+        Take the state lock
+
+        Raises:
+            SchedulerUnavailable: No Redis, or the lock stayed busy for LOCK_WAIT_SECONDS
+        """
+        if not self._redis:
+            raise SchedulerUnavailable("Scheduler needs Redis (UPSTASH_REDIS_REST_URL/TOKEN)")
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + LOCK_WAIT_SECONDS
+        while time.monotonic() < deadline:
+            if self._redis.command("SET", LOCK_KEY, token, "NX", "PX", LOCK_TTL_MS) == "OK":
+                return token
+            time.sleep(0.05)
+        raise SchedulerUnavailable("Scheduler lock busy")
+
+    def _release(self, token: str) -> None:
+        if self._redis.command("GET", LOCK_KEY) == token:
+            self._redis.command("DEL", LOCK_KEY)
+
+    def _empty_state(self) -> Dict[str, Any]:
+        return {
+            "queues": {p: {} for p in PRIORITIES},  # priority -> user_id -> [job_id]
+            "ring": {p: [] for p in PRIORITIES},    # priority -> user round-robin order
+            "jobs": {},                             # job_id -> job (queued)
+            "running": {},                          # job_id -> {user_id, provider, started_at}
+            "buckets": {},                          # provider -> [tokens, updated_at]
+            "avg_run_seconds": DEFAULT_RUN_SECONDS,
+            "next_tick_at": 0
+        }
+
+    def _load(self) -> Dict[str, Any]:
+        if not self._redis:
+            return self._empty_state()
+        raw = self._redis.command("GET", STATE_KEY)
+        try:
+            return json.loads(raw) if raw else self._empty_state()
+        except Exception:
+            return self._empty_state()
+
+    def _save(self, state: Dict[str, Any]) -> None:
+        self._redis.command("SET", STATE_KEY, json.dumps(state))
+
+    # ------------------------------------------------------------------
+    # Limits
+    # ------------------------------------------------------------------
+
+    def _provider_limits(self, provider: str) -> Dict[str, float]:
+        limits = {
+            "concurrency": settings.SCHEDULER_PROVIDER_CONCURRENCY,
+            "rate_per_min": settings.SCHEDULER_PROVIDER_RATE_PER_MIN,
+            "burst": settings.SCHEDULER_PROVIDER_BURST
+        }
+        limits.update(self._provider_overrides.get(provider, {}))
+        return limits
+
+    def _refill(self, state: Dict[str, Any], provider: str, now: float) -> float:
+        """Refill and return the provider's available start tokens"""
+        limits = self._provider_limits(provider)
+        tokens, updated_at = state["buckets"].get(provider, [limits["burst"], now])
+        tokens = min(limits["burst"], tokens + (now - updated_at) * limits["rate_per_min"] / 60.0)
+        state["buckets"][provider] = [tokens, now]
+        return tokens
+
+    def _running_count(self, state: Dict[str, Any], field: str, value: str) -> int:
+        """Slots held by running jobs matching field == value"""
+        return sum(r.get("slots", 1) for r in state["running"].values() if r[field] == value)
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def submit(
+        self,
+        task_name: str,
+        kwargs: Dict[str, Any],
+        user_id: str,
+        base_model: str,
+        priority: str = PRIORITY_INTERACTIVE,
+        slots: int = 1
+    ) -> str:
+        """
+        Queue a run and dispatch whatever is admissible now
+
+        Args:
+            task_name: Registered Celery task name (e.g. 'workers.run_intraday_trading')
+            kwargs: Task kwargs (JSON serializable)
+            user_id: Owner (fair-share key)
+            base_model: AI model (provider rate-limit key)
+            priority: 'interactive' or 'batch'
+            slots: Concurrent runs the job occupies (shards of a sharded run)
+
+        Returns:
+            Job id (also the Celery task id once dispatched)
+
+        Raises:
+            SchedulerUnavailable: State lock couldn't be taken, or the job could
+                not be published to Celery (nothing queued)
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f"Invalid priority: {priority}. Must be 'interactive' or 'batch'")
+
+        job_id = str(uuid.uuid4())
+        job = {
+            "job_id": job_id,
+            "task_name": task_name,
+            "kwargs": kwargs,
+            "user_id": user_id,
+            "provider": provider_for_model(base_model),
+            "priority": priority,
+            "slots": max(1, int(slots)),
+            "enqueued_at": time.time()
+        }
+
+        token = self._acquire()
+        try:
+            state = self._load()
+            state["jobs"][job_id] = job
+            state["queues"][priority].setdefault(user_id, []).append(job_id)
+            if user_id not in state["ring"][priority]:
+                state["ring"][priority].append(user_id)
+            dispatched = self._dispatch(state)
+            self._save(state)
+        finally:
+            self._release(token)
+
+        self._send(dispatched, drop=job_id)
+        return job_id
+
+    def dispatch(self) -> int:
+        """Dispatch admissible queued jobs (called on completion and by the retry tick)"""
+        token = self._acquire()
+        try:
+            state = self._load()
+            dispatched = self._dispatch(state)
+            self._save(state)
+        finally:
+            self._release(token)
+
+        self._send(dispatched)
+        return len(dispatched)
+
+    def release(self, job_id: str, succeeded: bool = True) -> None:
+        """
+        Free the slots of a finished/revoked job and dispatch the next ones
+
+        Args:
+            job_id: Job / Celery task id
+            succeeded: Run completed - only completed runs update the ETA estimate
+        """
+        token = self._acquire()
+        try:
+            state = self._load()
+            running = state["running"].pop(job_id, None)
+            if running is None:
+                return
+            if succeeded:
+                duration = time.time() - running["started_at"]
+                state["avg_run_seconds"] = 0.8 * state["avg_run_seconds"] + 0.2 * duration
+            dispatched = self._dispatch(state)
+            self._save(state)
+        finally:
+            self._release(token)
+
+        self._send(dispatched)
+
+    def cancel(self, job_id: str) -> bool:
+        """Remove a job that has not been dispatched yet"""
+        token = self._acquire()
+        try:
+            state = self._load()
+            job = state["jobs"].pop(job_id, None)
+            if job is None:
+                return False
+            queue = state["queues"][job["priority"]].get(job["user_id"], [])
+            if job_id in queue:
+                queue.remove(job_id)
+            self._save(state)
+            return True
+        finally:
+            self._release(token)
+
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Scheduler view of a job
+
+        Returns:
+            {'state': 'queued', 'queue_position', 'eta_seconds', 'priority'} /
+            {'state': 'running', ...} / None if the scheduler does not know it
+        """
+        state = self._load()
+        if job_id in state["running"]:
+            return {"state": "running", **state["running"][job_id]}
+
+        job = state["jobs"].get(job_id)
+        if job is None:
+            return None
+
+        order = self._service_order(state)
+        position = order.index(job_id) + 1 if job_id in order else len(order)
+        capacity = max(1, self._provider_limits(job["provider"])["concurrency"])
+        waves = math.ceil(position / capacity)
+        return {
+            "state": "queued",
+            "priority": job["priority"],
+            "provider": job["provider"],
+            "queue_position": position,
+            "queued_total": len(order),
+            "eta_seconds": int(waves * state["avg_run_seconds"]),
+            "user_running": self._running_count(state, "user_id", job["user_id"])
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and running counts"""
+        state = self._load()
+        return {
+            "queued": {p: sum(len(q) for q in state["queues"][p].values()) for p in PRIORITIES},
+            "running": len(state["running"]),
+            "running_by_provider": {
+                p: self._running_count(state, "provider", p)
+                for p in {r["provider"] for r in state["running"].values()}
+            },
+            "avg_run_seconds": int(state["avg_run_seconds"])
+        }
+
+    # ------------------------------------------------------------------
+    # Core
+    # ------------------------------------------------------------------
+
+    def _service_order(self, state: Dict[str, Any]) -> List[str]:
+        """Job ids in the order fair-share would serve them (ignoring limits)"""
+        order = []
+        for priority in PRIORITIES:
+            queues = [list(state["queues"][priority].get(u, [])) for u in state["ring"][priority]]
+            while any(queues):
+                for q in queues:
+                    if q:
+                        order.append(q.pop(0))
+        return order
+
+    def _dispatch(self, state: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Pick admissible jobs (mutates state, returns jobs to send)"""
+        now = time.time()
+
+        # Reap runs whose completion signal never arrived (worker crash)
+        stale_after = stale_run_seconds() if state["running"] else 0
+        for job_id, running in list(state["running"].items()):
+            if now - running["started_at"] > stale_after:
+                state["running"].pop(job_id)
+
+        dispatched = []
+        wait_for_tokens = None
+
+        for priority in PRIORITIES:
+            progress = True
+            while progress:
+                progress = False
+                ring = state["ring"][priority]
+                for user_id in list(ring):
+                    queue = state["queues"][priority].get(user_id, [])
+                    if not queue:
+                        ring.remove(user_id)
+                        state["queues"][priority].pop(user_id, None)
+                        continue
+
+                    job = state["jobs"][queue[0]]
+                    provider = job["provider"]
+                    limits = self._provider_limits(provider)
+                    slots = job.get("slots", 1)
+
+                    user_limit = settings.SCHEDULER_MAX_RUNS_PER_USER
+                    if self._running_count(state, "user_id", user_id) + min(slots, user_limit) > user_limit:
+                        continue
+                    if self._running_count(state, "provider", provider) + min(slots, limits["concurrency"]) > limits["concurrency"]:
+                        continue
+                    needed = min(slots, limits["burst"])
+                    tokens = self._refill(state, provider, now)
+                    if tokens < needed:
+                        wait = (needed - tokens) * 60.0 / max(limits["rate_per_min"], 1e-6)
+                        wait_for_tokens = wait if wait_for_tokens is None else min(wait_for_tokens, wait)
+                        continue
+
+                    # Admit: consume tokens, mark running, rotate user to the back
+                    state["buckets"][provider][0] = tokens - needed
+                    queue.pop(0)
+                    state["jobs"].pop(job["job_id"])
+                    state["running"][job["job_id"]] = {
+                        "user_id": user_id,
+                        "provider": provider,
+                        "priority": priority,
+                        "slots": slots,
+                        "started_at": now
+                    }
+                    ring.remove(user_id)
+                    ring.append(user_id)
+                    dispatched.append(job)
+                    progress = True
+                    break  # Restart the pass from the new ring head
+
+        # Token-starved jobs need a wake-up even if nothing completes
+        if wait_for_tokens is not None and state["next_tick_at"] <= now:
+            state["next_tick_at"] = now + wait_for_tokens
+            dispatched.append({"tick_in": wait_for_tokens})
+
+        return dispatched
+
+    def _send(self, dispatched: List[Dict[str, Any]], drop: Optional[str] = None) -> None:
+        """
+        Publish admitted jobs to Celery (outside the lock)
+
+        Args:
+            dispatched: Jobs (and tick requests) returned by _dispatch
+            drop: Job id to discard instead of re-queueing if it can't be sent
+                (the submitter gets the error)
+
+        Raises:
+            SchedulerUnavailable: Publishing failed (unsent jobs were rolled back)
+        """
+        if not dispatched:
+            return
+
+        from celery_app import celery_app
+
+        for i, job in enumerate(dispatched):
+            try:
+                if "tick_in" in job:
+                    celery_app.send_task('workers.dispatch_runs', countdown=math.ceil(job["tick_in"]))
+                    continue
+                celery_app.send_task(
+                    job["task_name"],
+                    kwargs=job["kwargs"],
+                    task_id=job["job_id"],
+                    priority=CELERY_PRIORITY[job["priority"]]
+                )
+            except Exception as e:
+                print(f"❌ Scheduler: could not publish {job.get('task_name', 'dispatch tick')}: {e}")
+                self._rollback(dispatched[i:], drop)
+                raise SchedulerUnavailable(f"Could not publish run to Celery: {e}") from e
+            print(f"🚦 Scheduler: dispatched {job['task_name']} for user {job['user_id'][:8]} "
+                  f"({job['priority']}, {job['provider']})")
+
+    def _rollback(self, unsent: List[Dict[str, Any]], drop: Optional[str] = None) -> None:
+        """Undo admission of jobs that never reached Celery"""
+        try:
+            token = self._acquire()
+        except SchedulerUnavailable as e:
+            # Left as running: the stale-run reaper frees the slots eventually
+            print(f"⚠️  Scheduler rollback skipped ({len(unsent)} jobs): {e}")
+            return
+        try:
+            state = self._load()
+            for job in reversed(unsent):  # Reversed so each lands at the head in order
+                if "tick_in" in job:
+                    state["next_tick_at"] = 0
+                    continue
+                if state["running"].pop(job["job_id"], None) is None:
+                    continue
+
+                limits = self._provider_limits(job["provider"])
+                bucket = state["buckets"].get(job["provider"])
+                if bucket is not None:
+                    bucket[0] = min(limits["burst"], bucket[0] + min(job.get("slots", 1), limits["burst"]))
+
+                if job["job_id"] == drop:
+                    continue
+                priority, user_id = job["priority"], job["user_id"]
+                state["jobs"][job["job_id"]] = job
+                state["queues"][priority].setdefault(user_id, []).insert(0, job["job_id"])
+                if user_id not in state["ring"][priority]:
+                    state["ring"][priority].insert(0, user_id)
+            self._save(state)
+        finally:
+            self._release(token)
+
+
+# Global instance (one per process)
+run_scheduler = RunScheduler()
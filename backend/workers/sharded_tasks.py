@@ -0,0 +1,311 @@
+"""
+Sharded intraday backtests
+Splits one logical run into shards executed as a Celery chord:
+- by symbol: one shard per basket symbol, cash split evenly. Each shard
+  trades its own sleeve with its own RuleEnforcer / RiskGates, so position
+  and cash limits apply per sleeve (and the 25% drawdown breaker per
+  sleeve). Limits that only mean something across the whole portfolio
+  (max open positions rules, max_daily_loss_dollars) can't be enforced
+  that way: portfolio_wide_limits() finds them and such models are refused
+  symbol sharding instead of silently getting N times the limit.
+- by time window: contiguous session windows, each starting and ending flat
+
+A reducer merges shard results into the single trading_runs row. Reasoning
+and positions already land on the shared run_id as each shard writes them.
+
+Sharded runs go through the fair-share scheduler as one job holding a slot
+per shard: run_sharded_intraday is dispatched with the job id and queues
+the chord with the reducer under that same id, so the id the client polls
+is the reducer and the scheduler frees the slots when the reducer finishes.
+
+Each shard checkpoints under checkpoint_id(run_id, symbol, window) and keeps
+its result there until the reducer completes the run, so a paused or
+interrupted sharded run is resumed by queuing the same shards again
+(finished shards return their recorded result).
+"""
+
+from typing import Dict, Any, List, Optional
+
+from celery import chord, group
+from celery.exceptions import SoftTimeLimitExceeded
+
+from celery_app import celery_app
+from services import get_model_by_id, complete_trading_run
+from trading.intraday_agent import run_intraday_session, split_session_windows
+from trading.run_checkpoint import (
+    MAX_DELIVERIES, checkpoint_id, clear_checkpoint, record_delivery, clear_deliveries
+)
+from workers.warm_pool import task_loop, prepare_agent, release_loop, abandon_loop
+
+
+SHARD_BY_SYMBOL = "symbol"
+SHARD_BY_TIME = "time"
+
+
+@celery_app.task(bind=True, name='workers.run_intraday_shard', acks_late=True, reject_on_worker_lost=True)
+def run_intraday_shard(
+    self,
+    model_id: int,
+    user_id: str,
+    symbol: str,
+    date: str,
+    session: str,
+    base_model: str,
+    run_id: int,
+    shard_index: int,
+    shard_count: int,
+    minute_window: Optional[List[str]] = None,
+    starting_cash: Optional[float] = None,
+    flatten_at_window_end: bool = False
+) -> Dict[str, Any]:
+    """
+    Run one shard of a sharded intraday run
+
+    Returns:
+        Shard summary (never raises - failures are reported to the reducer)
+    """
+    shard = {'shard_index': shard_index, 'symbol': symbol, 'minute_window': minute_window}
+
+    loop = None
+    try:
+        self.update_state(
+            state='PROGRESS',
+            meta={
+                'status': f'Shard {shard_index + 1}/{shard_count} starting ({symbol})',
+                'run_id': run_id,
+                'shard_index': shard_index
+            }
+        )
+
+        loop = task_loop()
+        if loop.run_until_complete(record_delivery(self.request.id)) > MAX_DELIVERIES:
+            return {**shard, 'status': 'error', 'error': f'Gave up after {MAX_DELIVERIES} attempts (worker lost or time limit)'}
+
+        model = loop.run_until_complete(get_model_by_id(model_id, user_id))
+        if not model:
+            return {**shard, 'status': 'error', 'error': 'Model not found or access denied'}
+
+        agent = prepare_agent(loop, model, base_model, symbol, max_steps=10)
+
+        result = loop.run_until_complete(run_intraday_session(
+            agent=agent,
+            model_id=model_id,
+            user_id=user_id,
+            symbol=symbol,
+            date=date,
+            session=session,
+            run_id=run_id,
+            celery_task=self,
+            minute_window=tuple(minute_window) if minute_window else None,
+            flatten_at_window_end=flatten_at_window_end,
+            starting_cash=starting_cash
+        ))
+
+        loop.run_until_complete(clear_deliveries(self.request.id))
+        release_loop(loop)
+        return {**shard, **result}
+
+    except SoftTimeLimitExceeded as e:
+        # Out of time: progress is checkpointed, continue in a fresh execution
+        print(f"⏱️  Shard {shard_index + 1}/{shard_count}: soft time limit reached - requeueing from its checkpoint")
+        abandon_loop(loop)
+        raise self.retry(exc=e, countdown=5, max_retries=MAX_DELIVERIES)
+
+    except Exception as e:
+        print(f"❌ Shard {shard_index + 1}/{shard_count} failed: {e}")
+        return {**shard, 'status': 'error', 'error': str(e)}
+
+
+@celery_app.task(bind=True, name='workers.merge_intraday_shards')
+def merge_intraday_shards(
+    self,
+    shard_results: List[Dict[str, Any]],
+    run_id: int,
+    initial_cash: float,
+    shard_by: str
+) -> Dict[str, Any]:
+    """
+    Reduce shard results into the run's final metrics
+
+    Symbol shards: portfolio value is the sum of shard values.
+    Time shards: each window starts from the full initial cash and ends flat,
+    so final value is initial cash plus the sum of window P&L.
+    Paused shards leave the run open (resume re-queues the shards).
+    """
+    cancelled = [r for r in shard_results if r.get('status') == 'cancelled']
+    if cancelled:
+        print(f"⏸️  {len(cancelled)}/{len(shard_results)} shards of run {run_id} paused - run left open for resume")
+        return {
+            'status': 'cancelled',
+            'run_id': run_id,
+            'shard_by': shard_by,
+            'reason': cancelled[0].get('reason', 'stop'),
+            'shards': len(shard_results)
+        }
+
+    completed = [r for r in shard_results if r.get('status') == 'completed']
+    failed = [r for r in shard_results if r.get('status') != 'completed']
+
+    if shard_by == SHARD_BY_TIME:
+        final_value = initial_cash + sum(
+            r.get('total_portfolio_value', 0) - r.get('initial_cash', initial_cash) for r in completed
+        )
+    else:
+        # Failed symbol shards keep their cash allocation untouched
+        final_value = sum(r.get('total_portfolio_value', 0) for r in completed)
+        final_value += initial_cash / max(len(shard_results), 1) * len(failed)
+
+    final_return = ((final_value - initial_cash) / initial_cash) if initial_cash > 0 else 0.0
+    max_drawdown = max(0, (initial_cash - final_value) / initial_cash) if initial_cash > 0 else 0.0
+
+    merged_position: Dict[str, float] = {}
+    if shard_by != SHARD_BY_TIME:
+        for r in completed:
+            for key, value in (r.get('final_position') or {}).items():
+                merged_position[key] = merged_position.get(key, 0) + value
+    elif completed:
+        merged_position = {"CASH": final_value}
+
+    metrics = {
+        "total_trades": sum(r.get('trades_executed', 0) for r in completed),
+        "final_portfolio_value": final_value,
+        "final_return": final_return,
+        "max_drawdown": max_drawdown
+    }
+
+    loop = task_loop()
+    loop.run_until_complete(complete_trading_run(run_id, metrics))
+    for r in shard_results:
+        loop.run_until_complete(clear_checkpoint(checkpoint_id(run_id, r.get('symbol'), r.get('minute_window'))))
+    release_loop(loop)
+
+    print(f"✅ Merged {len(completed)}/{len(shard_results)} shards for run {run_id}")
+
+    return {
+        'status': 'completed' if not failed else 'partial',
+        'run_id': run_id,
+        'shard_by': shard_by,
+        'shards': len(shard_results),
+        'failed_shards': [{'shard_index': r.get('shard_index'), 'error': r.get('error')} for r in failed],
+        'final_position': merged_position,
+        'minutes_processed': sum(r.get('minutes_processed', 0) for r in completed),
+        'llm_calls_skipped': sum(r.get('llm_calls_skipped', 0) for r in completed),
+        'trades_executed': metrics['total_trades'],
+        'total_portfolio_value': final_value,
+        'final_return': final_return
+    }
+
+
+def shard_checkpoint_ids(
+    run_id: int,
+    symbols: List[str],
+    date: str,
+    session: str,
+    shard_by: str,
+    shard_count: int
+) -> List[str]:
+    """Checkpoint ids of a sharded run's loops (same split as start_sharded_intraday)"""
+    if shard_by == SHARD_BY_TIME:
+        return [checkpoint_id(run_id, symbols[0], window) for window in split_session_windows(date, session, shard_count)]
+    return [checkpoint_id(run_id, symbol) for symbol in symbols]
+
+
+def start_sharded_intraday(
+    model_id: int,
+    user_id: str,
+    symbols: List[str],
+    date: str,
+    session: str,
+    base_model: str,
+    run_id: int,
+    initial_cash: float,
+    shard_by: str = SHARD_BY_SYMBOL,
+    shard_count: int = 4,
+    merge_task_id: Optional[str] = None
+):
+    """
+    Queue a sharded intraday run as a chord (shards -> merge_intraday_shards)
+
+    Args:
+        symbols: Basket (symbol sharding) or a single symbol (time sharding)
+        shard_by: 'symbol' or 'time'
+        shard_count: Number of time windows (time sharding only)
+        merge_task_id: Task id for the reducer (the scheduler job id)
+
+    Returns:
+        AsyncResult of the reducer task
+    """
+    common = dict(model_id=model_id, user_id=user_id, date=date, session=session,
+                  base_model=base_model, run_id=run_id)
+
+    if shard_by == SHARD_BY_TIME:
+        windows = split_session_windows(date, session, shard_count)
+        shards = [
+            run_intraday_shard.s(
+                symbol=symbols[0], shard_index=i, shard_count=len(windows),
+                minute_window=list(window), starting_cash=initial_cash,
+                flatten_at_window_end=True, **common
+            )
+            for i, window in enumerate(windows)
+        ]
+    elif shard_by == SHARD_BY_SYMBOL:
+        per_symbol_cash = initial_cash / len(symbols)
+        shards = [
+            run_intraday_shard.s(
+                symbol=symbol, shard_index=i, shard_count=len(symbols),
+                starting_cash=per_symbol_cash, **common
+            )
+            for i, symbol in enumerate(symbols)
+        ]
+    else:
+        raise ValueError(f"Invalid shard_by: {shard_by}. Must be 'symbol' or 'time'")
+
+    reducer = merge_intraday_shards.s(run_id=run_id, initial_cash=initial_cash, shard_by=shard_by)
+    if merge_task_id:
+        reducer = reducer.set(task_id=merge_task_id)
+
+    print(f"🧩 Queuing {len(shards)} {shard_by} shards for run {run_id}")
+    return chord(group(shards))(reducer)
+
+
+def portfolio_wide_limits(model: Dict[str, Any], supabase) -> List[str]:
+    """
+    Limits of a model that symbol shards would each enforce on their own
+    sleeve (loosening them N times)
+
+    Returns:
+        Human-readable names; empty when the model can be sharded by symbol
+    """
+    limits = []
+    if (model.get("model_parameters") or {}).get("max_daily_loss_dollars"):
+        limits.append("max daily loss (max_daily_loss_dollars)")
+
+    rules = supabase.table("model_rules")\
+        .select("rule_name, rule_category, enforcement_params")\
+        .eq("model_id", model["id"])\
+        .eq("is_active", True)\
+        .execute().data or []
+    for rule in rules:
+        if rule.get("rule_category") == "risk" and (rule.get("enforcement_params") or {}).get("max_positions"):
+            limits.append(f"rule '{rule['rule_name']}' (max open positions)")
+    return limits
+
+
+def shard_slots(symbols: List[str], shard_by: str, shard_count: int) -> int:
+    """Scheduler slots a sharded run occupies (one per shard)"""
+    return shard_count if shard_by == SHARD_BY_TIME else len(symbols)
+
+
+# No result of its own: the reducer reports under the same task id
+@celery_app.task(bind=True, name='workers.run_sharded_intraday', ignore_result=True)
+def run_sharded_intraday(self, **kwargs) -> Dict[str, Any]:
+    """
+    Scheduler entry point for sharded runs: queue the chord with the reducer
+    under this task's id (kwargs as start_sharded_intraday)
+
+    Returns:
+        {'status': 'sharded'} - the scheduler keeps the job's slots until the
+        reducer with the same id finishes
+    """
+    start_sharded_intraday(merge_task_id=self.request.id, **kwargs)
+    return {'status': 'sharded', 'run_id': kwargs.get('run_id')}
@@ -5,16 +5,27 @@ Celery tasks for trading operations
 import asyncio
 from typing import Dict, Any
 
+from celery.exceptions import SoftTimeLimitExceeded
+
 # Import celery_app at module level (after celery_app.py has initialized)
 from celery_app import celery_app
+from config import settings
 
 # Import services
-from services import TradingService, get_supabase, get_model_by_id, create_trading_run, complete_trading_run
+from services import get_model_by_id, create_trading_run, complete_trading_run, fail_trading_run
 from trading.intraday_agent import run_intraday_session
-from trading.base_agent import BaseAgent
+from trading.run_checkpoint import (
+    MAX_DELIVERIES, checkpoint_id, clear_checkpoint, record_delivery, clear_deliveries
+)
+from workers.warm_pool import task_loop, prepare_agent, release_loop, abandon_loop
+from workers import warm_pool
 
 
-@celery_app.task(bind=True, name='workers.run_intraday_trading')
+# acks_late + reject_on_worker_lost: a run lost to a worker crash/restart is
+# redelivered and resumes from its last checkpoint instead of restarting.
+# The soft time limit requeues the task the same way; both count towards
+# MAX_DELIVERIES, after which the run is failed.
+@celery_app.task(bind=True, name='workers.run_intraday_trading', acks_late=True, reject_on_worker_lost=True)
 def run_intraday_trading(
     self,
     model_id: int,
@@ -41,6 +52,7 @@ def run_intraday_trading(
         Dict with results or error
     """
     
+    loop = None
     try:
         # Update state: STARTED
         self.update_state(
@@ -56,8 +68,14 @@ def run_intraday_trading(
         )
         
         # Get model from database
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
+        loop = task_loop()
+        
+        deliveries = loop.run_until_complete(record_delivery(self.request.id))
+        if deliveries > MAX_DELIVERIES:
+            error = f"Gave up after {MAX_DELIVERIES} attempts (worker lost or time limit)"
+            if run_id:
+                loop.run_until_complete(fail_trading_run(run_id, error))
+            return {'status': 'error', 'error': error}
         
         model = loop.run_until_complete(get_model_by_id(model_id, user_id))
         
@@ -105,32 +123,6 @@ def run_intraday_trading(
             }
         )
         
-        # Create TradingService
-        supabase = get_supabase()
-        trading_service = TradingService(supabase)
-        
-        # Create agent with FULL configuration
-        agent = BaseAgent(
-            signature=model["signature"],
-            basemodel=base_model,
-            stock_symbols=[symbol],
-            max_steps=10,
-            initial_cash=model.get("initial_cash", 10000.0),
-            model_id=model_id,
-            custom_rules=model.get("custom_rules"),
-            custom_instructions=model.get("custom_instructions"),
-            model_parameters=model.get("model_parameters"),
-            trading_service=trading_service,
-            # NEW CONFIGURATION PARAMETERS:
-            trading_style=model.get("trading_style", "day-trading"),
-            instrument=model.get("instrument", "stocks"),
-            allow_shorting=model.get("allow_shorting", False),
-            allow_options_strategies=model.get("allow_options_strategies", False),
-            allow_hedging=model.get("allow_hedging", False),
-            allowed_order_types=model.get("allowed_order_types", ["market", "limit"]),
-            margin_account=model.get("margin_account", False)
-        )
-        
         # Update state: Initializing agent
         self.update_state(
             state='PROGRESS',
@@ -143,8 +135,8 @@ def run_intraday_trading(
             }
         )
         
-        # Initialize agent
-        loop.run_until_complete(agent.initialize())
+        # Initialize agent (reused across tasks in warm mode)
+        agent = prepare_agent(loop, model, base_model, symbol, max_steps=10)
         
         # Update state: Trading started
         self.update_state(
@@ -170,6 +162,17 @@ def run_intraday_trading(
             celery_task=self  # Pass task for progress updates
         ))
         
+        # Cancelled at a minute boundary: run row was already stopped/deleted by the API
+        if result.get("status") == "cancelled":
+            print(f"⏸️  Celery Task: Run #{run_number} {result.get('reason')} at minute {result.get('resume_minute_index')}")
+            loop.run_until_complete(clear_deliveries(self.request.id))
+            release_loop(loop)
+            return {
+                'run_id': run_id,
+                'run_number': run_number,
+                **result
+            }
+        
         # Complete run with metrics
         initial_value = model.get("initial_cash", 10000.0)
         final_total_value = result.get("total_portfolio_value", result.get("final_position", {}).get("CASH", initial_value))
@@ -185,7 +188,9 @@ def run_intraday_trading(
         
         print(f"✅ Celery Task: Run #{run_number} completed")
         
-        loop.close()
+        loop.run_until_complete(clear_checkpoint(checkpoint_id(run_id, symbol)))
+        loop.run_until_complete(clear_deliveries(self.request.id))
+        release_loop(loop)
         
         return {
             'status': 'completed',
@@ -194,6 +199,12 @@ def run_intraday_trading(
             **result
         }
         
+    except SoftTimeLimitExceeded as e:
+        # Out of time: progress is checkpointed, continue in a fresh execution
+        print(f"⏱️  Celery Task: soft time limit reached - requeueing run {run_id} from its checkpoint")
+        abandon_loop(loop)
+        raise self.retry(exc=e, countdown=5, max_retries=MAX_DELIVERIES)
+        
     except Exception as e:
         print(f"❌ Celery Task Error: {e}")
         
@@ -240,8 +251,7 @@ def run_daily_backtest(
             }
         )
         
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
+        loop = task_loop()
         
         model = loop.run_until_complete(get_model_by_id(model_id, user_id))
         
@@ -270,34 +280,6 @@ def run_daily_backtest(
         
         print(f"🚀 Celery Task: Daily Backtest Run #{run_number} ({symbol}: {start_date} to {end_date})")
         
-        supabase = get_supabase()
-        trading_service = TradingService(supabase)
-        
-        # Create agent with FULL configuration
-        agent = BaseAgent(
-            signature=model["signature"],
-            basemodel=base_model,
-            stock_symbols=[symbol],
-            max_steps=30,
-            initial_cash=model.get("initial_cash", 10000.0),
-            model_id=model_id,
-            custom_rules=model.get("custom_rules"),
-            custom_instructions=model.get("custom_instructions"),
-            model_parameters=model.get("model_parameters"),
-            trading_service=trading_service,
-            # NEW CONFIGURATION PARAMETERS:
-            trading_style=model.get("trading_style", "day-trading"),
-            instrument=model.get("instrument", "stocks"),
-            allow_shorting=model.get("allow_shorting", False),
-            allow_options_strategies=model.get("allow_options_strategies", False),
-            allow_hedging=model.get("allow_hedging", False),
-            allowed_order_types=model.get("allowed_order_types", ["market", "limit"]),
-            margin_account=model.get("margin_account", False)
-        )
-        
-        # Set run_id so trades link
-        agent._current_run_id = run_id
-        
         self.update_state(
             state='PROGRESS',
             meta={
@@ -308,7 +290,11 @@ def run_daily_backtest(
             }
         )
         
-        loop.run_until_complete(agent.initialize())
+        # Initialize agent (reused across tasks in warm mode)
+        agent = prepare_agent(loop, model, base_model, symbol, max_steps=30)
+        
+        # Set run_id so trades link
+        agent._current_run_id = run_id
         
         self.update_state(
             state='PROGRESS',
@@ -319,8 +305,18 @@ def run_daily_backtest(
             }
         )
         
-        # Fetch daily bars from Polygon
-        from daily_loader import fetch_daily_bars_polygon
+        # Ingest daily bars for the run's symbol (only ranges not yet in the local
+        # price index; from the prior trading day for yesterday's prices). The
+        # full Nasdaq-100 is preloaded by workers.ingest_daily_universe unless
+        # DAILY_INGEST_UNIVERSE_ON_BACKTEST opts into doing it per run.
+        from daily_loader import ingest_daily_universe, fetch_daily_bars_polygon
+        from utils.market_calendar import previous_trading_day
+        from utils.price_tools import all_nasdaq_100_symbols
+        
+        universe = [symbol]
+        if settings.DAILY_INGEST_UNIVERSE_ON_BACKTEST:
+            universe = sorted(set(all_nasdaq_100_symbols) | {symbol})
+        loop.run_until_complete(ingest_daily_universe(previous_trading_day(start_date), end_date, universe))
         
         bars = loop.run_until_complete(fetch_daily_bars_polygon(symbol, start_date, end_date))
         
@@ -348,7 +344,7 @@ def run_daily_backtest(
         
         print(f"✅ Celery Task: Daily Backtest Run #{run_number} completed")
         
-        loop.close()
+        release_loop(loop)
         
         return {
             'status': 'completed',
@@ -366,3 +362,44 @@ def run_daily_backtest(
         
         return {'status': 'error', 'error': str(e)}
 
+
+
+@celery_app.task(name='workers.ingest_daily_universe')
+def ingest_daily_universe_task(start_date: str, end_date: str, symbols: list = None) -> Dict[str, int]:
+    """Preload daily bars for a symbol universe (defaults to Nasdaq-100), gaps only"""
+    from daily_loader import ingest_daily_universe
+    
+    loop = task_loop()
+    stats = loop.run_until_complete(ingest_daily_universe(start_date, end_date, symbols))
+    release_loop(loop)
+    return stats
+
+
+@celery_app.task(name='workers.archive_completed_runs')
+def archive_completed_runs_task(older_than_days: int = None, limit: int = None) -> Dict[str, Any]:
+    """Move old completed runs' positions/reasoning to the run archive"""
+    from services.archive_service import archive_completed_runs
+    return archive_completed_runs(older_than_days, limit)
+
+
+@celery_app.task(name='workers.worker_health')
+def worker_health() -> Dict[str, Any]:
+    """Report warm-worker health and cache statistics for this worker process"""
+    return warm_pool.stats()
+
+
+@celery_app.task(name='workers.dispatch_runs')
+def dispatch_runs() -> int:
+    """Scheduler wake-up: dispatch runs that were waiting on provider rate limits"""
+    from workers.scheduler import run_scheduler
+    return run_scheduler.dispatch()
+
+
+@celery_app.task(bind=True, name='workers.release_run', max_retries=20, default_retry_delay=2)
+def release_run(self, job_id: str, succeeded: bool = False) -> None:
+    """Scheduler slot release that couldn't take the state lock in the signal handler"""
+    from workers.scheduler import run_scheduler, SchedulerUnavailable
+    try:
+        run_scheduler.release(job_id, succeeded=succeeded)
+    except SchedulerUnavailable as e:
+        raise self.retry(exc=e)
@@ -0,0 +1,283 @@
+"""
+Warm Worker Pool - Per-Process State for Long-Lived Celery Workers
+
+Each worker child process keeps:
+- One persistent asyncio event loop (pooled async clients like redis_client
+  stay bound to a live loop instead of dying with a per-task loop)
+- One Supabase client and one TradingService
+- Initialized BaseAgents keyed by model configuration
+- MCP tool lists keyed by MCP config (no reconnect/tool discovery per task)
+
+Enabled by settings.CELERY_WARM_WORKERS. Cold mode keeps the original
+per-task loop + fresh agent behaviour.
+"""
+
+import json
+import time
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import settings
+from trading.base_agent import BaseAgent
+
+
+MAX_WARM_AGENTS = 16  # Initialized agents kept per worker process
+MCP_RETRY_INTERVAL = 60.0  # Seconds before retrying a failed MCP tool load
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_supabase = None
+_trading_service = None
+_agents: "OrderedDict[str, BaseAgent]" = OrderedDict()
+_mcp_tools: Dict[str, Tuple[List, float]] = {}
+_lock = threading.Lock()
+
+_stats = {"agent_hits": 0, "agent_misses": 0, "mcp_loads": 0}
+health: Dict[str, Any] = {"status": "cold", "checked_at": None, "checks": {}}
+
+
+def get_worker_loop() -> asyncio.AbstractEventLoop:
+    """Persistent event loop for this worker process"""
+    global _loop
+    if _loop is None or _loop.is_closed():
+        _loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(_loop)
+    return _loop
+
+
+def get_worker_supabase():
+    """Supabase client shared by all tasks in this worker process"""
+    global _supabase
+    if _supabase is None:
+        from services import get_supabase
+        _supabase = get_supabase()
+    return _supabase
+
+
+def get_worker_trading_service():
+    """TradingService shared by all tasks (keeps ledgers and price cache warm)"""
+    global _trading_service
+    if _trading_service is None:
+        from services import TradingService
+        _trading_service = TradingService(get_worker_supabase())
+    return _trading_service
+
+
+def create_agent_for_model(
+    model: Dict[str, Any],
+    base_model: str,
+    stock_symbols: List[str],
+    max_steps: int,
+    trading_service: Any
+) -> BaseAgent:
+    """
+    Build a BaseAgent with the model's full configuration (not initialized)
+
+    Args:
+        model: Model row from the database
+        base_model: AI model to use
+        stock_symbols: Symbols to trade
+        max_steps: Maximum reasoning steps
+        trading_service: TradingService for trade execution
+
+    Returns:
+        BaseAgent instance
+    """
+    return BaseAgent(
+        signature=model["signature"],
+        basemodel=base_model,
+        stock_symbols=stock_symbols,
+        max_steps=max_steps,
+        initial_cash=model.get("initial_cash", 10000.0),
+        model_id=model["id"],
+        custom_rules=model.get("custom_rules"),
+        custom_instructions=model.get("custom_instructions"),
+        model_parameters=model.get("model_parameters"),
+        trading_service=trading_service,
+        # NEW CONFIGURATION PARAMETERS:
+        trading_style=model.get("trading_style", "day-trading"),
+        instrument=model.get("instrument", "stocks"),
+        allow_shorting=model.get("allow_shorting", False),
+        allow_options_strategies=model.get("allow_options_strategies", False),
+        allow_hedging=model.get("allow_hedging", False),
+        allowed_order_types=model.get("allowed_order_types", ["market", "limit"]),
+        margin_account=model.get("margin_account", False)
+    )
+
+
+def agent_config_key(model: Dict[str, Any], base_model: str, stock_symbols: List[str], max_steps: int) -> str:
+    """Cache key covering every model field that shapes an initialized agent"""
+    fields = (
+        "id", "signature", "initial_cash", "custom_rules", "custom_instructions",
+        "model_parameters", "trading_style", "instrument", "allow_shorting",
+        "allow_options_strategies", "allow_hedging", "allowed_order_types", "margin_account"
+    )
+    config = {field: model.get(field) for field in fields}
+    config.update(base_model=base_model, stock_symbols=list(stock_symbols), max_steps=max_steps)
+    return json.dumps(config, sort_keys=True, default=str)
+
+
+async def _get_mcp_tools(mcp_config: Dict[str, Any]) -> List:
+    """MCP tools for a config, loaded once per worker (failures retried after MCP_RETRY_INTERVAL)"""
+    key = json.dumps(mcp_config, sort_keys=True, default=str)
+    cached = _mcp_tools.get(key)
+    if cached and (cached[0] or time.monotonic() - cached[1] < MCP_RETRY_INTERVAL):
+        return cached[0]
+
+    from langchain_mcp_adapters.client import MultiServerMCPClient
+
+    _stats["mcp_loads"] += 1
+    try:
+        client = MultiServerMCPClient(mcp_config)
+        tools = await client.get_tools()
+        print(f"  ✅ Warm worker: loaded {len(tools)} MCP tools")
+    except Exception as e:
+        print(f"  ⚠️  Warm worker: MCP tools unavailable ({e}), continuing without them")
+        tools = []
+
+    _mcp_tools[key] = (tools, time.monotonic())
+    return tools
+
+
+async def get_warm_agent(
+    model: Dict[str, Any],
+    base_model: str,
+    stock_symbols: List[str],
+    max_steps: int,
+    trading_service: Any
+) -> BaseAgent:
+    """
+    Get an initialized agent for this model configuration, building it once
+
+    Reused agents get their per-run state reset; callers set
+    `_current_run_id` for the new run as before.
+    """
+    key = agent_config_key(model, base_model, stock_symbols, max_steps)
+
+    with _lock:
+        agent = _agents.get(key)
+        if agent is not None:
+            _agents.move_to_end(key)
+            _stats["agent_hits"] += 1
+
+    if agent is not None:
+        agent.trading_service = trading_service
+        agent._current_run_id = None
+        agent._current_date = None
+        print(f"♻️  Warm worker: reusing initialized agent for {model['signature']}")
+        return agent
+
+    _stats["agent_misses"] += 1
+    agent = create_agent_for_model(model, base_model, stock_symbols, max_steps, trading_service)
+    mcp_tools = await _get_mcp_tools(agent.mcp_config) if agent.mcp_config else []
+    await agent.initialize(mcp_tools=mcp_tools)
+
+    with _lock:
+        _agents[key] = agent
+        while len(_agents) > MAX_WARM_AGENTS:
+            _agents.popitem(last=False)
+    return agent
+
+
+def task_loop() -> asyncio.AbstractEventLoop:
+    """Persistent loop in warm mode, fresh loop per task otherwise"""
+    if settings.CELERY_WARM_WORKERS:
+        return get_worker_loop()
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    return loop
+
+
+def prepare_agent(loop, model: Dict[str, Any], base_model: str, symbol: str, max_steps: int):
+    """Initialized agent for a task (cached per worker in warm mode)"""
+    if settings.CELERY_WARM_WORKERS:
+        return loop.run_until_complete(get_warm_agent(
+            model, base_model, [symbol], max_steps, get_worker_trading_service()
+        ))
+
+    from services import TradingService, get_supabase
+
+    trading_service = TradingService(get_supabase())
+    agent = create_agent_for_model(model, base_model, [symbol], max_steps, trading_service)
+    loop.run_until_complete(agent.initialize())
+    return agent
+
+
+def release_loop(loop) -> None:
+    """Close per-task loops (the warm loop lives as long as the worker)"""
+    if not settings.CELERY_WARM_WORKERS:
+        loop.close()
+
+
+def abandon_loop(loop) -> None:
+    """
+    Cancel and drain whatever an interrupted task left pending on its loop
+
+    A soft time limit raises out of run_until_complete with the session
+    coroutine still scheduled; on the warm loop the next delivery would
+    otherwise resume it next to the new session (duplicate trades).
+    """
+    if loop is None or loop.is_closed():
+        return
+    pending = [task for task in asyncio.all_tasks(loop) if not task.done()]
+    for task in pending:
+        task.cancel()
+    if pending:
+        loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+        print(f"  🧹 Cancelled {len(pending)} pending task(s) left by the interrupted run")
+    release_loop(loop)
+
+
+def warm_worker_startup() -> Dict[str, Any]:
+    """
+    Warm up and health-check this worker process (run on worker_process_init)
+
+    Creates the persistent loop and shared clients, preloads MCP tools and
+    verifies Redis and Supabase connectivity.
+
+    Returns:
+        Health dict (also kept in warm_pool.health)
+    """
+    loop = get_worker_loop()
+    checks: Dict[str, Any] = {}
+
+    try:
+        from utils.redis_client import redis_client
+        checks["redis"] = loop.run_until_complete(redis_client.ping())
+    except Exception as e:
+        checks["redis"] = f"error: {e}"
+
+    try:
+        get_worker_supabase().table("models").select("id").limit(1).execute()
+        get_worker_trading_service()
+        checks["supabase"] = True
+    except Exception as e:
+        checks["supabase"] = f"error: {e}"
+
+    try:
+        tools = loop.run_until_complete(_get_mcp_tools(BaseAgent._get_default_mcp_config()))
+        checks["mcp_tools"] = len(tools)
+    except Exception as e:
+        checks["mcp_tools"] = f"error: {e}"
+
+    healthy = checks.get("redis") is True and checks.get("supabase") is True
+    health.update(
+        status="warm" if healthy else "degraded",
+        checked_at=time.time(),
+        checks=checks
+    )
+    print(f"🔥 Warm worker ready ({health['status']}): {checks}")
+    return health
+
+
+def stats() -> Dict[str, Any]:
+    """Warm pool statistics for health reporting"""
+    return {
+        "enabled": settings.CELERY_WARM_WORKERS,
+        "health": health,
+        "warm_agents": len(_agents),
+        "mcp_configs": len(_mcp_tools),
+        "trading_service_cache": _trading_service.cache_sizes() if _trading_service else None,
+        **_stats
+    }